@@ -0,0 +1,294 @@
+"""
+Busca textual de produtos, lojas e produtos monitorados.
+
+Índice invertido próprio em duas tabelas (`DocumentoBusca` e `TermoBusca`), o
+que funciona igual no MySQL e no SQLite dos testes e permite tokenização em
+português sem acento: "Câmeras" e "camera" viram o mesmo termo. Cada documento
+guarda os termos dos campos indexados com pesos (nome pesa mais que descrição);
+a consulta lê só as linhas dos termos pedidos pelo índice `(termo, documento,
+peso)`, então o custo depende de quantos documentos têm aqueles termos e não do
+tamanho do catálogo.
+
+Ranking: primeiro os documentos que têm mais termos da consulta; entre eles, a
+soma de peso x IDF (termos raros valem mais). O último termo casa por prefixo,
+para a busca funcionar enquanto o usuário digita: com pelo menos
+`TAMANHO_MINIMO_PREFIXO` letras, ele é expandido para no máximo
+`MAX_TERMOS_PREFIXO` termos do índice (em ordem alfabética); abaixo disso,
+casa só o termo exato. Assim um prefixo curto ("c") não lê a fatia do índice
+de todos os termos que começam com ele.
+
+O índice é atualizado pelos sinais em `api.signals` (e pelo `ResultSink` nas
+gravações em lote); `manage.py reindexar_busca` reconstrói tudo.
+"""
+import logging
+import math
+import re
+import unicodedata
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+
+from .models import DocumentoBusca, TermoBusca, Produto, SKU, Vendedor
+
+BUSCA_DEFAULTS = {
+    'LIMITE_RESULTADOS': 20,
+    'LIMITE_MAXIMO': 50,
+    'TTL_TOTAL_DOCUMENTOS': 10 * 60,   # Total de documentos (para o IDF) fica em cache
+    'TAMANHO_LOTE_REINDEXACAO': 500,
+    'TAMANHO_MINIMO_PREFIXO': 3,       # Último termo mais curto que isso casa só exato
+    'MAX_TERMOS_PREFIXO': 50,          # Termos do índice em que o prefixo é expandido
+}
+
+PESO_TITULO = 3.0
+PESO_ATRIBUTO = 2.0
+PESO_DESCRICAO = 1.0
+
+TAMANHO_TERMO = 64
+
+STOPWORDS = {
+    'a', 'o', 'as', 'os', 'ao', 'aos', 'de', 'da', 'do', 'das', 'dos', 'e', 'em', 'no', 'na', 'nos', 'nas',
+    'um', 'uma', 'uns', 'umas', 'para', 'pra', 'por', 'com', 'sem', 'que', 'se', 'ou',
+}
+
+CHAVE_TOTAL_DOCUMENTOS = 'busca:total_documentos'
+
+
+def get_busca_config():
+    config = dict(BUSCA_DEFAULTS)
+    config.update(getattr(settings, 'API_BUSCA', {}))
+    return config
+
+
+def normalizar(texto):
+    """Minúsculas e sem acentos."""
+    decomposto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in decomposto if not unicodedata.combining(c)).lower()
+
+
+def _radical(termo):
+    """Reduz plurais comuns, para "celulares" achar "celular"."""
+    if termo.isdigit() or len(termo) <= 3:
+        return termo
+    if len(termo) > 4 and termo.endswith(('oes', 'aes')):
+        return termo[:-3] + 'ao'
+    if len(termo) > 4 and termo.endswith('es') and termo[-3] in 'rzs':
+        return termo[:-2]
+    if termo.endswith('s') and not termo.endswith('ss'):
+        return termo[:-1]
+    return termo
+
+
+def tokenizar(texto):
+    """Termos do texto, na ordem em que aparecem (com repetições)."""
+    termos = []
+    for palavra in re.findall(r'[a-z0-9]+', normalizar(texto)):
+        if palavra in STOPWORDS or (len(palavra) < 2 and not palavra.isdigit()):
+            continue
+        termos.append(_radical(palavra)[:TAMANHO_TERMO])
+    return termos
+
+
+def _termos_ponderados(campos):
+    """[(texto, peso)] -> {termo: peso somado}."""
+    pesos = Counter()
+    for texto, peso in campos:
+        for termo in tokenizar(texto):
+            pesos[termo] += peso
+    return pesos
+
+
+# --- Indexação -------------------------------------------------------------
+
+def _gravar(tipo, documentos, removidos=()):
+    """
+    Substitui os documentos de `tipo`. `documentos` é {objeto_id: (titulo,
+    vendedor_id_restrito, campos)}; os ids em `removidos` saem do índice.
+    """
+    ids = set(documentos) | set(removidos)
+    if not ids:
+        return
+    with transaction.atomic():
+        # Apagar o documento apaga os termos (CASCADE); recriar é mais simples que comparar.
+        DocumentoBusca.objects.filter(tipo=tipo, objeto_id__in=ids).delete()
+        DocumentoBusca.objects.bulk_create([
+            DocumentoBusca(tipo=tipo, objeto_id=objeto_id, titulo=(titulo or '')[:255], vendedor_id_restrito=restrito)
+            for objeto_id, (titulo, restrito, _) in documentos.items()
+        ])
+        # No MySQL o bulk_create não devolve as chaves.
+        chaves = dict(
+            DocumentoBusca.objects.filter(tipo=tipo, objeto_id__in=documentos).values_list('objeto_id', 'id')
+        )
+        TermoBusca.objects.bulk_create([
+            TermoBusca(documento_id=chaves[objeto_id], termo=termo, peso=peso)
+            for objeto_id, (_, _, campos) in documentos.items()
+            for termo, peso in _termos_ponderados(campos).items()
+        ])
+
+
+def indexar_produtos(produto_ids):
+    """Nome, descrição e valores de atributo dos SKUs de cada produto."""
+    produto_ids = set(produto_ids)
+    valores = {}
+    for produto_id, valor in SKU.valores.through.objects.filter(
+        sku__produto_id__in=produto_ids
+    ).values_list('sku__produto_id', 'valoratributo__valor').distinct():
+        valores.setdefault(produto_id, []).append((valor, PESO_ATRIBUTO))
+
+    documentos = {
+        pk: (nome, None, [(nome, PESO_TITULO), (descricao, PESO_DESCRICAO)] + valores.get(pk, []))
+        for pk, nome, descricao in Produto.objects.filter(pk__in=produto_ids).values_list('pk', 'nome', 'descricao')
+    }
+    _gravar('produto', documentos, produto_ids - set(documentos))
+
+
+def indexar_vendedores(vendedor_ids):
+    """Só lojas aprovadas aparecem na busca."""
+    vendedor_ids = set(vendedor_ids)
+    documentos = {
+        pk: (nome_loja, None, [(nome_loja, PESO_TITULO)])
+        for pk, nome_loja in Vendedor.objects.filter(
+            pk__in=vendedor_ids, status_aprovacao='Aprovado'
+        ).values_list('pk', 'nome_loja')
+    }
+    _gravar('vendedor', documentos, vendedor_ids - set(documentos))
+
+
+def indexar_monitorados(monitorado_ids):
+    """Nome coletado de cada produto monitorado, visível só para o vendedor dono."""
+    from scraper.models import ProdutosMonitoradosExternos
+
+    monitorado_ids = set(monitorado_ids)
+    documentos = {
+        pk: (nome, vendedor_id, [(nome, PESO_TITULO)])
+        for pk, vendedor_id, nome in ProdutosMonitoradosExternos.objects.filter(
+            pk__in=monitorado_ids
+        ).exclude(nome_produto__isnull=True).exclude(nome_produto='').values_list('pk', 'vendedor_id', 'nome_produto')
+    }
+    _gravar('monitorado', documentos, monitorado_ids - set(documentos))
+
+
+def remover(tipo, objeto_ids):
+    DocumentoBusca.objects.filter(tipo=tipo, objeto_id__in=objeto_ids).delete()
+
+
+def indexar_depois_do_commit(indexador, ids):
+    """Agenda a indexação para depois do commit; falhas no índice não desfazem a gravação."""
+    ids = set(ids)
+
+    def indexar():
+        try:
+            indexador(ids)
+        except Exception as e:
+            logging.warning(f"BUSCA: Falha ao indexar {len(ids)} itens com {indexador.__name__}: {e}")
+
+    transaction.on_commit(indexar)
+
+
+def reindexar_tudo(tamanho_lote=None):
+    """Reconstrói o índice inteiro, em lotes. Retorna {tipo: documentos processados}."""
+    from scraper.models import ProdutosMonitoradosExternos
+
+    tamanho_lote = tamanho_lote or get_busca_config()['TAMANHO_LOTE_REINDEXACAO']
+    fontes = [
+        ('produto', Produto.objects, indexar_produtos),
+        ('vendedor', Vendedor.objects, indexar_vendedores),
+        ('monitorado', ProdutosMonitoradosExternos.objects, indexar_monitorados),
+    ]
+    totais = {}
+    for tipo, gerenciador, indexador in fontes:
+        ids = list(gerenciador.order_by('pk').values_list('pk', flat=True))
+        # Documentos de objetos que não existem mais.
+        DocumentoBusca.objects.filter(tipo=tipo).exclude(objeto_id__in=ids).delete()
+        for inicio in range(0, len(ids), tamanho_lote):
+            indexador(ids[inicio:inicio + tamanho_lote])
+        totais[tipo] = len(ids)
+    cache.delete(CHAVE_TOTAL_DOCUMENTOS)
+    return totais
+
+
+# --- Consulta --------------------------------------------------------------
+
+def _total_documentos():
+    try:
+        total = cache.get(CHAVE_TOTAL_DOCUMENTOS)
+    except Exception as e:
+        logging.warning(f"BUSCA: Cache indisponível: {e}")
+        total = None
+    if total is None:
+        total = DocumentoBusca.objects.count()
+        try:
+            cache.set(CHAVE_TOTAL_DOCUMENTOS, total, get_busca_config()['TTL_TOTAL_DOCUMENTOS'])
+        except Exception as e:
+            logging.warning(f"BUSCA: Falha ao gravar total de documentos no cache: {e}")
+    return total
+
+
+def _expandir_prefixo(prefixo, config):
+    """Termos do índice que começam com `prefixo`, limitados; prefixos curtos casam só exatos."""
+    if len(prefixo) < config['TAMANHO_MINIMO_PREFIXO']:
+        return [prefixo]
+    # Intervalo [prefixo, prefixo seguinte) em vez de LIKE: usa o índice também no SQLite,
+    # cujo LIKE não diferencia maiúsculas e por isso não aproveita o índice. Termos são [a-z0-9].
+    proximo = prefixo[:-1] + chr(ord(prefixo[-1]) + 1)
+    expandidos = list(
+        TermoBusca.objects.filter(termo__gte=prefixo, termo__lt=proximo).order_by('termo')
+        .values_list('termo', flat=True).distinct()[:config['MAX_TERMOS_PREFIXO']]
+    )
+    return expandidos or [prefixo]
+
+
+def buscar(consulta, tipos=None, vendedor_id=None, limite=None):
+    """
+    Documentos que casam com `consulta`, do mais relevante para o menos.
+    Retorna [{'tipo', 'id', 'titulo', 'relevancia'}]. Produtos monitorados só
+    entram para o `vendedor_id` que os monitora.
+    """
+    config = get_busca_config()
+    limite = min(limite or config['LIMITE_RESULTADOS'], config['LIMITE_MAXIMO'])
+    termos = list(dict.fromkeys(tokenizar(consulta)))
+    if not termos:
+        return []
+
+    grupos = [[termo] for termo in termos[:-1]] + [_expandir_prefixo(termos[-1], config)]
+    condicoes = [Q(termo__in=grupo) for grupo in grupos]
+    qualquer_termo = Q(termo__in={termo for grupo in grupos for termo in grupo})
+
+    # Frequência de documentos de cada termo (para o IDF) em uma consulta.
+    frequencias = [0] * len(termos)
+    for termo, quantidade in TermoBusca.objects.filter(qualquer_termo).values_list('termo').annotate(Count('id')):
+        for i, grupo in enumerate(grupos):
+            if termo in grupo:
+                frequencias[i] += quantidade
+    if not any(frequencias):
+        return []
+    total = max(_total_documentos(), max(frequencias))
+    idfs = [math.log(1 + total / frequencia) if frequencia else 0.0 for frequencia in frequencias]
+
+    visiveis = Q(documento__vendedor_id_restrito__isnull=True)
+    if vendedor_id is not None:
+        visiveis |= Q(documento__vendedor_id_restrito=vendedor_id)
+    linhas = TermoBusca.objects.filter(qualquer_termo).filter(visiveis)
+    if tipos:
+        linhas = linhas.filter(documento__tipo__in=tipos)
+    linhas = linhas.values(
+        'documento_id', 'documento__tipo', 'documento__objeto_id', 'documento__titulo'
+    ).annotate(
+        acertos=Count(Case(*[When(c, then=Value(i)) for i, c in enumerate(condicoes)]), distinct=True),
+        relevancia=Sum(Case(
+            *[When(c, then=F('peso') * Value(idf)) for c, idf in zip(condicoes, idfs)],
+            default=Value(0.0), output_field=FloatField(),
+        )),
+    ).order_by('-acertos', '-relevancia', 'documento_id')[:limite]
+
+    return [
+        {
+            'tipo': linha['documento__tipo'],
+            'id': linha['documento__objeto_id'],
+            'titulo': linha['documento__titulo'],
+            'relevancia': round(linha['relevancia'], 4),
+        }
+        for linha in linhas
+    ]
@@ -0,0 +1,116 @@
+"""
+Cache de respostas dos endpoints de catálogo (categorias, subcategorias,
+atributos, vendedores aprovados), que são lidos em quase toda página do
+frontend e mudam raramente.
+
+As respostas ficam no cache padrão do Django (Redis, ver `CACHES`). Cada modelo
+tem um número de versão no cache que entra na chave das respostas; os sinais
+`post_save`/`post_delete` incrementam a versão (ver `api.signals`), o que torna
+as respostas antigas inalcançáveis sem precisar apagá-las. Toda resposta em
+cache leva um ETag; um `If-None-Match` igual recebe 304 sem serialização.
+"""
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+API_CACHE_DEFAULTS = {
+    'TTL_SEGUNDOS': 10 * 60,
+}
+
+
+def get_api_cache_config():
+    config = dict(API_CACHE_DEFAULTS)
+    config.update(getattr(settings, 'API_CACHE', {}))
+    return config
+
+
+def _chave_versao(modelo):
+    return f'api:versao:{modelo._meta.label_lower}'
+
+
+def versao_modelo(modelo):
+    versao = cache.get(_chave_versao(modelo))
+    if versao is None:
+        cache.add(_chave_versao(modelo), 1, timeout=None)
+        versao = cache.get(_chave_versao(modelo)) or 1
+    return versao
+
+
+def invalidar_modelo(modelo):
+    """Incrementa a versão do modelo; respostas que dependem dele deixam de ser usadas."""
+    try:
+        cache.incr(_chave_versao(modelo))
+    except ValueError:
+        # Versão ainda não existe (ou expirou junto com o cache): começa de novo.
+        cache.add(_chave_versao(modelo), 2, timeout=None)
+    except Exception as e:
+        logging.warning(f"API CACHE: Falha ao invalidar {modelo._meta.label}: {e}")
+
+
+def _etag(dados):
+    corpo = json.dumps(dados, cls=JSONEncoder, sort_keys=True, ensure_ascii=False)
+    return quote_etag(hashlib.md5(corpo.encode()).hexdigest())
+
+
+class RespostaEmCacheMixin:
+    """
+    Mixin para ViewSets: guarda em cache as respostas de `list` e `retrieve`.
+
+    `cache_modelos` lista os modelos cujo conteúdo aparece na resposta (o
+    próprio modelo e os serializados aninhados). A chave inclui a ação, o pk,
+    todos os parâmetros de consulta (ex.: `?categoria_loja=`) e a variante
+    devolvida por `get_cache_variante()`; se ela for None a resposta não é
+    guardada (ex.: conteúdo que depende do usuário).
+    """
+    cache_modelos = ()
+
+    def get_cache_variante(self):
+        return ''
+
+    def _chave_resposta(self, variante):
+        parametros = sorted(self.request.query_params.lists())
+        versoes = ':'.join(str(versao_modelo(modelo)) for modelo in self.cache_modelos)
+        assinatura = hashlib.md5(json.dumps([self.action, self.kwargs, parametros, variante]).encode()).hexdigest()
+        return f'api:resposta:{self.basename}:{assinatura}:{versoes}'
+
+    def _responder_com_cache(self, gerar_resposta, request, *args, **kwargs):
+        variante = self.get_cache_variante()
+        if variante is None:
+            return gerar_resposta(request, *args, **kwargs)
+        try:
+            chave = self._chave_resposta(variante)
+            guardado = cache.get(chave)
+        except Exception as e:
+            logging.warning(f"API CACHE: Cache indisponível para {self.basename}: {e}")
+            return gerar_resposta(request, *args, **kwargs)
+
+        if guardado is None:
+            resposta = gerar_resposta(request, *args, **kwargs)
+            if resposta.status_code != status.HTTP_200_OK:
+                return resposta
+            guardado = (_etag(resposta.data), resposta.data)
+            try:
+                cache.set(chave, guardado, get_api_cache_config()['TTL_SEGUNDOS'])
+            except Exception as e:
+                logging.warning(f"API CACHE: Falha ao gravar resposta de {self.basename}: {e}")
+        else:
+            resposta = Response(guardado[1])
+
+        etag = guardado[0]
+        if etag in request.headers.get('If-None-Match', ''):
+            resposta = Response(status=status.HTTP_304_NOT_MODIFIED)
+        resposta['ETag'] = etag
+        return resposta
+
+    def list(self, request, *args, **kwargs):
+        return self._responder_com_cache(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._responder_com_cache(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,213 @@
+"""
+Comparação de preços entre lojas e concorrentes monitorados.
+
+A tabela `PrecoComparado` é uma cópia materializada dos preços comparáveis:
+ofertas ativas de lojas aprovadas e produtos monitorados vinculados a um SKU do
+catálogo. Cada linha já traz produto, subcategoria e coordenadas da loja, então
+"os N mais baratos deste SKU/produto/subcategoria" é uma única leitura em ordem
+do índice `(sku|produto|subcategoria, preco)`, sem JOIN com ofertas, SKUs ou
+endereços.
+
+A tabela é mantida incrementalmente: sinais de `OfertaProduto`, produtos
+monitorados, `Vendedor`, `Endereco` e `Produto` (ver `api.signals`) e as
+gravações do scraper, que atualizam preços com `update()`/upsert, chamam as
+funções `atualizar_*` depois do commit. `manage.py reconstruir_comparacao`
+refaz tudo.
+"""
+import logging
+import math
+from decimal import Decimal
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from .models import PrecoComparado, OfertaProduto
+
+COMPARACAO_DEFAULTS = {
+    'LIMITE_RESULTADOS': 10,
+    'LIMITE_MAXIMO': 100,
+    'TAMANHO_LOTE_RECONSTRUCAO': 1000,
+}
+
+RAIO_TERRA_KM = 6371.0
+
+
+def get_comparacao_config():
+    config = dict(COMPARACAO_DEFAULTS)
+    config.update(getattr(settings, 'API_COMPARACAO', {}))
+    return config
+
+
+def _gravar(origem, linhas, removidos=()):
+    """Substitui as linhas de `origem`: `linhas` é {objeto_id: campos}; `removidos` saem da tabela."""
+    ids = set(linhas) | set(removidos)
+    if not ids:
+        return
+    with transaction.atomic():
+        PrecoComparado.objects.filter(origem=origem, objeto_id__in=ids).delete()
+        PrecoComparado.objects.bulk_create([
+            PrecoComparado(origem=origem, objeto_id=objeto_id, **campos) for objeto_id, campos in linhas.items()
+        ])
+
+
+def atualizar_ofertas(oferta_ids):
+    """Recalcula as linhas das ofertas; inativas ou de lojas não aprovadas saem da comparação."""
+    oferta_ids = set(oferta_ids)
+    linhas = {
+        linha['pk']: {
+            'sku_id': linha['sku_id'],
+            'produto_id': linha['sku__produto_id'],
+            'subcategoria_id': linha['sku__produto__subcategoria_id'],
+            'preco': linha['preco'],
+            'vendedor_id': linha['vendedor_id'],
+            'nome_loja': linha['vendedor__nome_loja'],
+            'latitude': linha['vendedor__endereco__latitude'],
+            'longitude': linha['vendedor__endereco__longitude'],
+        }
+        for linha in OfertaProduto.objects.filter(
+            pk__in=oferta_ids, ativo=True, vendedor__status_aprovacao='Aprovado'
+        ).values(
+            'pk', 'sku_id', 'sku__produto_id', 'sku__produto__subcategoria_id', 'preco', 'vendedor_id',
+            'vendedor__nome_loja', 'vendedor__endereco__latitude', 'vendedor__endereco__longitude',
+        )
+    }
+    _gravar('oferta', linhas, oferta_ids - set(linhas))
+
+
+def atualizar_monitorados(monitorado_ids):
+    """Recalcula as linhas dos produtos monitorados; sem SKU ou sem preço saem da comparação."""
+    from scraper.models import ProdutosMonitoradosExternos
+
+    monitorado_ids = set(monitorado_ids)
+    linhas = {
+        linha['pk']: {
+            'sku_id': linha['sku_id'],
+            'produto_id': linha['sku__produto_id'],
+            'subcategoria_id': linha['sku__produto__subcategoria_id'],
+            'preco': linha['preco_atual'],
+            # Loja concorrente: o domínio da página coletada.
+            'nome_loja': urlparse(linha['url_produto']).netloc,
+            'url_produto': linha['url_produto'],
+            'monitorado_por_id': linha['vendedor_id'],
+        }
+        for linha in ProdutosMonitoradosExternos.objects.filter(
+            pk__in=monitorado_ids, sku__isnull=False, preco_atual__isnull=False
+        ).values(
+            'pk', 'sku_id', 'sku__produto_id', 'sku__produto__subcategoria_id', 'preco_atual',
+            'url_produto', 'vendedor_id',
+        )
+    }
+    _gravar('monitorado', linhas, monitorado_ids - set(linhas))
+
+
+def atualizar_monitorados_das_paginas(url_hashes):
+    """Para gravações do scraper, que atualizam os monitoramentos de uma página com `update()`."""
+    from scraper.models import ProdutosMonitoradosExternos
+
+    ids = ProdutosMonitoradosExternos.objects.filter(url_hash__in=url_hashes, sku__isnull=False).values_list('pk', flat=True)
+    # Monitoramentos que perderam o SKU já saíram pelo sinal de save.
+    atualizar_monitorados(list(ids))
+
+
+def atualizar_vendedores(vendedor_ids):
+    """Aprovação, nome ou endereço da loja mudaram: refaz as ofertas dela."""
+    atualizar_ofertas(OfertaProduto.objects.filter(vendedor_id__in=vendedor_ids).values_list('pk', flat=True))
+
+
+def atualizar_produto(produto_id, subcategoria_id):
+    PrecoComparado.objects.filter(produto_id=produto_id).exclude(subcategoria_id=subcategoria_id).update(subcategoria_id=subcategoria_id)
+
+
+def atualizar_depois_do_commit(atualizador, *args):
+    """Agenda a atualização para depois do commit; falhas aqui não desfazem a gravação."""
+    def atualizar():
+        try:
+            atualizador(*args)
+        except Exception as e:
+            logging.warning(f"COMPARACAO: Falha em {atualizador.__name__}: {e}")
+
+    transaction.on_commit(atualizar)
+
+
+def reconstruir(tamanho_lote=None):
+    """Refaz a tabela inteira, em lotes. Retorna {origem: objetos processados}."""
+    from scraper.models import ProdutosMonitoradosExternos
+
+    tamanho_lote = tamanho_lote or get_comparacao_config()['TAMANHO_LOTE_RECONSTRUCAO']
+    fontes = [
+        ('oferta', OfertaProduto.objects, atualizar_ofertas),
+        ('monitorado', ProdutosMonitoradosExternos.objects, atualizar_monitorados),
+    ]
+    totais = {}
+    for origem, gerenciador, atualizador in fontes:
+        ids = list(gerenciador.order_by('pk').values_list('pk', flat=True))
+        PrecoComparado.objects.filter(origem=origem).exclude(objeto_id__in=ids).delete()
+        for inicio in range(0, len(ids), tamanho_lote):
+            atualizador(ids[inicio:inicio + tamanho_lote])
+        totais[origem] = len(ids)
+    return totais
+
+
+# --- Consulta --------------------------------------------------------------
+
+def distancia_km(lat1, lng1, lat2, lng2):
+    """Distância em linha reta (haversine)."""
+    lat1, lng1, lat2, lng2 = map(math.radians, map(float, (lat1, lng1, lat2, lng2)))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * RAIO_TERRA_KM * math.asin(math.sqrt(a))
+
+
+def _caixa(latitude, longitude, raio_km):
+    """Retângulo que contém o círculo do raio; filtra no banco antes do cálculo exato."""
+    delta_lat = raio_km / 111.0
+    delta_lng = raio_km / max(111.0 * math.cos(math.radians(latitude)), 0.01)
+    return {
+        'latitude__range': (Decimal(str(latitude - delta_lat)), Decimal(str(latitude + delta_lat))),
+        'longitude__range': (Decimal(str(longitude - delta_lng)), Decimal(str(longitude + delta_lng))),
+    }
+
+
+def mais_baratos(sku_id=None, produto_id=None, subcategoria_id=None, limite=None, origens=None,
+                 vendedor_id=None, perto=None):
+    """
+    Os `limite` preços mais baixos de um SKU, produto ou subcategoria (informe um).
+
+    `perto=(latitude, longitude, raio_km)` restringe a lojas dentro do raio (os
+    monitorados, sem endereço, ficam de fora). Monitorados só aparecem para o
+    `vendedor_id` que os monitora. Retorna dicionários com `distancia_km`
+    quando `perto` é usado.
+    """
+    config = get_comparacao_config()
+    limite = min(limite or config['LIMITE_RESULTADOS'], config['LIMITE_MAXIMO'])
+    filtros = {k: v for k, v in (('sku_id', sku_id), ('produto_id', produto_id), ('subcategoria_id', subcategoria_id)) if v is not None}
+    if len(filtros) != 1:
+        raise ValueError('Informe exatamente um de sku, produto ou subcategoria.')
+
+    linhas = PrecoComparado.objects.filter(**filtros)
+    if origens:
+        linhas = linhas.filter(origem__in=origens)
+    visiveis = Q(monitorado_por__isnull=True)
+    if vendedor_id is not None:
+        visiveis |= Q(monitorado_por_id=vendedor_id)
+    linhas = linhas.filter(visiveis)
+    if perto:
+        latitude, longitude, raio_km = perto
+        linhas = linhas.filter(**_caixa(latitude, longitude, raio_km))
+
+    campos = ('origem', 'objeto_id', 'sku_id', 'produto_id', 'preco', 'vendedor_id', 'nome_loja', 'url_produto', 'latitude', 'longitude')
+    if not perto:
+        return list(linhas.order_by('preco', 'id').values(*campos)[:limite])
+
+    # Os cantos da caixa ficam fora do círculo: descarta no Python, lendo em
+    # ordem de preço até completar o limite.
+    resultados = []
+    for linha in linhas.order_by('preco', 'id').values(*campos).iterator(chunk_size=limite * 2):
+        distancia = distancia_km(latitude, longitude, linha['latitude'], linha['longitude'])
+        if distancia <= raio_km:
+            linha['distancia_km'] = round(distancia, 2)
+            resultados.append(linha)
+            if len(resultados) == limite:
+                break
+    return resultados
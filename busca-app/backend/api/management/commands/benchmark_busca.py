@@ -0,0 +1,95 @@
+import itertools
+import math
+import random
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from api import busca
+from api.models import DocumentoBusca, TermoBusca
+
+SILABAS = ['ca', 'ce', 'ci', 'co', 'ba', 'be', 'bo', 'ma', 'me', 'mo', 'ta', 'te', 'to', 'ra', 're', 'ri',
+           'la', 'le', 'lu', 'na', 'ne', 'sa', 'se', 'so', 'pa', 'pe', 'po', 'da', 'de', 'di', 'ga', 'go']
+
+CONSULTAS_PADRAO = ['ca', 'cam', 'camer', 'celular', 'celular ta', 'tela grande preta', 'bateria cabo car']
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede a latência da busca textual sobre um índice sintético com centenas de milhares '
+        'de linhas em TermoBusca. Os documentos são criados numa transação desfeita ao final.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('consultas', nargs='*', help=f'Consultas medidas (padrão: {CONSULTAS_PADRAO})')
+        parser.add_argument('--documentos', type=int, default=100_000)
+        parser.add_argument('--termos-por-documento', type=int, default=4)
+        parser.add_argument('--vocabulario', type=int, default=20_000, help='Palavras distintas do índice sintético.')
+        parser.add_argument('--repeticoes', type=int, default=20)
+        parser.add_argument('--semente', type=int, default=42)
+
+    def vocabulario(self, tamanho, aleatorio):
+        # Palavras de 2 a 4 sílabas mais as reais das consultas, para os prefixos terem o que expandir.
+        palavras = {'camera', 'celular', 'tela', 'grande', 'preta', 'bateria', 'cabo', 'carregador'}
+        while len(palavras) < tamanho:
+            palavras.add(''.join(aleatorio.choice(SILABAS) for _ in range(aleatorio.randint(2, 4))))
+        return sorted(palavras)
+
+    def popular(self, options, aleatorio):
+        palavras = self.vocabulario(options['vocabulario'], aleatorio)
+        # Distribuição de Zipf: poucas palavras muito comuns, a maioria rara, como num catálogo real.
+        pesos_zipf = list(itertools.accumulate(1 / (posicao + 1) for posicao in range(len(palavras))))
+        aleatorio.shuffle(palavras)
+        inicio_id = (DocumentoBusca.objects.filter(tipo='produto').aggregate(Max('objeto_id'))['objeto_id__max'] or 0) + 1
+        lote = 5000
+        for base in range(0, options['documentos'], lote):
+            ids = range(inicio_id + base, inicio_id + min(base + lote, options['documentos']))
+            titulos = {
+                objeto_id: set(aleatorio.choices(palavras, cum_weights=pesos_zipf, k=options['termos_por_documento']))
+                for objeto_id in ids
+            }
+            DocumentoBusca.objects.bulk_create([
+                DocumentoBusca(tipo='produto', objeto_id=objeto_id, titulo=' '.join(termos))
+                for objeto_id, termos in titulos.items()
+            ])
+            chaves = dict(DocumentoBusca.objects.filter(tipo='produto', objeto_id__in=ids).values_list('objeto_id', 'id'))
+            TermoBusca.objects.bulk_create([
+                TermoBusca(documento_id=chaves[objeto_id], termo=termo, peso=busca.PESO_TITULO)
+                for objeto_id, termos in titulos.items() for termo in termos
+            ])
+
+    def medir(self, consulta, repeticoes):
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            resultados = busca.buscar(consulta)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        tempos.sort()
+        return statistics.median(tempos), tempos[math.ceil(len(tempos) * 0.95) - 1], len(resultados)
+
+    def handle(self, *args, **options):
+        aleatorio = random.Random(options['semente'])
+        consultas = options['consultas'] or CONSULTAS_PADRAO
+        config = busca.get_busca_config()
+
+        with transaction.atomic():
+            inicio = time.perf_counter()
+            self.popular(options, aleatorio)
+            cache.delete(busca.CHAVE_TOTAL_DOCUMENTOS)
+            self.stdout.write(
+                f'Índice sintético: {DocumentoBusca.objects.count()} documentos, {TermoBusca.objects.count()} termos '
+                f'({time.perf_counter() - inicio:.1f} s). Prefixo mínimo {config["TAMANHO_MINIMO_PREFIXO"]}, '
+                f'até {config["MAX_TERMOS_PREFIXO"]} termos por prefixo.'
+            )
+            busca.buscar(consultas[0])  # aquece o total de documentos no cache
+            for consulta in consultas:
+                mediana, p95, encontrados = self.medir(consulta, options['repeticoes'])
+                self.stdout.write(f'{consulta!r}: mediana {mediana:.1f} ms | p95 {p95:.1f} ms | {encontrados} resultados')
+            transaction.set_rollback(True)
+        cache.delete(busca.CHAVE_TOTAL_DOCUMENTOS)
+
+        self.stdout.write(self.style.SUCCESS('--- Benchmark concluído (índice sintético descartado) ---'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from api.comparacao import reconstruir
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói a tabela de comparação de preços (ofertas e produtos monitorados vinculados a SKUs).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamanho-lote', type=int, default=None, help='Objetos processados por lote.')
+
+    def handle(self, *args, **options):
+        totais = reconstruir(options['tamanho_lote'])
+        for origem, total in totais.items():
+            self.stdout.write(f'{origem}: {total} processados')
+        self.stdout.write(self.style.SUCCESS('Comparação de preços reconstruída.'))
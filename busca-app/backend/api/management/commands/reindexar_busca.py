@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from api.busca import reindexar_tudo
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o índice de busca (produtos, lojas aprovadas e produtos monitorados).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamanho-lote', type=int, default=None, help='Objetos indexados por lote.')
+
+    def handle(self, *args, **options):
+        totais = reindexar_tudo(options['tamanho_lote'])
+        for tipo, total in totais.items():
+            self.stdout.write(f'{tipo}: {total} indexados')
+        self.stdout.write(self.style.SUCCESS('Índice de busca reconstruído.'))
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_alter_produtosmonitoradosexternos_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentoBusca',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('produto', 'Produto'), ('vendedor', 'Vendedor'), ('monitorado', 'Produto monitorado')], max_length=20)),
+                ('objeto_id', models.PositiveBigIntegerField()),
+                ('titulo', models.CharField(max_length=255)),
+                ('vendedor_id_restrito', models.PositiveBigIntegerField(blank=True, null=True)),
+            ],
+            options={
+                'unique_together': {('tipo', 'objeto_id')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TermoBusca',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('termo', models.CharField(max_length=64)),
+                ('peso', models.FloatField()),
+                ('documento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='termos', to='api.documentobusca')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['termo', 'documento', 'peso'], name='busca_termo_idx')],
+                'unique_together': {('documento', 'termo')},
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_indice_busca'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrecoComparado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('origem', models.CharField(choices=[('oferta', 'Oferta'), ('monitorado', 'Produto monitorado')], max_length=20)),
+                ('objeto_id', models.PositiveBigIntegerField()),
+                ('preco', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('nome_loja', models.CharField(blank=True, max_length=255)),
+                ('url_produto', models.URLField(blank=True, max_length=2048)),
+                ('latitude', models.DecimalField(blank=True, decimal_places=8, max_digits=10, null=True)),
+                ('longitude', models.DecimalField(blank=True, decimal_places=8, max_digits=11, null=True)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('monitorado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.vendedor')),
+                ('produto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.produto')),
+                ('sku', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='precos_comparados', to='api.sku')),
+                ('subcategoria', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.subcategoriaproduto')),
+                ('vendedor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.vendedor')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['sku', 'preco'], name='comparacao_sku_preco_idx'), models.Index(fields=['produto', 'preco'], name='comparacao_produto_preco_idx'), models.Index(fields=['subcategoria', 'preco'], name='comparacao_subcat_preco_idx')],
+                'unique_together': {('origem', 'objeto_id')},
+            },
+        ),
+    ]
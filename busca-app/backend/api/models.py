@@ -232,4 +232,77 @@ class Sugestao(models.Model):
         ordering = ['-data_envio']
 
     def __str__(self):
-        return f'Sugestão de {self.usuario.email} em {self.data_envio.strftime("%Y-%m-%d %H:%M")}'
\ No newline at end of file
+        return f'Sugestão de {self.usuario.email} em {self.data_envio.strftime("%Y-%m-%d %H:%M")}'
+
+class DocumentoBusca(models.Model):
+    """
+    Um item encontrável pela busca (produto, loja ou produto monitorado), com o
+    título exibido nos resultados. Os termos ficam em `TermoBusca`; ver `api.busca`.
+    """
+    TIPO_CHOICES = [
+        ('produto', 'Produto'),
+        ('vendedor', 'Vendedor'),
+        ('monitorado', 'Produto monitorado'),
+    ]
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES)
+    objeto_id = models.PositiveBigIntegerField()
+    titulo = models.CharField(max_length=255)
+    # Produtos monitorados são privados do vendedor que os monitora.
+    vendedor_id_restrito = models.PositiveBigIntegerField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('tipo', 'objeto_id')
+
+    def __str__(self):
+        return f'{self.tipo} {self.objeto_id}: {self.titulo}'
+
+
+class TermoBusca(models.Model):
+    """Índice invertido: termo normalizado -> documento, com o peso somado dos campos onde aparece."""
+    documento = models.ForeignKey(DocumentoBusca, related_name='termos', on_delete=models.CASCADE)
+    termo = models.CharField(max_length=64)
+    peso = models.FloatField()
+
+    class Meta:
+        unique_together = ('documento', 'termo')
+        indexes = [
+            # Busca por termo exato ou prefixo (LIKE 'abc%') sem tocar na tabela.
+            models.Index(fields=['termo', 'documento', 'peso'], name='busca_termo_idx'),
+        ]
+
+
+class PrecoComparado(models.Model):
+    """
+    Tabela materializada da comparação de preços: uma linha por oferta ativa de
+    loja aprovada e por produto monitorado vinculado a um SKU, com os dados de
+    filtro já copiados (produto, subcategoria, coordenadas da loja). Mantida
+    pelos sinais e pelas gravações do scraper; ver `api.comparacao`.
+    """
+    ORIGEM_CHOICES = [
+        ('oferta', 'Oferta'),
+        ('monitorado', 'Produto monitorado'),
+    ]
+    origem = models.CharField(max_length=20, choices=ORIGEM_CHOICES)
+    objeto_id = models.PositiveBigIntegerField()
+    sku = models.ForeignKey(SKU, on_delete=models.CASCADE, related_name='precos_comparados')
+    produto = models.ForeignKey(Produto, on_delete=models.CASCADE, related_name='+')
+    subcategoria = models.ForeignKey(SubcategoriaProduto, on_delete=models.CASCADE, related_name='+')
+    preco = models.DecimalField(max_digits=10, decimal_places=2)
+    # Loja da oferta; vazio nos monitorados (o preço é de um concorrente externo).
+    vendedor = models.ForeignKey(Vendedor, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    nome_loja = models.CharField(max_length=255, blank=True)
+    url_produto = models.URLField(max_length=2048, blank=True)
+    latitude = models.DecimalField(max_digits=10, decimal_places=8, blank=True, null=True)
+    longitude = models.DecimalField(max_digits=11, decimal_places=8, blank=True, null=True)
+    # Produtos monitorados são privados do vendedor que os monitora.
+    monitorado_por = models.ForeignKey(Vendedor, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('origem', 'objeto_id')
+        indexes = [
+            # "Os N mais baratos de X" é uma leitura em ordem de um destes índices.
+            models.Index(fields=['sku', 'preco'], name='comparacao_sku_preco_idx'),
+            models.Index(fields=['produto', 'preco'], name='comparacao_produto_preco_idx'),
+            models.Index(fields=['subcategoria', 'preco'], name='comparacao_subcat_preco_idx'),
+        ]
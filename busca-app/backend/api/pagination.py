@@ -0,0 +1,44 @@
+"""
+Paginação por cursor (keyset) das listagens da API.
+
+Em vez de `LIMIT/OFFSET`, cada página é filtrada pela chave do último item da
+página anterior (`WHERE id < ?`), então o custo de uma página não cresce com a
+posição dela nem com o tamanho do catálogo do vendedor. A ordenação padrão é
+`-pk`, sempre indexada; views (ou `@action(..., ordenacao_cursor=...)`)
+podem trocar por outra coluna com o atributo `ordenacao_cursor`. O cursor usa
+só a primeira coluna; empates nela são resolvidos por offset dentro do valor.
+
+Resposta: `{"next": url|null, "previous": url|null, "results": [...]}`. O
+cliente segue `next` até receber null; `?page_size=` ajusta o tamanho da
+página até `TAMANHO_MAXIMO`.
+"""
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+API_PAGINACAO_DEFAULTS = {
+    'TAMANHO_PAGINA': 50,
+    'TAMANHO_MAXIMO': 200,
+}
+
+
+def get_api_paginacao_config():
+    config = dict(API_PAGINACAO_DEFAULTS)
+    config.update(getattr(settings, 'API_PAGINACAO', {}))
+    return config
+
+
+class PaginacaoPorCursor(CursorPagination):
+    ordering = '-pk'
+    page_size_query_param = 'page_size'
+
+    def get_page_size(self, request):
+        config = get_api_paginacao_config()
+        self.page_size = config['TAMANHO_PAGINA']
+        self.max_page_size = config['TAMANHO_MAXIMO']
+        return super().get_page_size(request)
+
+    def get_ordering(self, request, queryset, view):
+        ordenacao = getattr(view, 'ordenacao_cursor', None)
+        if ordenacao:
+            return (ordenacao,) if isinstance(ordenacao, str) else tuple(ordenacao)
+        return super().get_ordering(request, queryset, view)
@@ -0,0 +1,67 @@
+"""
+Querysets de leitura com todas as relações aninhadas já carregadas.
+
+`ProdutoSerializer` aninha `SKUSerializer`, que aninha valores de atributo (com
+o nome do atributo) e imagens. Sem prefetch, cada nível faz uma consulta por
+objeto. Com estes querysets o número de consultas de uma listagem é fixo,
+independente do número de produtos, SKUs ou ofertas (ver `test_query_counts`).
+
+As listagens de "meus produtos" usam um caminho ainda mais enxuto
+(`meus_produtos_para_leitura` + `variacoes_formatadas`): linhas de `values()`
+com a primeira imagem resolvida por subconsulta, sem instanciar modelos.
+
+Os serializers não devem reordenar nem filtrar essas relações (`order_by`,
+`first()`), pois isso descarta o prefetch; a ordem já vem daqui.
+"""
+from django.db.models import F, OuterRef, Prefetch, Subquery
+
+from .models import Produto, SKU, ValorAtributo, ImagemSKU, OfertaProduto
+
+
+def _valores(caminho='valores'):
+    return Prefetch(caminho, queryset=ValorAtributo.objects.select_related('atributo').order_by('atributo__nome', 'valor'))
+
+
+def _imagens(caminho='imagens'):
+    return Prefetch(caminho, queryset=ImagemSKU.objects.order_by('ordem', 'id'))
+
+
+def skus_para_leitura():
+    return SKU.objects.prefetch_related(_valores(), _imagens())
+
+
+def produtos_para_leitura():
+    return Produto.objects.prefetch_related(Prefetch('skus', queryset=skus_para_leitura()))
+
+
+def ofertas_para_leitura():
+    return OfertaProduto.objects.select_related(
+        'sku__produto__subcategoria__categoria_loja'
+    ).prefetch_related(_valores('sku__valores'), _imagens('sku__imagens'))
+
+
+def meus_produtos_para_leitura(vendedor):
+    """
+    Ofertas do vendedor como dicionários com tudo o que a listagem mostra:
+    nomes do produto e da categoria por JOIN e o caminho da primeira imagem do
+    SKU (menor `ordem`) por subconsulta. Uma única consulta por página.
+    """
+    primeira_imagem = ImagemSKU.objects.filter(sku=OuterRef('sku')).order_by('ordem', 'id').values('imagem')[:1]
+    return OfertaProduto.objects.filter(vendedor=vendedor).values(
+        'pk', 'sku_id', 'preco', 'quantidade_disponivel',
+        nome_produto=F('sku__produto__nome'),
+        descricao=F('sku__produto__descricao'),
+        nome_categoria=F('sku__produto__subcategoria__categoria_loja__nome'),
+        imagem=Subquery(primeira_imagem),
+    )
+
+
+def variacoes_formatadas(sku_ids):
+    """{sku_id: 'Cor: Azul - Tamanho: M'} em uma consulta, já na ordem de exibição."""
+    linhas = SKU.valores.through.objects.filter(sku_id__in=sku_ids).order_by(
+        'sku_id', 'valoratributo__atributo__nome', 'valoratributo__valor'
+    ).values_list('sku_id', 'valoratributo__atributo__nome', 'valoratributo__valor')
+    partes = {}
+    for sku_id, atributo, valor in linhas:
+        partes.setdefault(sku_id, []).append(f"{atributo}: {valor}")
+    return {sku_id: " - ".join(valores) for sku_id, valores in partes.items()}
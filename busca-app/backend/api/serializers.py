@@ -6,9 +6,39 @@ from .models import (
 )
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.conf import settings # Importar settings
+from django.core.files.storage import default_storage
 
+from .querysets import variacoes_formatadas
 
 
+class CamposDinamicosMixin:
+    """
+    Permite ao cliente pedir só alguns campos: `?fields=id,nome,preco`.
+
+    Vale apenas para leituras (GET) e para o serializer de nível mais alto da
+    resposta; os aninhados continuam completos. Nomes desconhecidos são
+    ignorados.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+        pedidos = campos_pedidos(request)
+        if pedidos is None:
+            return
+        for campo in set(self.fields) - pedidos:
+            self.fields.pop(campo)
+
+
+def campos_pedidos(request):
+    """Conjunto de campos de `?fields=`, ou None se o cliente não restringiu."""
+    pedidos = getattr(request, 'query_params', request.GET).get('fields')
+    if not pedidos:
+        return None
+    return {campo.strip() for campo in pedidos.split(',') if campo.strip()}
+
 
 class UserSerializer(serializers.ModelSerializer):
     senha = serializers.CharField(write_only=True, required=True, style={'input_type': 'password'})
@@ -59,12 +89,12 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
             data['user']['tipo_usuario'] = 'Administrador'
         return data
 
-class AtributoSerializer(serializers.ModelSerializer):
+class AtributoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = Atributo
         fields = '__all__'
 
-class ValorAtributoSerializer(serializers.ModelSerializer):
+class ValorAtributoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     atributo = serializers.StringRelatedField(read_only=True)
     atributo_id = serializers.PrimaryKeyRelatedField(
         queryset=Atributo.objects.all(), source='atributo', write_only=True
@@ -79,7 +109,7 @@ class ImagemSKUSerializer(serializers.ModelSerializer):
         model = ImagemSKU
         fields = ['id', 'imagem', 'ordem']
 
-class SKUSerializer(serializers.ModelSerializer):
+class SKUSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     valores = ValorAtributoSerializer(many=True, read_only=True)
     imagens = ImagemSKUSerializer(many=True, read_only=True)
 
@@ -87,7 +117,7 @@ class SKUSerializer(serializers.ModelSerializer):
         model = SKU
         fields = ['id', 'produto', 'codigo_sku', 'valores', 'imagens']
 
-class ProdutoSerializer(serializers.ModelSerializer):
+class ProdutoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     # Aninha os SKUs para detalhar o produto
     skus = SKUSerializer(many=True, read_only=True)
 
@@ -95,7 +125,7 @@ class ProdutoSerializer(serializers.ModelSerializer):
         model = Produto
         fields = ['id', 'nome', 'descricao', 'subcategoria', 'skus']
 
-class OfertaProdutoSerializer(serializers.ModelSerializer):
+class OfertaProdutoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     # Aninha o SKU para dar detalhes da oferta
     sku = SKUSerializer(read_only=True)
     sku_id = serializers.PrimaryKeyRelatedField(
@@ -107,24 +137,24 @@ class OfertaProdutoSerializer(serializers.ModelSerializer):
         fields = ['id', 'vendedor', 'sku', 'sku_id', 'preco', 'quantidade_disponivel', 'ativo']
         read_only_fields = ['vendedor']
 
-class CategoriaLojaSerializer(serializers.ModelSerializer):
+class CategoriaLojaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = CategoriaLoja
         fields = '__all__'
 
-class SubcategoriaProdutoSerializer(serializers.ModelSerializer):
+class SubcategoriaProdutoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     categoria_loja_nome = serializers.CharField(source='categoria_loja.nome', read_only=True)
 
     class Meta:
         model = SubcategoriaProduto
         fields = ['id', 'nome', 'categoria_loja', 'categoria_loja_nome']
 
-class EnderecoSerializer(serializers.ModelSerializer):
+class EnderecoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = Endereco
         fields = '__all__'
 
-class ClienteSerializer(serializers.ModelSerializer):
+class ClienteSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     usuario = UserSerializer(read_only=True)
     endereco = EnderecoSerializer(required=False, allow_null=True)
 
@@ -167,7 +197,7 @@ class ClienteSerializer(serializers.ModelSerializer):
 
         return instance
 
-class VendedorSerializer(serializers.ModelSerializer):
+class VendedorSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     usuario = UserSerializer(read_only=True)
     endereco = EnderecoSerializer(required=False, allow_null=True)
 
@@ -210,7 +240,7 @@ class VendedorSerializer(serializers.ModelSerializer):
 
         return instance
 
-class AdminSerializer(serializers.ModelSerializer):
+class AdminSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     usuario = UserSerializer(read_only=True)
 
     class Meta:
@@ -223,7 +253,7 @@ class AdminSerializer(serializers.ModelSerializer):
         return admin
 
 
-class AvaliacaoLojaSerializer(serializers.ModelSerializer):
+class AvaliacaoLojaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = AvaliacaoLoja
         fields = '__all__'
@@ -241,7 +271,7 @@ class SugestaoSerializer(serializers.ModelSerializer):
         fields = ['id', 'vendedor', 'url_produto', 'nome_produto', 'preco_atual', 'ultima_coleta']
         read_only_fields = ['vendedor', 'ultima_coleta'] # Removed nome_produto and preco_atual"""
 
-class MeusProdutosSerializer(serializers.ModelSerializer):
+class MeusProdutosSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     nome_produto = serializers.CharField(source='sku.produto.nome', read_only=True)
     descricao = serializers.CharField(source='sku.produto.descricao', read_only=True)
     nome_categoria = serializers.CharField(source='sku.produto.subcategoria.categoria_loja.nome', read_only=True)
@@ -262,12 +292,13 @@ class MeusProdutosSerializer(serializers.ModelSerializer):
         ]
 
     def get_variacao_formatada(self, obj):
-        valores = obj.sku.valores.all().order_by('atributo__nome')
+        # Valores e imagens já vêm ordenados do prefetch (ver api/querysets.py).
+        valores = obj.sku.valores.all()
         return " - ".join([f"{v.atributo.nome}: {v.valor}" for v in valores])
     
     def get_url_imagem(self, obj):
         request = self.context.get('request')
-        primeira_imagem = obj.sku.imagens.first()
+        primeira_imagem = next(iter(obj.sku.imagens.all()), None)
         if primeira_imagem and primeira_imagem.imagem and request:
             return request.build_absolute_uri(primeira_imagem.imagem.url)
         
@@ -276,6 +307,58 @@ class MeusProdutosSerializer(serializers.ModelSerializer):
         return default_image_url
 
 
+def serializar_meus_produtos(linhas, request):
+    """
+    Mesma saída de `MeusProdutosSerializer`, para as linhas de
+    `meus_produtos_para_leitura`. Sem instâncias de modelo nem campos do DRF
+    por linha: as variações vêm de uma consulta para a página inteira e as
+    URLs absolutas são montadas a partir de uma raiz calculada uma vez.
+    """
+    linhas = list(linhas)
+    variacoes = variacoes_formatadas({linha['sku_id'] for linha in linhas})
+    preco = serializers.DecimalField(max_digits=10, decimal_places=2)
+    raiz = request.build_absolute_uri('/')[:-1]
+    imagem_padrao = request.build_absolute_uri(settings.MEDIA_URL + 'ia.png')
+    pedidos = campos_pedidos(request)
+
+    resultado = []
+    for linha in linhas:
+        url_imagem = imagem_padrao
+        if linha['imagem']:
+            url_imagem = default_storage.url(linha['imagem'])
+            if url_imagem.startswith('/'):
+                url_imagem = raiz + url_imagem
+        item = {
+            'id': linha['pk'],
+            'preco': preco.to_representation(linha['preco']),
+            'quantidade_disponivel': linha['quantidade_disponivel'],
+            'nome_produto': linha['nome_produto'],
+            'descricao': linha['descricao'],
+            'nome_categoria': linha['nome_categoria'],
+            'variacao_formatada': variacoes.get(linha['sku_id'], ''),
+            'url_imagem': url_imagem,
+        }
+        if pedidos is not None:
+            item = {campo: valor for campo, valor in item.items() if campo in pedidos}
+        resultado.append(item)
+    return resultado
+
+
+class PrecoComparadoSerializer(serializers.Serializer):
+    """Linhas de `comparacao.mais_baratos` (dicionários, não instâncias)."""
+    origem = serializers.CharField()
+    objeto_id = serializers.IntegerField()
+    sku_id = serializers.IntegerField()
+    produto_id = serializers.IntegerField()
+    preco = serializers.DecimalField(max_digits=10, decimal_places=2)
+    vendedor_id = serializers.IntegerField(allow_null=True)
+    nome_loja = serializers.CharField()
+    url_produto = serializers.CharField()
+    latitude = serializers.DecimalField(max_digits=10, decimal_places=8, allow_null=True)
+    longitude = serializers.DecimalField(max_digits=11, decimal_places=8, allow_null=True)
+    distancia_km = serializers.FloatField(required=False)
+
+
 class RecuperarSenhaSerializer(serializers.Serializer):
     email = serializers.EmailField()
 
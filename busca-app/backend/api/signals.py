@@ -0,0 +1,106 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from . import busca, comparacao
+from .cache import invalidar_modelo
+from .models import (
+    CategoriaLoja, SubcategoriaProduto, Atributo, Vendedor, Usuario, Endereco, Produto, SKU, ValorAtributo, OfertaProduto
+)
+
+# Modelos cujas respostas ficam em cache (ver `api.cache.RespostaEmCacheMixin`).
+MODELOS_EM_CACHE = (CategoriaLoja, SubcategoriaProduto, Atributo, Vendedor, Usuario, Endereco)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidar_respostas_em_cache(sender, update_fields=None, **kwargs):
+    if sender not in MODELOS_EM_CACHE:
+        return
+    # O login só atualiza `last_login`, que não aparece em nenhuma resposta.
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    # Invalida só depois do commit, para que ninguém guarde de novo dados antigos.
+    transaction.on_commit(lambda: invalidar_modelo(sender))
+
+
+# --- Índice de busca (ver `api.busca`) ---
+
+@receiver(post_save, sender=Produto)
+def indexar_produto(sender, instance, created, **kwargs):
+    busca.indexar_depois_do_commit(busca.indexar_produtos, [instance.pk])
+    if not created:
+        comparacao.atualizar_depois_do_commit(comparacao.atualizar_produto, instance.pk, instance.subcategoria_id)
+
+
+@receiver(post_delete, sender=Produto)
+def remover_produto_da_busca(sender, instance, **kwargs):
+    busca.remover('produto', [instance.pk])
+
+
+@receiver(post_save, sender=SKU)
+@receiver(post_delete, sender=SKU)
+def reindexar_produto_do_sku(sender, instance, **kwargs):
+    busca.indexar_depois_do_commit(busca.indexar_produtos, [instance.produto_id])
+
+
+@receiver(m2m_changed, sender=SKU.valores.through)
+def reindexar_valores_do_sku(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # `valor.skus.add(...)`: instance é o ValorAtributo. Um clear reverso não informa os SKUs.
+        produto_ids = SKU.objects.filter(pk__in=pk_set or ()).values_list('produto_id', flat=True)
+    else:
+        produto_ids = [instance.produto_id]
+    busca.indexar_depois_do_commit(busca.indexar_produtos, list(produto_ids))
+
+
+@receiver(post_save, sender=ValorAtributo)
+def reindexar_produtos_do_valor(sender, instance, created, **kwargs):
+    if created:
+        return
+    produto_ids = SKU.objects.filter(valores=instance).values_list('produto_id', flat=True).distinct()
+    busca.indexar_depois_do_commit(busca.indexar_produtos, list(produto_ids))
+
+
+@receiver(post_save, sender=Vendedor)
+def indexar_vendedor(sender, instance, **kwargs):
+    busca.indexar_depois_do_commit(busca.indexar_vendedores, [instance.pk])
+    comparacao.atualizar_depois_do_commit(comparacao.atualizar_vendedores, [instance.pk])
+
+
+@receiver(post_delete, sender=Vendedor)
+def remover_vendedor_da_busca(sender, instance, **kwargs):
+    busca.remover('vendedor', [instance.pk])
+
+
+@receiver(post_save, sender='scraper.ProdutosMonitoradosExternos')
+def indexar_monitorado(sender, instance, **kwargs):
+    busca.indexar_depois_do_commit(busca.indexar_monitorados, [instance.pk])
+    comparacao.atualizar_depois_do_commit(comparacao.atualizar_monitorados, [instance.pk])
+
+
+@receiver(post_delete, sender='scraper.ProdutosMonitoradosExternos')
+def remover_monitorado(sender, instance, **kwargs):
+    busca.remover('monitorado', [instance.pk])
+    # Sem o monitoramento, `atualizar_monitorados` tira a linha da comparação.
+    comparacao.atualizar_depois_do_commit(comparacao.atualizar_monitorados, [instance.pk])
+
+
+# --- Comparação de preços (ver `api.comparacao`) ---
+# As linhas de monitorados e lojas são mantidas junto com o índice de busca, acima.
+
+@receiver(post_save, sender=OfertaProduto)
+@receiver(post_delete, sender=OfertaProduto)
+def atualizar_comparacao_da_oferta(sender, instance, **kwargs):
+    comparacao.atualizar_depois_do_commit(comparacao.atualizar_ofertas, [instance.pk])
+
+
+@receiver(post_save, sender=Endereco)
+def atualizar_comparacao_do_endereco(sender, instance, created, **kwargs):
+    if created:
+        return
+    vendedor_ids = list(Vendedor.objects.filter(endereco=instance).values_list('pk', flat=True))
+    if vendedor_ids:
+        comparacao.atualizar_depois_do_commit(comparacao.atualizar_vendedores, vendedor_ids)
@@ -0,0 +1,100 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from scraper.models import ProdutosMonitoradosExternos
+from . import busca
+from .models import (
+    Usuario, CategoriaLoja, SubcategoriaProduto, Produto, Atributo, ValorAtributo, SKU, Vendedor, DocumentoBusca
+)
+
+
+class TokenizacaoTest(TestCase):
+    def test_accents_case_stopwords_and_plurals_are_normalized(self):
+        self.assertEqual(busca.tokenizar('Câmeras DE Segurança'), ['camera', 'seguranca'])
+        self.assertEqual(busca.tokenizar('Celulares e Cartões 128GB'), ['celular', 'cartao', '128gb'])
+        self.assertEqual(busca.tokenizar('celular cartão'), ['celular', 'cartao'])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class BuscaTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        categoria = CategoriaLoja.objects.create(nome='Eletrônicos')
+        self.subcategoria = SubcategoriaProduto.objects.create(nome='Celulares', categoria_loja=categoria)
+        self.usuario = Usuario.objects.create_user(email='vendedor@test.com', password='pw', tipo_usuario='Vendedor')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vendedor = Vendedor.objects.create(
+                usuario=self.usuario, nome_loja='Loja do Celular', categoria_loja=categoria, status_aprovacao='Aprovado'
+            )
+            self.celular = Produto.objects.create(nome='Celular Galáxia', descricao='Tela grande', subcategoria=self.subcategoria)
+            self.capa = Produto.objects.create(nome='Capa', descricao='Capa para celular', subcategoria=self.subcategoria)
+            sku = SKU.objects.create(produto=self.capa, codigo_sku='CAPA-1')
+            sku.valores.add(ValorAtributo.objects.create(atributo=Atributo.objects.create(nome='Cor'), valor='Azul-marinho'))
+
+    def buscar(self, q, **params):
+        resposta = self.client.get(reverse('busca'), {'q': q, **params})
+        self.assertEqual(resposta.status_code, 200)
+        return [(r['tipo'], r['id']) for r in resposta.json()['resultados']]
+
+    def test_ranks_title_matches_above_description_matches(self):
+        self.assertEqual(
+            self.buscar('celulares', tipo='produto'),
+            [('produto', self.celular.pk), ('produto', self.capa.pk)]
+        )
+
+    def test_documents_matching_more_terms_come_first_and_last_term_is_prefix(self):
+        self.assertEqual(self.buscar('capa azul')[0], ('produto', self.capa.pk))
+        self.assertEqual(self.buscar('galax')[0], ('produto', self.celular.pk))
+
+    def test_index_follows_saves_and_deletes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.celular.nome = 'Smartphone Galáxia'
+            self.celular.save()
+        self.assertEqual(self.buscar('smartphone'), [('produto', self.celular.pk)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vendedor.status_aprovacao = 'Rejeitado'
+            self.vendedor.save()
+        self.assertNotIn(('vendedor', self.vendedor.pk), self.buscar('loja'))
+
+        self.capa.delete()
+        self.assertFalse(DocumentoBusca.objects.filter(tipo='produto', objeto_id=self.capa.pk).exists())
+
+    def test_monitored_products_are_only_visible_to_their_seller(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            monitorado = ProdutosMonitoradosExternos.objects.create(
+                vendedor=self.vendedor, url_produto='https://loja.com/p/1', nome_produto='Fone Bluetooth'
+            )
+        self.assertEqual(self.buscar('fone'), [])
+
+        self.client.force_authenticate(self.usuario)
+        self.assertEqual(self.buscar('fone'), [('monitorado', monitorado.pk)])
+
+    def test_query_cost_does_not_depend_on_catalog_size(self):
+        busca.buscar('celular')  # aquece o total de documentos no cache
+        # Expansão do prefixo, frequências e resultados.
+        with self.assertNumQueries(3):
+            busca.buscar('celular tela')
+
+    def test_short_prefixes_match_exactly_and_expansion_is_capped(self):
+        self.assertEqual(self.buscar('ca'), [])
+        self.assertIn(('produto', self.capa.pk), self.buscar('cap'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for nome in ('Caneta', 'Caneca', 'Canivete'):
+                Produto.objects.create(nome=nome, subcategoria=self.subcategoria)
+        self.assertEqual(len(self.buscar('can')), 3)
+        with self.settings(API_BUSCA={'MAX_TERMOS_PREFIXO': 2}):
+            self.assertEqual(busca._expandir_prefixo('can', busca.get_busca_config()), ['caneca', 'caneta'])
+            self.assertEqual(len(self.buscar('can')), 2)
+
+    def test_rejects_empty_query_and_unknown_type(self):
+        self.assertEqual(self.client.get(reverse('busca')).status_code, 400)
+        self.assertEqual(self.client.get(reverse('busca'), {'q': 'x', 'tipo': 'pedido'}).status_code, 400)
+
+    def test_reindex_rebuilds_from_scratch(self):
+        DocumentoBusca.objects.all().delete()
+        totais = busca.reindexar_tudo(tamanho_lote=1)
+        self.assertEqual(totais['produto'], 2)
+        self.assertEqual(self.buscar('galaxia'), [('produto', self.celular.pk)])
@@ -0,0 +1,61 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .models import CategoriaLoja, SubcategoriaProduto, Usuario, Vendedor
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM)
+class RespostaEmCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.categoria = CategoriaLoja.objects.create(nome='Eletrônicos')
+        self.outra = CategoriaLoja.objects.create(nome='Moda')
+        SubcategoriaProduto.objects.create(nome='Celulares', categoria_loja=self.categoria)
+        SubcategoriaProduto.objects.create(nome='Camisas', categoria_loja=self.outra)
+
+    def test_serves_from_cache_and_answers_304(self):
+        url = reverse('categorialoja-list')
+        primeira = self.client.get(url)
+
+        with self.assertNumQueries(0):
+            segunda = self.client.get(url)
+            nao_modificada = self.client.get(url, HTTP_IF_NONE_MATCH=primeira['ETag'])
+
+        self.assertEqual(segunda.json(), primeira.json())
+        self.assertEqual(nao_modificada.status_code, 304)
+
+    def test_filter_is_part_of_key_and_save_invalidates(self):
+        url = reverse('subcategoriaproduto-list')
+        filtrada = self.client.get(url, {'categoria_loja': self.categoria.pk})
+        self.assertEqual([s['nome'] for s in filtrada.json()], ['Celulares'])
+        self.assertEqual(len(self.client.get(url).json()), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.categoria.nome = 'Eletrônicos e Celulares'
+            self.categoria.save()
+
+        atualizada = self.client.get(url, {'categoria_loja': self.categoria.pk})
+        self.assertNotEqual(atualizada['ETag'], filtrada['ETag'])
+        self.assertEqual(atualizada.json()[0]['categoria_loja_nome'], 'Eletrônicos e Celulares')
+
+    def test_seller_listing_is_only_cached_for_public_variant(self):
+        vendedor_user = Usuario.objects.create_user(email='v@test.com', password='pw', tipo_usuario='Vendedor')
+        Vendedor.objects.create(usuario=vendedor_user, nome_loja='Loja', categoria_loja=self.categoria, status_aprovacao='Aprovado')
+        cliente = Usuario.objects.create_user(email='c@test.com', password='pw', tipo_usuario='Cliente')
+        url = reverse('vendedor-list')
+
+        self.client.force_authenticate(cliente)
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.client.get(url).json()['results']), 1)
+
+        # O vendedor vê só o próprio perfil: consulta o banco em toda requisição.
+        self.client.force_authenticate(vendedor_user)
+        self.client.get(url)
+        with self.assertNumQueries(2):
+            self.client.get(url)
@@ -0,0 +1,99 @@
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from scraper.models import ProdutosMonitoradosExternos
+from scraper.scraping_service import save_page_data
+from . import comparacao
+from .models import Usuario, CategoriaLoja, SubcategoriaProduto, Produto, SKU, OfertaProduto, Vendedor, Endereco, PrecoComparado
+
+
+class ComparacaoPrecosTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.categoria = CategoriaLoja.objects.create(nome='Eletrônicos')
+        self.subcategoria = SubcategoriaProduto.objects.create(nome='Celulares', categoria_loja=self.categoria)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.produto = Produto.objects.create(nome='Celular', subcategoria=self.subcategoria)
+            self.sku = SKU.objects.create(produto=self.produto, codigo_sku='CEL-1')
+            # São Paulo, Campinas (~85 km) e Rio de Janeiro (~360 km).
+            self.sp = self.criar_vendedor('sp', '-23.55', '-46.63')
+            self.campinas = self.criar_vendedor('campinas', '-22.90', '-47.06')
+            self.rio = self.criar_vendedor('rio', '-22.91', '-43.17')
+            self.ofertas = {
+                vendedor: OfertaProduto.objects.create(vendedor=vendedor, sku=self.sku, preco=preco)
+                for vendedor, preco in ((self.sp, 900), (self.campinas, 850), (self.rio, 800))
+            }
+
+    def criar_vendedor(self, nome, latitude, longitude):
+        usuario = Usuario.objects.create_user(email=f'{nome}@test.com', password='pw', tipo_usuario='Vendedor')
+        endereco = Endereco.objects.create(logradouro='Rua', cidade=nome, estado='SP', cep='00000-000',
+                                           latitude=Decimal(latitude), longitude=Decimal(longitude))
+        return Vendedor.objects.create(usuario=usuario, nome_loja=f'Loja {nome}', categoria_loja=self.categoria,
+                                       status_aprovacao='Aprovado', endereco=endereco)
+
+    def comparar(self, **params):
+        resposta = self.client.get(reverse('comparacao-precos'), params)
+        self.assertEqual(resposta.status_code, 200)
+        return [(r['nome_loja'], r['preco']) for r in resposta.json()['resultados']]
+
+    def test_cheapest_offers_first_for_sku_product_and_subcategory(self):
+        esperado = [('Loja rio', '800.00'), ('Loja campinas', '850.00')]
+        self.assertEqual(self.comparar(sku=self.sku.pk, limite=2), esperado)
+        self.assertEqual(self.comparar(produto=self.produto.pk, limite=2), esperado)
+        self.assertEqual(self.comparar(subcategoria=self.subcategoria.pk, limite=2), esperado)
+
+    def test_geographic_filter_uses_store_address(self):
+        self.assertEqual(
+            self.comparar(sku=self.sku.pk, lat='-23.55', lng='-46.63', raio_km=100),
+            [('Loja campinas', '850.00'), ('Loja sp', '900.00')]
+        )
+
+    def test_table_follows_offer_and_store_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            oferta = self.ofertas[self.sp]
+            oferta.preco = 700
+            oferta.save()
+            self.ofertas[self.rio].delete()
+            self.campinas.status_aprovacao = 'Rejeitado'
+            self.campinas.save()
+        self.assertEqual(self.comparar(sku=self.sku.pk), [('Loja sp', '700.00')])
+
+    def test_monitored_competitor_prices_follow_scraper_writes_and_stay_private(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ProdutosMonitoradosExternos.objects.create(
+                vendedor=self.sp, url_produto='https://concorrente.com/p/1', nome_produto='Celular', preco_atual=990, sku=self.sku
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            save_page_data('https://concorrente.com/p/1', 'Celular', 750)
+
+        self.assertNotIn(('concorrente.com', '750.00'), self.comparar(sku=self.sku.pk))
+        self.client.force_authenticate(Usuario.objects.get(pk=self.sp.pk))
+        self.assertEqual(self.comparar(sku=self.sku.pk, origem='monitorado'), [('concorrente.com', '750.00')])
+
+    def test_deleted_monitor_leaves_comparison(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            monitorado = ProdutosMonitoradosExternos.objects.create(
+                vendedor=self.sp, url_produto='https://concorrente.com/p/1', nome_produto='Celular', preco_atual=750, sku=self.sku
+            )
+        self.assertEqual(PrecoComparado.objects.filter(origem='monitorado').count(), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            monitorado.delete()
+
+        self.assertFalse(PrecoComparado.objects.filter(origem='monitorado').exists())
+
+    def test_single_query_per_comparison(self):
+        with self.assertNumQueries(1):
+            comparacao.mais_baratos(sku_id=self.sku.pk, limite=5)
+
+    def test_requires_exactly_one_target(self):
+        self.assertEqual(self.client.get(reverse('comparacao-precos')).status_code, 400)
+        self.assertEqual(self.client.get(reverse('comparacao-precos'), {'sku': self.sku.pk, 'produto': self.produto.pk}).status_code, 400)
+
+    def test_rebuild_restores_table(self):
+        PrecoComparado.objects.all().delete()
+        self.assertEqual(comparacao.reconstruir(tamanho_lote=2), {'oferta': 3, 'monitorado': 0})
+        self.assertEqual(len(self.comparar(sku=self.sku.pk)), 3)
@@ -0,0 +1,65 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .models import Usuario, CategoriaLoja, SubcategoriaProduto, Produto, SKU, OfertaProduto, Vendedor
+
+
+@override_settings(MEDIA_ROOT='/tmp/test_pagination_media')
+class PaginacaoPorCursorTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.usuario = Usuario.objects.create_user(email='vendedor@test.com', password='pw', tipo_usuario='Vendedor')
+        categoria = CategoriaLoja.objects.create(nome='Moda')
+        self.vendedor = Vendedor.objects.create(usuario=self.usuario, nome_loja='Loja', categoria_loja=categoria, status_aprovacao='Aprovado')
+        subcategoria = SubcategoriaProduto.objects.create(nome='Roupas', categoria_loja=categoria)
+        nomes = ['Meia', 'Camisa', 'Bermuda', 'Camisa', 'Agasalho']
+        self.ofertas = [
+            OfertaProduto.objects.create(
+                vendedor=self.vendedor, preco=50 + i,
+                sku=SKU.objects.create(produto=Produto.objects.create(nome=nome, subcategoria=subcategoria), codigo_sku=f'C-{i}'),
+            )
+            for i, nome in enumerate(nomes)
+        ]
+        self.client.force_authenticate(self.usuario)
+
+    def test_pages_follow_cursor_without_repeating_items(self):
+        url = f"{reverse('oferta-list')}?page_size=2"
+        ids = []
+        paginas = 0
+        while url:
+            dados = self.client.get(url).json()
+            self.assertLessEqual(len(dados['results']), 2)
+            ids += [item['id'] for item in dados['results']]
+            url = dados['next']
+            paginas += 1
+
+        self.assertEqual(paginas, 3)
+        self.assertEqual(ids, sorted((oferta.pk for oferta in self.ofertas), reverse=True))
+
+    def test_meus_produtos_pages_keep_product_name_order(self):
+        url = f"{reverse('produto-meus-produtos')}?page_size=2"
+        itens = []
+        while url:
+            dados = self.client.get(url).json()
+            itens += [(item['nome_produto'], item['id']) for item in dados['results']]
+            url = dados['next']
+
+        self.assertEqual(itens, sorted((o.sku.produto.nome, o.pk) for o in self.ofertas))
+
+    def test_page_size_is_capped(self):
+        with self.settings(API_PAGINACAO={'TAMANHO_MAXIMO': 3}):
+            dados = self.client.get(f"{reverse('oferta-list')}?page_size=100").json()
+        self.assertEqual(len(dados['results']), 3)
+        self.assertIsNotNone(dados['next'])
+
+    def test_fields_limits_serialized_fields(self):
+        dados = self.client.get(f"{reverse('oferta-list')}?fields=id,preco,inexistente").json()
+        self.assertEqual({frozenset(item) for item in dados['results']}, {frozenset({'id', 'preco'})})
+
+    def test_fields_is_ignored_on_writes(self):
+        resposta = self.client.patch(
+            f"{reverse('oferta-detail', args=[self.ofertas[0].pk])}?fields=id", {'preco': '99.00'}, format='json'
+        )
+        self.assertEqual(resposta.status_code, 200)
+        self.assertIn('preco', resposta.json())
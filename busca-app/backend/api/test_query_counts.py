@@ -0,0 +1,69 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .models import (
+    Usuario, CategoriaLoja, SubcategoriaProduto, Produto, Atributo, ValorAtributo, SKU, ImagemSKU,
+    OfertaProduto, Vendedor
+)
+
+
+class OrcamentoDeConsultasMixin:
+    """
+    Garante que um endpoint faz o mesmo número de consultas com poucos ou
+    muitos resultados (sem N+1) e que esse número cabe no orçamento.
+    """
+
+    def contar_consultas(self, url):
+        # Usuário recarregado a cada requisição, para que caches do objeto não mascarem consultas.
+        self.client.force_authenticate(Usuario.objects.get(pk=self.usuario.pk))
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get(url)
+        self.assertEqual(resposta.status_code, 200)
+        return len(consultas)
+
+    def assertOrcamentoConstante(self, url, orcamento, criar_mais):
+        poucos = self.contar_consultas(url)
+        criar_mais()
+        muitos = self.contar_consultas(url)
+        self.assertEqual(poucos, muitos, f'{url}: {poucos} consultas com poucos resultados, {muitos} com muitos (N+1).')
+        self.assertLessEqual(muitos, orcamento, f'{url}: {muitos} consultas, orçamento de {orcamento}.')
+
+
+@override_settings(MEDIA_ROOT='/tmp/test_query_counts_media')
+class ConsultasCatalogoTest(OrcamentoDeConsultasMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.usuario = Usuario.objects.create_user(email='vendedor@test.com', password='pw', tipo_usuario='Vendedor')
+        categoria = CategoriaLoja.objects.create(nome='Moda')
+        self.vendedor = Vendedor.objects.create(usuario=self.usuario, nome_loja='Loja', categoria_loja=categoria, status_aprovacao='Aprovado')
+        self.subcategoria = SubcategoriaProduto.objects.create(nome='Camisas', categoria_loja=categoria)
+        self.cor = Atributo.objects.create(nome='Cor')
+        self.tamanho = Atributo.objects.create(nome='Tamanho')
+        self.criar_produtos(1)
+
+    def criar_produtos(self, quantidade, skus_por_produto=3):
+        for _ in range(quantidade):
+            produto = Produto.objects.create(nome=f'Camisa {Produto.objects.count()}', subcategoria=self.subcategoria)
+            for i in range(skus_por_produto):
+                sku = SKU.objects.create(produto=produto, codigo_sku=f'{produto.pk}-{i}')
+                sku.valores.add(
+                    ValorAtributo.objects.get_or_create(atributo=self.cor, valor=f'Cor {i}')[0],
+                    ValorAtributo.objects.get_or_create(atributo=self.tamanho, valor='M')[0],
+                )
+                ImagemSKU.objects.create(sku=sku, imagem=f'produtos/{sku.pk}.png', ordem=0)
+                OfertaProduto.objects.create(vendedor=self.vendedor, sku=sku, preco=50 + i)
+
+    def test_produtos(self):
+        self.assertOrcamentoConstante(reverse('produto-list'), 6, lambda: self.criar_produtos(10))
+
+    def test_skus(self):
+        self.assertOrcamentoConstante(reverse('sku-list'), 5, lambda: self.criar_produtos(10))
+
+    def test_ofertas(self):
+        self.assertOrcamentoConstante(reverse('oferta-list'), 5, lambda: self.criar_produtos(10))
+
+    def test_meus_produtos(self):
+        self.assertOrcamentoConstante(reverse('produto-meus-produtos'), 4, lambda: self.criar_produtos(10))
@@ -2,7 +2,8 @@ from django.test import TestCase
 from django.contrib.auth import get_user_model, authenticate
 from .models import Usuario, Cliente, Endereco, CategoriaLoja, Vendedor, SubcategoriaProduto, Produto, Atributo, ValorAtributo, SKU, ImagemSKU, OfertaProduto
 from rest_framework.exceptions import ValidationError, AuthenticationFailed
-from .serializers import UserSerializer, MyTokenObtainPairSerializer, ClienteSerializer, VendedorSerializer, EnderecoSerializer, MeusProdutosSerializer
+from .querysets import meus_produtos_para_leitura, ofertas_para_leitura
+from .serializers import UserSerializer, MyTokenObtainPairSerializer, ClienteSerializer, VendedorSerializer, EnderecoSerializer, MeusProdutosSerializer, serializar_meus_produtos
 from django.test import RequestFactory
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.conf import settings
@@ -370,4 +371,23 @@ class MeusProdutosSerializerTests(TestCase):
         serializer = MeusProdutosSerializer(instance=self.oferta, context={'request': request})
         
         default_image_url = request.build_absolute_uri(settings.MEDIA_URL + 'ia.png')
-        self.assertEqual(serializer.data['url_imagem'], default_image_url)
\ No newline at end of file
+        self.assertEqual(serializer.data['url_imagem'], default_image_url)
+
+    def test_fast_path_matches_serializer_output(self):
+        """
+        serializar_meus_produtos produces the same payload as MeusProdutosSerializer.
+        """
+        self.sku.valores.add(ValorAtributo.objects.create(atributo=Atributo.objects.create(nome='Armazenamento'), valor='128GB'))
+        ImagemSKU.objects.create(sku=self.sku, imagem='produtos/segunda.jpg', ordem=1)
+        ImagemSKU.objects.create(sku=self.sku, imagem='produtos/primeira.jpg', ordem=0)
+        outro_sku = SKU.objects.create(produto=self.produto, codigo_sku='SP-BCO-01')
+        OfertaProduto.objects.create(vendedor=self.vendedor, sku=outro_sku, preco=10)
+        request = self.factory.get('/')
+
+        with self.assertNumQueries(2):
+            rapido = serializar_meus_produtos(meus_produtos_para_leitura(self.vendedor).order_by('pk'), request)
+        completo = MeusProdutosSerializer(ofertas_para_leitura().order_by('pk'), many=True, context={'request': request}).data
+
+        self.assertEqual(rapido, [dict(item) for item in completo])
+        self.assertEqual(rapido[0]['variacao_formatada'], 'Armazenamento: 128GB - Cor: Preto')
+
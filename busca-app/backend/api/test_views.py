@@ -6,9 +6,9 @@ from django.core import mail
 from unittest.mock import patch, MagicMock
 from api.models import (
     Usuario, Cliente, Vendedor, CategoriaLoja, SubcategoriaProduto, Produto, SKU, 
-    OfertaProduto, ImagemSKU, Atributo, ValorAtributo, Endereco, AvaliacaoLoja,
-    ProdutosMonitoradosExternos, HistoricoPrecos, Sugestao
+    OfertaProduto, ImagemSKU, Atributo, ValorAtributo, Endereco, AvaliacaoLoja, Sugestao
 )
+from scraper.models import ProdutosMonitoradosExternos, HistoricoPrecos
 import uuid
 import json
 from django.utils import timezone
@@ -16,8 +16,8 @@ import datetime
 from rest_framework.test import APIClient
 from django.core.files.uploadedfile import SimpleUploadedFile
 from decimal import Decimal
-from api.serializers import OfertaProdutoSerializer, ProdutosMonitoradosExternosSerializer
-from api.views import OfertaProdutoViewSet, ProdutosMonitoradosExternosViewSet
+from api.serializers import OfertaProdutoSerializer
+from api.views import OfertaProdutoViewSet
 
 User = get_user_model()
 
@@ -426,7 +426,7 @@ class ProdutoViewSetTest(BaseSetup):
         self.client.force_authenticate(user=self.vendedor_user)
         response = self.client.get(self.list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test_list_produtos_as_cliente_forbidden(self):
         self.client.force_authenticate(user=self.cliente_user)
@@ -468,8 +468,8 @@ class ProdutoViewSetTest(BaseSetup):
         response = self.client.get(self.meus_produtos_url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['nome_produto'], 'Test Phone')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['nome_produto'], 'Test Phone')
 
     def test_meus_produtos_returns_only_own_offers(self):
         # Setup: Create a second vendor and their offer
@@ -484,8 +484,8 @@ class ProdutoViewSetTest(BaseSetup):
         response = self.client.get(self.meus_produtos_url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1) # Should only see 1 offer
-        self.assertEqual(response.data[0]['nome_produto'], 'Test Phone')
+        self.assertEqual(len(response.data['results']), 1) # Should only see 1 offer
+        self.assertEqual(response.data['results'][0]['nome_produto'], 'Test Phone')
 
     def test_meus_produtos_as_cliente_forbidden(self):
         self.client.force_authenticate(user=self.cliente_user)
@@ -511,14 +511,14 @@ class ProdutoViewSetTest(BaseSetup):
         # Filter by the first category ('Eletrônicos')
         response = self.client.get(f'{self.meus_produtos_url}?id_categoria={self.categoria_loja.pk}')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['nome_produto'], 'Test Phone')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['nome_produto'], 'Test Phone')
 
         # Filter by the second category ('Vestuário')
         response = self.client.get(f'{self.meus_produtos_url}?id_categoria={cat_vestuario.pk}')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['nome_produto'], 'Camiseta Teste')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['nome_produto'], 'Camiseta Teste')
 
 class OfertaProdutoViewSetTest(BaseSetup):
     def setUp(self):
@@ -773,7 +773,7 @@ class ValorAtributoViewSetTest(BaseSetup):
         self.client.force_authenticate(user=self.admin_user)
         response = self.client.get(self.list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test_list_valores_as_vendedor_forbidden(self):
         self.client.force_authenticate(user=self.vendedor_user)
@@ -806,7 +806,7 @@ class SKUViewSetTest(BaseSetup):
         self.client.force_authenticate(user=self.vendedor_user)
         response = self.client.get(self.list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test_list_skus_as_cliente_forbidden(self):
         self.client.force_authenticate(user=self.cliente_user)
@@ -932,7 +932,7 @@ class AvaliacaoLojaViewSetTest(BaseSetup):
         self.client.force_authenticate(user=self.cliente_user)
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
 class ObterPerfilViewTest(BaseSetup):
     def setUp(self):
@@ -1093,13 +1093,13 @@ class ProdutosMonitoradosExternosViewSetTest(BaseSetup):
         self.client.force_authenticate(user=self.vendedor_user)
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test_get_queryset_as_cliente(self):
         self.client.force_authenticate(user=self.cliente_user)
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 0)
+        self.assertEqual(len(response.data['results']), 0)
 
     @patch('api.views.CrawlerProcess')
     def test_create_monitoramento_success(self, mock_crawler_process):
@@ -1152,7 +1152,7 @@ class HistoricoPrecosViewTest(BaseSetup):
             nome_produto='Produto Teste',
             preco_atual='100.00'
         )
-        HistoricoPrecos.objects.create(produto_monitorado=self.produto_monitorado, preco='100.00')
+        HistoricoPrecos.objects.create(pagina=self.produto_monitorado.pagina, preco='100.00')
         self.url = reverse('historico-precos', kwargs={'pk': self.produto_monitorado.pk})
 
     def test_get_historico_precos_as_owner(self):
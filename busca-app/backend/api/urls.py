@@ -25,6 +25,8 @@ from .views import (
     VariacaoCreateView,    
     AdminTestView,
     ClienteTestView,
+    BuscaView,
+    ComparacaoPrecosView,
     
 
 )
@@ -57,6 +59,8 @@ urlpatterns = [
     path('perfil/', ObterPerfilView.as_view(), name='obter_perfil'),
     path('registrar/', UserCreateView.as_view(), name='registrar'),
     path('sugestoes/', SugestaoCreateView.as_view(), name='criar_sugestao'),
+    path('busca/', BuscaView.as_view(), name='busca'),
+    path('comparacao/', ComparacaoPrecosView.as_view(), name='comparacao-precos'),
     path('recuperar-senha/', RecuperarSenhaView.as_view(), name='recuperar_senha'),
     path('redefinir-senha/<uuid:token>/', RedefinirSenhaView.as_view(), name='redefinir_senha'),
     path('verificar-email/<uuid:token>/', VerificarEmailView.as_view(), name='verificar_email'),
@@ -24,15 +24,18 @@ from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework_simplejwt.views import TokenObtainPairView
 import json
 
+from . import busca, comparacao
+from .cache import RespostaEmCacheMixin
+from .querysets import produtos_para_leitura, skus_para_leitura, ofertas_para_leitura, meus_produtos_para_leitura
 from .models import (
     Usuario, CategoriaLoja, SubcategoriaProduto, Produto, Atributo, ValorAtributo, SKU, OfertaProduto, ImagemSKU,
-    Vendedor, Cliente, Endereco, AvaliacaoLoja, Sugestao, Administrador
+    Vendedor, Cliente, Endereco, AvaliacaoLoja, Sugestao, Administrador, DocumentoBusca, PrecoComparado
 )
 from .serializers import (
     UserSerializer, MyTokenObtainPairSerializer, CategoriaLojaSerializer, SubcategoriaProdutoSerializer,
     ProdutoSerializer, AtributoSerializer, ValorAtributoSerializer, SKUSerializer, OfertaProdutoSerializer,
     VendedorSerializer, ClienteSerializer, EnderecoSerializer, AvaliacaoLojaSerializer, SugestaoSerializer,
-    MeusProdutosSerializer,
+    serializar_meus_produtos, PrecoComparadoSerializer,
     AdminSerializer
 )
 
@@ -63,15 +66,19 @@ class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = MyTokenObtainPairSerializer
 
 
-class CategoriaLojaViewSet(viewsets.ModelViewSet):
+class CategoriaLojaViewSet(RespostaEmCacheMixin, viewsets.ModelViewSet):
     queryset = CategoriaLoja.objects.all()
+    cache_modelos = (CategoriaLoja,)
     serializer_class = CategoriaLojaSerializer
+    pagination_class = None  # Tabela pequena de apoio (listas de seleção), já em cache
     permission_classes = [IsAdminUserOrReadOnly]
 
 
-class SubcategoriaProdutoViewSet(viewsets.ModelViewSet):
+class SubcategoriaProdutoViewSet(RespostaEmCacheMixin, viewsets.ModelViewSet):
     queryset = SubcategoriaProduto.objects.all()
+    cache_modelos = (SubcategoriaProduto, CategoriaLoja)
     serializer_class = SubcategoriaProdutoSerializer
+    pagination_class = None  # Tabela pequena de apoio (listas de seleção), já em cache
     permission_classes = [IsAdminUserOrReadOnly]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['categoria_loja']
@@ -91,9 +98,11 @@ class SubcategoriaProdutoViewSet(viewsets.ModelViewSet):
         super().perform_update(serializer)
 
 
-class AtributoViewSet(viewsets.ModelViewSet):
+class AtributoViewSet(RespostaEmCacheMixin, viewsets.ModelViewSet):
     queryset = Atributo.objects.all()
+    cache_modelos = (Atributo,)
     serializer_class = AtributoSerializer
+    pagination_class = None  # Tabela pequena de apoio (listas de seleção), já em cache
     permission_classes = [IsAdminUser]
 
 
@@ -104,34 +113,34 @@ class ValorAtributoViewSet(viewsets.ModelViewSet):
 
 
 class SKUViewSet(viewsets.ModelViewSet):
-    queryset = SKU.objects.all()
+    queryset = skus_para_leitura()
     serializer_class = SKUSerializer
     permission_classes = [IsAuthenticated, IsVendedor]
 
 
 class ProdutoViewSet(viewsets.ModelViewSet):
-    queryset = Produto.objects.all()
+    queryset = produtos_para_leitura()
     serializer_class = ProdutoSerializer
     permission_classes = [IsAuthenticated, IsVendedor]
+    ordenacao_cursor = None  # Ações podem trocar a ordenação da paginação (ver api/pagination.py)
 
-    @action(detail=False, methods=['get'], url_path='meus-produtos', permission_classes=[IsVendedor])
+    # Ordem alfabética do produto; o pk desempata nomes iguais.
+    @action(detail=False, methods=['get'], url_path='meus-produtos', permission_classes=[IsVendedor],
+            ordenacao_cursor=('nome_produto', 'pk'))
     def meus_produtos(self, request):
         vendedor = get_object_or_404(Vendedor, usuario=request.user)
-        ofertas = OfertaProduto.objects.filter(vendedor=vendedor).select_related(
-            'sku__produto__subcategoria__categoria_loja'
-        ).prefetch_related(
-            'sku__valores__atributo',
-            'sku__imagens'
-        ).order_by('sku__produto__nome') # Add ordering
+        # Paginado por cursor: cada página filtra a partir do último nome da anterior, sem OFFSET.
+        # Caminho de leitura enxuto: linhas de values() e uma consulta de variações por página.
+        ofertas = meus_produtos_para_leitura(vendedor)
         id_categoria = request.query_params.get('id_categoria')
         if id_categoria:
             ofertas = ofertas.filter(sku__produto__subcategoria__categoria_loja__id=id_categoria)
-        serializer = MeusProdutosSerializer(ofertas, many=True, context={'request': request})
-        return Response(serializer.data)
+        pagina = self.paginate_queryset(ofertas)
+        return self.get_paginated_response(serializar_meus_produtos(pagina, request))
 
 
 class OfertaProdutoViewSet(viewsets.ModelViewSet):
-    queryset = OfertaProduto.objects.all()
+    queryset = ofertas_para_leitura()
     serializer_class = OfertaProdutoSerializer
     permission_classes = [IsAuthenticated, IsVendedor, IsOwnerOrReadOnly]
     parser_classes = [MultiPartParser, FormParser, JSONParser] # Add JSONParser
@@ -169,12 +178,84 @@ class OfertaProdutoViewSet(viewsets.ModelViewSet):
                 ImagemSKU.objects.create(sku=sku, imagem=imagem, ordem=0)
 
 
-class VendedorViewSet(viewsets.ModelViewSet):
+class BuscaView(APIView):
+    """
+    Busca textual em produtos, lojas e (para o vendedor logado) produtos monitorados.
+
+    Parâmetros: `q` (obrigatório), `tipo` (ex.: `produto,vendedor`) e `limite`.
+    Ver `api.busca` para tokenização e ranking.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        consulta = request.query_params.get('q', '').strip()
+        if not consulta:
+            return Response({'error': 'Informe o termo de busca em q.'}, status=status.HTTP_400_BAD_REQUEST)
+        tipos = [t for t in request.query_params.get('tipo', '').split(',') if t]
+        tipos_validos = {tipo for tipo, _ in DocumentoBusca.TIPO_CHOICES}
+        if set(tipos) - tipos_validos:
+            return Response({'error': f"Tipo inválido. Use: {', '.join(sorted(tipos_validos))}."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limite = int(request.query_params['limite']) if 'limite' in request.query_params else None
+        except ValueError:
+            return Response({'error': 'limite deve ser um número inteiro.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        vendedor_id = None
+        if request.user.is_authenticated and request.user.tipo_usuario == 'Vendedor': # type: ignore
+            vendedor_id = request.user.pk
+        resultados = busca.buscar(consulta, tipos=tipos, vendedor_id=vendedor_id, limite=limite)
+        return Response({'q': consulta, 'resultados': resultados})
+
+
+class ComparacaoPrecosView(APIView):
+    """
+    Ofertas mais baratas de um SKU, produto ou subcategoria, entre lojas e
+    (para o vendedor logado) concorrentes monitorados.
+
+    Parâmetros: exatamente um de `sku`, `produto` ou `subcategoria`; `limite`;
+    `origem` (`oferta` ou `monitorado`); `lat`, `lng` e `raio_km` para lojas
+    próximas. Ver `api.comparacao`.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        try:
+            alvo = {f'{campo}_id': int(params[campo]) for campo in ('sku', 'produto', 'subcategoria') if campo in params}
+            limite = int(params['limite']) if 'limite' in params else None
+            perto = None
+            if 'lat' in params or 'lng' in params:
+                perto = (float(params['lat']), float(params['lng']), float(params.get('raio_km', 10)))
+        except (KeyError, ValueError):
+            return Response({'error': 'Parâmetros numéricos inválidos (sku/produto/subcategoria, limite, lat, lng, raio_km).'}, status=status.HTTP_400_BAD_REQUEST)
+        origens = [o for o in params.get('origem', '').split(',') if o]
+        if set(origens) - {origem for origem, _ in PrecoComparado.ORIGEM_CHOICES}:
+            return Response({'error': 'Origem inválida. Use oferta ou monitorado.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        vendedor_id = None
+        if request.user.is_authenticated and request.user.tipo_usuario == 'Vendedor': # type: ignore
+            vendedor_id = request.user.pk
+        try:
+            resultados = comparacao.mais_baratos(limite=limite, origens=origens, vendedor_id=vendedor_id, perto=perto, **alvo)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'resultados': PrecoComparadoSerializer(resultados, many=True).data})
+
+
+class VendedorViewSet(RespostaEmCacheMixin, viewsets.ModelViewSet):
     queryset = Vendedor.objects.all()
     serializer_class = VendedorSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['status_aprovacao']
+    cache_modelos = (Vendedor, Usuario, Endereco)
+
+    def get_cache_variante(self):
+        # Só a listagem pública (vendedores aprovados) é igual para todos os usuários.
+        user = self.request.user
+        if user.is_staff or user.tipo_usuario in ('Administrador', 'Vendedor'): # type: ignore
+            return None
+        return 'aprovados'
 
     def get_queryset(self): # type: ignore
         user = self.request.user
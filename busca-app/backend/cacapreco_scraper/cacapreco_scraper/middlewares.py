@@ -5,45 +5,75 @@
 
 from scrapy import signals
 from scrapy.http import HtmlResponse
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
+from scrapy.utils.defer import maybe_deferred_to_future
+from selenium.common.exceptions import TimeoutException
+from twisted.internet import reactor, threads
+from twisted.python.threadpool import ThreadPool
+
+from scraper.browser_pool import get_selenium_pool, get_pool_config, get_chromedriver_path, encerrar_pools
+from scraper.extraction import candidatos_padrao
+from scraper import render_profiles
+
 
 class SeleniumMiddleware(object):
+    """
+    Renderiza com Selenium as requisições marcadas com `meta['selenium']`.
+
+    Os drivers vêm do pool do processo (`scraper.browser_pool`): ficam abertos
+    entre requisições, têm cookies e storage limpos a cada devolução e são
+    reciclados por uso/memória. Cada renderização roda num thread pool próprio,
+    do tamanho do pool de drivers, para não bloquear o reactor do Twisted.
+    Com `SELENIUM_ENCERRAR_DRIVERS` (execução avulsa via `scrapy crawl`), os
+    drivers são fechados ao fim do crawl; no worker eles continuam quentes.
+    A espera segue o perfil de renderização do domínio (`render_profiles`).
+    """
+
+    def __init__(self, encerrar_drivers=False):
+        self.encerrar_drivers = encerrar_drivers
+        self.threadpool = None
 
-    def process_request(self, request, spider):
+    @classmethod
+    def from_crawler(cls, crawler):
+        middleware = cls(encerrar_drivers=crawler.settings.getbool('SELENIUM_ENCERRAR_DRIVERS'))
+        crawler.signals.connect(middleware.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def spider_opened(self, spider):
+        self.threadpool = ThreadPool(minthreads=0, maxthreads=get_pool_config()['TAMANHO_MAX'], name='selenium')
+        self.threadpool.start()
+        # Resolve (e baixa, se preciso) o chromedriver uma vez, antes da primeira página.
+        threads.deferToThreadPool(reactor, self.threadpool, get_chromedriver_path).addErrback(
+            lambda falha: spider.logger.warning(f"SELENIUM: Não foi possível resolver o chromedriver: {falha.value}")
+        )
+
+    def spider_closed(self, spider):
+        if self.threadpool is not None:
+            self.threadpool.stop()
+            self.threadpool = None
+        if self.encerrar_drivers:
+            encerrar_pools()
+
+    async def process_request(self, request, spider):
         if not request.meta.get('selenium', False):
-            return
-
-        options = Options()
-        # options.add_argument('--headless')  # Comente para ver o navegador
-        driver = webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()), options=options)
-        driver.get(request.url)
-
-        try:
-            WebDriverWait(driver, 20).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, 
-                    'script[type="application/ld+json"], ' + 
-                    'p[data-testid="product-price-value"], ' + 
-                    'span.andes-money-amount__fraction, ' + 
-                    r'span.h5-bold.md\:h4-bold, ' + 
-                    'span.a-price-whole, ' + 
-                    'h1.ui-pdp-title, ' + 
-                    'span#productTitle'
-                ))
-            )
-            spider.logger.info("Página carregada e elemento principal encontrado.")
-        except Exception as e:
-            spider.logger.warning(f"Tempo limite excedido ou elemento principal não encontrado: {e}. Prosseguindo...")
-
-        body = driver.page_source
-        response = HtmlResponse(driver.current_url, body=body, encoding='utf-8', request=request)
-        driver.quit()
-        return response
+            return None
+        return await maybe_deferred_to_future(
+            threads.deferToThreadPool(reactor, self.threadpool, self.renderizar, request, spider)
+        )
+
+    def renderizar(self, request, spider):
+        """Roda no thread pool: empresta um driver, carrega a página e devolve a resposta."""
+        with get_selenium_pool().checkout(timeout=get_pool_config()['TIMEOUT_CHECKOUT']) as driver:
+            perfil = render_profiles.get_perfil(request.url)
+            render_profiles.aplicar_perfil_selenium(driver, perfil)
+            try:
+                # Seletores do domínio e genéricos, mais os que o spider mandar em `meta['seletores_espera']`.
+                seletores = candidatos_padrao(request.url)['preco'] + tuple(request.meta.get('seletores_espera', ()))
+                render_profiles.carregar_selenium(driver, request.url, perfil, seletores)
+                spider.logger.info("Página carregada e elemento principal encontrado.")
+            except TimeoutException as e:
+                spider.logger.warning(f"Tempo limite excedido ou elemento principal não encontrado: {e}. Prosseguindo...")
+            return HtmlResponse(driver.current_url, body=driver.page_source, encoding='utf-8', request=request)
 
 
 # useful for handling different item types with a single interface
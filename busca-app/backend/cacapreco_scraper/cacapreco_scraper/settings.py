@@ -67,10 +67,14 @@ PLAYWRIGHT_DEFAULT_NAVIGATION_TIMEOUT = 60 * 1000  # 60 segundos
 PLAYWRIGHT_BROWSER_TYPE = "chromium"
 
 
+# Renderiza com os drivers do pool as requisições com `meta['selenium']` (SeleniumSpider).
 DOWNLOADER_MIDDLEWARES = {
-   # 'cacapreco_scraper.middlewares.SeleniumMiddleware': 543, # Desativado para usar Playwright
+   'cacapreco_scraper.middlewares.SeleniumMiddleware': 543,
 }
 
+# Execução avulsa (`scrapy crawl`): fecha os drivers do pool ao fim do crawl.
+SELENIUM_ENCERRAR_DRIVERS = True
+
 # --- Pipeline de Itens ---
 # Ativa o pipeline para salvar os dados no banco de dados Django.
 ITEM_PIPELINES = {
@@ -0,0 +1,141 @@
+"""
+Spider de recoleta em massa dos produtos monitorados.
+
+Em vez de um processo do Scrapy por URL, um único crawl longo percorre todas
+as páginas com `ultima_coleta` vencida: as URLs são lidas do banco em páginas
+(paginação por `url_hash`, ver `refresh.pagina_de_urls_vencidas`) conforme o
+Scrapy pede mais requisições, a concorrência por domínio fica com o AutoThrottle
+e os itens vão para o `DjangoPipeline`, que grava em lote pelo `ResultSink`.
+
+Cada resposta é extraída com o JSON-LD e os seletores do `Dominio` da URL
+(registro em memória) seguidos dos genéricos. Páginas sem dados continuam
+vencidas e ficam para o ciclo do Celery, que tenta as estratégias com navegador.
+
+O agendador canônico da recoleta continua sendo o Celery beat
+(`agendar_recoleta`); o spider é a alternativa para varrer o catálogo inteiro
+de uma vez. Os dois dividem a trava do ciclo (`refresh.iniciar_ciclo`): o
+spider não começa com um ciclo do Celery em andamento e, enquanto roda, os
+agendamentos do beat são ignorados. A trava é liberada quando o spider fecha.
+
+Uso (Scrapy >= 2.13):
+    scrapy crawl monitoramento [-a intervalo_horas=6] [-a max_urls=1000]
+    python manage.py executar_spider_monitoramento
+"""
+from datetime import timedelta
+
+import redis
+import scrapy
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from scraper import refresh
+from scraper.extraction import extract, candidatos_padrao
+from scraper.scraping_service import FAST_PATH_HEADERS
+from ..pipelines import DjangoPipeline
+
+SPIDER_MONITORAMENTO_DEFAULTS = {
+    'TAMANHO_PAGINA_DB': 500,              # URLs lidas do banco por consulta
+    'REQUISICOES_SIMULTANEAS': 64,         # Total do crawl
+    'REQUISICOES_POR_DOMINIO': 8,          # Teto por domínio; o AutoThrottle ajusta abaixo disso
+    'CONCORRENCIA_ALVO_POR_DOMINIO': 2.0,  # AUTOTHROTTLE_TARGET_CONCURRENCY
+    'ATRASO_MAXIMO': 30,                   # AUTOTHROTTLE_MAX_DELAY (segundos)
+    'TIMEOUT_DOWNLOAD': 20,
+    'TTL_CICLO_SEGUNDOS': 6 * 60 * 60,     # Trava do ciclo; o crawl inteiro costuma passar das 2 h do Celery
+}
+
+
+def get_spider_monitoramento_config():
+    config = dict(SPIDER_MONITORAMENTO_DEFAULTS)
+    config.update(getattr(settings, 'SCRAPER_SPIDER_MONITORAMENTO', {}))
+    return config
+
+
+def _proxima_pagina(limite, apos_hash, tamanho):
+    """Roda fora do reactor: próximas URLs vencidas e os seletores do domínio de cada uma."""
+    return [
+        (url_hash, url, candidatos_padrao(url))
+        for url_hash, url in refresh.pagina_de_urls_vencidas(limite, apos_hash, tamanho)
+    ]
+
+
+class MonitoramentoSpider(scrapy.Spider):
+    name = 'monitoramento'
+
+    def __init__(self, intervalo_horas=None, max_urls=None, *args, **kwargs):
+        super(MonitoramentoSpider, self).__init__(*args, **kwargs)
+        self.intervalo_horas = float(intervalo_horas or refresh.get_refresh_config()['INTERVALO_HORAS'])
+        self.max_urls = int(max_urls) if max_urls else None
+        self.ciclo_id = None
+
+    @classmethod
+    def update_settings(cls, scrapy_settings):
+        super().update_settings(scrapy_settings)
+        config = get_spider_monitoramento_config()
+        scrapy_settings.setdict({
+            'CONCURRENT_REQUESTS': config['REQUISICOES_SIMULTANEAS'],
+            'CONCURRENT_REQUESTS_PER_DOMAIN': config['REQUISICOES_POR_DOMINIO'],
+            'DOWNLOAD_DELAY': 0,
+            'AUTOTHROTTLE_ENABLED': True,
+            'AUTOTHROTTLE_START_DELAY': 1,
+            'AUTOTHROTTLE_MAX_DELAY': config['ATRASO_MAXIMO'],
+            'AUTOTHROTTLE_TARGET_CONCURRENCY': config['CONCORRENCIA_ALVO_POR_DOMINIO'],
+            'DOWNLOAD_TIMEOUT': config['TIMEOUT_DOWNLOAD'],
+            'RETRY_TIMES': 1,
+            'USER_AGENT': FAST_PATH_HEADERS['User-Agent'],
+            'DEFAULT_REQUEST_HEADERS': {'Accept-Language': FAST_PATH_HEADERS['Accept-Language']},
+            'ITEM_PIPELINES': {DjangoPipeline: 300},
+            # Os itens vão para o banco; nada de feed em arquivo.
+            'FEEDS': {},
+        }, priority='spider')
+
+    async def start(self):
+        config = get_spider_monitoramento_config()
+        try:
+            self.ciclo_id = await sync_to_async(refresh.iniciar_ciclo)(config['TTL_CICLO_SEGUNDOS'])
+        except redis.RedisError as e:
+            self.logger.warning(f"MONITORAMENTO: Redis indisponível para a trava do ciclo ({e}); crawl cancelado.")
+            return
+        if self.ciclo_id is None:
+            self.logger.info("MONITORAMENTO: Ciclo de recoleta em andamento. Crawl ignorado.")
+            return
+
+        # O limite é fixado no início: páginas gravadas durante o crawl não voltam à fila.
+        limite = timezone.now() - timedelta(hours=self.intervalo_horas)
+        tamanho = config['TAMANHO_PAGINA_DB']
+        apos_hash, agendadas = None, 0
+        while True:
+            pagina = await sync_to_async(_proxima_pagina)(limite, apos_hash, tamanho)
+            for url_hash, url, seletores in pagina:
+                if self.max_urls is not None and agendadas >= self.max_urls:
+                    return
+                agendadas += 1
+                yield scrapy.Request(
+                    url, callback=self.parse, errback=self.falhou,
+                    cb_kwargs={'url_original': url, 'seletores': seletores},
+                )
+            if len(pagina) < tamanho:
+                self.logger.info(f"MONITORAMENTO: {agendadas} URLs vencidas agendadas.")
+                return
+            apos_hash = pagina[-1][0]
+
+    def parse(self, response, url_original, seletores):
+        # O item usa a URL monitorada, não a final após redirecionamentos.
+        dados = extract(response.body, url_original, selectors=seletores)
+        if dados['nome'] and dados['preco'] is not None:
+            self.crawler.stats.inc_value('monitoramento/sucesso')
+            yield {'url_produto': url_original, 'nome_produto': dados['nome'], 'preco_atual': dados['preco']}
+        else:
+            self.crawler.stats.inc_value('monitoramento/sem_dados')
+            self.logger.warning(f"MONITORAMENTO: Nome e/ou preço não encontrados em {url_original}")
+
+    def falhou(self, failure):
+        self.crawler.stats.inc_value('monitoramento/erro')
+        self.logger.warning(f"MONITORAMENTO: Falha ao baixar {failure.request.url}: {failure.value}")
+
+    def closed(self, reason):
+        if self.ciclo_id is not None:
+            try:
+                refresh.finalizar_ciclo(self.ciclo_id)
+            except redis.RedisError as e:
+                self.logger.warning(f"MONITORAMENTO: Falha ao liberar a trava do ciclo {self.ciclo_id}: {e}")
@@ -1,32 +1,101 @@
+import asyncio
 import pytest
 from unittest.mock import patch, MagicMock
 from scrapy.http import Request, HtmlResponse
+from selenium.common.exceptions import TimeoutException
+from twisted.internet import defer
 from cacapreco_scraper.cacapreco_scraper.middlewares import SeleniumMiddleware
+from scraper.browser_pool import BrowserPool, _resetar_driver_selenium
+from scraper import render_profiles
+
+
+class FakeDriverSelenium:
+    def __init__(self):
+        self.current_url = 'about:blank'
+        self.cookies_limpos = 0
+
+    def get(self, url):
+        self.current_url = url
+
+    @property
+    def page_source(self):
+        return f'<html><body><h1>{self.current_url}</h1></body></html>'
+
+    def find_element(self, by, seletor):
+        return object()
+
+    def delete_all_cookies(self):
+        self.cookies_limpos += 1
+
+    def execute_script(self, script):
+        pass
+
+    def execute_cdp_cmd(self, comando, parametros):
+        pass
+
+    def set_page_load_timeout(self, segundos):
+        pass
+
+    def set_window_size(self, largura, altura):
+        pass
+
+
+def executar_na_thread(reactor, threadpool, funcao, *args):
+    # Executa a renderização na hora; o thread pool real só existe com o crawl rodando.
+    return defer.succeed(funcao(*args))
+
 
 class TestSeleniumMiddleware:
 
     @pytest.fixture
-    def middleware(self):
-        return SeleniumMiddleware()
+    def drivers(self):
+        return []
+
+    @pytest.fixture
+    def middleware(self, drivers):
+        def criar():
+            drivers.append(FakeDriverSelenium())
+            return drivers[-1]
 
-    def test_process_request_no_selenium_meta(self, middleware):
+        pool = BrowserPool('selenium', criar=criar, destruir=lambda d: None, resetar=_resetar_driver_selenium, tamanho_max=1)
+        base = 'cacapreco_scraper.cacapreco_scraper.middlewares'
+        with patch(f'{base}.get_selenium_pool', return_value=pool), \
+                patch(f'{base}.render_profiles.get_perfil', return_value=render_profiles.perfil_padrao()), \
+                patch(f'{base}.candidatos_padrao', return_value={'nome': (), 'preco': ('span.preco',)}), \
+                patch(f'{base}.threads.deferToThreadPool', side_effect=executar_na_thread):
+            yield SeleniumMiddleware()
+
+    def test_process_request_no_selenium_meta(self, middleware, drivers):
         request = Request('http://example.com')
         spider = MagicMock()
-        assert middleware.process_request(request, spider) is None
+        assert asyncio.run(middleware.process_request(request, spider)) is None
+        assert drivers == []
+
+    def test_process_request_with_selenium_meta_uses_pooled_driver(self, middleware, drivers):
+        spider = MagicMock()
+        respostas = [
+            asyncio.run(middleware.process_request(Request(f'https://loja.com/p/{i}', meta={'selenium': True}), spider))
+            for i in range(3)
+        ]
+
+        assert all(isinstance(resposta, HtmlResponse) for resposta in respostas)
+        assert len(drivers) == 1
+        assert drivers[0].cookies_limpos == 3
+        assert drivers[0].current_url == 'about:blank'
+        assert respostas[2].url == 'https://loja.com/p/2'
+        assert b'https://loja.com/p/2' in respostas[2].body
 
-    @patch('cacapreco_scraper.cacapreco_scraper.middlewares.webdriver')
-    def test_process_request_with_selenium_meta(self, mock_webdriver, middleware):
-        request = Request('http://example.com', meta={'selenium': True})
+    def test_page_load_timeout_keeps_driver_and_partial_page(self, middleware, drivers):
         spider = MagicMock()
+        resposta = asyncio.run(middleware.process_request(Request('https://loja.com/p/1', meta={'selenium': True}), spider))
 
-        mock_driver = MagicMock()
-        mock_webdriver.Chrome.return_value = mock_driver
-        mock_driver.page_source = '<html></html>'
-        mock_driver.current_url = 'http://example.com'
+        def get_lento(url):
+            FakeDriverSelenium.get(drivers[0], url)
+            raise TimeoutException('page load')
 
-        response = middleware.process_request(request, spider)
+        drivers[0].get = get_lento
+        parcial = asyncio.run(middleware.process_request(Request('https://loja.com/p/2', meta={'selenium': True}), spider))
 
-        assert isinstance(response, HtmlResponse)
-        mock_webdriver.Chrome.assert_called_once()
-        mock_driver.get.assert_called_once_with('http://example.com')
-        mock_driver.quit.assert_called_once()
+        assert len(drivers) == 1
+        assert b'https://loja.com/p/1' in resposta.body
+        assert b'https://loja.com/p/2' in parcial.body
@@ -2,6 +2,7 @@ import unittest
 import os
 from unittest.mock import Mock, patch
 from scrapy.http import HtmlResponse
+from twisted.python.failure import Failure
 from bs4 import BeautifulSoup
 from cacapreco_scraper.cacapreco_scraper.spiders.selenium_spider import SeleniumSpider
 
@@ -79,28 +80,37 @@ class ScraperTest(unittest.TestCase):
             self.assertEqual(result['nome_produto'], 'Smart TV LED 50" Ultra HD 4K Philips 50PUG7019 com Google TV, Comando de Voz, Wi-Fi, Entradas HDMI e USB')
             self.assertEqual(result['preco_atual'], 1849.0)
 
-    @patch('cacapreco_scraper.cacapreco_scraper.spiders.selenium_spider.HtmlResponse')
-    @patch('cacapreco_scraper.cacapreco_scraper.spiders.selenium_spider.uc.Chrome')
-    @patch('cacapreco_scraper.cacapreco_scraper.spiders.selenium_spider.ChromeDriverManager')
-    def test_start_requests(self, mock_driver_manager, mock_chrome, mock_html_response):
+    def test_start_requests(self):
         # Arrange
-        self.selenium_spider.url = "http://test.com"
+        self.selenium_spider.url = "http://www.casasbahia.com.br/p/1"
         self.selenium_spider.usuario_id = 1
-        mock_driver = Mock()
-        mock_chrome.return_value = mock_driver
-        mock_driver_manager.return_value.install.return_value = "path/to/driver"
-        
-        # Patch the parse_product_page method
-        with patch('cacapreco_scraper.cacapreco_scraper.spiders.selenium_spider.SeleniumSpider.parse_product_page', return_value=iter([{"key": "value"}])) as mock_parse:
-            # Act
-            requests = list(self.selenium_spider.start_requests())
-
-            # Assert
-            mock_chrome.assert_called_once()
-            mock_driver.get.assert_called_once_with("http://test.com")
-            mock_html_response.assert_called_once_with(url=self.selenium_spider.url, body=mock_driver.page_source, encoding='utf-8')
-            self.assertEqual(len(requests), 1)
-            mock_parse.assert_called_once()
+
+        # Act
+        requests = list(self.selenium_spider.start_requests())
+
+        # Assert: a página é renderizada pelo SeleniumMiddleware, não pelo spider
+        self.assertEqual(len(requests), 1)
+        request = requests[0]
+        self.assertEqual(request.url, "http://www.casasbahia.com.br/p/1")
+        self.assertTrue(request.meta['selenium'])
+        self.assertEqual(request.meta['seletores_espera'], ['.product-price-value', '.product-price'])
+        self.assertEqual(request.callback, self.selenium_spider.parse)
+
+        response = HtmlResponse(url="http://www.casasbahia.com.br/p/1?redirecionado=1", body=b"<html></html>", encoding="utf-8", request=request)
+        with patch('cacapreco_scraper.cacapreco_scraper.spiders.selenium_spider.SeleniumSpider.parse_product_page', return_value=iter([{"nome_produto": "TV"}])) as mock_parse:
+            items = list(request.callback(response, **request.cb_kwargs))
+
+        mock_parse.assert_called_once_with(response)
+        self.assertEqual(items, [{"nome_produto": "TV", "url_produto": "http://www.casasbahia.com.br/p/1"}])
+
+    def test_start_requests_batch_without_dummy_request(self):
+        spider = SeleniumSpider(urls=['http://a.com/1', 'http://b.com/2'], usuario_id=1)
+
+        requests = list(spider.start_requests())
+
+        self.assertEqual([r.url for r in requests], ['http://a.com/1', 'http://b.com/2'])
+        self.assertEqual([r.cb_kwargs['url'] for r in requests], ['http://a.com/1', 'http://b.com/2'])
+        self.assertTrue(all(r.meta['selenium'] for r in requests))
 
     @patch('cacapreco_scraper.cacapreco_scraper.spiders.selenium_spider.SeleniumSpider.logger')
     def test_start_requests_missing_args(self, mock_logger):
@@ -115,46 +125,48 @@ class ScraperTest(unittest.TestCase):
         self.assertEqual(len(requests), 0)
         mock_logger.error.assert_called_once_with("A URL e o usuario_id são obrigatórios")
 
-    @patch('cacapreco_scraper.cacapreco_scraper.spiders.selenium_spider.uc.Chrome')
-    @patch('cacapreco_scraper.cacapreco_scraper.spiders.selenium_spider.ChromeDriverManager')
-    @patch('cacapreco_scraper.cacapreco_scraper.spiders.selenium_spider.SeleniumSpider.logger')
-    def test_start_requests_exception(self, mock_logger, mock_driver_manager, mock_chrome):
-        # Arrange
+    def _renderizar_com_falha(self, destruir):
+        from cacapreco_scraper.cacapreco_scraper.middlewares import SeleniumMiddleware
+        from scraper.browser_pool import BrowserPool
+        from scraper import render_profiles
+
+        mock_driver = Mock()
+        mock_driver.get.side_effect = Exception("Test Exception")
+        pool = BrowserPool('selenium', criar=lambda: mock_driver, destruir=destruir, tamanho_max=1)
         self.selenium_spider.url = "http://test.com"
         self.selenium_spider.usuario_id = 1
-        mock_driver = Mock()
-        mock_chrome.return_value = mock_driver
-        mock_driver_manager.return_value.install.return_value = "path/to/driver"
-        mock_driver.get.side_effect = Exception("Test Exception") # Make get raise an exception
+        request = next(self.selenium_spider.start_requests())
+
+        base = 'cacapreco_scraper.cacapreco_scraper.middlewares'
+        with patch(f'{base}.get_selenium_pool', return_value=pool), \
+                patch(f'{base}.candidatos_padrao', return_value={'nome': (), 'preco': ()}), \
+                patch(f'{base}.render_profiles.get_perfil', return_value=render_profiles.perfil_padrao()), \
+                patch(f'{base}.render_profiles.aplicar_perfil_selenium'):
+            with self.assertRaises(Exception) as contexto:
+                SeleniumMiddleware().renderizar(request, self.selenium_spider)
+        request.errback(Failure(contexto.exception))
+        return pool
 
+    @patch('cacapreco_scraper.cacapreco_scraper.spiders.selenium_spider.SeleniumSpider.logger')
+    def test_start_requests_exception(self, mock_logger):
         # Act
-        requests = list(self.selenium_spider.start_requests())
+        destruir = Mock()
+        pool = self._renderizar_com_falha(destruir)
 
-        # Assert
-        self.assertEqual(len(requests), 0)
+        # Assert: o driver que falhou é descartado do pool e o erro chega ao errback do spider
+        destruir.assert_called_once()
+        self.assertEqual(pool.ociosos, [])
         mock_logger.error.assert_called_once_with("Ocorreu um erro durante o scraping com Selenium: Test Exception")
-        mock_driver.save_screenshot.assert_called_once_with('screenshot_falha_selenium.png')
 
-    @patch('cacapreco_scraper.cacapreco_scraper.spiders.selenium_spider.uc.Chrome')
-    @patch('cacapreco_scraper.cacapreco_scraper.spiders.selenium_spider.ChromeDriverManager')
     @patch('cacapreco_scraper.cacapreco_scraper.spiders.selenium_spider.SeleniumSpider.logger')
-    def test_start_requests_os_error(self, mock_logger, mock_driver_manager, mock_chrome):
-        # Arrange
-        self.selenium_spider.url = "http://test.com"
-        self.selenium_spider.usuario_id = 1
-        mock_driver = Mock()
-        mock_chrome.return_value = mock_driver
-        mock_driver_manager.return_value.install.return_value = "path/to/driver"
-        mock_driver.get.side_effect = Exception("Test Exception") # Make get raise an exception
-        mock_driver.quit.side_effect = OSError("OS Error") # Make quit raise an OSError
-
+    def test_start_requests_os_error(self, mock_logger):
         # Act
-        requests = list(self.selenium_spider.start_requests())
+        with self.assertLogs(level='WARNING') as logs:
+            self._renderizar_com_falha(Mock(side_effect=OSError("OS Error")))
 
-        # Assert
-        self.assertEqual(len(requests), 0)
+        # Assert: erro ao fechar o driver é só registrado; o erro original segue para o spider
+        self.assertIn("WARNING:root:BROWSER POOL [selenium]: Erro ao encerrar navegador (ignorado): OS Error", logs.output)
         mock_logger.error.assert_called_once_with("Ocorreu um erro durante o scraping com Selenium: Test Exception")
-        mock_logger.warning.assert_called_once_with("Erro ao finalizar o driver do Selenium (pode ser ignorado se o processo já foi encerrado): OS Error")
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
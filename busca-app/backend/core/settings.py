@@ -79,6 +79,9 @@ TEMPLATES = [
 ],},},]
 
 WSGI_APPLICATION = 'core.wsgi.application'
+# Servidor principal: o stream SSE de tarefas (`TaskEventsView`) é assíncrono e
+# precisa de ASGI (uvicorn). O WSGI fica para ferramentas que ainda o exigem.
+ASGI_APPLICATION = 'core.asgi.application'
 
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3001",
@@ -104,6 +107,8 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    # Listagens paginadas por cursor (keyset); ver api/pagination.py
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.PaginacaoPorCursor',
     # 'DEFAULT_RENDERER_CLASSES': (
     #     'djangorestframework_camel_case.render.CamelCaseJSONRenderer',
     #     'djangorestframework_camel_case.render.CamelCaseBrowsableAPIRenderer',
@@ -173,6 +178,35 @@ SIMPLE_JWT = {
     'UPDATE_LAST_LOGIN': True,
 }
 
+# Cache de respostas da API no mesmo Redis do Celery, em outro banco lógico (ver api/cache.py)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://localhost:6379/1',
+    }
+}
+
+API_PAGINACAO = {
+    'TAMANHO_PAGINA': 50,      # Itens por página das listagens (?page_size= ajusta)
+    'TAMANHO_MAXIMO': 200,     # Limite de ?page_size=
+}
+
+API_BUSCA = {
+    'LIMITE_RESULTADOS': 20,   # Resultados por busca quando ?limite= não é informado
+    'LIMITE_MAXIMO': 50,
+    'TAMANHO_MINIMO_PREFIXO': 3,   # O último termo só casa por prefixo a partir deste tamanho
+    'MAX_TERMOS_PREFIXO': 50,      # Termos do índice em que o prefixo é expandido
+}
+
+API_COMPARACAO = {
+    'LIMITE_RESULTADOS': 10,   # Ofertas por comparação quando ?limite= não é informado
+    'LIMITE_MAXIMO': 100,
+}
+
+API_CACHE = {
+    'TTL_SEGUNDOS': 10 * 60,   # Validade das respostas em cache (a versão por modelo invalida antes)
+}
+
 # Configurações do Celery
 CELERY_BROKER_URL = 'redis://localhost:6379/0'
 CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
@@ -181,6 +215,125 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'America/Sao_Paulo'
 
+# Recoleta periódica dos produtos monitorados (requer `celery -A core beat`)
+# Coletas com navegador em lote vão para uma fila própria, consumida por um worker
+# dedicado que mantém o reactor, o Xvfb e os drivers abertos:
+#   celery -A core worker -Q navegador --concurrency=1
+CELERY_TASK_ROUTES = {
+    'scraper.tasks.coletar_lote_navegador': {'queue': 'navegador'},
+}
+
+CELERY_BEAT_SCHEDULE = {
+    'agendar-recoleta-precos': {
+        'task': 'scraper.tasks.agendar_recoleta',
+        'schedule': timedelta(minutes=15),
+    },
+    'compactar-historico-precos': {
+        'task': 'scraper.tasks.compactar_historico',
+        'schedule': timedelta(days=1),
+    },
+}
+
+SCRAPER_REFRESH = {
+    'INTERVALO_HORAS': 6,                  # Idade mínima de `ultima_coleta` para recoletar
+    'TAMANHO_LOTE': 200,                   # URLs por tarefa de lote
+    'TTL_CICLO_SEGUNDOS': 2 * 60 * 60,     # Expiração da trava caso um ciclo não termine
+    'USAR_WORKER_NAVEGADOR': False,        # Falhas do fast path vão para a fila do worker assíncrono
+}
+
+# Spider de recoleta em massa (scrapy crawl monitoramento / manage.py executar_spider_monitoramento)
+SCRAPER_SPIDER_MONITORAMENTO = {
+    'TAMANHO_PAGINA_DB': 500,              # URLs lidas do banco por consulta
+    'REQUISICOES_SIMULTANEAS': 64,
+    'REQUISICOES_POR_DOMINIO': 8,          # Teto; o AutoThrottle ajusta abaixo disso
+    'CONCORRENCIA_ALVO_POR_DOMINIO': 2.0,
+    'ATRASO_MAXIMO': 30,
+    'TIMEOUT_DOWNLOAD': 20,
+}
+
+# Status das tarefas de monitoramento: consulta em lote e stream SSE (ver scraper/task_events.py)
+SCRAPER_TASK_EVENTS = {
+    'TTL_SEGUNDOS': 2 * 60 * 60,
+    'MAX_TAREFAS_POR_CONSULTA': 100,
+    'HEARTBEAT_SEGUNDOS': 15,
+    'DURACAO_MAXIMA_STREAM_SEGUNDOS': 20 * 60,
+}
+
+# Coalescência de coletas da mesma URL (ver scraper/inflight.py)
+SCRAPER_INFLIGHT = {
+    'FATIA_ESPERA_SEGUNDOS': 15,           # BLPOP por vez; entre eles confere se a dona ainda está viva
+    'ORCAMENTO_COLETA_SEGUNDOS': 300,      # Reservado do soft time limit para coletar se a espera não der resultado
+}
+
+# Motor assíncrono do Playwright (manage.py executar_worker_navegador)
+SCRAPER_ASYNC_ENGINE = {
+    'PAGINAS_SIMULTANEAS': 24,     # Páginas renderizando ao mesmo tempo no worker
+    'PAGINAS_POR_NAVEGADOR': 12,   # Contextos abertos em cada navegador do pool
+}
+
+# Perfis de renderização: o restante (recursos bloqueados, espera, viewport) fica em cada Dominio
+SCRAPER_RENDER = {
+    'HOSTS_RASTREADORES': [
+        'google-analytics.com', 'googletagmanager.com', 'googleadservices.com', 'googlesyndication.com',
+        'doubleclick.net', 'facebook.net', 'connect.facebook.com', 'hotjar.com', 'clarity.ms',
+        'criteo.com', 'criteo.net', 'taboola.com', 'outbrain.com', 'tiktok.com', 'bing.com',
+        'newrelic.com', 'nr-data.net', 'segment.io', 'mixpanel.com', 'rtbhouse.com',
+    ],
+}
+
+# Pool de navegadores reutilizados pelas estratégias de scraping (por processo worker)
+SCRAPER_BROWSER_POOL = {
+    'TAMANHO_MAX': 2,          # Navegadores abertos por tipo (Playwright/Selenium)
+    'MAX_PAGINAS': 50,         # Recicla o navegador após N páginas
+    'MAX_RSS_MB': 1500,        # Recicla quando o RSS do worker (com filhos) passa deste limite
+    'TIMEOUT_CHECKOUT': 120,   # Segundos esperando um navegador livre
+}
+
+# Fast path em lote (requests com conexões keep-alive compartilhadas)
+SCRAPER_FAST_PATH = {
+    'CONCURRENT_REQUESTS': 16,             # Threads/conexões simultâneas no total
+    'CONCURRENT_REQUESTS_PER_DOMAIN': 2,   # Requisições simultâneas por domínio
+    'DOWNLOAD_DELAY': 1.0,                 # Segundos entre requisições ao mesmo domínio
+    'TIMEOUT': 10,
+    'CHUNK_BYTES': 16 * 1024,              # Tamanho dos pedaços lidos na pré-varredura de JSON-LD
+}
+
+# Cache de validação (ETag/Last-Modified e hash do trecho do produto) do fast path
+SCRAPER_FETCH_CACHE = {
+    'TTL_SEGUNDOS': 7 * 24 * 60 * 60,
+}
+
+# Ordem adaptativa das estratégias de scraping por domínio
+SCRAPER_STRATEGY_ROUTER = {
+    'EPSILON': 0.1,         # Fração das coletas que seguem a ordem padrão (exploração)
+    'MIN_AMOSTRAS': 5,      # Tentativas necessárias antes de julgar uma estratégia
+    'TAXA_MINIMA': 0.2,     # Abaixo disso a estratégia é adiada para o fim da fila
+    'JANELA': 200,          # Acima disso os contadores são reduzidos à metade
+}
+
+# Serviço de crawler Scrapy/Selenium em processo (substitui o `xvfb-run scrapy crawl`)
+SCRAPER_CRAWLER = {
+    'DISPLAY': ':99',          # Display do Xvfb iniciado pelo worker (se DISPLAY não existir)
+    'TIMEOUT_LOTE': 300,       # Segundos para coletar um lote inteiro
+}
+
+# Registro em memória dos seletores por domínio (invalidado via versão no Redis)
+SCRAPER_SELECTOR_REGISTRY = {
+    'INTERVALO_VERSAO_SEGUNDOS': 5,   # Frequência máxima de consulta da versão no Redis
+}
+
+# Gravação em lote dos resultados de coleta (upserts de várias linhas)
+SCRAPER_RESULT_SINK = {
+    'TAMANHO_LOTE': 200,        # Resultados acumulados antes de gravar
+    'INTERVALO_SEGUNDOS': 5,    # Tempo máximo de um resultado no buffer
+}
+
+# Histórico de preços: pontos de mudança detalhados, depois resumo diário
+SCRAPER_HISTORICO = {
+    'DIAS_DETALHE': 90,             # Pontos mais antigos viram mínimo/máximo/fechamento do dia
+    'MESES_PARTICOES_FUTURAS': 3,   # Partições mensais criadas com antecedência (MySQL)
+}
+
 # Configuração de Logging para silenciar logs de bibliotecas
 LOGGING = {
     'version': 1,
@@ -0,0 +1,206 @@
+"""
+Motor assíncrono de coleta com Playwright: muitas páginas por navegador.
+
+A estratégia `playwright_stealth` do pipeline abre uma página por tarefa do
+Celery; cada tarefa ocupa um navegador inteiro esperando a rede. Aqui um único
+event loop renderiza até `PAGINAS_SIMULTANEAS` páginas ao mesmo tempo,
+distribuídas entre os navegadores do pool (`PAGINAS_POR_NAVEGADOR` contextos
+abertos em cada um), cada página com o perfil de renderização do seu domínio
+(`render_profiles`). A extração (lxml) roda em threads para não travar o loop.
+
+Uso:
+- `scrape_many(urls)`: corrotina; retorna {url: (nome, preco) ou None}.
+- `enfileirar(itens)` + `manage.py executar_worker_navegador`: fila no Redis
+  consumida por um processo dedicado, que grava os resultados em lote
+  (`ResultSink`) e devolve as falhas ao caminho lento do Celery.
+"""
+import asyncio
+import json
+import logging
+import math
+import time
+from contextlib import AsyncExitStack
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .browser_pool import get_playwright_pool, get_pool_config, encerrar_playwright
+from .extraction import extract
+from .redis_client import get_redis
+from .selector_registry import get_registro
+from . import render_profiles
+
+ASYNC_ENGINE_DEFAULTS = {
+    'PAGINAS_SIMULTANEAS': 24,      # Páginas renderizando ao mesmo tempo no processo
+    'PAGINAS_POR_NAVEGADOR': 12,    # Contextos abertos por navegador antes de usar outro
+    'FILA': 'scraper:fila_navegador',
+    'TAMANHO_LOTE_FILA': 48,        # Itens retirados da fila por rodada do worker
+    'ESPERA_FILA_SEGUNDOS': 5,
+}
+
+def get_async_engine_config():
+    config = dict(ASYNC_ENGINE_DEFAULTS)
+    config.update(getattr(settings, 'SCRAPER_ASYNC_ENGINE', {}))
+    return config
+
+
+def _extrair(html, url):
+    dados = extract(html, url)
+    if dados['nome'] and dados['preco'] is not None:
+        return dados['nome'].strip(), dados['preco']
+    return None
+
+
+def _preparar(urls):
+    """
+    Roda em thread (o registro pode precisar ler o banco): perfil de
+    renderização e seletores de preço de cada URL.
+    """
+    registro = get_registro()
+    preparados = {}
+    try:
+        for url in urls:
+            hostname = urlparse(url).hostname or ''
+            _, seletores = registro.resolver(hostname)
+            perfil = registro.resolver_perfil(hostname) or render_profiles.perfil_padrao()
+            preparados[url] = (perfil, (seletores or {}).get('preco'))
+    finally:
+        close_old_connections()
+    return preparados
+
+
+async def coletar_pagina(browser, url, perfil, seletores_preco=None):
+    """Renderiza a URL em um contexto descartável do navegador e extrai (nome, preco)."""
+    context = None
+    try:
+        context = await render_profiles.abrir_contexto(browser, perfil)
+        page = await context.new_page()
+        await render_profiles.carregar(page, url, perfil, seletores_preco)
+        html = await page.content()
+    except Exception as e:
+        logging.warning(f"ASYNC ENGINE: Falha ao renderizar {url}: {e}")
+        return None
+    finally:
+        if context is not None:
+            try:
+                await context.close()
+            except Exception:
+                pass
+    return await asyncio.to_thread(_extrair, html, url)
+
+
+async def scrape_many(urls, paginas_simultaneas=None, pool=None):
+    """
+    Coleta as URLs concorrentemente. Os navegadores ficam emprestados do pool
+    durante o lote inteiro e as páginas são distribuídas entre eles.
+    """
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return {}
+    config = get_async_engine_config()
+    pool = pool or get_playwright_pool()
+    paginas_simultaneas = paginas_simultaneas or config['PAGINAS_SIMULTANEAS']
+    quantidade = min(pool.tamanho_max, math.ceil(min(len(urls), paginas_simultaneas) / config['PAGINAS_POR_NAVEGADOR']))
+    paginas_por_navegador = math.ceil(len(urls) / quantidade)
+    inicio = time.monotonic()
+    preparados = await asyncio.to_thread(_preparar, urls)
+
+    async with AsyncExitStack() as pilha:
+        navegadores = [
+            await pilha.enter_async_context(
+                pool.checkout(timeout=get_pool_config()['TIMEOUT_CHECKOUT'], paginas=paginas_por_navegador)
+            )
+            for _ in range(quantidade)
+        ]
+        vagas = asyncio.Semaphore(paginas_simultaneas)
+
+        async def coletar(indice, url):
+            async with vagas:
+                return await coletar_pagina(navegadores[indice % quantidade], url, *preparados[url])
+
+        resultados = await asyncio.gather(*(coletar(i, url) for i, url in enumerate(urls)))
+
+    sucesso = sum(1 for r in resultados if r)
+    logging.info(
+        f"ASYNC ENGINE: {len(urls)} páginas em {quantidade} navegadores ({sucesso} com sucesso) "
+        f"em {time.monotonic() - inicio:.1f}s."
+    )
+    return dict(zip(urls, resultados))
+
+
+# --- Fila e worker dedicado ---
+
+def enfileirar(itens):
+    """Coloca na fila do worker itens {'url', 'url_hash', 'usuario_id' (opcional)}."""
+    if not itens:
+        return 0
+    return get_redis().rpush(get_async_engine_config()['FILA'], *(json.dumps(item) for item in itens))
+
+
+def _retirar_lote(config):
+    """Espera o primeiro item (bloqueante, com timeout) e leva junto os que já estiverem na fila."""
+    redis = get_redis()
+    primeiro = redis.blpop(config['FILA'], timeout=config['ESPERA_FILA_SEGUNDOS'])
+    if primeiro is None:
+        return []
+    brutos = [primeiro[1]] + (redis.lpop(config['FILA'], config['TAMANHO_LOTE_FILA'] - 1) or [])
+    itens = []
+    for bruto in brutos:
+        try:
+            itens.append(json.loads(bruto))
+        except ValueError:
+            logging.error(f"ASYNC ENGINE: Item inválido descartado da fila: {bruto!r}")
+    return itens
+
+
+def _gravar_resultados(itens, resultados):
+    """Roda em thread: grava os sucessos em lote e devolve as falhas ao caminho lento."""
+    from . import refresh
+    from .result_sink import ResultSink
+    from .tasks import recoletar_url_lento, validar_dados_extraidos
+
+    close_old_connections()
+    sucesso, falhas = 0, 0
+    try:
+        coletadas = []
+        with ResultSink() as sink:
+            for item in itens:
+                dados = resultados.get(item['url'])
+                if dados and not validar_dados_extraidos(*dados):
+                    sink.adicionar(item['url'], dados[0], dados[1], usuario_id=item.get('usuario_id'))
+                    coletadas.append(item['url_hash'])
+                    sucesso += 1
+                else:
+                    recoletar_url_lento.delay(item['url_hash'], item['url'])
+                    falhas += 1
+        refresh.liberar_caminho_lento(coletadas)
+    finally:
+        close_old_connections()
+    return sucesso, falhas
+
+
+async def executar_worker(parar=None, max_lotes=None):
+    """
+    Consome a fila até `parar` (asyncio.Event) ser acionado ou `max_lotes`
+    lotes serem processados. Cada lote é coletado com `scrape_many`.
+    """
+    config = get_async_engine_config()
+    lotes = 0
+    logging.info(f"ASYNC ENGINE: Worker consumindo a fila '{config['FILA']}'.")
+    try:
+        while not (parar and parar.is_set()) and (max_lotes is None or lotes < max_lotes):
+            itens = await asyncio.to_thread(_retirar_lote, config)
+            if not itens:
+                continue
+            try:
+                resultados = await scrape_many([item['url'] for item in itens])
+            except Exception as e:
+                logging.error(f"ASYNC ENGINE: Erro ao coletar lote de {len(itens)} URLs: {e}", exc_info=True)
+                resultados = {}
+            sucesso, falhas = await asyncio.to_thread(_gravar_resultados, itens, resultados)
+            lotes += 1
+            logging.info(f"ASYNC ENGINE: Lote de {len(itens)} URLs gravado. Sucesso: {sucesso}, caminho lento: {falhas}.")
+    finally:
+        await encerrar_playwright()
+    return lotes
@@ -0,0 +1,451 @@
+"""
+Pool de navegadores "quentes" compartilhado pelas tarefas de scraping de um worker.
+
+Cada processo worker do Celery mantém no máximo `TAMANHO_MAX` navegadores abertos
+por tipo (Playwright e Selenium). As estratégias fazem checkout de um navegador,
+usam e devolvem, em vez de iniciar um Chromium novo a cada URL. Um navegador é
+reciclado (fechado e recriado sob demanda) quando atinge `MAX_PAGINAS` páginas
+servidas, quando o RSS do worker passa de `MAX_RSS_MB` ou quando falha no health-check.
+"""
+import asyncio
+import logging
+import os
+import random
+import shutil
+import threading
+import time
+from contextlib import contextmanager, asynccontextmanager
+from functools import lru_cache
+
+from django.conf import settings
+
+try:
+    import psutil
+except ImportError:
+    # Sem psutil, o RSS é lido de /proc e considera apenas o processo atual.
+    psutil = None
+
+DEFAULTS = {
+    'TAMANHO_MAX': 2,
+    'MAX_PAGINAS': 50,
+    'MAX_RSS_MB': 1500,
+    'TIMEOUT_CHECKOUT': 120,
+}
+
+
+def get_pool_config():
+    """Retorna a configuração do pool, mesclando `SCRAPER_BROWSER_POOL` com os padrões."""
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'SCRAPER_BROWSER_POOL', {}))
+    return config
+
+
+def rss_worker_mb():
+    """
+    RSS (em MB) do processo worker somado ao de todos os processos filhos
+    (drivers e processos do Chromium).
+    """
+    if psutil is not None:
+        try:
+            processo = psutil.Process(os.getpid())
+            total = processo.memory_info().rss
+            for filho in processo.children(recursive=True):
+                try:
+                    total += filho.memory_info().rss
+                except psutil.Error:
+                    continue
+            return total / (1024 * 1024)
+        except psutil.Error:
+            return 0.0
+    try:
+        with open('/proc/self/status', encoding='utf-8') as f:
+            for linha in f:
+                if linha.startswith('VmRSS:'):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+class PoolEsgotadoError(Exception):
+    """Nenhum navegador ficou disponível dentro do tempo limite de checkout."""
+
+
+class _Recurso:
+    __slots__ = ('obj', 'usos', 'criado_em')
+
+    def __init__(self, obj):
+        self.obj = obj
+        self.usos = 0
+        self.criado_em = time.monotonic()
+
+
+class _PoolBase:
+    """Contabilidade comum aos pools síncrono e assíncrono."""
+
+    def __init__(self, nome, tamanho_max, max_paginas, max_rss_mb):
+        self.nome = nome
+        self.tamanho_max = tamanho_max
+        self.max_paginas = max_paginas
+        self.max_rss_mb = max_rss_mb
+        self.ociosos = []
+        self.criados = 0
+        self.reciclados = 0
+
+    def _deve_reciclar(self, recurso):
+        if recurso.usos >= self.max_paginas:
+            logging.info(f"BROWSER POOL [{self.nome}]: Reciclando navegador após {recurso.usos} páginas.")
+            return True
+        if self.max_rss_mb:
+            rss = rss_worker_mb()
+            if rss > self.max_rss_mb:
+                logging.warning(f"BROWSER POOL [{self.nome}]: RSS do worker em {rss:.0f} MB (limite {self.max_rss_mb} MB). Reciclando navegador.")
+                return True
+        return False
+
+    def estatisticas(self):
+        return {
+            'nome': self.nome,
+            'ociosos': len(self.ociosos),
+            'criados': self.criados,
+            'reciclados': self.reciclados,
+        }
+
+
+class BrowserPool(_PoolBase):
+    """
+    Pool síncrono e thread-safe. Usado para drivers do Selenium.
+
+    Args:
+        criar: Função sem argumentos que cria um novo navegador.
+        destruir: Função que recebe o navegador e o encerra.
+        verificar: Função opcional de health-check; retorna False se o navegador não serve mais.
+        resetar: Função opcional chamada antes de devolver o navegador ao pool.
+    """
+
+    def __init__(self, nome, criar, destruir, verificar=None, resetar=None,
+                 tamanho_max=2, max_paginas=50, max_rss_mb=1500):
+        super().__init__(nome, tamanho_max, max_paginas, max_rss_mb)
+        self._criar = criar
+        self._destruir = destruir
+        self._verificar = verificar
+        self._resetar = resetar
+        self._vagas = threading.BoundedSemaphore(tamanho_max)
+        self._lock = threading.Lock()
+
+    def _descartar(self, recurso):
+        self.reciclados += 1
+        try:
+            self._destruir(recurso.obj)
+        except Exception as e:
+            logging.warning(f"BROWSER POOL [{self.nome}]: Erro ao encerrar navegador (ignorado): {e}")
+
+    def _obter(self):
+        while True:
+            with self._lock:
+                recurso = self.ociosos.pop() if self.ociosos else None
+            if recurso is None:
+                logging.info(f"BROWSER POOL [{self.nome}]: Iniciando novo navegador.")
+                recurso = _Recurso(self._criar())
+                self.criados += 1
+                return recurso
+            if self._verificar is None or self._verificar(recurso.obj):
+                return recurso
+            logging.warning(f"BROWSER POOL [{self.nome}]: Navegador falhou no health-check. Descartando.")
+            self._descartar(recurso)
+
+    def _devolver(self, recurso):
+        if self._resetar is not None:
+            try:
+                self._resetar(recurso.obj)
+            except Exception as e:
+                logging.warning(f"BROWSER POOL [{self.nome}]: Falha ao resetar navegador: {e}")
+                self._descartar(recurso)
+                return
+        if self._deve_reciclar(recurso):
+            self._descartar(recurso)
+            return
+        with self._lock:
+            self.ociosos.append(recurso)
+
+    @contextmanager
+    def checkout(self, timeout=None):
+        """
+        Empresta um navegador do pool. Se o bloco levantar exceção, o navegador
+        é descartado em vez de voltar ao pool.
+        """
+        if not self._vagas.acquire(timeout=timeout):
+            raise PoolEsgotadoError(f"Nenhum navegador '{self.nome}' disponível após {timeout}s.")
+        recurso = None
+        try:
+            recurso = self._obter()
+            recurso.usos += 1
+            yield recurso.obj
+        except BaseException:
+            if recurso is not None:
+                self._descartar(recurso)
+                recurso = None
+            raise
+        finally:
+            if recurso is not None:
+                self._devolver(recurso)
+            self._vagas.release()
+
+    def encerrar(self):
+        """Fecha todos os navegadores ociosos."""
+        with self._lock:
+            ociosos, self.ociosos = self.ociosos, []
+        for recurso in ociosos:
+            self._descartar(recurso)
+
+
+class AsyncBrowserPool(_PoolBase):
+    """
+    Versão asyncio do pool. Todos os métodos devem ser chamados no mesmo event loop
+    (ver `run_in_browser_loop`). Usado para navegadores do Playwright.
+    """
+
+    def __init__(self, nome, criar, destruir, verificar=None,
+                 tamanho_max=2, max_paginas=50, max_rss_mb=1500):
+        super().__init__(nome, tamanho_max, max_paginas, max_rss_mb)
+        self._criar = criar
+        self._destruir = destruir
+        self._verificar = verificar
+        self._vagas = None
+
+    async def _descartar(self, recurso):
+        self.reciclados += 1
+        try:
+            await self._destruir(recurso.obj)
+        except Exception as e:
+            logging.warning(f"BROWSER POOL [{self.nome}]: Erro ao encerrar navegador (ignorado): {e}")
+
+    async def _obter(self):
+        while self.ociosos:
+            recurso = self.ociosos.pop()
+            if self._verificar is None or await self._verificar(recurso.obj):
+                return recurso
+            logging.warning(f"BROWSER POOL [{self.nome}]: Navegador falhou no health-check. Descartando.")
+            await self._descartar(recurso)
+        logging.info(f"BROWSER POOL [{self.nome}]: Iniciando novo navegador.")
+        recurso = _Recurso(await self._criar())
+        self.criados += 1
+        return recurso
+
+    @asynccontextmanager
+    async def checkout(self, timeout=None, paginas=1):
+        """
+        Empresta um navegador. `paginas` é quantas páginas serão abertas nele
+        durante o empréstimo (ver `async_engine`), para a reciclagem por uso.
+        """
+        if self._vagas is None:
+            self._vagas = asyncio.Semaphore(self.tamanho_max)
+        try:
+            await asyncio.wait_for(self._vagas.acquire(), timeout)
+        except asyncio.TimeoutError:
+            raise PoolEsgotadoError(f"Nenhum navegador '{self.nome}' disponível após {timeout}s.")
+        recurso = None
+        try:
+            recurso = await self._obter()
+            recurso.usos += paginas
+            yield recurso.obj
+        except BaseException:
+            if recurso is not None:
+                await self._descartar(recurso)
+                recurso = None
+            raise
+        finally:
+            if recurso is not None:
+                if self._deve_reciclar(recurso):
+                    await self._descartar(recurso)
+                else:
+                    self.ociosos.append(recurso)
+            self._vagas.release()
+
+    async def encerrar(self):
+        ociosos, self.ociosos = self.ociosos, []
+        for recurso in ociosos:
+            await self._descartar(recurso)
+
+
+# --- EVENT LOOP DEDICADO ---
+# Objetos do Playwright ficam presos ao loop em que foram criados. Para que um
+# navegador sobreviva entre tarefas, todas as corrotinas do Playwright rodam em um
+# único loop mantido em uma thread daemon, em vez de um `asyncio.run` por tarefa.
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _get_browser_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='browser-pool-loop', daemon=True).start()
+        return _loop
+
+
+def run_in_browser_loop(coro, timeout=None):
+    """Executa a corrotina no loop dedicado do pool e bloqueia até o resultado."""
+    return asyncio.run_coroutine_threadsafe(coro, _get_browser_loop()).result(timeout)
+
+
+# --- PLAYWRIGHT ---
+
+_playwright = None
+_playwright_manager = None
+_playwright_pool = None
+
+
+async def _iniciar_playwright():
+    global _playwright, _playwright_manager
+    if _playwright is None:
+        from playwright.async_api import async_playwright
+        from playwright_stealth import Stealth
+        _playwright_manager = Stealth().use_async(async_playwright())
+        _playwright = await _playwright_manager.__aenter__()
+    return _playwright
+
+
+async def _criar_browser_playwright():
+    p = await _iniciar_playwright()
+    return await p.chromium.launch(headless=True)
+
+
+async def _fechar_browser_playwright(browser):
+    await browser.close()
+
+
+async def _browser_playwright_saudavel(browser):
+    return browser.is_connected()
+
+
+def get_playwright_pool():
+    """Pool de navegadores Chromium do Playwright do processo atual."""
+    global _playwright_pool
+    if _playwright_pool is None:
+        config = get_pool_config()
+        _playwright_pool = AsyncBrowserPool(
+            'playwright',
+            criar=_criar_browser_playwright,
+            destruir=_fechar_browser_playwright,
+            verificar=_browser_playwright_saudavel,
+            tamanho_max=config['TAMANHO_MAX'],
+            max_paginas=config['MAX_PAGINAS'],
+            max_rss_mb=config['MAX_RSS_MB'],
+        )
+    return _playwright_pool
+
+
+async def encerrar_playwright():
+    """Fecha os navegadores do pool e o Playwright. Deve rodar no loop em que foram criados."""
+    global _playwright, _playwright_manager
+    if _playwright_pool is not None:
+        await _playwright_pool.encerrar()
+    if _playwright_manager is not None:
+        await _playwright_manager.__aexit__(None, None, None)
+    _playwright = None
+    _playwright_manager = None
+
+
+# --- SELENIUM ---
+
+_selenium_pool = None
+
+
+@lru_cache(maxsize=1)
+def get_chromedriver_path():
+    """Resolve (e baixa, se preciso) o binário do chromedriver uma única vez por processo."""
+    from webdriver_manager.chrome import ChromeDriverManager
+    return ChromeDriverManager().install()
+
+
+def _criar_driver_selenium():
+    import undetected_chromedriver as uc
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service as ChromeService
+    from cacapreco_scraper.cacapreco_scraper.settings import USER_AGENTS
+
+    chrome_executable_path = (
+        shutil.which('google-chrome') or
+        shutil.which('chromium-browser') or
+        shutil.which('chrome')
+    )
+    if not chrome_executable_path:
+        raise RuntimeError("Navegador Chrome/Chromium não encontrado. Instale-o ou defina o caminho no spider.")
+
+    options = Options()
+    options.binary_location = chrome_executable_path
+    options.add_argument(f'user-agent={random.choice(USER_AGENTS)}')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--start-maximized')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-extensions')
+    options.add_argument('--disable-infobars')
+    options.add_argument('--disable-notifications')
+    options.add_argument('--disable-popup-blocking')
+    return uc.Chrome(
+        service=ChromeService(get_chromedriver_path()),
+        options=options,
+        headless=False
+    )
+
+
+def _fechar_driver_selenium(driver):
+    driver.quit()
+
+
+def _resetar_driver_selenium(driver):
+    """
+    Limpa o estado deixado pela página anterior antes de o driver voltar ao
+    pool: cookies, localStorage/sessionStorage da origem atual e a própria aba.
+    """
+    try:
+        driver.execute_script('window.localStorage.clear(); window.sessionStorage.clear();')
+    except Exception:
+        # Páginas sem origem (about:blank, data:) não têm storage.
+        pass
+    driver.delete_all_cookies()
+    driver.get('about:blank')
+
+
+def _driver_selenium_saudavel(driver):
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+
+def get_selenium_pool():
+    """Pool de drivers undetected-chromedriver do processo atual."""
+    global _selenium_pool
+    if _selenium_pool is None:
+        config = get_pool_config()
+        _selenium_pool = BrowserPool(
+            'selenium',
+            criar=_criar_driver_selenium,
+            destruir=_fechar_driver_selenium,
+            verificar=_driver_selenium_saudavel,
+            resetar=_resetar_driver_selenium,
+            tamanho_max=config['TAMANHO_MAX'],
+            max_paginas=config['MAX_PAGINAS'],
+            max_rss_mb=config['MAX_RSS_MB'],
+        )
+    return _selenium_pool
+
+
+def encerrar_pools():
+    """Fecha todos os navegadores do processo. Chamado no desligamento do worker."""
+    global _selenium_pool, _playwright_pool
+    if _selenium_pool is not None:
+        _selenium_pool.encerrar()
+        _selenium_pool = None
+    if _playwright_pool is not None or _playwright is not None:
+        try:
+            run_in_browser_loop(encerrar_playwright(), timeout=30)
+        except Exception as e:
+            logging.warning(f"BROWSER POOL: Erro ao encerrar o Playwright: {e}")
+        _playwright_pool = None
@@ -0,0 +1,136 @@
+"""
+Serviço de crawler Scrapy/Selenium em processo.
+
+Substitui o `xvfb-run scrapy crawl selenium_spider` por URL: o processo worker
+mantém um único reactor do Twisted (via crochet), um único display Xvfb e os
+drivers quentes do pool (`browser_pool`). Cada chamada agenda um crawl com um
+lote de URLs e recebe os itens diretamente pelo sinal `item_scraped`, sem
+passar por feed JSON no stdout.
+"""
+import atexit
+import logging
+import os
+import shutil
+import subprocess
+import threading
+
+from django.conf import settings
+
+CRAWLER_DEFAULTS = {
+    'DISPLAY': ':99',               # Display usado pelo Xvfb iniciado pelo serviço
+    'RESOLUCAO': '1280x1024x24',
+    'TIMEOUT_LOTE': 300,            # Segundos para um lote inteiro
+    'SCRAPY_SETTINGS': {
+        'ROBOTSTXT_OBEY': False,
+        'CONCURRENT_REQUESTS_PER_DOMAIN': 1,
+        'DOWNLOAD_DELAY': 2,
+        # As páginas são renderizadas no thread pool do middleware, fora do reactor compartilhado.
+        'DOWNLOADER_MIDDLEWARES': {
+            'cacapreco_scraper.cacapreco_scraper.middlewares.SeleniumMiddleware': 543,
+        },
+        # Os itens são devolvidos a quem chamou; nada de pipelines nem feeds.
+        'ITEM_PIPELINES': {},
+        'FEEDS': {},
+        'TELNETCONSOLE_ENABLED': False,
+        'LOG_LEVEL': 'INFO',
+        # O reactor é o do crochet, não o que o Scrapy instalaria por padrão.
+        'TWISTED_REACTOR': None,
+    },
+}
+
+_lock = threading.Lock()
+_runner = None
+_xvfb = None
+
+
+def get_crawler_config():
+    config = dict(CRAWLER_DEFAULTS)
+    config.update(getattr(settings, 'SCRAPER_CRAWLER', {}))
+    return config
+
+
+def _iniciar_display(config):
+    """Sobe um Xvfb para o processo, a menos que já exista um DISPLAY."""
+    global _xvfb
+    if os.environ.get('DISPLAY'):
+        return
+    if not shutil.which('Xvfb'):
+        logging.warning("CRAWLER: Xvfb não encontrado; o Chrome precisará de um DISPLAY existente.")
+        return
+    _xvfb = subprocess.Popen(
+        ['Xvfb', config['DISPLAY'], '-screen', '0', config['RESOLUCAO'], '-nolisten', 'tcp'],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    os.environ['DISPLAY'] = config['DISPLAY']
+    atexit.register(encerrar_display)
+    logging.info(f"CRAWLER: Xvfb iniciado no display {config['DISPLAY']} (pid {_xvfb.pid}).")
+
+
+def encerrar_display():
+    global _xvfb
+    if _xvfb is not None and _xvfb.poll() is None:
+        _xvfb.terminate()
+    _xvfb = None
+
+
+def get_runner():
+    """Inicializa (uma vez por processo) o display, o reactor e o CrawlerRunner."""
+    global _runner
+    if _runner is None:
+        with _lock:
+            if _runner is None:
+                import crochet
+                from scrapy.crawler import CrawlerRunner
+                from scrapy.settings import Settings
+
+                config = get_crawler_config()
+                _iniciar_display(config)
+                crochet.setup()
+                _runner = CrawlerRunner(Settings(config['SCRAPY_SETTINGS']))
+    return _runner
+
+
+def _agendar_crawl(urls, usuario_id):
+    """Roda na thread do reactor: agenda o crawl e devolve um Deferred com os itens."""
+    from scrapy import signals
+    from cacapreco_scraper.cacapreco_scraper.spiders.selenium_spider import SeleniumSpider
+
+    runner = get_runner()
+    itens = []
+
+    def item_coletado(item, response, spider):
+        itens.append(dict(item))
+
+    crawler = runner.create_crawler(SeleniumSpider)
+    crawler.signals.connect(item_coletado, signal=signals.item_scraped, weak=False)
+    deferred = runner.crawl(crawler, urls=list(urls), usuario_id=usuario_id)
+    deferred.addCallback(lambda _: itens)
+    return deferred
+
+
+def crawl_urls(urls, usuario_id, timeout=None):
+    """
+    Coleta um lote de URLs com o SeleniumSpider no reactor do processo.
+    As páginas são renderizadas pelo `SeleniumMiddleware` no thread pool dele,
+    então o reactor do crochet não fica bloqueado pelo Selenium.
+    Retorna {url: (nome, preco) ou None}.
+    """
+    import crochet
+
+    get_runner()
+    timeout = timeout or get_crawler_config()['TIMEOUT_LOTE']
+    resultados = {url: None for url in urls}
+    eventual = crochet.run_in_reactor(_agendar_crawl)(urls, usuario_id)
+    try:
+        itens = eventual.wait(timeout=timeout)
+    except crochet.TimeoutError:
+        eventual.cancel()
+        logging.error(f"CRAWLER: Timeout de {timeout}s ao coletar lote de {len(urls)} URLs.")
+        return resultados
+
+    for item in itens:
+        nome, preco = item.get('nome_produto'), item.get('preco_atual')
+        if item.get('url_produto') in resultados and nome and preco:
+            resultados[item['url_produto']] = (nome, float(preco))
+    logging.info(f"CRAWLER: Lote concluído. {sum(1 for r in resultados.values() if r)}/{len(urls)} URLs com dados.")
+    return resultados
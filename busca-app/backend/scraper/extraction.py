@@ -0,0 +1,178 @@
+"""
+Motor de extração de nome e preço compartilhado por todas as estratégias.
+
+Primeiro os blocos JSON-LD são varridos direto nos bytes (ver `jsonld`); só se
+faltar nome ou preço a página é parseada, uma única vez, com lxml (bem mais
+rápido que o `html.parser` do BeautifulSoup em páginas de vários MB). Os
+seletores CSS são traduzidos para XPath e compilados uma vez por processo;
+seletores que começam com '/' são tratados como XPath. Sobre a árvore, os
+candidatos de nome e preço são tentados em ordem de prioridade, parando no
+primeiro que encontrar.
+"""
+import logging
+import re
+from functools import lru_cache
+
+from cssselect import GenericTranslator, SelectorError
+from lxml import etree
+from lxml import html as lxml_html
+
+from .jsonld import scan
+
+GENERIC_NOME_SELECTORS = ('h1', 'h1[class*="title"]', 'h1[class*="name"]')
+GENERIC_PRECO_SELECTORS = ('span[class*="price"]', 'div[class*="price"]', 'p[class*="price"]')
+
+_XPATH_FRACAO_AMAZON = etree.XPath(
+    'following-sibling::*[contains(concat(" ", normalize-space(@class), " "), " a-price-fraction ")][1]'
+)
+_REGEX_PRECO = re.compile(r'\d[\d.,]*')
+_tradutor = GenericTranslator()
+
+
+@lru_cache(maxsize=2048)
+def compilar_seletor(seletor):
+    """Compila um seletor CSS (ou XPath, se começar com '/'). Retorna None se for inválido."""
+    try:
+        xpath = seletor if seletor.startswith('/') else _tradutor.css_to_xpath(seletor)
+        return etree.XPath(xpath)
+    except (SelectorError, etree.XPathSyntaxError) as e:
+        logging.warning(f"EXTRACAO: Seletor inválido ignorado '{seletor}': {e}")
+        return None
+
+
+@lru_cache(maxsize=512)
+def compilar_candidatos(seletores):
+    """Compila uma tupla de seletores, preservando a ordem e descartando os inválidos."""
+    compilados = []
+    for seletor in seletores:
+        xpath = compilar_seletor(seletor)
+        if xpath is not None:
+            compilados.append((seletor, xpath))
+    return tuple(compilados)
+
+
+def _separador_decimal(numero, padrao):
+    """
+    O último separador seguido de uma ou duas casas é o decimal, qualquer que
+    seja o padrão ('1.849,90', '1,849.90'). Sem isso ('1.849', '1,849'), vale o padrão.
+    """
+    ultimo = max(numero.rfind('.'), numero.rfind(','))
+    if ultimo != -1 and len(numero) - ultimo - 1 <= 2:
+        return numero[ultimo]
+    return padrao
+
+
+def converter_preco(valor, separador_decimal=','):
+    """
+    Converte um preço em float. Textos de HTML usam o formato brasileiro
+    ('R$ 1.849,90'); valores do JSON-LD usam ponto decimal ('1849.90'), mas
+    há lojas que publicam o formato brasileiro no JSON-LD também: centavos
+    depois do último separador prevalecem sobre `separador_decimal`.
+    """
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    encontrado = _REGEX_PRECO.search(str(valor))
+    if not encontrado:
+        return None
+    numero = encontrado.group(0).rstrip('.,')
+    decimal = _separador_decimal(numero, separador_decimal)
+    milhar = '.' if decimal == ',' else ','
+    numero = numero.replace(milhar, '').replace(decimal, '.')
+    try:
+        return float(numero)
+    except ValueError:
+        return None
+
+
+def _texto(resultado):
+    if isinstance(resultado, str):
+        return resultado.strip()
+    return ' '.join(resultado.text_content().split())
+
+
+def _primeiro(arvore, candidatos):
+    """Retorna (seletor, elemento, texto) do primeiro candidato com texto não vazio."""
+    for seletor, xpath in candidatos:
+        for resultado in xpath(arvore):
+            texto = _texto(resultado)
+            if texto:
+                return seletor, resultado, texto
+    return None, None, None
+
+
+def parsear_html(html):
+    """Constrói a árvore lxml; retorna None para documentos vazios."""
+    if isinstance(html, str):
+        html = html.encode('utf-8')
+    if not html or not html.strip():
+        return None
+    try:
+        return lxml_html.document_fromstring(html, parser=lxml_html.HTMLParser(encoding='utf-8'))
+    except (etree.ParserError, ValueError) as e:
+        logging.warning(f"EXTRACAO: Não foi possível parsear o HTML: {e}")
+        return None
+
+
+def candidatos_padrao(url):
+    """Seletores do domínio (registro) seguidos dos genéricos."""
+    from .scraping_service import get_specific_selectors
+
+    especificos = get_specific_selectors(url) or {}
+    return {
+        'nome': tuple(especificos.get('nome', ())) + GENERIC_NOME_SELECTORS,
+        'preco': tuple(especificos.get('preco', ())) + GENERIC_PRECO_SELECTORS,
+    }
+
+
+def extract(html, url, selectors=None):
+    """
+    Extrai nome e preço de uma página de produto.
+
+    `selectors` é um dicionário {'nome': [...], 'preco': [...]} com os candidatos
+    em ordem de prioridade; se omitido, usa os seletores do domínio da URL mais
+    os genéricos. Retorna um dicionário com 'nome', 'preco' (float ou None),
+    'preco_texto' (texto bruto encontrado) e 'fonte' ('json_ld', 'seletores' ou None).
+    """
+    resultado = {'nome': None, 'preco': None, 'preco_texto': None, 'fonte': None}
+
+    # Pré-varredura dos blocos JSON-LD direto nos bytes: se ela já traz nome e
+    # preço, a árvore da página nem chega a ser construída.
+    json_ld = scan(html)
+    if json_ld.nome:
+        resultado['nome'] = json_ld.nome
+        resultado['fonte'] = 'json_ld'
+    preco = converter_preco(json_ld.preco, separador_decimal='.') if json_ld.preco is not None else None
+    if preco is not None:
+        # Preço ilegível no JSON-LD (ex.: 'Consulte') fica para os seletores.
+        resultado['preco_texto'] = str(json_ld.preco)
+        resultado['preco'] = preco
+        resultado['fonte'] = 'json_ld'
+    if resultado['nome'] and resultado['preco_texto']:
+        return resultado
+
+    arvore = parsear_html(html)
+    if arvore is None:
+        return resultado
+
+    if selectors is None:
+        selectors = candidatos_padrao(url)
+
+    if not resultado['nome']:
+        _, _, nome = _primeiro(arvore, compilar_candidatos(tuple(selectors.get('nome', ()))))
+        if nome:
+            resultado['nome'] = nome
+            resultado['fonte'] = resultado['fonte'] or 'seletores'
+
+    if not resultado['preco_texto']:
+        _, elemento, texto = _primeiro(arvore, compilar_candidatos(tuple(selectors.get('preco', ()))))
+        if texto:
+            # Amazon separa a parte inteira e os centavos em elementos irmãos.
+            if not isinstance(elemento, str) and 'a-price-whole' in (elemento.get('class') or ''):
+                fracao = _XPATH_FRACAO_AMAZON(elemento)
+                if fracao:
+                    texto = f"{texto.rstrip(',.')},{_texto(fracao[0])}"
+            resultado['preco_texto'] = texto
+            resultado['preco'] = converter_preco(texto)
+            resultado['fonte'] = resultado['fonte'] or 'seletores'
+
+    return resultado
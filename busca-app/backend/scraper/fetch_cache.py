@@ -0,0 +1,98 @@
+"""
+Cache de validação das páginas baixadas pelo fast path.
+
+Para cada URL canônica guarda no Redis o ETag, o Last-Modified, um hash do
+trecho da página que contém o produto (os blocos JSON-LD ou, na falta deles,
+nome + preço extraídos) e o último nome/preço. Na próxima coleta:
+
+- a requisição leva `If-None-Match`/`If-Modified-Since`; um 304 dispensa o
+  download e o parse;
+- se a página veio inteira mas o trecho do produto tem o mesmo hash, o
+  resultado anterior é reaproveitado.
+
+Nos dois casos quem chamou só precisa atualizar `ultima_coleta`.
+"""
+import hashlib
+import logging
+
+import redis
+from django.conf import settings
+
+from .models import get_url_hash
+from .redis_client import get_redis
+
+PREFIXO = 'scraper:fetch:'
+
+FETCH_CACHE_DEFAULTS = {
+    'TTL_SEGUNDOS': 7 * 24 * 60 * 60,
+}
+
+# Resultado de uma coleta em que a página não mudou desde a anterior.
+PAGINA_INALTERADA = object()
+
+
+def get_fetch_cache_config():
+    config = dict(FETCH_CACHE_DEFAULTS)
+    config.update(getattr(settings, 'SCRAPER_FETCH_CACHE', {}))
+    return config
+
+
+def _chave(url):
+    return f'{PREFIXO}{get_url_hash(url)}'
+
+
+def hash_fragmento(*partes):
+    """Hash do trecho que identifica o produto quando não há JSON-LD."""
+    return hashlib.sha256('|'.join(str(p) for p in partes).encode()).hexdigest()
+
+
+def obter_entrada(url):
+    """Retorna a entrada em cache (dict com etag, last_modified, fragmento, nome, preco) ou None."""
+    try:
+        bruto = get_redis().hgetall(_chave(url))
+    except redis.RedisError as e:
+        logging.warning(f"FETCH CACHE: Redis indisponível ao consultar {url}: {e}")
+        return None
+    if not bruto:
+        return None
+    entrada = {k.decode(): v.decode() for k, v in bruto.items()}
+    entrada['preco'] = float(entrada['preco']) if entrada.get('preco') else None
+    return entrada
+
+
+def headers_condicionais(entrada):
+    if not entrada:
+        return {}
+    headers = {}
+    if entrada.get('etag'):
+        headers['If-None-Match'] = entrada['etag']
+    if entrada.get('last_modified'):
+        headers['If-Modified-Since'] = entrada['last_modified']
+    return headers
+
+
+def salvar_entrada(url, headers_resposta, fragmento, nome, preco):
+    """Grava os validadores da resposta e o resultado da extração."""
+    chave = _chave(url)
+    try:
+        pipe = get_redis().pipeline()
+        pipe.delete(chave)
+        pipe.hset(chave, mapping={
+            'etag': headers_resposta.get('ETag', ''),
+            'last_modified': headers_resposta.get('Last-Modified', ''),
+            'fragmento': fragmento or '',
+            'nome': nome,
+            'preco': repr(float(preco)),
+        })
+        pipe.expire(chave, get_fetch_cache_config()['TTL_SEGUNDOS'])
+        pipe.execute()
+    except redis.RedisError as e:
+        logging.warning(f"FETCH CACHE: Falha ao gravar a entrada de {url}: {e}")
+
+
+def renovar_entrada(url):
+    """Estende a validade da entrada após um 304."""
+    try:
+        get_redis().expire(_chave(url), get_fetch_cache_config()['TTL_SEGUNDOS'])
+    except redis.RedisError as e:
+        logging.warning(f"FETCH CACHE: Falha ao renovar a entrada de {url}: {e}")
@@ -0,0 +1,444 @@
+"""
+Camada de armazenamento do histórico de preços.
+
+O histórico guarda só os pontos de mudança: uma coleta com o mesmo preço da
+anterior apenas avança `confirmado_em` da última linha. Assim ler a série de
+uma página custa O(mudanças), não O(coletas), não importa há quanto tempo ela
+é monitorada.
+
+Cada escrita também recalcula o `ResumoPrecos` das páginas envolvidas (último
+preço, anterior, variação e mínimo/máximo/média de 7, 30 e 90 dias), lido
+pelas listagens sem tocar no histórico.
+
+Linhas mais antigas que `DIAS_DETALHE` são compactadas em `HistoricoPrecosDiario`
+(mínimo, máximo e fechamento do dia) pela tarefa diária `compactar_historico`.
+No MySQL a tabela é particionada por mês (`TO_DAYS(data_coleta)`); a mesma
+tarefa cria as partições dos próximos meses e remove as antigas que ficaram
+vazias depois da compactação.
+"""
+import logging
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .models import PaginaProduto, HistoricoPrecos, HistoricoPrecosDiario, ResumoPrecos
+
+TABELA = HistoricoPrecos._meta.db_table
+
+HISTORICO_DEFAULTS = {
+    'DIAS_DETALHE': 90,             # Idade a partir da qual os pontos viram resumo diário
+    'MESES_PARTICOES_FUTURAS': 3,   # Partições mensais criadas com antecedência (MySQL)
+    'TAMANHO_LOTE_COMPACTACAO': 5000,
+    'MAX_PONTOS_SERIE': 500,        # Buckets devolvidos no máximo pela API de série
+}
+
+JANELAS_RESUMO = (7, 30, 90)
+
+# Resoluções da série OHLC, da mais fina para a mais grossa, com a duração aproximada do bucket.
+RESOLUCOES = {
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+    'week': timedelta(weeks=1),
+    'month': timedelta(days=30),
+}
+
+
+def get_historico_config():
+    config = dict(HISTORICO_DEFAULTS)
+    config.update(getattr(settings, 'SCRAPER_HISTORICO', {}))
+    return config
+
+
+def normalizar_preco(valor):
+    """Preço como Decimal com duas casas, para comparar float com DecimalField."""
+    if valor is None:
+        return None
+    return Decimal(str(valor)).quantize(Decimal('0.01'))
+
+
+def ultimos_pontos(pagina_ids):
+    """Retorna {pagina_id: (id, preco)} da linha mais recente de cada página, numa consulta."""
+    ultimo = HistoricoPrecos.objects.filter(pagina_id=OuterRef('pk')).order_by('-data_coleta', '-id')
+    linhas = PaginaProduto.objects.filter(pk__in=pagina_ids).annotate(
+        ultimo_id=Subquery(ultimo.values('id')[:1]),
+        ultimo_preco=Subquery(ultimo.values('preco')[:1]),
+    ).values_list('pk', 'ultimo_id', 'ultimo_preco')
+    return {pk: (ultimo_id, preco) for pk, ultimo_id, preco in linhas if ultimo_id is not None}
+
+
+def registrar_coletas(coletas, agora=None):
+    """
+    Registra coletas [(pagina_id, preco), ...] em ordem cronológica. Preço igual
+    ao anterior só confirma o ponto existente; preço novo cria um ponto.
+    Retorna (pontos criados, pontos confirmados).
+    """
+    agora = agora or timezone.now()
+    ultimos = ultimos_pontos({pagina_id for pagina_id, _ in coletas})
+    anteriores = {pagina_id: preco for pagina_id, (_, preco) in ultimos.items()}
+    confirmar = set()
+    novos = {}
+    for pagina_id, preco in coletas:
+        preco = normalizar_preco(preco)
+        if preco is None:
+            continue
+        if anteriores.get(pagina_id) == preco:
+            if pagina_id not in novos:
+                confirmar.add(pagina_id)
+            continue
+        # Mudanças dentro do mesmo lote também geram pontos, na ordem em que chegaram.
+        novos.setdefault(pagina_id, []).append(preco)
+        anteriores[pagina_id] = preco
+        confirmar.discard(pagina_id)
+
+    if confirmar:
+        HistoricoPrecos.objects.filter(pk__in=[ultimos[p][0] for p in confirmar]).update(confirmado_em=agora)
+    objetos = [
+        HistoricoPrecos(pagina_id=pagina_id, preco=preco, confirmado_em=agora)
+        for pagina_id, precos in novos.items() for preco in precos
+    ]
+    HistoricoPrecos.objects.bulk_create(objetos)
+    atualizar_resumos(confirmar | set(novos), agora)
+    return len(objetos), len(confirmar)
+
+
+def _estatisticas_janela(segmentos, inicio, fim):
+    """Mínimo, máximo e média ponderada pelo tempo dos segmentos [(inicio, preco)] em [inicio, fim]."""
+    precos, soma, duracao_total = [], Decimal(0), 0.0
+    for i, (comeco, preco) in enumerate(segmentos):
+        termino = segmentos[i + 1][0] if i + 1 < len(segmentos) else fim
+        duracao = max((min(termino, fim) - max(comeco, inicio)).total_seconds(), 0)
+        # O último segmento é o preço vigente: entra mesmo que tenha acabado de começar.
+        if duracao > 0 or i == len(segmentos) - 1:
+            precos.append(preco)
+            soma += preco * Decimal(duracao)
+            duracao_total += duracao
+    if not precos:
+        return None
+    media = soma / Decimal(duracao_total) if duracao_total else precos[-1]
+    return min(precos), max(precos), normalizar_preco(media)
+
+
+def atualizar_resumos(pagina_ids, agora=None):
+    """
+    Recalcula o `ResumoPrecos` das páginas a partir dos pontos de mudança da
+    maior janela (mais o ponto vigente no início dela). Custa duas consultas
+    (três se houver período compactado dentro da janela) e um upsert por
+    chamada, independente do número de páginas.
+    """
+    pagina_ids = set(pagina_ids)
+    if not pagina_ids:
+        return 0
+    agora = agora or timezone.now()
+    inicio_janela = agora - timedelta(days=max(JANELAS_RESUMO))
+
+    anterior_ao_inicio = HistoricoPrecos.objects.filter(pagina_id=OuterRef('pk'), data_coleta__lt=inicio_janela).order_by('-data_coleta', '-id')
+    pontos_desc = HistoricoPrecos.objects.filter(pagina_id=OuterRef('pk')).order_by('-data_coleta', '-id')
+    segmentos = {}
+    anteriores = {}
+    for pk, inicio_preco, preco_inicio, preco_anterior in PaginaProduto.objects.filter(pk__in=pagina_ids).annotate(
+        inicio_preco=Subquery(anterior_ao_inicio.values('data_coleta')[:1]),
+        preco_inicio=Subquery(anterior_ao_inicio.values('preco')[:1]),
+        preco_anterior=Subquery(pontos_desc.values('preco')[1:2]),
+    ).values_list('pk', 'inicio_preco', 'preco_inicio', 'preco_anterior'):
+        anteriores[pk] = preco_anterior
+        if inicio_preco is not None:
+            segmentos[pk] = [(inicio_preco, preco_inicio)]
+
+    # Período já compactado que ainda cai na janela: fechamentos diários.
+    if get_historico_config()['DIAS_DETALHE'] < max(JANELAS_RESUMO):
+        for pagina_id, dia, fechamento in HistoricoPrecosDiario.objects.filter(
+            pagina_id__in=pagina_ids, dia__gte=timezone.localdate(inicio_janela)
+        ).order_by('dia').values_list('pagina_id', 'dia', 'preco_fechamento'):
+            segmentos.setdefault(pagina_id, []).append((_inicio_do_dia(dia), fechamento))
+
+    for pagina_id, data_coleta, preco in HistoricoPrecos.objects.filter(
+        pagina_id__in=pagina_ids, data_coleta__gte=inicio_janela
+    ).order_by('data_coleta', 'id').values_list('pagina_id', 'data_coleta', 'preco'):
+        segmentos.setdefault(pagina_id, []).append((data_coleta, preco))
+
+    resumos = []
+    for pagina_id, pontos in segmentos.items():
+        pontos.sort(key=lambda ponto: ponto[0])
+        ultimo, anterior = pontos[-1][1], anteriores.get(pagina_id)
+        campos = {
+            'preco_ultimo': ultimo,
+            'preco_anterior': anterior,
+            'variacao_percentual': normalizar_preco((ultimo - anterior) / anterior * 100) if anterior else None,
+            'atualizado_em': agora,
+        }
+        for dias in JANELAS_RESUMO:
+            minimo, maximo, media = _estatisticas_janela(pontos, agora - timedelta(days=dias), agora)
+            campos.update({f'min_{dias}d': minimo, f'max_{dias}d': maximo, f'media_{dias}d': media})
+        resumos.append(ResumoPrecos(pagina_id=pagina_id, **campos))
+
+    if resumos:
+        campos_atualizados = [f.name for f in ResumoPrecos._meta.concrete_fields if not f.primary_key]
+        ResumoPrecos.objects.bulk_create(
+            resumos, update_conflicts=True, update_fields=campos_atualizados,
+            unique_fields=['pagina'] if connection.features.supports_update_conflicts_with_target else None,
+        )
+    return len(resumos)
+
+
+def _inicio_do_dia(dia):
+    return timezone.make_aware(datetime.combine(dia, time.min))
+
+
+def serie(pagina_id, desde=None):
+    """
+    Série de preços da página, do mais recente ao mais antigo, como
+    [{'preco', 'data_coleta'}]: os pontos de mudança seguidos dos fechamentos
+    diários do período já compactado. `desde` limita o período.
+    """
+    pontos = HistoricoPrecos.objects.filter(pagina_id=pagina_id)
+    diarios = HistoricoPrecosDiario.objects.filter(pagina_id=pagina_id)
+    if desde is not None:
+        pontos = pontos.filter(data_coleta__gte=desde)
+        diarios = diarios.filter(dia__gte=timezone.localdate(desde))
+    pontos = list(pontos.order_by('-data_coleta').values('preco', 'data_coleta'))
+    if pontos:
+        # O ponto mais antigo que sobrou já cobre o próprio dia.
+        diarios = diarios.filter(dia__lt=timezone.localdate(pontos[-1]['data_coleta']))
+    for dia, fechamento in diarios.order_by('-dia').values_list('dia', 'preco_fechamento'):
+        pontos.append({'preco': fechamento, 'data_coleta': _inicio_do_dia(dia)})
+    if desde is not None:
+        # Preço que já vigorava no início do período, para a série não começar vazia.
+        anterior = (
+            HistoricoPrecos.objects.filter(pagina_id=pagina_id, data_coleta__lt=desde)
+            .order_by('-data_coleta').values('preco', 'data_coleta').first()
+        )
+        if anterior is None:
+            diario = (
+                HistoricoPrecosDiario.objects.filter(pagina_id=pagina_id, dia__lt=timezone.localdate(desde))
+                .order_by('-dia').values_list('dia', 'preco_fechamento').first()
+            )
+            anterior = diario and {'preco': diario[1], 'data_coleta': _inicio_do_dia(diario[0])}
+        if anterior:
+            pontos.append(anterior)
+    return pontos
+
+
+def inicio_bucket(momento, resolucao):
+    local = timezone.localtime(momento)
+    if resolucao == 'hour':
+        return local.replace(minute=0, second=0, microsecond=0)
+    dia = local.date()
+    if resolucao == 'week':
+        dia -= timedelta(days=dia.weekday())
+    elif resolucao == 'month':
+        dia = dia.replace(day=1)
+    return _inicio_do_dia(dia)
+
+
+def _proximo_bucket(inicio, resolucao):
+    if resolucao == 'hour':
+        return inicio + timedelta(hours=1)
+    dia = timezone.localdate(inicio)
+    if resolucao == 'day':
+        return _inicio_do_dia(dia + timedelta(days=1))
+    if resolucao == 'week':
+        return _inicio_do_dia(dia + timedelta(weeks=1))
+    return _inicio_do_dia(_proximo_mes(dia))
+
+
+def resolucao_efetiva(inicio, fim, resolucao, max_pontos=None):
+    """A resolução pedida ou a primeira mais grossa que cabe em `max_pontos` buckets."""
+    max_pontos = max_pontos or get_historico_config()['MAX_PONTOS_SERIE']
+    nomes = list(RESOLUCOES)
+    for nome in nomes[nomes.index(resolucao):]:
+        if (fim - inicio) / RESOLUCOES[nome] <= max_pontos:
+            return nome
+    return nomes[-1]
+
+
+def ohlc(pagina_id, inicio, fim, resolucao):
+    """
+    Série OHLC da página entre `inicio` e `fim`, um bucket por período da
+    resolução: [{'inicio', 'abertura', 'maxima', 'minima', 'fechamento'}].
+    Lê os pontos de mudança e, no período compactado, o resumo diário; buckets
+    sem mudança repetem o preço vigente. Buckets antes do primeiro preço são omitidos.
+    """
+    # (momento, mínima, máxima, fechamento) em ordem cronológica.
+    eventos = [
+        (data_coleta, preco, preco, preco)
+        for data_coleta, preco in HistoricoPrecos.objects.filter(
+            pagina_id=pagina_id, data_coleta__gte=inicio, data_coleta__lt=fim
+        ).values_list('data_coleta', 'preco')
+    ]
+    eventos += [
+        (_inicio_do_dia(dia), minimo, maximo, fechamento)
+        for dia, minimo, maximo, fechamento in HistoricoPrecosDiario.objects.filter(
+            pagina_id=pagina_id, dia__gte=timezone.localdate(inicio), dia__lt=timezone.localdate(fim)
+        ).values_list('dia', 'preco_min', 'preco_max', 'preco_fechamento')
+    ]
+    eventos.sort(key=lambda evento: evento[0])
+
+    # Preço vigente no início do período.
+    vigente = (
+        HistoricoPrecos.objects.filter(pagina_id=pagina_id, data_coleta__lt=inicio)
+        .order_by('-data_coleta').values_list('preco', flat=True).first()
+    )
+    if vigente is None:
+        vigente = (
+            HistoricoPrecosDiario.objects.filter(pagina_id=pagina_id, dia__lt=timezone.localdate(inicio))
+            .order_by('-dia').values_list('preco_fechamento', flat=True).first()
+        )
+
+    buckets = []
+    bucket = inicio_bucket(inicio, resolucao)
+    i = 0
+    while bucket < fim:
+        proximo = _proximo_bucket(bucket, resolucao)
+        abertura = vigente
+        minima = maxima = vigente
+        while i < len(eventos) and eventos[i][0] < proximo:
+            _, ev_min, ev_max, vigente = eventos[i]
+            if abertura is None:
+                abertura = vigente
+            minima = ev_min if minima is None else min(minima, ev_min)
+            maxima = ev_max if maxima is None else max(maxima, ev_max)
+            i += 1
+        if vigente is not None:
+            buckets.append({
+                'inicio': bucket,
+                'abertura': abertura,
+                'maxima': maxima,
+                'minima': minima,
+                'fechamento': vigente,
+            })
+        bucket = proximo
+    return buckets
+
+
+def compactar(dias_detalhe=None, tamanho_lote=None):
+    """
+    Resume em `HistoricoPrecosDiario` os pontos anteriores ao corte e apaga-os.
+    O ponto mais recente de cada página é mantido, pois ele é o preço vigente.
+    Retorna {'dias': n, 'removidos': n}.
+    """
+    config = get_historico_config()
+    dias_detalhe = dias_detalhe or config['DIAS_DETALHE']
+    tamanho_lote = tamanho_lote or config['TAMANHO_LOTE_COMPACTACAO']
+    corte = _inicio_do_dia(timezone.localdate() - timedelta(days=dias_detalhe))
+
+    vigentes = HistoricoPrecos.objects.filter(pagina_id=OuterRef('pagina_id')).order_by('-data_coleta', '-id').values('id')[:1]
+    antigos = HistoricoPrecos.objects.filter(data_coleta__lt=corte, pagina__isnull=False)
+
+    resumos = {}
+    remover = []
+    linhas = antigos.annotate(vigente=Subquery(vigentes)).order_by('pagina_id', 'data_coleta', 'id')
+    for pk, pagina_id, preco, data_coleta, vigente in linhas.values_list('pk', 'pagina_id', 'preco', 'data_coleta', 'vigente').iterator(chunk_size=tamanho_lote):
+        chave = (pagina_id, timezone.localdate(data_coleta))
+        minimo, maximo, _ = resumos.get(chave, (preco, preco, preco))
+        resumos[chave] = (min(minimo, preco), max(maximo, preco), preco)
+        if pk != vigente:
+            remover.append(pk)
+
+    with transaction.atomic():
+        # Um dia pode já ter sido resumido (o ponto vigente fica para a próxima
+        # compactação); nesse caso mínimo e máximo são combinados.
+        existentes = {}
+        paginas = {pagina_id for pagina_id, _ in resumos}
+        dias = {dia for _, dia in resumos}
+        for resumo in HistoricoPrecosDiario.objects.filter(pagina_id__in=paginas, dia__in=dias):
+            existentes[(resumo.pagina_id, resumo.dia)] = resumo
+        objetos = []
+        for (pagina_id, dia), (minimo, maximo, fechamento) in resumos.items():
+            anterior = existentes.get((pagina_id, dia))
+            if anterior:
+                minimo, maximo = min(minimo, anterior.preco_min), max(maximo, anterior.preco_max)
+            objetos.append(HistoricoPrecosDiario(
+                pagina_id=pagina_id, dia=dia, preco_min=minimo, preco_max=maximo, preco_fechamento=fechamento
+            ))
+        if objetos:
+            unicos = ['pagina', 'dia'] if connection.features.supports_update_conflicts_with_target else None
+            HistoricoPrecosDiario.objects.bulk_create(
+                objetos, batch_size=tamanho_lote, update_conflicts=True,
+                unique_fields=unicos, update_fields=['preco_min', 'preco_max', 'preco_fechamento']
+            )
+        for i in range(0, len(remover), tamanho_lote):
+            HistoricoPrecos.objects.filter(pk__in=remover[i:i + tamanho_lote]).delete()
+
+    logging.info(f"HISTORICO: Compactação até {corte:%d/%m/%Y}: {len(resumos)} dias resumidos, {len(remover)} pontos removidos.")
+    return {'dias': len(resumos), 'removidos': len(remover)}
+
+
+def atualizar_todos_resumos(tamanho_lote=None):
+    """
+    Recalcula os resumos de todas as páginas com histórico. Roda na tarefa
+    diária para que as janelas avancem também nas páginas que pararam de ser
+    coletadas.
+    """
+    tamanho_lote = tamanho_lote or get_historico_config()['TAMANHO_LOTE_COMPACTACAO'] // 10
+    ids = list(PaginaProduto.objects.filter(preco_atual__isnull=False).values_list('pk', flat=True))
+    total = 0
+    for i in range(0, len(ids), tamanho_lote):
+        total += atualizar_resumos(ids[i:i + tamanho_lote])
+    logging.info(f"HISTORICO: {total} resumos de preço recalculados.")
+    return total
+
+
+def _nome_particao(mes):
+    return f'p{mes:%Y%m}'
+
+
+def _proximo_mes(mes):
+    return (mes.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _particoes_existentes(cursor):
+    cursor.execute(
+        "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL",
+        [TABELA]
+    )
+    return {nome for (nome,) in cursor.fetchall()}
+
+
+def manter_particoes(meses_a_frente=None, dias_detalhe=None):
+    """
+    MySQL: garante as partições dos próximos meses (dividindo a `pmax`) e
+    remove as partições anteriores ao período detalhado que ficaram vazias.
+    Nos demais bancos não faz nada.
+    """
+    if connection.vendor != 'mysql':
+        return {'criadas': 0, 'removidas': 0}
+    config = get_historico_config()
+    meses_a_frente = meses_a_frente or config['MESES_PARTICOES_FUTURAS']
+    dias_detalhe = dias_detalhe or config['DIAS_DETALHE']
+    hoje = timezone.localdate()
+    criadas, removidas = [], []
+
+    with connection.cursor() as cursor:
+        existentes = _particoes_existentes(cursor)
+        if 'pmax' not in existentes:
+            logging.warning(f"HISTORICO: Tabela {TABELA} não está particionada; manutenção ignorada.")
+            return {'criadas': 0, 'removidas': 0}
+
+        mes = hoje.replace(day=1)
+        for _ in range(meses_a_frente + 1):
+            if _nome_particao(mes) not in existentes:
+                cursor.execute(
+                    f"ALTER TABLE {TABELA} REORGANIZE PARTITION pmax INTO ("
+                    f"PARTITION {_nome_particao(mes)} VALUES LESS THAN (TO_DAYS('{_proximo_mes(mes)}')), "
+                    f"PARTITION pmax VALUES LESS THAN MAXVALUE)"
+                )
+                criadas.append(_nome_particao(mes))
+            mes = _proximo_mes(mes)
+
+        limite = _nome_particao((hoje - timedelta(days=dias_detalhe)).replace(day=1))
+        for nome in sorted(existentes - {'pmax'}):
+            if nome >= limite:
+                break
+            cursor.execute(f"SELECT 1 FROM {TABELA} PARTITION ({nome}) LIMIT 1")
+            if cursor.fetchone() is None:
+                cursor.execute(f"ALTER TABLE {TABELA} DROP PARTITION {nome}")
+                removidas.append(nome)
+
+    if criadas or removidas:
+        logging.info(f"HISTORICO: Partições criadas: {criadas}; removidas: {removidas}.")
+    return {'criadas': len(criadas), 'removidas': len(removidas)}
@@ -0,0 +1,162 @@
+"""
+Coalescência de coletas em andamento.
+
+Se duas tarefas pedem a mesma URL (mesmo `url_hash`) ao mesmo tempo, apenas a
+primeira executa as estratégias de scraping. As demais esperam o resultado
+publicado por ela no Redis, em vez de abrir outro navegador para a mesma página.
+
+A espera é um BLPOP na lista de aviso da URL: a dona empurra um aviso ao
+publicar (ou ao desistir) e cada tarefa acordada o devolve para a próxima. O
+BLPOP é feito em fatias, para perceber uma dona que morreu sem avisar.
+"""
+import json
+import logging
+import time
+import uuid
+
+import redis
+from django.conf import settings
+
+from .redis_client import get_redis, apagar_se_igual
+
+INFLIGHT_DEFAULTS = {
+    'FATIA_ESPERA_SEGUNDOS': 15,  # Cada BLPOP; entre eles confere se a dona ainda segura a trava
+    # Quem espera desiste a tempo de coletar sozinho antes do soft time limit da tarefa.
+    'ORCAMENTO_COLETA_SEGUNDOS': 300,
+}
+
+PREFIXO_TRAVA = 'scraper:inflight:'
+PREFIXO_RESULTADO = 'scraper:inflight:resultado:'
+PREFIXO_AVISO = 'scraper:inflight:aviso:'
+
+# Sem resultado e sem trava: a coleta dona terminou sem publicar (ex.: worker morto).
+NAO_DISPONIVEL = object()
+
+
+def get_inflight_config():
+    config = dict(INFLIGHT_DEFAULTS)
+    config.update(getattr(settings, 'SCRAPER_INFLIGHT', {}))
+    return config
+
+
+class ColetaEmAndamento:
+    """
+    Coordena uma coleta por `url_hash`.
+
+    Uso:
+        coleta = ColetaEmAndamento(url_hash)
+        if coleta.adquirir():
+            try:
+                dados = ...
+            finally:
+                coleta.publicar(dados)
+        else:
+            dados = coleta.aguardar()
+    """
+
+    def __init__(self, url_hash, ttl=900, ttl_resultado=120):
+        self.url_hash = url_hash
+        self.ttl = ttl
+        self.ttl_resultado = ttl_resultado
+        self.token = uuid.uuid4().hex
+        self.dona = False
+
+    @property
+    def chave_trava(self):
+        return f'{PREFIXO_TRAVA}{self.url_hash}'
+
+    @property
+    def chave_resultado(self):
+        return f'{PREFIXO_RESULTADO}{self.url_hash}'
+
+    @property
+    def chave_aviso(self):
+        return f'{PREFIXO_AVISO}{self.url_hash}'
+
+    def _avisar(self, pipe):
+        # Um aviso basta: cada tarefa que acorda o devolve para a próxima.
+        pipe.rpush(self.chave_aviso, 1)
+        pipe.expire(self.chave_aviso, self.ttl_resultado)
+
+    def adquirir(self):
+        """
+        Retorna True se esta tarefa deve executar a coleta. Se o Redis estiver
+        indisponível, executa sem coalescência.
+        """
+        try:
+            r = get_redis()
+            self.dona = bool(r.set(self.chave_trava, self.token, nx=True, ex=self.ttl))
+            if self.dona:
+                # Descarta o resultado e o aviso de uma coleta anterior da mesma URL.
+                r.delete(self.chave_resultado, self.chave_aviso)
+        except redis.RedisError as e:
+            logging.warning(f"INFLIGHT: Redis indisponível, seguindo sem coalescência: {e}")
+            self.dona = True
+        return self.dona
+
+    def publicar(self, dados):
+        """Publica o resultado (tupla (nome, preco) ou None) e libera a trava."""
+        if not self.dona:
+            return
+        try:
+            r = get_redis()
+            pipe = r.pipeline()
+            pipe.set(self.chave_resultado, json.dumps({'dados': list(dados) if dados else None}), ex=self.ttl_resultado)
+            # Se a trava expirou e outra tarefa a adquiriu, ela continua com a nova dona.
+            apagar_se_igual(r, self.chave_trava, self.token, pipe=pipe)
+            self._avisar(pipe)
+            pipe.execute()
+        except redis.RedisError as e:
+            logging.warning(f"INFLIGHT: Falha ao publicar resultado para {self.url_hash}: {e}")
+
+    def liberar(self):
+        """Libera a trava sem publicar resultado."""
+        if not self.dona:
+            return
+        try:
+            r = get_redis()
+            if apagar_se_igual(r, self.chave_trava, self.token):
+                # Acorda quem espera: sem resultado e sem trava, cada uma coleta por conta própria.
+                pipe = r.pipeline()
+                self._avisar(pipe)
+                pipe.execute()
+        except redis.RedisError as e:
+            logging.warning(f"INFLIGHT: Falha ao liberar a trava de {self.url_hash}: {e}")
+
+    def _ler_resultado(self, r):
+        bruto = r.get(self.chave_resultado)
+        if bruto is None:
+            return NAO_DISPONIVEL
+        dados = json.loads(bruto)['dados']
+        return tuple(dados) if dados else None
+
+    def aguardar(self, timeout=None):
+        """
+        Espera a coleta dona publicar o resultado, por no máximo `timeout`
+        segundos (padrão: o TTL da trava). Retorna a tupla (nome, preco), None se
+        a coleta dona falhou, ou NAO_DISPONIVEL se ela sumiu sem publicar ou o
+        tempo esgotou (nesse caso, quem chamou deve coletar por conta própria).
+        """
+        limite = time.monotonic() + (timeout if timeout is not None else self.ttl)
+        fatia = get_inflight_config()['FATIA_ESPERA_SEGUNDOS']
+        try:
+            r = get_redis()
+            while True:
+                resultado = self._ler_resultado(r)
+                if resultado is not NAO_DISPONIVEL:
+                    return resultado
+                if not r.exists(self.chave_trava):
+                    # Pode ter publicado entre as duas leituras.
+                    return self._ler_resultado(r)
+                restante = limite - time.monotonic()
+                if restante < 1:
+                    return NAO_DISPONIVEL
+                # Timeout inteiro: servidores Redis anteriores ao 6.0 não aceitam fração.
+                if r.blpop([self.chave_aviso], timeout=int(min(fatia, restante))) is not None:
+                    # Devolve o aviso para a próxima tarefa que estiver esperando.
+                    pipe = r.pipeline()
+                    self._avisar(pipe)
+                    pipe.execute()
+        except redis.RedisError as e:
+            logging.warning(f"INFLIGHT: Redis indisponível enquanto aguardava {self.url_hash}: {e}")
+        return NAO_DISPONIVEL
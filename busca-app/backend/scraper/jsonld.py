@@ -0,0 +1,163 @@
+"""
+Pré-varredura de JSON-LD direto nos bytes da página, sem construir DOM.
+
+O scanner recebe o HTML em pedaços (`feed`), localiza todos os blocos
+`<script type="application/ld+json">`, decodifica apenas esses blocos e percorre
+listas e `@graph` procurando `Product`, `Offer` e `AggregateOffer`. Assim que tem
+nome e preço, `completo` fica verdadeiro e quem está baixando a página pode parar.
+
+Os bytes dos blocos lidos entram num hash (`fragmento`). Se o hash de uma coleta
+anterior é informado e os blocos chegam idênticos, o scanner marca `inalterado`
+e para antes mesmo de decodificar o JSON.
+"""
+import hashlib
+import json
+import logging
+import re
+
+_REGEX_ABERTURA = re.compile(rb'<script\b([^>]*)>', re.IGNORECASE)
+_REGEX_TIPO_JSON_LD = re.compile(rb'type\s*=\s*["\']?application/ld\+json', re.IGNORECASE)
+_REGEX_FECHAMENTO = re.compile(rb'</script\s*>', re.IGNORECASE)
+_REGEX_INICIO = re.compile(rb'<script', re.IGNORECASE)
+# Bytes mantidos entre pedaços para não perder uma tag cortada ao meio.
+_MARGEM = 16
+
+TIPOS_OFERTA = ('Offer', 'AggregateOffer')
+
+
+def _tipos(no):
+    tipo = no.get('@type')
+    if isinstance(tipo, list):
+        return tipo
+    return [tipo] if tipo else []
+
+
+def _preco_da_oferta(oferta):
+    """Preço de um Offer/AggregateOffer (ou lista deles)."""
+    if isinstance(oferta, list):
+        for item in oferta:
+            preco = _preco_da_oferta(item)
+            if preco is not None:
+                return preco
+        return None
+    if not isinstance(oferta, dict):
+        return None
+    for chave in ('price', 'lowPrice'):
+        if oferta.get(chave) not in (None, ''):
+            return oferta[chave]
+    especificacao = oferta.get('priceSpecification')
+    if isinstance(especificacao, list):
+        especificacao = especificacao[0] if especificacao else None
+    if isinstance(especificacao, dict) and especificacao.get('price') not in (None, ''):
+        return especificacao['price']
+    # AggregateOffer pode aninhar as ofertas individuais.
+    if 'offers' in oferta:
+        return _preco_da_oferta(oferta['offers'])
+    return None
+
+
+class ScannerJsonLd:
+    """Scanner incremental; use `feed(pedaco)` até `completo` ou o fim da página."""
+
+    def __init__(self, encoding='utf-8', fragmento_conhecido=None):
+        self.encoding = encoding
+        self.fragmento_conhecido = fragmento_conhecido
+        self.nome = None
+        self.preco = None
+        self.blocos = 0
+        self.inalterado = False
+        self._hash = hashlib.sha256()
+        self._buffer = b''
+        # None (fora de script), 'json_ld' ou 'script' (script comum, ignorado)
+        self._estado = None
+
+    @property
+    def completo(self):
+        return self.inalterado or (bool(self.nome) and self.preco is not None)
+
+    @property
+    def fragmento(self):
+        """Hash dos blocos JSON-LD lidos até agora (None se não houve nenhum)."""
+        return self._hash.hexdigest() if self.blocos else None
+
+    def feed(self, pedaco):
+        """Processa mais um pedaço do HTML. Retorna True quando nome e preço foram encontrados."""
+        if self.completo:
+            return True
+        if isinstance(pedaco, str):
+            pedaco = pedaco.encode(self.encoding, errors='replace')
+        self._buffer += pedaco
+
+        while not self.completo:
+            if self._estado is not None:
+                fim = _REGEX_FECHAMENTO.search(self._buffer)
+                if not fim:
+                    if self._estado == 'script':
+                        # Conteúdo de scripts comuns pode ser enorme; guarda só o fim.
+                        self._buffer = self._buffer[-_MARGEM:]
+                    break
+                if self._estado == 'json_ld':
+                    self._processar_bloco(self._buffer[:fim.start()])
+                self._buffer = self._buffer[fim.end():]
+                self._estado = None
+                continue
+
+            inicio = _REGEX_INICIO.search(self._buffer)
+            if not inicio:
+                # Guarda só o suficiente para uma tag cortada entre dois pedaços.
+                self._buffer = self._buffer[-_MARGEM:]
+                break
+            abertura = _REGEX_ABERTURA.match(self._buffer, inicio.start())
+            if not abertura:
+                if b'>' not in self._buffer[inicio.start():]:
+                    # Tag ainda incompleta; espera o próximo pedaço.
+                    self._buffer = self._buffer[inicio.start():]
+                    break
+                self._buffer = self._buffer[inicio.end():]
+                continue
+            self._estado = 'json_ld' if _REGEX_TIPO_JSON_LD.search(abertura.group(1)) else 'script'
+            self._buffer = self._buffer[abertura.end():]
+        return self.completo
+
+    def _processar_bloco(self, bruto):
+        self.blocos += 1
+        self._hash.update(bruto)
+        if self.fragmento_conhecido and self._hash.hexdigest() == self.fragmento_conhecido:
+            self.inalterado = True
+            return
+        try:
+            dados = json.loads(bruto.decode(self.encoding, errors='replace'), strict=False)
+        except json.JSONDecodeError:
+            logging.warning("JSON-LD: Bloco com formato inválido ignorado.")
+            return
+        self._percorrer(dados)
+
+    def _percorrer(self, no):
+        if self.completo:
+            return
+        if isinstance(no, list):
+            for item in no:
+                self._percorrer(item)
+            return
+        if not isinstance(no, dict):
+            return
+
+        tipos = _tipos(no)
+        if 'Product' in tipos:
+            if not self.nome and no.get('name'):
+                self.nome = str(no['name']).strip()
+            if self.preco is None:
+                self.preco = _preco_da_oferta(no.get('offers'))
+        elif self.preco is None and any(t in TIPOS_OFERTA for t in tipos):
+            self.preco = _preco_da_oferta(no)
+
+        for chave in ('@graph', 'mainEntity', 'itemOffered'):
+            if chave in no:
+                self._percorrer(no[chave])
+
+
+def scan(html):
+    """Varre um documento inteiro (str ou bytes). Retorna o scanner."""
+    scanner = ScannerJsonLd()
+    scanner.feed(html)
+    return scanner
@@ -0,0 +1,63 @@
+import glob
+import os
+import time
+
+from bs4 import BeautifulSoup
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from scraper.extraction import GENERIC_NOME_SELECTORS, GENERIC_PRECO_SELECTORS, extract
+
+FIXTURES_PADRAO = os.path.join(settings.BASE_DIR, 'cacapreco_scraper', '*.html')
+
+
+def extrair_com_beautifulsoup(html):
+    """Caminho antigo (html.parser + select_one por candidato), usado como referência."""
+    soup = BeautifulSoup(html, 'html.parser')
+    soup.find('script', type='application/ld+json')
+    nome = preco = None
+    for selector in GENERIC_NOME_SELECTORS:
+        el = soup.select_one(selector)
+        if el: nome = el.text.strip(); break
+    for selector in GENERIC_PRECO_SELECTORS:
+        el = soup.select_one(selector)
+        if el: preco = el.text.strip(); break
+    return nome, preco
+
+
+class Command(BaseCommand):
+    help = 'Mede o tempo de CPU de parse + extração por página nas fixtures HTML salvas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivos', nargs='*', help='Arquivos HTML (padrão: cacapreco_scraper/*.html)')
+        parser.add_argument('--repeticoes', type=int, default=20)
+        parser.add_argument('--sem-referencia', action='store_true', help='Não mede o caminho antigo com BeautifulSoup.')
+
+    def medir(self, funcao, repeticoes):
+        inicio = time.process_time()
+        for _ in range(repeticoes):
+            funcao()
+        return (time.process_time() - inicio) / repeticoes * 1000
+
+    def handle(self, *args, **options):
+        arquivos = options['arquivos'] or sorted(glob.glob(FIXTURES_PADRAO))
+        repeticoes = options['repeticoes']
+        # Sem seletores de domínio: mede só o motor, sem depender do banco.
+        seletores = {'nome': GENERIC_NOME_SELECTORS, 'preco': GENERIC_PRECO_SELECTORS}
+
+        for caminho in arquivos:
+            with open(caminho, 'rb') as f:
+                html = f.read()
+            url = f'https://{os.path.splitext(os.path.basename(caminho))[0]}.com.br/'
+
+            lxml_ms = self.medir(lambda: extract(html, url, selectors=seletores), repeticoes)
+            linha = f'{os.path.basename(caminho)} ({len(html) / 1024:.0f} KB): lxml {lxml_ms:.2f} ms/página'
+            if not options['sem_referencia']:
+                bs_ms = self.medir(lambda: extrair_com_beautifulsoup(html), repeticoes)
+                linha += f' | BeautifulSoup {bs_ms:.2f} ms/página | {bs_ms / lxml_ms if lxml_ms else 0:.1f}x'
+            self.stdout.write(linha)
+
+            resultado = extract(html, url, selectors=seletores)
+            self.stdout.write(f"    -> nome={resultado['nome']!r} preco={resultado['preco']} fonte={resultado['fonte']}")
+
+        self.stdout.write(self.style.SUCCESS('--- Benchmark concluído ---'))
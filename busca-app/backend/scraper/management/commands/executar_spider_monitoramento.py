@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Recoleta todas as URLs monitoradas vencidas num único crawl do Scrapy '
+        '(ver cacapreco_scraper/spiders/monitoramento_spider.py).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--intervalo-horas', type=float, default=None, help='Idade mínima de ultima_coleta (padrão: SCRAPER_REFRESH).')
+        parser.add_argument('--max-urls', type=int, default=None, help='Encerra após agendar N URLs.')
+
+    def handle(self, *args, **options):
+        from scrapy.crawler import CrawlerProcess
+        from cacapreco_scraper.cacapreco_scraper.spiders.monitoramento_spider import MonitoramentoSpider
+
+        processo = CrawlerProcess({'LOG_LEVEL': 'INFO', 'TELNETCONSOLE_ENABLED': False})
+        crawler = processo.create_crawler(MonitoramentoSpider)
+        processo.crawl(crawler, intervalo_horas=options['intervalo_horas'], max_urls=options['max_urls'])
+        processo.start()
+
+        estatisticas = crawler.stats.get_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Crawl concluído. Sucesso: {estatisticas.get('monitoramento/sucesso', 0)}, "
+            f"sem dados: {estatisticas.get('monitoramento/sem_dados', 0)}, "
+            f"erros: {estatisticas.get('monitoramento/erro', 0)}."
+        ))
@@ -0,0 +1,32 @@
+import asyncio
+import signal
+
+from django.core.management.base import BaseCommand
+
+from scraper.async_engine import executar_worker, get_async_engine_config
+
+
+class Command(BaseCommand):
+    help = (
+        'Worker assíncrono do Playwright: consome a fila de URLs no Redis e renderiza '
+        'várias páginas ao mesmo tempo em cada navegador (ver scraper/async_engine.py).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-lotes', type=int, default=None, help='Encerra após N lotes (útil para testes e deploys).')
+
+    def handle(self, *args, **options):
+        config = get_async_engine_config()
+        self.stdout.write(
+            f"Consumindo '{config['FILA']}' com até {config['PAGINAS_SIMULTANEAS']} páginas simultâneas. Ctrl+C para sair."
+        )
+        lotes = asyncio.run(self._executar(options['max_lotes']))
+        self.stdout.write(self.style.SUCCESS(f'Worker encerrado após {lotes} lotes.'))
+
+    async def _executar(self, max_lotes):
+        parar = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        # SIGTERM/SIGINT terminam o lote atual e fecham os navegadores antes de sair.
+        for sinal in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sinal, parar.set)
+        return await executar_worker(parar=parar, max_lotes=max_lotes)
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def criar_paginas(apps, schema_editor):
+    """
+    Cria uma PaginaProduto por url_hash (com os dados do monitoramento coletado
+    mais recentemente) e aponta monitoramentos e histórico para ela. Consultas
+    por conjunto: um SELECT em streaming, INSERTs em lote e um UPDATE por tabela.
+    """
+    PaginaProduto = apps.get_model('scraper', 'PaginaProduto')
+    ProdutosMonitoradosExternos = apps.get_model('scraper', 'ProdutosMonitoradosExternos')
+    HistoricoPrecos = apps.get_model('scraper', 'HistoricoPrecos')
+
+    paginas = []
+    ultimo_hash = None
+    linhas = ProdutosMonitoradosExternos.objects.order_by('url_hash', '-ultima_coleta').values_list(
+        'url_hash', 'url_produto', 'nome_produto', 'preco_atual', 'ultima_coleta'
+    )
+    for url_hash, url_produto, nome_produto, preco_atual, ultima_coleta in linhas.iterator(chunk_size=2000):
+        if url_hash == ultimo_hash:
+            continue
+        ultimo_hash = url_hash
+        paginas.append(PaginaProduto(
+            url_hash=url_hash, url_produto=url_produto, nome_produto=nome_produto,
+            preco_atual=preco_atual, ultima_coleta=ultima_coleta,
+        ))
+        if len(paginas) >= 1000:
+            PaginaProduto.objects.bulk_create(paginas)
+            paginas = []
+    PaginaProduto.objects.bulk_create(paginas)
+
+    ProdutosMonitoradosExternos.objects.update(pagina=Subquery(
+        PaginaProduto.objects.filter(url_hash=OuterRef('url_hash')).values('pk')[:1]
+    ))
+    HistoricoPrecos.objects.filter(produto_monitorado__isnull=False).update(pagina=Subquery(
+        PaginaProduto.objects.filter(url_hash=Subquery(
+            ProdutosMonitoradosExternos.objects.filter(pk=OuterRef(OuterRef('produto_monitorado_id'))).values('url_hash')[:1]
+        )).values('pk')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaginaProduto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url_hash', models.CharField(help_text='Hash SHA-256 da URL canônica.', max_length=64, unique=True)),
+                ('url_produto', models.URLField(max_length=2048)),
+                ('nome_produto', models.CharField(blank=True, max_length=255, null=True)),
+                ('preco_atual', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('ultima_coleta', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Página de Produto',
+                'verbose_name_plural': 'Páginas de Produto',
+            },
+        ),
+        migrations.AlterField(
+            model_name='historicoprecos',
+            name='produto_monitorado',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='historico', to='scraper.produtosmonitoradosexternos'),
+        ),
+        migrations.AddField(
+            model_name='historicoprecos',
+            name='pagina',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='historico', to='scraper.paginaproduto'),
+        ),
+        migrations.AddField(
+            model_name='produtosmonitoradosexternos',
+            name='pagina',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='monitoramentos', to='scraper.paginaproduto'),
+        ),
+        migrations.RunPython(criar_paginas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,144 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:00
+
+from datetime import date, timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+MESES_FUTUROS = 3
+PAGINAS_POR_LOTE = 500
+TAMANHO_LOTE = 5000
+
+
+def manter_pontos_de_mudanca(apps, schema_editor):
+    """
+    Remove as coletas que repetem o preço anterior da mesma página; a linha que
+    fica recebe em `confirmado_em` a data da última repetição.
+
+    A série é por página (assinantes da mesma URL compartilham o histórico desde
+    a 0002), em ordem de `data_coleta`. As páginas são processadas em blocos,
+    com um UPDATE em lote e um DELETE por bloco, sem manter todas as linhas em memória.
+    """
+    PaginaProduto = apps.get_model('scraper', 'PaginaProduto')
+    HistoricoPrecos = apps.get_model('scraper', 'HistoricoPrecos')
+    ultima_pagina = 0
+    while True:
+        pagina_ids = list(
+            PaginaProduto.objects.filter(pk__gt=ultima_pagina).order_by('pk').values_list('pk', flat=True)[:PAGINAS_POR_LOTE]
+        )
+        if not pagina_ids:
+            return
+        ultima_pagina = pagina_ids[-1]
+        linhas = HistoricoPrecos.objects.filter(pagina_id__in=pagina_ids).order_by(
+            'pagina_id', 'data_coleta', 'id'
+        ).values_list('pk', 'pagina_id', 'preco', 'data_coleta')
+        pontos, repetidos = [], []
+        pagina_ponto, preco_ponto = None, None
+        for pk, pagina_id, preco, data_coleta in linhas:
+            if pontos and pagina_id == pagina_ponto and preco == preco_ponto:
+                repetidos.append(pk)
+                pontos[-1].confirmado_em = data_coleta
+            else:
+                pontos.append(HistoricoPrecos(pk=pk, confirmado_em=data_coleta))
+                pagina_ponto, preco_ponto = pagina_id, preco
+        HistoricoPrecos.objects.bulk_update(pontos, ['confirmado_em'], batch_size=TAMANHO_LOTE)
+        for j in range(0, len(repetidos), TAMANHO_LOTE):
+            HistoricoPrecos.objects.filter(pk__in=repetidos[j:j + TAMANHO_LOTE]).delete()
+
+
+def _proximo_mes(mes):
+    return (mes.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def particionar_por_mes(apps, schema_editor):
+    """
+    MySQL: particiona o histórico por mês de `data_coleta`. A coluna da partição
+    precisa fazer parte da chave primária, que passa a ser (id, data_coleta).
+    """
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    tabela = 'scraper_historicoprecos'
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"SELECT MIN(data_coleta) FROM {tabela}")
+        primeiro = cursor.fetchone()[0]
+    hoje = date.today()
+    mes = (primeiro.date() if primeiro else hoje).replace(day=1)
+    ultimo = hoje.replace(day=1)
+    for _ in range(MESES_FUTUROS):
+        ultimo = _proximo_mes(ultimo)
+    particoes = []
+    while mes <= ultimo:
+        particoes.append(f"PARTITION p{mes:%Y%m} VALUES LESS THAN (TO_DAYS('{_proximo_mes(mes)}'))")
+        mes = _proximo_mes(mes)
+    particoes.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    schema_editor.execute(f"ALTER TABLE {tabela} DROP PRIMARY KEY, ADD PRIMARY KEY (id, data_coleta)")
+    schema_editor.execute(
+        f"ALTER TABLE {tabela} PARTITION BY RANGE (TO_DAYS(data_coleta)) ({', '.join(particoes)})"
+    )
+
+
+def desfazer_particionamento(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    tabela = 'scraper_historicoprecos'
+    schema_editor.execute(f"ALTER TABLE {tabela} REMOVE PARTITIONING")
+    schema_editor.execute(f"ALTER TABLE {tabela} DROP PRIMARY KEY, ADD PRIMARY KEY (id)")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0002_pagina_produto'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistoricoPrecosDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('preco_min', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('preco_max', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('preco_fechamento', models.DecimalField(decimal_places=2, max_digits=10)),
+            ],
+            options={
+                'verbose_name': 'Histórico Diário de Preços',
+                'verbose_name_plural': 'Históricos Diários de Preços',
+                'ordering': ['-dia'],
+            },
+        ),
+        migrations.AddField(
+            model_name='historicoprecos',
+            name='confirmado_em',
+            field=models.DateTimeField(blank=True, help_text='Última coleta que encontrou este mesmo preço.', null=True),
+        ),
+        migrations.AlterField(
+            model_name='historicoprecos',
+            name='pagina',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='historico', to='scraper.paginaproduto'),
+        ),
+        migrations.AlterField(
+            model_name='historicoprecos',
+            name='produto_monitorado',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='historico', to='scraper.produtosmonitoradosexternos'),
+        ),
+        migrations.AddIndex(
+            model_name='historicoprecos',
+            index=models.Index(fields=['pagina', 'data_coleta', 'preco'], name='historico_pagina_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicoprecos',
+            index=models.Index(fields=['produto_monitorado', 'data_coleta', 'preco'], name='historico_monitor_data_idx'),
+        ),
+        migrations.AddField(
+            model_name='historicoprecosdiario',
+            name='pagina',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='historico_diario', to='scraper.paginaproduto'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='historicoprecosdiario',
+            unique_together={('pagina', 'dia')},
+        ),
+        migrations.RunPython(manter_pontos_de_mudanca, migrations.RunPython.noop),
+        migrations.RunPython(particionar_por_mes, desfazer_particionamento),
+    ]
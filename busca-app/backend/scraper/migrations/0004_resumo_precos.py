@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0003_historico_pontos_de_mudanca'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoPrecos',
+            fields=[
+                ('pagina', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='resumo', serialize=False, to='scraper.paginaproduto')),
+                ('preco_ultimo', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('preco_anterior', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('variacao_percentual', models.DecimalField(blank=True, decimal_places=2, max_digits=9, null=True)),
+                ('min_7d', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('max_7d', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('media_7d', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('min_30d', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('max_30d', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('media_30d', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('min_90d', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('max_90d', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('media_90d', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('atualizado_em', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Resumo de Preços',
+                'verbose_name_plural': 'Resumos de Preços',
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_precos_comparados'),
+        ('scraper', '0004_resumo_precos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='produtosmonitoradosexternos',
+            name='sku',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='monitoramentos_externos', to='api.sku'),
+        ),
+    ]
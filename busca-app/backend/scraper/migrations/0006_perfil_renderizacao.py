@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:39
+
+import scraper.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraper', '0005_monitoramento_sku'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dominio',
+            name='bloquear_rastreadores',
+            field=models.BooleanField(default=True, help_text='Bloqueia requisições a hosts de analytics e anúncios de terceiros.'),
+        ),
+        migrations.AddField(
+            model_name='dominio',
+            name='condicao_espera',
+            field=models.CharField(choices=[('seletor_preco', 'Seletor de preço visível'), ('domcontentloaded', 'DOM carregado'), ('load', 'Evento load'), ('networkidle', 'Rede ociosa')], default='seletor_preco', help_text='Quando considerar a página pronta para extração.', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='dominio',
+            name='javascript_habilitado',
+            field=models.BooleanField(default=True, help_text='Desmarque em sites que entregam nome e preço no HTML inicial.'),
+        ),
+        migrations.AddField(
+            model_name='dominio',
+            name='recursos_bloqueados',
+            field=models.JSONField(blank=True, default=scraper.models.recursos_bloqueados_padrao, help_text='Tipos de recurso que o navegador não baixa (image, media, font, stylesheet...).'),
+        ),
+        migrations.AddField(
+            model_name='dominio',
+            name='timeout_renderizacao_ms',
+            field=models.PositiveIntegerField(default=30000),
+        ),
+        migrations.AddField(
+            model_name='dominio',
+            name='viewport_altura',
+            field=models.PositiveIntegerField(default=768),
+        ),
+        migrations.AddField(
+            model_name='dominio',
+            name='viewport_largura',
+            field=models.PositiveIntegerField(default=1366),
+        ),
+    ]
@@ -11,8 +11,34 @@ def get_canonical_url(url):
     canonical_url = urlunparse((parsed_url.scheme, parsed_url.netloc, parsed_url.path, '', '', ''))
     return canonical_url
 
+def get_url_hash(url):
+    """Hash SHA-256 da URL canônica, usado como chave das páginas monitoradas."""
+    return hashlib.sha256(get_canonical_url(url).encode()).hexdigest()
+
+class PaginaProduto(models.Model):
+    """
+    Página de produto externa, compartilhada por todos os vendedores que a monitoram.
+    Guarda o resultado da última coleta e é dona do histórico de preços, de modo que
+    cada URL é raspada uma única vez e o resultado é replicado para os monitoramentos.
+    """
+    url_hash = models.CharField(max_length=64, unique=True, help_text="Hash SHA-256 da URL canônica.")
+    url_produto = models.URLField(max_length=2048)
+    nome_produto = models.CharField(max_length=255, blank=True, null=True)
+    preco_atual = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    ultima_coleta = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Página de Produto"
+        verbose_name_plural = "Páginas de Produto"
+
+    def __str__(self):
+        return self.nome_produto or self.url_produto
+
 class ProdutosMonitoradosExternos(models.Model):
     vendedor = models.ForeignKey('api.Vendedor', on_delete=models.CASCADE)
+    pagina = models.ForeignKey(PaginaProduto, related_name='monitoramentos', on_delete=models.SET_NULL, blank=True, null=True)
+    # SKU do catálogo equivalente ao produto do concorrente; habilita a comparação de preços.
+    sku = models.ForeignKey('api.SKU', related_name='monitoramentos_externos', on_delete=models.SET_NULL, blank=True, null=True)
     url_produto = models.URLField(max_length=2048)
     url_hash = models.CharField(max_length=64, blank=True, help_text="Hash SHA-256 da URL canônica para garantir unicidade.")
     nome_produto = models.CharField(max_length=255, blank=True, null=True)
@@ -24,23 +50,96 @@ class ProdutosMonitoradosExternos(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.url_hash:
-            canonical_url = get_canonical_url(self.url_produto)
-            self.url_hash = hashlib.sha256(canonical_url.encode()).hexdigest()
+            self.url_hash = get_url_hash(self.url_produto)
+        if not self.pagina_id:
+            self.pagina, _ = PaginaProduto.objects.get_or_create(
+                url_hash=self.url_hash,
+                defaults={'url_produto': get_canonical_url(self.url_produto)}
+            )
         super().save(*args, **kwargs)
 
+    def historico_precos(self):
+        """Histórico de preços da página monitorada (compartilhado entre vendedores)."""
+        return HistoricoPrecos.objects.filter(pagina_id=self.pagina_id)
+
     def __str__(self):
         return f'{self.nome_produto} ({self.vendedor.nome_loja})'
 
 class HistoricoPrecos(models.Model):
-    produto_monitorado = models.ForeignKey(ProdutosMonitoradosExternos, related_name='historico', on_delete=models.CASCADE)
+    """
+    Pontos de mudança de preço: uma linha por preço novo, não por coleta.
+    `data_coleta` é quando o preço apareceu e `confirmado_em` a última coleta
+    que o viu. No MySQL a tabela é particionada por mês (ver migração 0003),
+    o que impede chaves estrangeiras no banco; a integridade fica com o Django.
+    """
+    pagina = models.ForeignKey(PaginaProduto, related_name='historico', on_delete=models.CASCADE, blank=True, null=True, db_constraint=False)
+    # Legado: antes das páginas compartilhadas, o histórico era gravado por monitoramento.
+    produto_monitorado = models.ForeignKey(ProdutosMonitoradosExternos, related_name='historico', on_delete=models.CASCADE, blank=True, null=True, db_constraint=False)
     preco = models.DecimalField(max_digits=10, decimal_places=2)
     data_coleta = models.DateTimeField(auto_now_add=True)
+    confirmado_em = models.DateTimeField(blank=True, null=True, help_text="Última coleta que encontrou este mesmo preço.")
 
     class Meta:
         ordering = ['-data_coleta']
+        indexes = [
+            # Cobrem a leitura da série (data e preço) sem ir à tabela.
+            models.Index(fields=['pagina', 'data_coleta', 'preco'], name='historico_pagina_data_idx'),
+            models.Index(fields=['produto_monitorado', 'data_coleta', 'preco'], name='historico_monitor_data_idx'),
+        ]
 
     def __str__(self):
-        return f'{self.produto_monitorado.nome_produto} - R${self.preco} em {self.data_coleta.strftime("%d/%m/%Y %H:%M")}'
+        return f'{self.pagina} - R${self.preco} em {self.data_coleta.strftime("%d/%m/%Y %H:%M")}'
+
+
+class HistoricoPrecosDiario(models.Model):
+    """Histórico antigo compactado: mínimo, máximo e fechamento do dia por página."""
+    pagina = models.ForeignKey(PaginaProduto, related_name='historico_diario', on_delete=models.CASCADE)
+    dia = models.DateField()
+    preco_min = models.DecimalField(max_digits=10, decimal_places=2)
+    preco_max = models.DecimalField(max_digits=10, decimal_places=2)
+    preco_fechamento = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        verbose_name = "Histórico Diário de Preços"
+        verbose_name_plural = "Históricos Diários de Preços"
+        unique_together = ('pagina', 'dia')
+        ordering = ['-dia']
+
+    def __str__(self):
+        return f'{self.pagina} - {self.dia:%d/%m/%Y}: R${self.preco_fechamento}'
+
+
+class ResumoPrecos(models.Model):
+    """
+    Estatísticas de preço da página, mantidas a cada escrita no histórico, para
+    que listagens não precisem consultar o histórico de cada produto.
+    Médias ponderadas pelo tempo em que cada preço vigorou.
+    """
+    pagina = models.OneToOneField(PaginaProduto, related_name='resumo', on_delete=models.CASCADE, primary_key=True)
+    preco_ultimo = models.DecimalField(max_digits=10, decimal_places=2)
+    preco_anterior = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    variacao_percentual = models.DecimalField(max_digits=9, decimal_places=2, blank=True, null=True)
+    min_7d = models.DecimalField(max_digits=10, decimal_places=2)
+    max_7d = models.DecimalField(max_digits=10, decimal_places=2)
+    media_7d = models.DecimalField(max_digits=10, decimal_places=2)
+    min_30d = models.DecimalField(max_digits=10, decimal_places=2)
+    max_30d = models.DecimalField(max_digits=10, decimal_places=2)
+    media_30d = models.DecimalField(max_digits=10, decimal_places=2)
+    min_90d = models.DecimalField(max_digits=10, decimal_places=2)
+    max_90d = models.DecimalField(max_digits=10, decimal_places=2)
+    media_90d = models.DecimalField(max_digits=10, decimal_places=2)
+    atualizado_em = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Resumo de Preços"
+        verbose_name_plural = "Resumos de Preços"
+
+    def __str__(self):
+        return f'{self.pagina} - R${self.preco_ultimo}'
+
+
+def recursos_bloqueados_padrao():
+    return ['image', 'media', 'font']
 
 
 class Dominio(models.Model):
@@ -56,8 +155,36 @@ class Dominio(models.Model):
         default=True, 
         help_text="Desmarque para desativar temporariamente o scraping neste domínio."
     )
-    # Futuramente, podemos adicionar campos de configuração aqui, 
-    # como 'precisa_js', 'usa_proxy', etc.
+
+    # --- Perfil de renderização (estratégias com navegador; ver `render_profiles`) ---
+    class CondicaoEspera(models.TextChoices):
+        SELETOR_PRECO = 'seletor_preco', 'Seletor de preço visível'
+        DOMCONTENTLOADED = 'domcontentloaded', 'DOM carregado'
+        LOAD = 'load', 'Evento load'
+        NETWORKIDLE = 'networkidle', 'Rede ociosa'
+
+    recursos_bloqueados = models.JSONField(
+        default=recursos_bloqueados_padrao,
+        blank=True,
+        help_text="Tipos de recurso que o navegador não baixa (image, media, font, stylesheet...)."
+    )
+    bloquear_rastreadores = models.BooleanField(
+        default=True,
+        help_text="Bloqueia requisições a hosts de analytics e anúncios de terceiros."
+    )
+    condicao_espera = models.CharField(
+        max_length=20,
+        choices=CondicaoEspera.choices,
+        default=CondicaoEspera.SELETOR_PRECO,
+        help_text="Quando considerar a página pronta para extração."
+    )
+    timeout_renderizacao_ms = models.PositiveIntegerField(default=30000)
+    viewport_largura = models.PositiveIntegerField(default=1366)
+    viewport_altura = models.PositiveIntegerField(default=768)
+    javascript_habilitado = models.BooleanField(
+        default=True,
+        help_text="Desmarque em sites que entregam nome e preço no HTML inicial."
+    )
 
     def __str__(self):
         return self.nome_dominio
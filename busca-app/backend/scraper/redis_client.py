@@ -0,0 +1,34 @@
+import redis
+from django.conf import settings
+
+_client = None
+
+
+def get_redis():
+    """
+    Cliente Redis compartilhado pelo processo. Usa `SCRAPER_REDIS_URL` ou, na falta
+    dele, o mesmo Redis do broker do Celery.
+    """
+    global _client
+    if _client is None:
+        url = getattr(settings, 'SCRAPER_REDIS_URL', None) or settings.CELERY_BROKER_URL
+        _client = redis.Redis.from_url(url)
+    return _client
+
+
+# Compara e apaga numa operação só: entre um GET e um DELETE separados a trava
+# pode expirar e ser adquirida por outro dono, que teria a trava apagada.
+SCRIPT_APAGAR_SE_IGUAL = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def apagar_se_igual(r, chave, valor, pipe=None):
+    """
+    Apaga `chave` só se ela ainda guarda `valor` (ex.: o token de quem tem a
+    trava). Retorna 1 se apagou; com `pipe`, o comando entra no pipeline.
+    """
+    return r.register_script(SCRIPT_APAGAR_SE_IGUAL)(keys=[chave], args=[valor], client=pipe)
@@ -0,0 +1,187 @@
+"""
+Seleção e particionamento das URLs monitoradas para a recoleta periódica de preços.
+
+O agendador (Celery beat) chama `agendar_recoleta`, que:
+  1. seleciona os monitoramentos com `ultima_coleta` vencida;
+  2. deduplica por `url_hash` (cada página é baixada uma vez por ciclo, mesmo que
+     vários vendedores a monitorem);
+  3. agrupa por domínio e particiona por hash em lotes do tamanho configurado;
+  4. só inicia um ciclo se o anterior já terminou (trava no Redis).
+
+As URLs que o fast path não resolve seguem para o caminho lento fora do chord
+do ciclo. Para que os próximos agendamentos não as reenviem enquanto ainda
+estão na fila (ou logo depois de falharem), cada envio abre uma espera no
+Redis que dobra a cada falha seguida (`adiar_caminho_lento`); uma coleta bem
+sucedida encerra a espera (`liberar_caminho_lento`).
+"""
+import logging
+import math
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+from urllib.parse import urlparse
+
+import redis
+from django.conf import settings
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import ProdutosMonitoradosExternos
+from .redis_client import get_redis, apagar_se_igual
+
+REFRESH_DEFAULTS = {
+    'INTERVALO_HORAS': 6,
+    'TAMANHO_LOTE': 200,
+    'TTL_CICLO_SEGUNDOS': 2 * 60 * 60,
+    'USAR_WORKER_NAVEGADOR': False,
+    'ESPERA_CAMINHO_LENTO_SEGUNDOS': 60 * 60,        # Primeira espera; dobra a cada falha seguida
+    'ESPERA_MAXIMA_CAMINHO_LENTO_SEGUNDOS': 24 * 60 * 60,
+}
+
+CHAVE_CICLO = 'scraper:recoleta:ciclo'
+PREFIXO_ESPERA = 'scraper:recoleta:espera:'
+PREFIXO_TENTATIVAS = 'scraper:recoleta:tentativas:'
+
+
+def get_refresh_config():
+    config = dict(REFRESH_DEFAULTS)
+    config.update(getattr(settings, 'SCRAPER_REFRESH', {}))
+    return config
+
+
+def _urls_vencidas(limite):
+    return (
+        ProdutosMonitoradosExternos.objects
+        .filter(ultima_coleta__lt=limite)
+        .values('url_hash')
+        .annotate(url_produto=Min('url_produto'))
+        .order_by('url_hash')
+    )
+
+
+def selecionar_urls_vencidas(intervalo_horas):
+    """
+    Retorna uma lista de (url_hash, url_produto), uma entrada por URL canônica,
+    para os monitoramentos sem coleta há mais de `intervalo_horas`.
+    """
+    limite = timezone.now() - timedelta(hours=intervalo_horas)
+    return [(linha['url_hash'], linha['url_produto']) for linha in _urls_vencidas(limite)]
+
+
+def pagina_de_urls_vencidas(limite, apos_hash=None, tamanho=500):
+    """
+    Próxima página de (url_hash, url_produto) vencidos antes de `limite`, em
+    ordem de `url_hash` e depois de `apos_hash`. A paginação é por chave (sem
+    OFFSET), para varrer o catálogo inteiro em streaming (ver MonitoramentoSpider).
+    """
+    linhas = _urls_vencidas(limite)
+    if apos_hash is not None:
+        linhas = linhas.filter(url_hash__gt=apos_hash)
+    return [(linha['url_hash'], linha['url_produto']) for linha in linhas[:tamanho]]
+
+
+def particionar_em_lotes(itens, tamanho_lote):
+    """
+    Agrupa os itens (url_hash, url) por domínio e divide cada domínio em
+    ceil(n / tamanho_lote) shards pelo hash da URL. Shards pequenos de domínios
+    diferentes são combinados no mesmo lote até `tamanho_lote`.
+
+    Manter as URLs de um domínio em poucos lotes evita que vários workers
+    batam no mesmo site ao mesmo tempo.
+    """
+    por_dominio = defaultdict(list)
+    for url_hash, url in itens:
+        por_dominio[urlparse(url).hostname or ''].append((url_hash, url))
+
+    shards = []
+    for dominio in sorted(por_dominio):
+        urls = por_dominio[dominio]
+        num_shards = math.ceil(len(urls) / tamanho_lote)
+        particoes = [[] for _ in range(num_shards)]
+        for url_hash, url in urls:
+            particoes[int(url_hash[:8], 16) % num_shards].append((url_hash, url))
+        # O hash não garante shards do mesmo tamanho; corta os que passarem do limite.
+        for particao in particoes:
+            shards.extend(particao[i:i + tamanho_lote] for i in range(0, len(particao), tamanho_lote))
+
+    # First-fit decrescente: junta shards pequenos no mesmo lote.
+    lotes = []
+    for shard in sorted(shards, key=len, reverse=True):
+        for lote in lotes:
+            if len(lote) + len(shard) <= tamanho_lote:
+                lote.extend(shard)
+                break
+        else:
+            lotes.append(list(shard))
+    return lotes
+
+
+def iniciar_ciclo(ttl):
+    """
+    Tenta adquirir a trava do ciclo de recoleta. Retorna o id do ciclo, ou None
+    se o ciclo anterior ainda está em andamento (backpressure).
+    """
+    ciclo_id = uuid.uuid4().hex
+    if get_redis().set(CHAVE_CICLO, ciclo_id, nx=True, ex=ttl):
+        return ciclo_id
+    return None
+
+
+def finalizar_ciclo(ciclo_id):
+    """Libera a trava, desde que ela ainda pertença a este ciclo."""
+    if apagar_se_igual(get_redis(), CHAVE_CICLO, ciclo_id):
+        return True
+    logging.warning(f"RECOLETA: Trava do ciclo {ciclo_id} já expirou ou pertence a outro ciclo.")
+    return False
+
+
+def adiar_caminho_lento(url_hashes):
+    """
+    Marca as URLs enviadas ao caminho lento: ficam fora dos próximos ciclos por
+    ESPERA_CAMINHO_LENTO_SEGUNDOS, dobrando a cada envio seguido sem sucesso,
+    até ESPERA_MAXIMA_CAMINHO_LENTO_SEGUNDOS.
+    """
+    if not url_hashes:
+        return
+    config = get_refresh_config()
+    maxima = config['ESPERA_MAXIMA_CAMINHO_LENTO_SEGUNDOS']
+    try:
+        r = get_redis()
+        pipe = r.pipeline(transaction=False)
+        for url_hash in url_hashes:
+            pipe.incr(f'{PREFIXO_TENTATIVAS}{url_hash}')
+            pipe.expire(f'{PREFIXO_TENTATIVAS}{url_hash}', 2 * maxima)
+        tentativas = pipe.execute()[::2]
+        pipe = r.pipeline(transaction=False)
+        for url_hash, n in zip(url_hashes, tentativas):
+            espera = min(config['ESPERA_CAMINHO_LENTO_SEGUNDOS'] * 2 ** (int(n) - 1), maxima)
+            pipe.set(f'{PREFIXO_ESPERA}{url_hash}', n, ex=espera)
+        pipe.execute()
+    except redis.RedisError as e:
+        logging.warning(f"RECOLETA: Falha ao registrar a espera do caminho lento: {e}")
+
+
+def liberar_caminho_lento(url_hashes):
+    """Coleta bem sucedida: a URL volta aos ciclos normais e as tentativas recomeçam do zero."""
+    if not url_hashes:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for url_hash in url_hashes:
+            pipe.delete(f'{PREFIXO_ESPERA}{url_hash}')
+            pipe.delete(f'{PREFIXO_TENTATIVAS}{url_hash}')
+        pipe.execute()
+    except redis.RedisError as e:
+        logging.warning(f"RECOLETA: Falha ao liberar a espera do caminho lento: {e}")
+
+
+def sem_espera(itens):
+    """Remove de [(url_hash, url), ...] as URLs ainda em espera do caminho lento (um MGET)."""
+    if not itens:
+        return itens
+    try:
+        em_espera = get_redis().mget([f'{PREFIXO_ESPERA}{url_hash}' for url_hash, _ in itens])
+    except redis.RedisError as e:
+        logging.warning(f"RECOLETA: Redis indisponível ao consultar a espera do caminho lento: {e}")
+        return itens
+    return [item for item, espera in zip(itens, em_espera) if espera is None]
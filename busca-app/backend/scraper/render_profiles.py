@@ -0,0 +1,190 @@
+"""
+Perfis de renderização por domínio para as estratégias com navegador.
+
+Cada `Dominio` define o que o navegador deixa de baixar (tipos de recurso e
+hosts de analytics/anúncios), quando a página é considerada pronta (por padrão,
+o seletor de preço visível em vez de esperar a rede ociosa), o timeout, o
+viewport e se o JavaScript roda. Os perfis são resolvidos pelo mesmo registro
+em memória dos seletores (`selector_registry`), sem consulta ao banco no
+caminho quente; URLs de domínios não cadastrados usam os valores padrão do
+modelo.
+"""
+import logging
+from urllib.parse import urlparse
+
+from django.conf import settings
+
+RENDER_DEFAULTS = {
+    # Hosts (e subdomínios) de analytics, tag managers e anúncios.
+    'HOSTS_RASTREADORES': [
+        'google-analytics.com', 'googletagmanager.com', 'googleadservices.com', 'googlesyndication.com',
+        'doubleclick.net', 'facebook.net', 'connect.facebook.com', 'hotjar.com', 'clarity.ms',
+        'criteo.com', 'criteo.net', 'taboola.com', 'outbrain.com', 'tiktok.com', 'bing.com',
+        'newrelic.com', 'nr-data.net', 'segment.io', 'mixpanel.com', 'rtbhouse.com',
+    ],
+}
+
+# Extensões por tipo de recurso, para navegadores que só bloqueiam por padrão
+# de URL (Selenium via CDP).
+EXTENSOES_POR_RECURSO = {
+    'image': ('jpg', 'jpeg', 'png', 'gif', 'webp', 'avif', 'svg', 'ico'),
+    'media': ('mp4', 'webm', 'm3u8', 'mp3', 'ogg'),
+    'font': ('woff', 'woff2', 'ttf', 'otf', 'eot'),
+    'stylesheet': ('css',),
+}
+
+
+def get_render_config():
+    config = dict(RENDER_DEFAULTS)
+    config.update(getattr(settings, 'SCRAPER_RENDER', {}))
+    return config
+
+
+def compilar_perfil(dominio):
+    """Perfil imutável (compartilhado entre chamadas) a partir de um `Dominio`."""
+    return {
+        'recursos_bloqueados': frozenset(dominio.recursos_bloqueados or ()),
+        'hosts_bloqueados': tuple(get_render_config()['HOSTS_RASTREADORES']) if dominio.bloquear_rastreadores else (),
+        'condicao_espera': dominio.condicao_espera,
+        'timeout_ms': dominio.timeout_renderizacao_ms,
+        'viewport': {'width': dominio.viewport_largura, 'height': dominio.viewport_altura},
+        'javascript': dominio.javascript_habilitado,
+    }
+
+
+_perfil_padrao = None
+
+
+def perfil_padrao():
+    global _perfil_padrao
+    if _perfil_padrao is None:
+        from .models import Dominio
+        # Instância não salva: os defaults dos campos do modelo.
+        _perfil_padrao = compilar_perfil(Dominio())
+    return _perfil_padrao
+
+
+def get_perfil(url):
+    """Perfil do domínio cadastrado mais específico da URL, ou o padrão."""
+    from .selector_registry import get_registro
+
+    hostname = urlparse(url).hostname
+    perfil = get_registro().resolver_perfil(hostname) if hostname else None
+    return perfil or perfil_padrao()
+
+
+def _host_bloqueado(hostname, hosts):
+    return any(hostname == host or hostname.endswith('.' + host) for host in hosts)
+
+
+def deve_bloquear(perfil, tipo_recurso, url):
+    if tipo_recurso in perfil['recursos_bloqueados']:
+        return True
+    if perfil['hosts_bloqueados']:
+        hostname = urlparse(url).hostname or ''
+        return _host_bloqueado(hostname, perfil['hosts_bloqueados'])
+    return False
+
+
+def seletor_espera(seletores_preco):
+    """Une os seletores CSS de preço num só (qualquer um visível serve); XPath fica de fora."""
+    css = [s for s in seletores_preco or () if s and not s.startswith('/')]
+    return ', '.join(css) or None
+
+
+# --- Playwright --------------------------------------------------------------
+
+async def abrir_contexto(browser, perfil):
+    """Contexto descartável com viewport, JavaScript e bloqueio de requisições do perfil."""
+    context = await browser.new_context(viewport=perfil['viewport'], java_script_enabled=perfil['javascript'])
+
+    async def filtrar(route):
+        if deve_bloquear(perfil, route.request.resource_type, route.request.url):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    if perfil['recursos_bloqueados'] or perfil['hosts_bloqueados']:
+        await context.route('**/*', filtrar)
+    return context
+
+
+async def carregar(page, url, perfil, seletores_preco=None):
+    """
+    Navega até a URL e espera a condição do perfil. Com `seletor_preco`, a
+    navegação para no DOM carregado e a espera é pelo preço visível; sem
+    seletor conhecido, o DOM carregado basta.
+    """
+    condicao = perfil['condicao_espera']
+    seletor = seletor_espera(seletores_preco) if condicao == 'seletor_preco' else None
+    wait_until = 'domcontentloaded' if condicao == 'seletor_preco' else condicao
+    await page.goto(url, wait_until=wait_until, timeout=perfil['timeout_ms'])
+    if seletor:
+        await page.locator(seletor).first.wait_for(state='visible', timeout=perfil['timeout_ms'])
+
+
+# --- Selenium ------------------------------------------------------------------
+
+def padroes_bloqueados(perfil):
+    """Padrões de URL para `Network.setBlockedURLs` do Chrome."""
+    padroes = [
+        f'*.{extensao}*'
+        for tipo in sorted(perfil['recursos_bloqueados'])
+        for extensao in EXTENSOES_POR_RECURSO.get(tipo, ())
+    ]
+    padroes += [f'*{host}/*' for host in perfil['hosts_bloqueados']]
+    return padroes
+
+
+def aplicar_perfil_selenium(driver, perfil):
+    """
+    Aplica o perfil a um driver do pool antes de navegar. Os drivers são
+    reutilizados entre domínios, então o perfil é reaplicado a cada empréstimo.
+    """
+    try:
+        driver.set_page_load_timeout(perfil['timeout_ms'] / 1000)
+        driver.set_window_size(perfil['viewport']['width'], perfil['viewport']['height'])
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': padroes_bloqueados(perfil)})
+        driver.execute_cdp_cmd('Emulation.setScriptExecutionDisabled', {'value': not perfil['javascript']})
+    except Exception as e:
+        logging.warning(f"RENDER: Não foi possível aplicar o perfil de renderização ao driver: {e}")
+
+
+def esperar_selenium(driver, perfil, seletores_preco=None):
+    """
+    Espera a condição do perfil. Com `seletor_preco`, basta o preço visível ou
+    o JSON-LD presente; as demais condições já foram cumpridas pelo
+    `driver.get`, que retorna no evento load.
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    if perfil['condicao_espera'] != 'seletor_preco':
+        return
+    condicoes = [EC.presence_of_element_located((By.CSS_SELECTOR, 'script[type="application/ld+json"]'))]
+    seletor = seletor_espera(seletores_preco)
+    if seletor:
+        condicoes.append(EC.visibility_of_element_located((By.CSS_SELECTOR, seletor)))
+    WebDriverWait(driver, perfil['timeout_ms'] / 1000).until(EC.any_of(*condicoes))
+
+
+def carregar_selenium(driver, url, perfil, seletores_preco=None):
+    """
+    Navega até a URL e espera a condição do perfil. Estourar o page load
+    timeout do perfil não invalida o driver: o carregamento é interrompido e a
+    página parcial segue para a espera e a extração, em vez de o erro descartar
+    um Chrome quente do pool. O `TimeoutException` da espera chega a quem chamou.
+    """
+    from selenium.common.exceptions import TimeoutException
+
+    try:
+        driver.get(url)
+    except TimeoutException:
+        logging.warning(f"RENDER: Page load timeout em {url}; seguindo com a página parcial.")
+        try:
+            driver.execute_script('window.stop();')
+        except Exception:
+            pass
+    esperar_selenium(driver, perfil, seletores_preco)
@@ -0,0 +1,215 @@
+"""
+Gravação em lote dos resultados de coleta.
+
+Gravar cada resultado com `save_page_data`/`save_monitoring_data` custa várias
+idas ao banco (busca do vendedor, get_or_create, save, create do histórico). Na
+recoleta em massa isso vira o gargalo no MySQL. O `ResultSink` acumula os
+resultados e, a cada `TAMANHO_LOTE` itens ou `INTERVALO_SEGUNDOS`, grava tudo
+de uma vez. O intervalo é conferido a cada `adicionar()`; quem recebe resultados
+de forma irregular (o pipeline do Scrapy) chama também `flush_vencido()` num
+temporizador, para que o último lote não espere o próximo item:
+
+- páginas e monitoramentos com um único INSERT de várias linhas com
+  `ON DUPLICATE KEY UPDATE` cada (`bulk_create(update_conflicts=True)`);
+- o histórico com um único `bulk_create` dos pontos de mudança (ver `historico`);
+- vendedores consultados uma vez e mantidos em cache enquanto o sink existir;
+- o índice de busca atualizado só para os monitoramentos com nome novo e a
+  comparação de preços para os vinculados a um SKU.
+
+Cada flush registra no log a própria latência, que também fica em `ultimo_flush`.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api import busca, comparacao
+from api.models import Vendedor
+from . import historico
+from .models import PaginaProduto, ProdutosMonitoradosExternos, get_canonical_url, get_url_hash
+
+RESULT_SINK_DEFAULTS = {
+    'TAMANHO_LOTE': 200,        # Resultados acumulados antes de um flush
+    'INTERVALO_SEGUNDOS': 5,    # Tempo máximo de um resultado no buffer
+}
+
+
+def get_result_sink_config():
+    config = dict(RESULT_SINK_DEFAULTS)
+    config.update(getattr(settings, 'SCRAPER_RESULT_SINK', {}))
+    return config
+
+
+def _upsert(modelo, objetos, campos_unicos, campos_atualizados):
+    """
+    INSERT de várias linhas que atualiza as existentes. No MySQL vira
+    `ON DUPLICATE KEY UPDATE` (que não aceita alvo); nos demais, `ON CONFLICT`.
+    """
+    if not objetos:
+        return
+    alvo = campos_unicos if connection.features.supports_update_conflicts_with_target else None
+    modelo.objects.bulk_create(
+        objetos, update_conflicts=True, unique_fields=alvo, update_fields=campos_atualizados
+    )
+
+
+class ResultSink:
+    """
+    Buffer de resultados de coleta. Use `adicionar()` para cada resultado e
+    `flush()` (ou o bloco `with`) no fim para gravar o que restou.
+    """
+
+    def __init__(self, tamanho_lote=None, intervalo_segundos=None):
+        config = get_result_sink_config()
+        self.tamanho_lote = tamanho_lote or config['TAMANHO_LOTE']
+        self.intervalo_segundos = intervalo_segundos or config['INTERVALO_SEGUNDOS']
+        self.ultimo_flush = None
+        self._buffer = []
+        self._inicio_buffer = None
+        self._vendedores = {}  # usuario_id -> existe?
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+        return False
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def adicionar(self, url_produto, nome_produto, preco_atual, usuario_id=None):
+        """
+        Enfileira um resultado. Com `usuario_id`, o vendedor passa a monitorar a
+        página (se ainda não monitorava). Retorna as estatísticas do flush se
+        um foi disparado, senão None.
+        """
+        if not self._buffer:
+            self._inicio_buffer = time.monotonic()
+        self._buffer.append((url_produto, nome_produto, preco_atual, usuario_id))
+        if len(self._buffer) >= self.tamanho_lote or self._vencido():
+            return self.flush()
+        return None
+
+    def _vencido(self):
+        return bool(self._buffer) and time.monotonic() - self._inicio_buffer >= self.intervalo_segundos
+
+    def flush_vencido(self):
+        """Grava o buffer se o resultado mais antigo já passou de `intervalo_segundos`."""
+        return self.flush() if self._vencido() else None
+
+    def _vendedores_existentes(self, usuario_ids):
+        desconhecidos = {u for u in usuario_ids if u not in self._vendedores}
+        if desconhecidos:
+            encontrados = set(Vendedor.objects.filter(pk__in=desconhecidos).values_list('pk', flat=True))
+            for usuario_id in desconhecidos:
+                self._vendedores[usuario_id] = usuario_id in encontrados
+        return {u for u in usuario_ids if self._vendedores[u]}
+
+    def flush(self):
+        """Grava o buffer. Retorna {'resultados', 'paginas', 'historicos', 'monitoramentos', 'latencia_ms'}."""
+        if not self._buffer:
+            return None
+        resultados, self._buffer = self._buffer, []
+        inicio = time.perf_counter()
+        agora = timezone.now()
+
+        # Várias coletas da mesma URL no lote: a página fica com a última, mas
+        # todas passam pelo histórico, na ordem em que chegaram.
+        paginas = {}
+        historicos = []
+        assinaturas = {}
+        for url_produto, nome_produto, preco_atual, usuario_id in resultados:
+            url_canonico = get_canonical_url(url_produto)
+            url_hash = get_url_hash(url_canonico)
+            paginas[url_hash] = (url_canonico, nome_produto, preco_atual)
+            if preco_atual is not None:
+                historicos.append((url_hash, preco_atual))
+            if usuario_id is not None:
+                assinaturas[(usuario_id, url_hash)] = url_canonico
+
+        try:
+            with transaction.atomic():
+                _upsert(
+                    PaginaProduto,
+                    [
+                        PaginaProduto(url_hash=url_hash, url_produto=url, nome_produto=nome,
+                                      preco_atual=preco, ultima_coleta=agora)
+                        for url_hash, (url, nome, preco) in paginas.items()
+                    ],
+                    ['url_hash'], ['url_produto', 'nome_produto', 'preco_atual', 'ultima_coleta']
+                )
+                # O upsert não devolve as chaves no MySQL; uma consulta resolve todas.
+                ids_paginas = dict(
+                    PaginaProduto.objects.filter(url_hash__in=paginas).values_list('url_hash', 'id')
+                )
+
+                # Só os pontos de mudança; preço repetido apenas confirma o ponto anterior.
+                pontos_criados, _ = historico.registrar_coletas(
+                    [(ids_paginas[url_hash], preco) for url_hash, preco in historicos], agora
+                )
+
+                # Assinantes atuais das páginas mais as novas assinaturas do lote.
+                nomes_anteriores = {}
+                monitoramentos = {}
+                for vendedor_id, url_hash, url, nome in ProdutosMonitoradosExternos.objects.filter(
+                    url_hash__in=paginas
+                ).values_list('vendedor_id', 'url_hash', 'url_produto', 'nome_produto'):
+                    monitoramentos[(vendedor_id, url_hash)] = url
+                    nomes_anteriores[(vendedor_id, url_hash)] = nome
+                vendedores = self._vendedores_existentes({u for u, _ in assinaturas})
+                for (usuario_id, url_hash), url in assinaturas.items():
+                    if usuario_id in vendedores:
+                        monitoramentos.setdefault((usuario_id, url_hash), url)
+                    else:
+                        logging.warning(f"RESULT SINK: Vendedor {usuario_id} não encontrado; assinatura de {url} ignorada.")
+
+                _upsert(
+                    ProdutosMonitoradosExternos,
+                    [
+                        ProdutosMonitoradosExternos(
+                            vendedor_id=vendedor_id, url_hash=url_hash, url_produto=url,
+                            pagina_id=ids_paginas[url_hash], nome_produto=paginas[url_hash][1],
+                            preco_atual=paginas[url_hash][2], ultima_coleta=agora
+                        )
+                        for (vendedor_id, url_hash), url in monitoramentos.items()
+                    ],
+                    ['vendedor', 'url_hash'], ['pagina', 'nome_produto', 'preco_atual', 'ultima_coleta']
+                )
+
+                # O upsert não dispara sinais: reindexa na busca só os nomes novos ou alterados.
+                renomeados = {
+                    chave for chave in monitoramentos
+                    if chave not in nomes_anteriores or nomes_anteriores[chave] != paginas[chave[1]][1]
+                }
+                if renomeados:
+                    ids_renomeados = [
+                        pk for pk, vendedor_id, url_hash in ProdutosMonitoradosExternos.objects
+                        .filter(url_hash__in={url_hash for _, url_hash in renomeados})
+                        .values_list('pk', 'vendedor_id', 'url_hash')
+                        if (vendedor_id, url_hash) in renomeados
+                    ]
+                    busca.indexar_depois_do_commit(busca.indexar_monitorados, ids_renomeados)
+                comparacao.atualizar_depois_do_commit(comparacao.atualizar_monitorados_das_paginas, list(paginas))
+        except Exception as e:
+            from .scraping_service import log_to_file
+
+            logging.error(f"RESULT SINK: Erro ao gravar lote de {len(resultados)} resultados: {e}", exc_info=True)
+            for url_produto, nome_produto, preco_atual, usuario_id in resultados:
+                log_to_file(url_produto, str(nome_produto), preco_atual, usuario_id, e)
+            return None
+
+        self.ultimo_flush = {
+            'resultados': len(resultados),
+            'paginas': len(paginas),
+            'historicos': pontos_criados,
+            'monitoramentos': len(monitoramentos),
+            'latencia_ms': (time.perf_counter() - inicio) * 1000,
+        }
+        logging.info(
+            f"RESULT SINK: Flush de {len(resultados)} resultados ({len(paginas)} páginas, "
+            f"{len(monitoramentos)} monitoramentos) em {self.ultimo_flush['latencia_ms']:.1f} ms."
+        )
+        return self.ultimo_flush
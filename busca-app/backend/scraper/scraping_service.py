@@ -1,17 +1,29 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 import json
 import logging
-import subprocess
-import os
-import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
+from api import comparacao
 from api.models import Vendedor
 from urllib.parse import urlparse
-from .models import Dominio, Seletor, ProdutosMonitoradosExternos, HistoricoPrecos, get_canonical_url
-
-import hashlib
+from .models import (
+    PaginaProduto, ProdutosMonitoradosExternos,
+    get_canonical_url, get_url_hash
+)
+from .selector_registry import get_registro
+from .extraction import extract, converter_preco
+from .jsonld import ScannerJsonLd
+from . import fetch_cache
+from . import historico
+from .fetch_cache import PAGINA_INALTERADA
+from .crawler_service import crawl_urls
 
 LOG_FILE_PATH = '/mnt/c/users/cydyq/documents/python/testecacapreco/cacapreco_ai/busca-app/backend/scrapy_output.log'
 
@@ -34,18 +46,70 @@ def log_to_file(url, name, price, user_id, error):
     except Exception as e:
         logging.error(f"SAVE DATA FALLBACK: Falha ao escrever no arquivo de log: {e}")
 
-def save_monitoring_data(url_produto, nome_produto, preco_atual, usuario_id):
+def save_page_data(url_produto, nome_produto, preco_atual):
+    """
+    Registra o resultado de uma coleta na página compartilhada da URL e replica
+    o resultado para todos os monitoramentos que a assinam, com um único UPDATE.
+    Retorna (pagina, quantidade de monitoramentos atualizados).
+    """
+    url_canonico = get_canonical_url(url_produto)
+    url_hash = get_url_hash(url_canonico)
+    agora = timezone.now()
+
+    with transaction.atomic():
+        pagina, _ = PaginaProduto.objects.update_or_create(
+            url_hash=url_hash,
+            defaults={
+                'url_produto': url_canonico,
+                'nome_produto': nome_produto,
+                'preco_atual': preco_atual,
+                'ultima_coleta': agora,
+            }
+        )
+        # Histórico da página (não por assinante), só com os pontos de mudança.
+        historico.registrar_coletas([(pagina.pk, preco_atual)], agora)
+        # update() não passa pelo save(), então ultima_coleta precisa ser definido aqui.
+        atualizados = ProdutosMonitoradosExternos.objects.filter(url_hash=url_hash).update(
+            pagina=pagina,
+            nome_produto=nome_produto,
+            preco_atual=preco_atual,
+            ultima_coleta=agora,
+        )
+        # update() não dispara sinais: o preço novo vai para a comparação após o commit.
+        comparacao.atualizar_depois_do_commit(comparacao.atualizar_monitorados_das_paginas, [url_hash])
+
+    logging.info(f"SAVE DATA: Coleta registrada para a URL {url_canonico} ({atualizados} monitoramentos atualizados).")
+    return pagina, atualizados
+
+def tocar_paginas(url_hashes):
+    """
+    Marca as páginas como coletadas agora, sem alterar nome/preço. Usado quando
+    a página não mudou desde a última coleta: o preço em cache passa pelo
+    histórico como uma coleta comum, o que só avança `confirmado_em` do último
+    ponto e mantém o `ResumoPrecos` em dia.
+    """
+    agora = timezone.now()
+    with transaction.atomic():
+        paginas = PaginaProduto.objects.filter(url_hash__in=url_hashes)
+        historico.registrar_coletas(list(paginas.values_list('pk', 'preco_atual')), agora)
+        paginas.update(ultima_coleta=agora)
+        return ProdutosMonitoradosExternos.objects.filter(url_hash__in=url_hashes).update(ultima_coleta=agora)
+
+def save_monitoring_data(url_produto, nome_produto, preco_atual, usuario_id, nova_coleta=True):
     """
     Salva os dados de monitoramento no banco de dados.
+    Garante que o vendedor assine a página da URL e, se `nova_coleta` for True,
+    registra a coleta na página (o que atualiza todos os assinantes).
     Retorna o objeto de monitoramento em caso de sucesso, None em caso de falha.
     """
     try:
         vendedor = Vendedor.objects.get(usuario_id=usuario_id)
 
         url_canonico = get_canonical_url(url_produto)
-        url_hash = hashlib.sha256(url_canonico.encode()).hexdigest()
+        url_hash = get_url_hash(url_canonico)
 
         # Usa o url_hash para encontrar ou criar o produto, garantindo unicidade.
+        # O save() do modelo vincula o monitoramento à página compartilhada.
         monitoramento, created = ProdutosMonitoradosExternos.objects.get_or_create(
             vendedor=vendedor,
             url_hash=url_hash,
@@ -56,19 +120,14 @@ def save_monitoring_data(url_produto, nome_produto, preco_atual, usuario_id):
             }
         )
 
-        # Se o produto já existia, atualiza os dados.
-        if not created:
+        if nova_coleta:
+            save_page_data(url_canonico, nome_produto, preco_atual)
+        elif not created:
             monitoramento.nome_produto = nome_produto
             monitoramento.preco_atual = preco_atual
             monitoramento.save() # ultima_coleta é atualizado automaticamente pelo auto_now=True
 
-        # Salva a nova entrada no histórico de preços
-        HistoricoPrecos.objects.create(
-            produto_monitorado=monitoramento, # Nome correto do campo
-            preco=preco_atual,
-            # data_coleta é preenchido automaticamente pelo auto_now_add=True
-        )
-        
+        monitoramento.refresh_from_db()
         logging.info(f"SAVE DATA: Dados de monitoramento salvos com sucesso para a URL: {url_produto}")
         return monitoramento
         
@@ -80,152 +139,160 @@ def save_monitoring_data(url_produto, nome_produto, preco_atual, usuario_id):
 
 def get_specific_selectors(url: str):
     """
-    Busca no banco de dados os seletores para o domínio da URL fornecida,
-    de forma dinâmica e escalável.
+    Retorna os seletores cadastrados para o domínio da URL fornecida.
+    A resolução é feita no registro em memória (ver `selector_registry`),
+    sem consultas ao banco no caminho quente.
     """
     hostname = urlparse(url).hostname
     if not hostname:
         logging.warning(f"URL inválida ou sem hostname: {url}")
         return None
 
-    # Gera uma lista de possíveis domínios a serem buscados, do mais específico ao mais genérico.
-    # Ex: para 'm.americanas.com.br', tentará: 
-    # 1. 'm.americanas.com.br'
-    # 2. 'americanas.com.br'
-    parts = hostname.split('.')
-    domain_candidates = ['.'.join(parts[i:]) for i in range(len(parts) - 1)]
-    
-    dominio_obj = None
-    for domain_name in domain_candidates:
-        try:
-            # Busca por um domínio ativo que corresponda ao candidato
-            dominio_obj = Dominio.objects.get(ativo=True, nome_dominio=domain_name)
-            logging.info(f"Domínio correspondente encontrado no DB: {domain_name}")
-            break  # Para no primeiro que encontrar
-        except Dominio.DoesNotExist:
-            continue # Tenta o próximo candidato (mais genérico)
-
-    if not dominio_obj:
-        logging.warning(f"Nenhum domínio de scraping ativo encontrado no DB para o hostname: {hostname}")
+    # O registro devolve o domínio ativo mais específico que seja sufixo do hostname.
+    # Ex: para 'm.americanas.com.br', tenta 'm.americanas.com.br' e depois 'americanas.com.br'.
+    nome_dominio, seletores = get_registro().resolver(hostname)
+    if not seletores:
+        logging.warning(f"Nenhum domínio de scraping ativo com seletores encontrado para o hostname: {hostname}")
         return None
 
-    # Busca todos os seletores para o domínio encontrado, ordenados por prioridade
-    seletores_db = dominio_obj.seletores.all().order_by('prioridade')
-    if not seletores_db.exists():
-        logging.warning(f"Nenhum seletor encontrado no DB para o domínio: {dominio_obj.nome_dominio}")
-        return None
+    logging.info(f"Usando seletores do registro para o domínio: {nome_dominio}")
+    return seletores
 
-    # Monta o dicionário de seletores no formato esperado pelo pipeline
-    selectors_dict = {
-        'nome': [],
-        'preco': [],
-        'api_url': None,
-    }
-    for s in seletores_db:
-        if s.tipo == Seletor.TipoSeletor.NOME:
-            selectors_dict['nome'].append(s.seletor)
-        elif s.tipo == Seletor.TipoSeletor.PRECO:
-            selectors_dict['preco'].append(s.seletor)
-        elif s.tipo == Seletor.TipoSeletor.API_URL:
-            # Assume que haverá apenas uma URL de API por domínio, a de maior prioridade
-            if selectors_dict['api_url'] is None:
-                selectors_dict['api_url'] = s.seletor
-
-    logging.info(f"Usando {len(seletores_db)} seletores do banco de dados para o domínio: {dominio_obj.nome_dominio}")
-    return selectors_dict
+FAST_PATH_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Language': 'pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7',
+    'Accept-Encoding': 'gzip, deflate, br'
+}
 
-def fast_path_scrape(url: str):
+FAST_PATH_DEFAULTS = {
+    'CONCURRENT_REQUESTS': 16,
+    'CONCURRENT_REQUESTS_PER_DOMAIN': 2,
+    'DOWNLOAD_DELAY': 1.0,
+    'TIMEOUT': 10,
+    'CHUNK_BYTES': 16 * 1024,
+}
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+
+def get_fast_path_config():
+    """Retorna a configuração do fast path, mesclando `SCRAPER_FAST_PATH` com os padrões."""
+    config = dict(FAST_PATH_DEFAULTS)
+    config.update(getattr(settings, 'SCRAPER_FAST_PATH', {}))
+    return config
+
+
+def get_http_session():
     """
-    Tenta extrair dados de produtos de forma rápida (requests + BeautifulSoup).
-    Retorna (nome, preco) em caso de sucesso, ou None em caso de falha.
+    Sessão HTTP compartilhada pelo processo, com pool de conexões keep-alive.
+    Evita um handshake TCP/TLS novo a cada URL do mesmo domínio.
     """
-    logging.info(f"FAST PATH: Tentando para a URL: {url}")
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept-Language': 'pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7',
-        'Accept-Encoding': 'gzip, deflate, br'
-    }
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            config = get_fast_path_config()
+            adapter = HTTPAdapter(
+                pool_connections=config['CONCURRENT_REQUESTS'],
+                pool_maxsize=config['CONCURRENT_REQUESTS'],
+            )
+            session = requests.Session()
+            session.headers.update(FAST_PATH_HEADERS)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _http_session = session
+        return _http_session
+
+
+def extract_product_data(html: str, url: str):
+    """
+    Extrai (nome, preco) do HTML de uma página de produto.
+    Retorna None se não for possível extrair os dois campos.
+    """
+    # JSON-LD, seletores do domínio e genéricos, nessa ordem (ver `extraction`).
+    dados = extract(html, url)
+    nome_produto = dados['nome']
+    preco_produto_str = dados['preco_texto']
+
+    # --- ETAPA FINAL: LIMPEZA E VALIDAÇÃO ---
+    if nome_produto and preco_produto_str:
+        if dados['preco'] is not None:
+            logging.info(f"FAST PATH: Sucesso via {dados['fonte']}! Produto: '{nome_produto}', Preço: {dados['preco']}")
+            return nome_produto, dados['preco']
+        logging.error(f"FAST PATH: Não foi possível converter o preço: '{preco_produto_str}'")
+
+    # Se chegamos aqui, a extração falhou. Salva o HTML para depuração.
+    logging.error(f"FAST PATH: Falha ao extrair dados para a URL: {url}. Nome: {nome_produto}, Preço: {preco_produto_str}")
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        file_path = '/tmp/fast_path_failure.html'
+        if isinstance(html, bytes):
+            html = html.decode('utf-8', errors='replace')
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(html)
+        logging.info(f"FAST PATH: HTML da falha salvo em: {file_path}")
+    except Exception as e:
+        logging.error(f"FAST PATH: Falha ao salvar o HTML de depuração: {e}")
+    return None
+
+def baixar_e_extrair(session, url, config):
+    """
+    Baixa a página em streaming, passando cada pedaço pelo scanner de JSON-LD.
+    Se nome e preço aparecem antes do fim, a conexão é encerrada sem ler o resto
+    da página e sem construir DOM; caso contrário, extrai do HTML completo.
+
+    Usa o cache de validação (`fetch_cache`): retorna PAGINA_INALTERADA se o
+    servidor responder 304 ou se o trecho do produto não mudou desde a última coleta.
+    """
+    entrada = fetch_cache.obter_entrada(url)
+    headers = fetch_cache.headers_condicionais(entrada)
+    pedacos = []
+    with session.get(url, timeout=config['TIMEOUT'], stream=True, headers=headers) as response:
+        if response.status_code == 304 and entrada:
+            logging.info(f"FAST PATH: Página não modificada (304): {url}")
+            fetch_cache.renovar_entrada(url)
+            return PAGINA_INALTERADA
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
+        scanner = ScannerJsonLd(fragmento_conhecido=entrada['fragmento'] if entrada else None)
+        for pedaco in response.iter_content(chunk_size=config['CHUNK_BYTES']):
+            pedacos.append(pedaco)
+            if scanner.feed(pedaco):
+                break
+        if scanner.inalterado:
+            logging.info(f"FAST PATH: JSON-LD inalterado desde a última coleta: {url}")
+            fetch_cache.salvar_entrada(url, response.headers, entrada['fragmento'], entrada['nome'], entrada['preco'])
+            return PAGINA_INALTERADA
+        if scanner.completo:
+            preco = converter_preco(scanner.preco, separador_decimal='.')
+            if preco is not None:
+                logging.info(f"FAST PATH: Sucesso via JSON-LD após {sum(map(len, pedacos))} bytes! Produto: '{scanner.nome}', Preço: {preco}")
+                fetch_cache.salvar_entrada(url, response.headers, scanner.fragmento, scanner.nome, preco)
+                return scanner.nome, preco
+            # JSON-LD com preço inválido: lê o resto da página para tentar os seletores.
+            pedacos.extend(response.iter_content(chunk_size=config['CHUNK_BYTES']))
+        headers_resposta = response.headers
 
-        nome_produto = None
-        preco_produto_str = None
+    dados = extract_product_data(b''.join(pedacos), url)
+    if dados:
+        fragmento = fetch_cache.hash_fragmento(*dados)
+        fetch_cache.salvar_entrada(url, headers_resposta, fragmento, *dados)
+        if entrada and entrada['fragmento'] == fragmento:
+            return PAGINA_INALTERADA
+    return dados
 
-        # --- TENTATIVA 1: JSON-LD (O Padrão Ouro) ---
-        json_ld_script = soup.find('script', type='application/ld+json')
-        if json_ld_script:
-            try:
-                data = json.loads(json_ld_script.string)
-                if isinstance(data, list): # Alguns sites colocam o JSON-LD em uma lista
-                    data = data[0]
-                
-                if data.get('@type') == 'Product':
-                    nome_produto = data.get('name')
-                    offers = data.get('offers', {})
-                    if isinstance(offers, list):
-                        offers = offers[0] if offers else {}
-                    
-                    price = offers.get('price') or offers.get('lowPrice')
-                    if price:
-                        preco_produto_str = str(price)
-                        logging.info("FAST PATH: Dados encontrados via JSON-LD.")
-            except (json.JSONDecodeError, AttributeError):
-                logging.warning("FAST PATH: JSON-LD encontrado, mas com formato inválido. Tentando HTML.")
-
-        # --- TENTATIVA 2 e 3: Seletores HTML (Planos B e C) ---
-        if not nome_produto or not preco_produto_str:
-            logging.info("FAST PATH: JSON-LD falhou ou incompleto. Tentando seletores HTML.")
-            
-            # Tenta seletores específicos do domínio primeiro
-            specific_selectors = get_specific_selectors(url)
-            if specific_selectors:
-                logging.info(f"FAST PATH: Usando seletores específicos para o domínio.")
-                if not nome_produto:
-                    for selector in specific_selectors['nome']:
-                        el = soup.select_one(selector)
-                        if el: nome_produto = el.text.strip(); break
-                if not preco_produto_str:
-                    for selector in specific_selectors['preco']:
-                        el = soup.select_one(selector)
-                        if el: preco_produto_str = el.text.strip(); break
-            
-            # Se ainda faltar, tenta seletores genéricos (fallback)
-            if not nome_produto:
-                generic_name_selectors = ['h1', 'h1[class*="title"]', 'h1[class*="name"]']
-                for selector in generic_name_selectors:
-                    el = soup.select_one(selector)
-                    if el: nome_produto = el.text.strip(); break
-            
-            if not preco_produto_str:
-                generic_price_selectors = ['span[class*="price"]', 'div[class*="price"]', 'p[class*="price"]']
-                for selector in generic_price_selectors:
-                    el = soup.select_one(selector)
-                    if el: preco_produto_str = el.text.strip(); break
-        
-        # --- ETAPA FINAL: LIMPEZA E VALIDAÇÃO ---
-        if nome_produto and preco_produto_str:
-            # Regex robusta para limpar o preço, removendo tudo exceto dígitos, vírgulas e pontos
-            preco_limpo_str = re.search(r'(\d[\d,.]*\d)', preco_produto_str)
-            if preco_limpo_str:
-                # Converte para o formato americano (ponto decimal) e depois para float
-                preco_final = float(preco_limpo_str.group(0).replace('.', '').replace(',', '.'))
-                logging.info(f"FAST PATH: Sucesso! Produto: '{nome_produto}', Preço: {preco_final}")
-                return nome_produto, preco_final
-            else:
-                logging.error(f"FAST PATH: Regex não conseguiu limpar o preço: '{preco_produto_str}'")
-
-        # Se chegamos aqui, a extração falhou. Salva o HTML para depuração.
-        logging.error(f"FAST PATH: Falha ao extrair dados para a URL: {url}. Nome: {nome_produto}, Preço: {preco_produto_str}")
-        try:
-            file_path = '/tmp/fast_path_failure.html'
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(response.text)
-            logging.info(f"FAST PATH: HTML da falha salvo em: {file_path}")
-        except Exception as e:
-            logging.error(f"FAST PATH: Falha ao salvar o HTML de depuração: {e}")
-        return None
+
+def fast_path_scrape(url: str):
+    """
+    Tenta extrair dados de produtos de forma rápida (requests + lxml).
+    Retorna (nome, preco) em caso de sucesso, ou None em caso de falha.
+    """
+    logging.info(f"FAST PATH: Tentando para a URL: {url}")
+    try:
+        dados = baixar_e_extrair(get_http_session(), url, get_fast_path_config())
+        if dados is PAGINA_INALTERADA:
+            # Quem chamou espera (nome, preco): devolve o resultado anterior.
+            entrada = fetch_cache.obter_entrada(url)
+            return (entrada['nome'], entrada['preco']) if entrada else None
+        return dados
 
     except requests.exceptions.RequestException as e:
         logging.error(f"FAST PATH: Erro de requisição para a URL: {url} - {e}")
@@ -234,6 +301,92 @@ def fast_path_scrape(url: str):
         logging.error(f"FAST PATH: Erro inesperado para a URL: {url} - {e}")
         return None
 
+
+class LimitadorPorDominio:
+    """
+    Limita requisições simultâneas e o intervalo entre requisições por domínio,
+    no mesmo espírito de CONCURRENT_REQUESTS_PER_DOMAIN e DOWNLOAD_DELAY do Scrapy.
+    """
+
+    def __init__(self, concorrencia_por_dominio, intervalo):
+        self.concorrencia_por_dominio = concorrencia_por_dominio
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._semaforos = {}
+        self._proximo_horario = {}
+
+    def _semaforo(self, dominio):
+        with self._lock:
+            if dominio not in self._semaforos:
+                self._semaforos[dominio] = threading.BoundedSemaphore(self.concorrencia_por_dominio)
+            return self._semaforos[dominio]
+
+    def _aguardar_intervalo(self, dominio):
+        with self._lock:
+            agora = time.monotonic()
+            horario = max(agora, self._proximo_horario.get(dominio, agora))
+            self._proximo_horario[dominio] = horario + self.intervalo
+        if horario > agora:
+            time.sleep(horario - agora)
+
+    @contextmanager
+    def slot(self, dominio):
+        semaforo = self._semaforo(dominio)
+        with semaforo:
+            self._aguardar_intervalo(dominio)
+            yield
+
+
+def intercalar_por_dominio(urls):
+    """
+    Reordena as URLs em rodízio entre domínios, para que um domínio com muitas URLs
+    não ocupe todas as threads esperando pelo seu limite.
+    """
+    por_dominio = defaultdict(list)
+    for url in urls:
+        por_dominio[urlparse(url).hostname or ''].append(url)
+    filas = list(por_dominio.values())
+    intercaladas = []
+    for i in range(max((len(f) for f in filas), default=0)):
+        for fila in filas:
+            if i < len(fila):
+                intercaladas.append(fila[i])
+    return intercaladas
+
+
+def fast_path_scrape_batch(urls, max_workers=None):
+    """
+    Versão em lote do fast path: busca várias URLs em paralelo sobre conexões
+    keep-alive compartilhadas, respeitando limites por domínio.
+
+    É um gerador que produz (url, (nome, preco) ou None) à medida que cada página
+    chega e é processada, sem esperar o lote inteiro. Páginas que não mudaram
+    desde a última coleta (ver `fetch_cache`) são produzidas como
+    (url, PAGINA_INALTERADA).
+    """
+    config = get_fast_path_config()
+    limitador = LimitadorPorDominio(config['CONCURRENT_REQUESTS_PER_DOMAIN'], config['DOWNLOAD_DELAY'])
+    session = get_http_session()
+    urls = intercalar_por_dominio(dict.fromkeys(urls))
+    logging.info(f"FAST PATH BATCH: Iniciando lote com {len(urls)} URLs.")
+
+    def processar(url):
+        with limitador.slot(urlparse(url).hostname or ''):
+            return baixar_e_extrair(session, url, config)
+
+    with ThreadPoolExecutor(max_workers=max_workers or config['CONCURRENT_REQUESTS']) as executor:
+        futures = {executor.submit(processar, url): url for url in urls}
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                yield url, future.result()
+            except requests.exceptions.RequestException as e:
+                logging.error(f"FAST PATH BATCH: Erro de requisição para a URL: {url} - {e}")
+                yield url, None
+            except Exception as e:
+                logging.error(f"FAST PATH BATCH: Erro inesperado para a URL: {url} - {e}")
+                yield url, None
+
 def medium_path_scrape(url: str):
     """
     Placeholder para uma tentativa de scraping de complexidade média.
@@ -243,66 +396,18 @@ def medium_path_scrape(url: str):
 
 def long_path_scrape(url: str, usuario_id: str):
     """
-    Executa o spider Scrapy/Selenium como um subprocesso e captura sua saída.
+    Executa o spider Scrapy/Selenium no serviço de crawler do processo
+    (reactor, Xvfb e drivers reaproveitados entre chamadas).
     Retorna (nome, preco) em caso de sucesso, ou None em caso de falha.
     """
     logging.info(f"LONG PATH: Iniciando para a URL: {url}")
     try:
-        scrapy_project_path = os.path.join(settings.BASE_DIR, 'cacapreco_scraper')
-        
-        command = [
-            'xvfb-run', '--auto-servernum', '--server-args', '-screen 0 1280x1024x24',
-            'scrapy', 'crawl', 'selenium_spider',
-            '-a', f'url={url}',
-            '-a', f'usuario_id={usuario_id}',
-            '-o', '-:json' # Sintaxe correta para output em JSON para stdout
-        ]
-        
-        result = subprocess.run(
-            command, 
-            cwd=scrapy_project_path, 
-            stdout=subprocess.PIPE, 
-            stderr=subprocess.STDOUT,
-            text=True, 
-            check=True,
-            timeout=300 # Timeout de 5 minutos para o processo do spider
-        )
-
-        # A saída do Scrapy pode conter múltiplos JSONs, um por linha, ou um array de JSON
-        # Vamos pegar a última linha não vazia, que geralmente é o item raspado
-        output_lines = [line for line in result.stdout.strip().split('\n') if line.strip()]
-        if not output_lines:
-            logging.error(f"LONG PATH: Spider executado, mas não produziu saída para a URL: {url}")
-            return None
-            
-        # Tenta carregar a última linha como JSON
-        try:
-            # Scrapy com '-o - -t json' produz um array JSON.
-            scraped_items = json.loads(result.stdout)
-            if not scraped_items:
-                logging.error(f"LONG PATH: A saída do spider era um array JSON vazio para a URL: {url}")
-                return None
-            
-            data = scraped_items[0] # Pega o primeiro item do array
-            nome = data.get('nome_produto')
-            preco = data.get('preco_atual')
-
-            if nome and preco:
-                logging.info(f"LONG PATH: Sucesso! Produto: {nome}, Preço: {preco}")
-                return nome, float(preco)
-            else:
-                logging.error(f"LONG PATH: JSON da saída do spider incompleto para a URL: {url}")
-                return None
-        except json.JSONDecodeError:
-            logging.error(f"LONG PATH: Falha ao decodificar a saída JSON do spider para a URL: {url}. Saída: {result.stdout}")
-            return None
-
-    except subprocess.CalledProcessError as e:
-        logging.error(f"LONG PATH: Erro ao executar o spider para a URL {url}. Output: {e.stdout}")
-        return None
-    except subprocess.TimeoutExpired:
-        logging.error(f"LONG PATH: Timeout ao executar o spider para a URL {url}.")
-        return None
+        resultado = crawl_urls([url], usuario_id).get(url)
+        if resultado:
+            logging.info(f"LONG PATH: Sucesso! Produto: {resultado[0]}, Preço: {resultado[1]}")
+        else:
+            logging.error(f"LONG PATH: Spider executado, mas não produziu item para a URL: {url}")
+        return resultado
     except Exception as e:
         logging.error(f"LONG PATH: Erro inesperado ao executar o spider para a URL {url}: {e}")
-        return None
\ No newline at end of file
+        return None
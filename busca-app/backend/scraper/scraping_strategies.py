@@ -1,9 +1,10 @@
 import requests
 from requests_html import HTMLSession
 import json
-from playwright.async_api import async_playwright
-from playwright_stealth import Stealth
 import asyncio
+import threading
+from .browser_pool import get_playwright_pool, get_pool_config
+from . import render_profiles
 
 def scrape_with_internal_api(api_url: str, headers: dict = None):
     """
@@ -36,6 +37,21 @@ def scrape_with_internal_api(api_url: str, headers: dict = None):
         print("Erro: A resposta da API não é um JSON válido.")
         return None
 
+_estado_thread = threading.local()
+
+
+def _loop_da_thread():
+    """
+    Event loop reutilizado pelas renderizações do requests-html na thread atual,
+    em vez de criar e fechar um loop a cada chamada.
+    """
+    loop = getattr(_estado_thread, 'loop', None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        _estado_thread.loop = loop
+    asyncio.set_event_loop(loop)
+    return loop
+
 def scrape_with_requests_html(url: str, price_selector: str, name_selector: str):
     """
     Usa a biblioteca requests-html para renderizar JavaScript básico e extrair dados.
@@ -51,11 +67,8 @@ def scrape_with_requests_html(url: str, price_selector: str, name_selector: str)
     """
     print(f"--- Estratégia: requests-html ---")
     session = HTMLSession()
-    loop = None # Initialize loop outside try
     try:
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        _loop_da_thread()
 
         response = session.get(url, timeout=20)
         
@@ -82,11 +95,9 @@ def scrape_with_requests_html(url: str, price_selector: str, name_selector: str)
         print(f"Erro durante a execução do requests-html: {e}")
         return None
     finally:
-        if loop:
-            loop.close()
         session.close()
 
-async def scrape_with_playwright_stealth(url: str, price_selector: str, name_selector: str):
+async def scrape_with_playwright_stealth(url: str, price_selector: str, name_selector: str, perfil: dict = None):
     """
     Usa Playwright com playwright-stealth para evitar detecção de bot.
     É uma estratégia de long-path, robusta mas mais lenta.
@@ -95,22 +106,22 @@ async def scrape_with_playwright_stealth(url: str, price_selector: str, name_sel
         url: A URL da página do produto.
         price_selector: O seletor CSS para encontrar o preço.
         name_selector: O seletor CSS para encontrar o nome do produto.
+        perfil: Perfil de renderização do domínio (ver `render_profiles.get_perfil`).
 
     Returns:
         Um dicionário com os dados extraídos ou None se falhar.
     """
     print(f"--- Estratégia: Playwright-Stealth ---")
-    async with Stealth().use_async(async_playwright()) as p:
-        browser = None
+    perfil = perfil or render_profiles.perfil_padrao()
+    # O navegador vem do pool do worker; cada chamada usa um contexto novo e descartável.
+    async with get_playwright_pool().checkout(timeout=get_pool_config()['TIMEOUT_CHECKOUT']) as browser:
+        context = None
         try:
-            browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
-            
-            await page.goto(url, wait_until='networkidle', timeout=120000) # Increased Timeout
-            
-            # Espera explícita pode ser necessária em alguns sites
-            await page.wait_for_load_state('domcontentloaded')
-            
+            # Bloqueio de recursos, viewport e condição de espera vêm do perfil do domínio.
+            context = await render_profiles.abrir_contexto(browser, perfil)
+            page = await context.new_page()
+            await render_profiles.carregar(page, url, perfil, [price_selector])
+
             price_element = page.locator(price_selector).first
             name_element = page.locator(name_selector).first
 
@@ -132,5 +143,5 @@ async def scrape_with_playwright_stealth(url: str, price_selector: str, name_sel
             print(f"Erro durante a execução do Playwright: {e}")
             return None
         finally:
-            if browser:
-                await browser.close()
+            if context:
+                await context.close()
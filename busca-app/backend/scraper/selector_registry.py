@@ -0,0 +1,192 @@
+"""
+Registro em memória dos seletores de scraping por domínio.
+
+`Dominio` e `Seletor` mudam raramente (admin ou `populate_selectors`), mas eram
+consultados a cada chamada de `get_specific_selectors`. O registro carrega tudo de
+uma vez por processo, numa trie de sufixos de hostname, e só recarrega quando a
+versão publicada no Redis muda. Os perfis de renderização dos domínios
+(`render_profiles`) são carregados junto, numa segunda trie. Os signals de `post_save`/`post_delete` incrementam
+essa versão, de modo que todos os workers do Celery percebem a alteração.
+"""
+import logging
+import threading
+import time
+
+import redis
+from django.conf import settings
+
+from .redis_client import get_redis
+
+CHAVE_VERSAO = 'scraper:seletores:versao'
+
+REGISTRY_DEFAULTS = {
+    'INTERVALO_VERSAO_SEGUNDOS': 5,  # Frequência máxima de consulta da versão no Redis
+}
+
+
+def get_registry_config():
+    config = dict(REGISTRY_DEFAULTS)
+    config.update(getattr(settings, 'SCRAPER_SELECTOR_REGISTRY', {}))
+    return config
+
+
+class _NoTrie:
+    __slots__ = ('filhos', 'valor', 'nome_dominio')
+
+    def __init__(self):
+        self.filhos = {}
+        self.valor = None
+        self.nome_dominio = None
+
+
+class TrieDominios:
+    """
+    Trie indexada pelos rótulos do hostname em ordem reversa
+    ('m.americanas.com.br' -> br, com, americanas, m). A busca devolve o
+    domínio cadastrado mais específico que seja sufixo do hostname.
+    """
+
+    def __init__(self):
+        self.raiz = _NoTrie()
+
+    def inserir(self, nome_dominio, valor):
+        no = self.raiz
+        for rotulo in reversed(nome_dominio.lower().split('.')):
+            no = no.filhos.setdefault(rotulo, _NoTrie())
+        no.valor = valor
+        no.nome_dominio = nome_dominio
+
+    def buscar(self, hostname):
+        """Retorna (nome_dominio, valor) ou (None, None)."""
+        no = self.raiz
+        encontrado = (None, None)
+        for rotulo in reversed(hostname.lower().split('.')):
+            no = no.filhos.get(rotulo)
+            if no is None:
+                break
+            if no.valor is not None:
+                encontrado = (no.nome_dominio, no.valor)
+        return encontrado
+
+
+def compilar_seletores(seletores_db):
+    """
+    Monta o dicionário no formato esperado pelo pipeline a partir de seletores
+    já ordenados por prioridade. As listas viram tuplas para que o mesmo objeto
+    possa ser compartilhado entre chamadas sem risco de ser alterado.
+    """
+    from .models import Seletor
+
+    nome, preco, api_url = [], [], None
+    for s in seletores_db:
+        if s.tipo == Seletor.TipoSeletor.NOME:
+            nome.append(s.seletor)
+        elif s.tipo == Seletor.TipoSeletor.PRECO:
+            preco.append(s.seletor)
+        elif s.tipo == Seletor.TipoSeletor.API_URL:
+            # Assume que haverá apenas uma URL de API por domínio, a de maior prioridade
+            if api_url is None:
+                api_url = s.seletor
+    if not nome and not preco and api_url is None:
+        return None
+    return {'nome': tuple(nome), 'preco': tuple(preco), 'api_url': api_url}
+
+
+class RegistroSeletores:
+    """Cache por processo; seguro para uso entre threads."""
+
+    def __init__(self, intervalo_versao=None):
+        self.intervalo_versao = (
+            intervalo_versao if intervalo_versao is not None
+            else get_registry_config()['INTERVALO_VERSAO_SEGUNDOS']
+        )
+        self._lock = threading.Lock()
+        self._trie = None
+        self._perfis = None
+        self._versao = None
+        self._proxima_verificacao = 0.0
+
+    def _versao_remota(self):
+        try:
+            versao = get_redis().get(CHAVE_VERSAO)
+            return int(versao) if versao is not None else 0
+        except redis.RedisError as e:
+            logging.warning(f"SELETORES: Redis indisponível ao verificar a versão: {e}")
+            return None
+
+    def _carregar(self):
+        """Retorna (trie de seletores, trie de perfis de renderização)."""
+        from .models import Dominio, Seletor
+        from .render_profiles import compilar_perfil
+
+        por_dominio = {}
+        for s in Seletor.objects.filter(dominio__ativo=True).select_related('dominio').order_by('dominio_id', 'prioridade'):
+            por_dominio.setdefault(s.dominio.nome_dominio, []).append(s)
+
+        trie = TrieDominios()
+        for nome_dominio, seletores_db in por_dominio.items():
+            compilados = compilar_seletores(seletores_db)
+            if compilados:
+                trie.inserir(nome_dominio, compilados)
+
+        perfis = TrieDominios()
+        for dominio in Dominio.objects.filter(ativo=True):
+            perfis.inserir(dominio.nome_dominio, compilar_perfil(dominio))
+        logging.info(f"SELETORES: Registro carregado com {len(por_dominio)} domínios.")
+        return trie, perfis
+
+    def _atualizar_se_necessario(self):
+        agora = time.monotonic()
+        if self._trie is not None and agora < self._proxima_verificacao:
+            return self._trie, self._perfis
+        with self._lock:
+            if self._trie is not None and agora < self._proxima_verificacao:
+                return self._trie, self._perfis
+            versao = self._versao_remota()
+            # Com o Redis fora, mantém o que já está carregado.
+            if self._trie is None or (versao is not None and versao != self._versao):
+                self._trie, self._perfis = self._carregar()
+                self._versao = versao
+            self._proxima_verificacao = agora + self.intervalo_versao
+            return self._trie, self._perfis
+
+    def resolver(self, hostname):
+        """Retorna (nome_dominio, seletores) para o hostname, ou (None, None)."""
+        trie, _ = self._atualizar_se_necessario()
+        return trie.buscar(hostname)
+
+    def resolver_perfil(self, hostname):
+        """Perfil de renderização do domínio ativo mais específico, ou None."""
+        _, perfis = self._atualizar_se_necessario()
+        return perfis.buscar(hostname)[1]
+
+    def invalidar(self):
+        """Descarta o cache local; a próxima busca recarrega do banco."""
+        with self._lock:
+            self._trie = None
+            self._proxima_verificacao = 0.0
+
+
+_registro = None
+_registro_lock = threading.Lock()
+
+
+def get_registro():
+    global _registro
+    if _registro is None:
+        with _registro_lock:
+            if _registro is None:
+                _registro = RegistroSeletores()
+    return _registro
+
+
+def publicar_nova_versao():
+    """
+    Invalida o registro deste processo e incrementa a versão no Redis para que
+    os demais processos recarreguem na próxima verificação.
+    """
+    get_registro().invalidar()
+    try:
+        get_redis().incr(CHAVE_VERSAO)
+    except redis.RedisError as e:
+        logging.warning(f"SELETORES: Falha ao publicar nova versão no Redis: {e}")
@@ -1,31 +1,50 @@
+from datetime import timedelta
+
+from django.utils import timezone
 from rest_framework import serializers
-from .models import ProdutosMonitoradosExternos, HistoricoPrecos
+
+from api.serializers import CamposDinamicosMixin
+from .models import ProdutosMonitoradosExternos, HistoricoPrecos, ResumoPrecos
+from .historico import serie
+
+# Período do histórico devolvido quando o cliente não informa `?dias=`.
+DIAS_HISTORICO_PADRAO = 90
 
 class HistoricoPrecosSerializer(serializers.ModelSerializer):
     class Meta:
         model = HistoricoPrecos
         fields = ['preco', 'data_coleta']
 
-class ProdutosMonitoradosExternosSerializer(serializers.ModelSerializer):
+class ResumoPrecosSerializer(serializers.ModelSerializer):
     class Meta:
-        model = ProdutosMonitoradosExternos
-        # Incluímos todos os campos para retornar o objeto completo ao frontend
-        fields = ['id', 'vendedor', 'url_produto', 'nome_produto', 'preco_atual', 'ultima_coleta']
-        read_only_fields = ['vendedor', 'ultima_coleta'] # Removed nome_produto and preco_atual
+        model = ResumoPrecos
+        exclude = ['pagina']
 
-class ProdutosMonitoradosExternosComHistoricoSerializer(serializers.ModelSerializer):
-    historico = HistoricoPrecosSerializer(many=True, read_only=True)
-    variacao = serializers.SerializerMethodField()
+class ProdutosMonitoradosExternosSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    # Lido de ResumoPrecos (select_related na view), sem consultar o histórico.
+    variacao = serializers.DecimalField(source='pagina.resumo.variacao_percentual', max_digits=9, decimal_places=2, read_only=True, allow_null=True)
+    resumo = ResumoPrecosSerializer(source='pagina.resumo', read_only=True, allow_null=True)
 
     class Meta:
         model = ProdutosMonitoradosExternos
-        fields = ['id', 'vendedor', 'url_produto', 'nome_produto', 'preco_atual', 'ultima_coleta', 'historico', 'variacao']
-
-    def get_variacao(self, obj):
-        historico = obj.historico.order_by('-data_coleta')[:2]
-        if len(historico) == 2:
-            preco_atual = historico[0].preco
-            preco_anterior = historico[1].preco
-            if preco_anterior > 0:
-                return ((preco_atual - preco_anterior) / preco_anterior) * 100
-        return None
+        # Incluímos todos os campos para retornar o objeto completo ao frontend
+        fields = ['id', 'vendedor', 'url_produto', 'nome_produto', 'preco_atual', 'ultima_coleta', 'sku', 'variacao', 'resumo']
+        # Pelo PATCH o vendedor só vincula o produto a um SKU do catálogo (comparação de preços).
+        read_only_fields = ['vendedor', 'url_produto', 'nome_produto', 'preco_atual', 'ultima_coleta']
+
+class ProdutosMonitoradosExternosComHistoricoSerializer(ProdutosMonitoradosExternosSerializer):
+    historico = serializers.SerializerMethodField()
+
+    class Meta(ProdutosMonitoradosExternosSerializer.Meta):
+        fields = ProdutosMonitoradosExternosSerializer.Meta.fields + ['historico']
+
+    def get_historico(self, obj):
+        # O histórico pertence à página compartilhada, não ao monitoramento do vendedor.
+        # Limitado a `?dias=` (padrão 90); as estatísticas vêm do resumo.
+        request = self.context.get('request')
+        try:
+            dias = int(request.query_params.get('dias', DIAS_HISTORICO_PADRAO)) if request else DIAS_HISTORICO_PADRAO
+        except ValueError:
+            dias = DIAS_HISTORICO_PADRAO
+        desde = timezone.now() - timedelta(days=max(dias, 1))
+        return HistoricoPrecosSerializer(serie(obj.pagina_id, desde=desde), many=True).data
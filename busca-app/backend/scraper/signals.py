@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Dominio, Seletor
+from .selector_registry import publicar_nova_versao
+
+
+@receiver(post_save, sender=Dominio)
+@receiver(post_delete, sender=Dominio)
+@receiver(post_save, sender=Seletor)
+@receiver(post_delete, sender=Seletor)
+def invalidar_registro_seletores(sender, **kwargs):
+    # Só publica depois do commit, para que outros workers não recarreguem dados antigos.
+    transaction.on_commit(publicar_nova_versao)
@@ -0,0 +1,106 @@
+"""
+Roteamento adaptativo das estratégias de scraping por domínio.
+
+Para cada domínio guarda no Redis, por estratégia, quantas coletas deram certo,
+quantas falharam e o tempo total gasto. O pipeline usa esses números para
+começar pela estratégia mais barata que provavelmente funciona: estratégias com
+amostras suficientes e taxa de sucesso abaixo do mínimo vão para o fim da fila.
+Com probabilidade `EPSILON` a ordem padrão é usada, para que uma estratégia
+descartada possa voltar a ser escolhida se o site mudar.
+"""
+import logging
+import random
+from urllib.parse import urlparse
+
+import redis
+from django.conf import settings
+
+from .redis_client import get_redis
+from .selector_registry import get_registro
+
+PREFIXO = 'scraper:estrategias:'
+
+ROUTER_DEFAULTS = {
+    'EPSILON': 0.1,         # Fração das coletas que seguem a ordem padrão (exploração)
+    'MIN_AMOSTRAS': 5,      # Tentativas necessárias antes de julgar uma estratégia
+    'TAXA_MINIMA': 0.2,     # Abaixo disso a estratégia é adiada para o fim
+    'JANELA': 200,          # Acima disso os contadores são reduzidos à metade
+}
+
+
+def get_router_config():
+    config = dict(ROUTER_DEFAULTS)
+    config.update(getattr(settings, 'SCRAPER_STRATEGY_ROUTER', {}))
+    return config
+
+
+def dominio_da_url(url):
+    """Nome do `Dominio` cadastrado para a URL ou, na falta dele, o hostname."""
+    hostname = (urlparse(url).hostname or '').lower()
+    nome_dominio, _ = get_registro().resolver(hostname) if hostname else (None, None)
+    return nome_dominio or hostname
+
+
+def estatisticas(dominio):
+    """Retorna {estrategia: {'ok': n, 'falha': n, 'latencia_ms': média}}."""
+    try:
+        bruto = get_redis().hgetall(f'{PREFIXO}{dominio}')
+    except redis.RedisError as e:
+        logging.warning(f"ROTEADOR: Redis indisponível ao ler estatísticas de {dominio}: {e}")
+        return {}
+    contadores = {}
+    for campo, valor in bruto.items():
+        estrategia, _, metrica = campo.decode().rpartition(':')
+        contadores.setdefault(estrategia, {'ok': 0, 'falha': 0, 'ms': 0})[metrica] = int(valor)
+    resultado = {}
+    for estrategia, c in contadores.items():
+        tentativas = c['ok'] + c['falha']
+        resultado[estrategia] = {
+            'ok': c['ok'],
+            'falha': c['falha'],
+            'latencia_ms': c['ms'] / tentativas if tentativas else None,
+        }
+    return resultado
+
+
+def registrar(dominio, estrategia, sucesso, latencia_ms):
+    """Contabiliza uma tentativa. Falhas do Redis não interrompem a coleta."""
+    chave = f'{PREFIXO}{dominio}'
+    config = get_router_config()
+    try:
+        r = get_redis()
+        pipe = r.pipeline()
+        pipe.hincrby(chave, f"{estrategia}:{'ok' if sucesso else 'falha'}", 1)
+        pipe.hincrby(chave, f'{estrategia}:ms', int(latencia_ms))
+        pipe.hmget(chave, f'{estrategia}:ok', f'{estrategia}:falha', f'{estrategia}:ms')
+        ok, falha, ms = (int(v or 0) for v in pipe.execute()[-1])
+        if ok + falha > config['JANELA']:
+            # Reduz o peso do histórico antigo para acompanhar mudanças no site.
+            r.hset(chave, mapping={f'{estrategia}:ok': ok // 2, f'{estrategia}:falha': falha // 2, f'{estrategia}:ms': ms // 2})
+    except redis.RedisError as e:
+        logging.warning(f"ROTEADOR: Falha ao registrar {estrategia} para {dominio}: {e}")
+
+
+def ordenar_estrategias(dominio, estrategias):
+    """
+    Recebe as estratégias em ordem crescente de custo e devolve a ordem em que
+    devem ser tentadas para o domínio.
+    """
+    config = get_router_config()
+    if random.random() < config['EPSILON']:
+        logging.info(f"ROTEADOR: Explorando a ordem padrão para {dominio}.")
+        return list(estrategias)
+
+    stats = estatisticas(dominio)
+    provaveis, adiadas = [], []
+    for estrategia in estrategias:
+        s = stats.get(estrategia)
+        tentativas = s['ok'] + s['falha'] if s else 0
+        # Estimativa com suavização de Laplace para não zerar com poucas amostras.
+        if tentativas >= config['MIN_AMOSTRAS'] and (s['ok'] + 1) / (tentativas + 2) < config['TAXA_MINIMA']:
+            adiadas.append(estrategia)
+        else:
+            provaveis.append(estrategia)
+    if adiadas:
+        logging.info(f"ROTEADOR: Para {dominio}, adiando {adiadas} (baixa taxa de sucesso).")
+    return provaveis + adiadas
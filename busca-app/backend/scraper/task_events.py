@@ -0,0 +1,193 @@
+"""
+Status e resultado das tarefas de monitoramento, entregues sem polling.
+
+Ao disparar `run_scraping_pipeline`, a view registra a tarefa no Redis
+(`scraper:tarefa:<id>`, com o dono). Quando ela termina, o sinal `task_postrun`
+grava o status final na mesma chave e publica o evento no canal do vendedor
+(`scraper:tarefas:usuario:<id>`). Com isso:
+
+- `status_em_lote(ids)` responde muitas tarefas com um único MGET, sem montar
+  um `AsyncResult` por tarefa;
+- o stream SSE (`eventos_do_usuario`) assina o canal e empurra cada resultado
+  assim que a tarefa termina; o frontend não precisa pollar durante os até 15
+  minutos de um long path.
+
+O EventSource não envia cabeçalhos, então o stream não recebe o JWT: o
+frontend pede antes um ticket assinado e de vida curta (`emitir_ticket_stream`)
+que vale só para o vendedor e as tarefas dele, e o passa em `?ticket=`.
+
+Falhas do Redis só geram aviso: a consulta cai no backend de resultados do Celery.
+"""
+import json
+import logging
+import time
+
+import redis
+import redis.asyncio
+from celery import states
+from django.conf import settings
+from django.core import signing
+
+from .redis_client import get_redis
+
+TASK_EVENTS_DEFAULTS = {
+    'TTL_SEGUNDOS': 2 * 60 * 60,        # Cobre a fila, o time limit de 900 s e as retentativas
+    'MAX_TAREFAS_POR_CONSULTA': 100,
+    'HEARTBEAT_SEGUNDOS': 15,           # Comentário SSE para manter proxies e o navegador conectados
+    'DURACAO_MAXIMA_STREAM_SEGUNDOS': 20 * 60,  # Depois disso o EventSource reconecta sozinho
+    'VALIDADE_TICKET_SEGUNDOS': 60,     # Só precisa durar até o navegador abrir o stream
+}
+
+SALT_TICKET = 'scraper.task_events.ticket'
+
+PREFIXO_TAREFA = 'scraper:tarefa:'
+PREFIXO_CANAL = 'scraper:tarefas:usuario:'
+
+
+def get_task_events_config():
+    config = dict(TASK_EVENTS_DEFAULTS)
+    config.update(getattr(settings, 'SCRAPER_TASK_EVENTS', {}))
+    return config
+
+
+def chave_tarefa(task_id):
+    return f'{PREFIXO_TAREFA}{task_id}'
+
+
+def canal_usuario(usuario_id):
+    return f'{PREFIXO_CANAL}{usuario_id}'
+
+
+def emitir_ticket_stream(usuario_id, task_ids):
+    """Ticket assinado (com timestamp) que autoriza o stream das tarefas do vendedor."""
+    return signing.TimestampSigner(salt=SALT_TICKET).sign_object({'usuario_id': usuario_id, 'task_ids': list(task_ids)})
+
+
+def validar_ticket_stream(ticket):
+    """Retorna (usuario_id, task_ids) do ticket, ou None se ele for inválido ou estiver vencido."""
+    try:
+        dados = signing.TimestampSigner(salt=SALT_TICKET).unsign_object(
+            ticket, max_age=get_task_events_config()['VALIDADE_TICKET_SEGUNDOS']
+        )
+    except signing.BadSignature:
+        return None
+    return dados['usuario_id'], dados['task_ids']
+
+
+def registrar_tarefa(task_id, usuario_id):
+    """Marca a tarefa como pendente e guarda o dono. Não sobrescreve um resultado já gravado."""
+    registro = {'task_id': task_id, 'status': states.PENDING, 'result': None, 'usuario_id': usuario_id}
+    try:
+        get_redis().set(chave_tarefa(task_id), json.dumps(registro), ex=get_task_events_config()['TTL_SEGUNDOS'], nx=True)
+    except redis.RedisError as e:
+        logging.warning(f"TASK EVENTS: Falha ao registrar a tarefa {task_id}: {e}")
+
+
+def publicar_resultado(task_id, usuario_id, status, resultado):
+    """Grava o status final da tarefa e avisa os streams do vendedor."""
+    if isinstance(resultado, BaseException):
+        resultado = {'status': 'FAILURE', 'reason': str(resultado)}
+    registro = {'task_id': task_id, 'status': status, 'result': resultado, 'usuario_id': usuario_id}
+    dados = json.dumps(registro, default=str)
+    try:
+        cliente = get_redis()
+        pipe = cliente.pipeline(transaction=False)
+        pipe.set(chave_tarefa(task_id), dados, ex=get_task_events_config()['TTL_SEGUNDOS'])
+        pipe.publish(canal_usuario(usuario_id), dados)
+        pipe.execute()
+    except redis.RedisError as e:
+        logging.warning(f"TASK EVENTS: Falha ao publicar o resultado da tarefa {task_id}: {e}")
+
+
+def _formatar(registro):
+    return {'task_id': registro['task_id'], 'status': registro['status'], 'result': registro['result']}
+
+
+def _do_backend_celery(task_id):
+    from celery.result import AsyncResult
+
+    task_result = AsyncResult(task_id)
+    return {
+        'task_id': task_id,
+        'status': task_result.status,
+        'result': task_result.result if task_result.ready() else None,
+    }
+
+
+def status_em_lote(task_ids, usuario_id):
+    """
+    Status das tarefas, na ordem pedida, com um MGET. O dono é comparado como
+    texto (o claim do JWT pode vir como string). Tarefas de outro vendedor
+    aparecem como PENDING (como o Celery faz com IDs desconhecidos); tarefas sem
+    registro (disparadas antes deste módulo ou expiradas) vêm do backend do Celery.
+    """
+    try:
+        brutos = get_redis().mget([chave_tarefa(task_id) for task_id in task_ids]) if task_ids else []
+    except redis.RedisError as e:
+        logging.warning(f"TASK EVENTS: Redis indisponível na consulta em lote: {e}")
+        brutos = [None] * len(task_ids)
+
+    resultados = []
+    for task_id, bruto in zip(task_ids, brutos):
+        if bruto is None:
+            resultados.append(_do_backend_celery(task_id))
+            continue
+        registro = json.loads(bruto)
+        if str(registro.get('usuario_id')) != str(usuario_id):
+            registro = {'task_id': task_id, 'status': states.PENDING, 'result': None}
+        resultados.append(_formatar(registro))
+    return resultados
+
+
+def _evento_sse(registro):
+    return f"event: tarefa\nid: {registro['task_id']}\ndata: {json.dumps(_formatar(registro), default=str)}\n\n"
+
+
+async def eventos_do_usuario(usuario_id, task_ids=None):
+    """
+    Gerador assíncrono de eventos SSE com os resultados das tarefas do vendedor.
+
+    Com `task_ids`, primeiro entrega as que já terminaram (o stream pode abrir
+    depois da conclusão) e encerra quando todas tiverem sido entregues; sem eles,
+    segue até `DURACAO_MAXIMA_STREAM_SEGUNDOS`.
+    """
+    config = get_task_events_config()
+    url = getattr(settings, 'SCRAPER_REDIS_URL', None) or settings.CELERY_BROKER_URL
+    cliente = redis.asyncio.Redis.from_url(url)
+    pubsub = cliente.pubsub()
+    pendentes = set(task_ids or ())
+    try:
+        # Assina antes de ler o estado atual, para não perder um resultado publicado no meio.
+        await pubsub.subscribe(canal_usuario(usuario_id))
+        yield f"retry: {config['HEARTBEAT_SEGUNDOS'] * 1000}\n\n"
+        if pendentes:
+            ids = sorted(pendentes)
+            for bruto in await cliente.mget([chave_tarefa(task_id) for task_id in ids]):
+                registro = json.loads(bruto) if bruto else None
+                if registro and str(registro.get('usuario_id')) == str(usuario_id) and registro['status'] in states.READY_STATES:
+                    pendentes.discard(registro['task_id'])
+                    yield _evento_sse(registro)
+            if not pendentes:
+                return
+
+        fim = time.monotonic() + config['DURACAO_MAXIMA_STREAM_SEGUNDOS']
+        while time.monotonic() < fim:
+            mensagem = await pubsub.get_message(ignore_subscribe_messages=True, timeout=config['HEARTBEAT_SEGUNDOS'])
+            if mensagem is None:
+                yield ": ping\n\n"
+                continue
+            registro = json.loads(mensagem['data'])
+            if task_ids and registro['task_id'] not in pendentes:
+                continue
+            yield _evento_sse(registro)
+            pendentes.discard(registro['task_id'])
+            if task_ids and not pendentes:
+                return
+    except redis.RedisError as e:
+        logging.warning(f"TASK EVENTS: Stream do usuário {usuario_id} interrompido: {e}")
+    finally:
+        try:
+            await pubsub.aclose()
+            await cliente.aclose()
+        except redis.RedisError:
+            pass
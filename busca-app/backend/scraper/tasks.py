@@ -1,7 +1,9 @@
 
-from celery import shared_task
+from celery import shared_task, group, chord, states
+from celery.signals import worker_process_shutdown, task_postrun
 import logging
-import asyncio
+import time
+import redis
 from requests.exceptions import RequestException
 
 try:
@@ -16,10 +18,25 @@ except ImportError:
 # Funções do serviço de scraping original
 from .scraping_service import (
     fast_path_scrape,
+    fast_path_scrape_batch,
     long_path_scrape,
     get_specific_selectors,
+    save_page_data,
+    tocar_paginas,
     save_monitoring_data as sync_save_monitoring_data
 )
+from .fetch_cache import PAGINA_INALTERADA
+from .crawler_service import crawl_urls
+from .result_sink import ResultSink
+from .models import ProdutosMonitoradosExternos, get_url_hash
+from .inflight import ColetaEmAndamento, NAO_DISPONIVEL, get_inflight_config
+from .extraction import converter_preco
+from . import refresh
+from . import historico
+from . import strategy_router
+from . import async_engine
+from . import render_profiles
+from . import task_events
 
 # Novas estratégias que criamos
 from .scraping_strategies import (
@@ -28,14 +45,127 @@ from .scraping_strategies import (
     scrape_with_playwright_stealth
 )
 
+# Pool de navegadores reutilizados entre tarefas do mesmo processo worker
+from .browser_pool import run_in_browser_loop, encerrar_pools
+
 # Define exceções que são recuperáveis e devem acionar uma nova tentativa
 RETRYABLE_EXCEPTIONS = (RequestException, PlaywrightTimeoutError)
 
+
+@worker_process_shutdown.connect
+def fechar_navegadores(**kwargs):
+    """Fecha os navegadores do pool quando o processo worker é encerrado."""
+    encerrar_pools()
+
+def _estrategia_fast_path(url, user_id):
+    # --- FAST-PATH (REQUESTS + LXML) ---
+    return fast_path_scrape(url)
+
+
+def _estrategia_medium_path(url, user_id):
+    # --- MEDIUM-PATH (APIs, RENDERIZAÇÃO LEVE) ---
+    selectors = get_specific_selectors(url)
+    if not selectors:
+        return None
+
+    if selectors.get('api_url'):
+        logging.info("PIPELINE: Tentando estratégia de API Interna.")
+        api_result = scrape_with_internal_api(selectors['api_url'])
+        if api_result and api_result['success']:
+            # A lógica para processar o resultado da API precisa ser implementada
+            pass
+
+    logging.info("PIPELINE: Tentando estratégia com requests-html.")
+    name_selector = selectors['nome'][0] if selectors.get('nome') else None
+    price_selector = selectors['preco'][0] if selectors.get('preco') else None
+
+    if name_selector and price_selector:
+        html_result = scrape_with_requests_html(url, price_selector, name_selector)
+        if html_result and html_result['success']:
+            preco = converter_preco(html_result['data']['price'])
+            if preco is not None:
+                return (html_result['data']['name'], preco)
+    return None
+
+
+def _estrategia_playwright(url, user_id):
+    # --- LONG-PATH (NAVEGADOR COMPLETO) ---
+    selectors = get_specific_selectors(url)
+    if not selectors:
+        return None
+
+    logging.info("PIPELINE: Tentando estratégia com Playwright-Stealth.")
+    name_selector = selectors['nome'][0] if selectors.get('nome') else None
+    price_selector = selectors['preco'][0] if selectors.get('preco') else None
+
+    if name_selector and price_selector:
+        perfil = render_profiles.get_perfil(url)
+        playwright_result = run_in_browser_loop(scrape_with_playwright_stealth(url, price_selector, name_selector, perfil))
+        if playwright_result and playwright_result['success']:
+            preco = converter_preco(playwright_result['data']['price'])
+            if preco is not None:
+                return (playwright_result['data']['name'], preco)
+    return None
+
+
+def _estrategia_selenium(url, user_id):
+    logging.info("PIPELINE: Tentando fallback final com Selenium Scrapy.")
+    return long_path_scrape(url, str(user_id))
+
+
+# Estratégias em ordem crescente de custo; o roteador decide a ordem efetiva por domínio.
+ESTRATEGIAS = {
+    'fast_path': _estrategia_fast_path,
+    'requests_html': _estrategia_medium_path,
+    'playwright_stealth': _estrategia_playwright,
+    'selenium_scrapy': _estrategia_selenium,
+}
+
+
+def executar_estrategias(url: str, user_id, incluir_fast_path: bool = True):
+    """
+    Tenta as estratégias de scraping, começando pela mais barata que costuma
+    funcionar no domínio da URL (ver `strategy_router`).
+    Retorna (scraped_data, strategy_used), com scraped_data = (nome, preco) ou None.
+    """
+    disponiveis = [nome for nome in ESTRATEGIAS if incluir_fast_path or nome != 'fast_path']
+    dominio = strategy_router.dominio_da_url(url)
+    ordem = strategy_router.ordenar_estrategias(dominio, disponiveis)
+
+    for nome in ordem:
+        inicio = time.monotonic()
+        try:
+            scraped_data = ESTRATEGIAS[nome](url, user_id)
+        except Exception:
+            strategy_router.registrar(dominio, nome, False, (time.monotonic() - inicio) * 1000)
+            raise
+        sucesso = bool(scraped_data) and not validar_dados_extraidos(*scraped_data)
+        strategy_router.registrar(dominio, nome, sucesso, (time.monotonic() - inicio) * 1000)
+        if scraped_data:
+            return scraped_data, nome
+        logging.info(f"PIPELINE: Estratégia '{nome}' falhou para a URL: {url}")
+
+    return None, None
+
+
+def validar_dados_extraidos(nome_produto, preco_atual):
+    """Retorna o motivo da falha de validação, ou None se os dados forem válidos."""
+    if not nome_produto or not isinstance(nome_produto, str) or len(nome_produto.strip()) == 0:
+        return 'Nome do produto extraído é inválido.'
+    if not preco_atual or not isinstance(preco_atual, (int, float)) or preco_atual <= 0:
+        return 'Preço extraído é inválido ou zero.'
+    return None
+
+
+SOFT_TIME_LIMIT_PIPELINE = 840
+
+
 @shared_task(
     bind=True,
     autoretry_for=RETRYABLE_EXCEPTIONS,
     retry_kwargs={'max_retries': 3, 'countdown': 60},  # 3 retentativas com 1 min de espera entre elas
-    task_time_limit=900,  # Timeout global de 15 minutos para a tarefa
+    time_limit=900,  # Timeout global de 15 minutos para a tarefa
+    soft_time_limit=SOFT_TIME_LIMIT_PIPELINE,  # SoftTimeLimitExceeded um minuto antes, para a tarefa encerrar sozinha
     acks_late=True # Garante que a tarefa só seja confirmada após o sucesso
 )
 def run_scraping_pipeline(self, url: str, user_id: int):
@@ -46,60 +176,29 @@ def run_scraping_pipeline(self, url: str, user_id: int):
     retry_count = self.request.retries
     max_retries = self.request.retries + 4 # Correção aqui
     logging.info(f"PIPELINE: Iniciando para a URL: {url} (Usuário: {user_id}) - Tentativa {retry_count + 1}/{max_retries}")
+    inicio = time.monotonic()
 
     try:
-        scraped_data = None
+        # Se outra tarefa já está coletando esta mesma URL, reaproveita o resultado dela.
+        coleta = ColetaEmAndamento(get_url_hash(url))
+        scraped_data = NAO_DISPONIVEL
         strategy_used = None
+        if not coleta.adquirir():
+            logging.info(f"PIPELINE: Coleta da URL {url} já em andamento. Aguardando o resultado.")
+            # Espera só até onde ainda sobra tempo para coletar por conta própria.
+            prazo = SOFT_TIME_LIMIT_PIPELINE - (time.monotonic() - inicio) - get_inflight_config()['ORCAMENTO_COLETA_SEGUNDOS']
+            scraped_data = coleta.aguardar(timeout=max(prazo, 0))
+            strategy_used = 'coalescida'
 
-        # --- ESTRATÉGIA 1: FAST-PATH (REQUESTS + BEAUTIFULSOUP) ---
-        scraped_data = fast_path_scrape(url)
-        if scraped_data:
-            strategy_used = 'fast_path'
-
-        # --- ESTRATÉGIA 2: MEDIUM-PATH (APIs, RENDERIZAÇÃO LEVE) ---
-        if not scraped_data:
-            logging.info("PIPELINE: Fast-path falhou. Tentando estratégias de Medium-path.")
-            selectors = get_specific_selectors(url)
-            
-            if selectors and selectors.get('api_url'):
-                logging.info("PIPELINE: Tentando estratégia de API Interna.")
-                api_result = scrape_with_internal_api(selectors['api_url'])
-                if api_result and api_result['success']:
-                    # A lógica para processar o resultado da API precisa ser implementada
-                    pass
-            
-            if not scraped_data and selectors:
-                logging.info("PIPELINE: Tentando estratégia com requests-html.")
-                name_selector = selectors['nome'][0] if selectors.get('nome') else None
-                price_selector = selectors['preco'][0] if selectors.get('preco') else None
-
-                if name_selector and price_selector:
-                    html_result = scrape_with_requests_html(url, price_selector, name_selector)
-                    if html_result and html_result['success']:
-                        scraped_data = (html_result['data']['name'], float(html_result['data']['price'].replace('.', '').replace(',', '.')))
-                        strategy_used = 'requests_html'
-
-        # --- ESTRATÉGIA 3: LONG-PATH (NAVEGADOR COMPLETO) ---
-        if not scraped_data:
-            logging.info("PIPELINE: Medium-path falhou. Tentando estratégias de Long-path.")
-            selectors = get_specific_selectors(url)
-
-            if selectors:
-                logging.info("PIPELINE: Tentando estratégia com Playwright-Stealth.")
-                name_selector = selectors['nome'][0] if selectors.get('nome') else None
-                price_selector = selectors['preco'][0] if selectors.get('preco') else None
-
-                if name_selector and price_selector:
-                    playwright_result = asyncio.run(scrape_with_playwright_stealth(url, price_selector, name_selector))
-                    if playwright_result and playwright_result['success']:
-                        scraped_data = (playwright_result['data']['name'], float(playwright_result['data']['price'].replace('.', '').replace(',', '.')))
-                        strategy_used = 'playwright_stealth'
-
-            if not scraped_data:
-                logging.info("PIPELINE: Playwright falhou. Tentando fallback final com Selenium Scrapy.")
-                scraped_data = long_path_scrape(url, str(user_id))
-                if scraped_data:
-                    strategy_used = 'selenium_scrapy'
+        nova_coleta = scraped_data is NAO_DISPONIVEL
+        if nova_coleta:
+            try:
+                scraped_data, strategy_used = executar_estrategias(url, user_id)
+            except Exception:
+                # Libera a trava sem resultado: quem estiver esperando coleta por conta própria.
+                coleta.liberar()
+                raise
+            coleta.publicar(scraped_data)
 
         # --- FASE FINAL: VALIDAÇÃO E SALVAMENTO ---
         if not scraped_data:
@@ -109,19 +208,16 @@ def run_scraping_pipeline(self, url: str, user_id: int):
         nome_produto, preco_atual = scraped_data
 
         # --- ETAPA DE VALIDAÇÃO DOS DADOS EXTRAÍDOS ---
-        if not nome_produto or not isinstance(nome_produto, str) or len(nome_produto.strip()) == 0:
-            logging.error(f"PIPELINE: FALHA DE VALIDAÇÃO - Nome do produto inválido: '{nome_produto}' para URL: {url}")
-            return {'status': 'FAILURE', 'reason': f'Nome do produto extraído é inválido.'}
-
-        if not preco_atual or not isinstance(preco_atual, (int, float)) or preco_atual <= 0:
-            logging.error(f"PIPELINE: FALHA DE VALIDAÇÃO - Preço do produto inválido: '{preco_atual}' para URL: {url}")
-            return {'status': 'FAILURE', 'reason': f'Preço extraído é inválido ou zero.'}
+        motivo = validar_dados_extraidos(nome_produto, preco_atual)
+        if motivo:
+            logging.error(f"PIPELINE: FALHA DE VALIDAÇÃO - {motivo} Nome: '{nome_produto}', Preço: '{preco_atual}' para URL: {url}")
+            return {'status': 'FAILURE', 'reason': motivo}
 
         nome_produto = nome_produto.strip()
         logging.info(f"PIPELINE: Sucesso via '{strategy_used}'. Produto: '{nome_produto}', Preço: {preco_atual}")
 
         # Usando a função de salvamento síncrona diretamente
-        save_result = sync_save_monitoring_data(url, nome_produto, preco_atual, user_id)
+        save_result = sync_save_monitoring_data(url, nome_produto, preco_atual, user_id, nova_coleta=nova_coleta)
 
         if save_result:
             logging.info(f"PIPELINE: SUCESSO - Dados para a URL {url} salvos com sucesso.")
@@ -136,3 +232,152 @@ def run_scraping_pipeline(self, url: str, user_id: int):
         # ou qualquer outra exceção não esperada que não seja recuperável.
         logging.critical(f"PIPELINE: Erro crítico ou final após {retry_count + 1} tentativas para a URL {url}: {e}", exc_info=True)
         return {'status': 'FAILURE', 'reason': 'Ocorreu um erro grave e não recuperável durante o processo.'}
+
+
+@task_postrun.connect
+def publicar_conclusao_pipeline(sender=None, task_id=None, args=None, kwargs=None, retval=None, state=None, **extras):
+    """Entrega o resultado final aos streams do vendedor (ver `task_events`); retentativas são ignoradas."""
+    # `shared_task` devolve um proxy: compara pelo nome em vez de usar `sender=`.
+    if getattr(sender, 'name', None) != run_scraping_pipeline.name or state not in states.READY_STATES:
+        return
+    usuario_id = args[1] if args and len(args) > 1 else (kwargs or {}).get('user_id')
+    task_events.publicar_resultado(task_id, usuario_id, state, retval)
+
+
+# --- RECOLETA PERIÓDICA (CELERY BEAT) ---
+
+@shared_task
+def agendar_recoleta():
+    """
+    Disparada pelo Celery beat. Seleciona os monitoramentos vencidos e distribui
+    as URLs (deduplicadas) em lotes paralelos. Não inicia um novo ciclo enquanto
+    o anterior não terminar.
+    """
+    config = refresh.get_refresh_config()
+    ciclo_id = refresh.iniciar_ciclo(config['TTL_CICLO_SEGUNDOS'])
+    if ciclo_id is None:
+        logging.info("RECOLETA: Ciclo anterior ainda em andamento. Agendamento ignorado.")
+        return {'status': 'SKIPPED'}
+
+    # URLs ainda no caminho lento (ou em espera após falhar) ficam para depois.
+    itens = refresh.sem_espera(refresh.selecionar_urls_vencidas(config['INTERVALO_HORAS']))
+    if not itens:
+        refresh.finalizar_ciclo(ciclo_id)
+        logging.info("RECOLETA: Nenhuma URL vencida.")
+        return {'status': 'SUCCESS', 'urls': 0, 'lotes': 0}
+
+    lotes = refresh.particionar_em_lotes(itens, config['TAMANHO_LOTE'])
+    chord(group(recoletar_lote.s(lote) for lote in lotes))(concluir_ciclo_recoleta.s(ciclo_id))
+    logging.info(f"RECOLETA: Ciclo {ciclo_id} iniciado com {len(itens)} URLs em {len(lotes)} lotes.")
+    return {'status': 'SUCCESS', 'urls': len(itens), 'lotes': len(lotes)}
+
+
+@shared_task(acks_late=True, time_limit=3600, soft_time_limit=3540)
+def recoletar_lote(itens):
+    """
+    Recoleta um lote de URLs pelo fast path em lote. As URLs que falharem são
+    reenviadas individualmente para as estratégias mais caras.
+    Nunca levanta exceção, para não impedir a conclusão do ciclo (chord).
+    """
+    urls_por_hash = {url: url_hash for url_hash, url in itens}
+    sucesso, falha = 0, 0
+    inalteradas = []
+    lentas = []
+    try:
+        # Os resultados são gravados em lote (ver result_sink), não um a um.
+        with ResultSink() as sink:
+            for url, scraped_data in fast_path_scrape_batch(list(urls_por_hash)):
+                url_hash = urls_por_hash[url]
+                if scraped_data is PAGINA_INALTERADA:
+                    inalteradas.append(url_hash)
+                elif scraped_data and not validar_dados_extraidos(*scraped_data):
+                    sink.adicionar(url, scraped_data[0].strip(), scraped_data[1])
+                    sucesso += 1
+                else:
+                    lentas.append((url_hash, url))
+                    falha += 1
+    except Exception as e:
+        logging.error(f"RECOLETA: Erro inesperado ao processar lote: {e}", exc_info=True)
+    _enviar_ao_caminho_lento(lentas)
+    if inalteradas:
+        # Página igual à da última coleta: confirma o preço em cache, sem novo ponto.
+        tocar_paginas(inalteradas)
+    logging.info(f"RECOLETA: Lote concluído. Sucesso: {sucesso}, inalteradas: {len(inalteradas)}, enviados ao caminho lento: {falha}.")
+    return {'sucesso': sucesso + len(inalteradas), 'inalteradas': len(inalteradas), 'falha': falha}
+
+def _enviar_ao_caminho_lento(itens):
+    """
+    URLs que o fast path não resolveu: uma entrada na fila do worker assíncrono
+    (se habilitado), ou uma tarefa do Celery por URL.
+    """
+    if not itens:
+        return
+    # Fora do chord: sem a espera, o próximo agendamento reenviaria as mesmas URLs.
+    refresh.adiar_caminho_lento([url_hash for url_hash, _ in itens])
+    if refresh.get_refresh_config()['USAR_WORKER_NAVEGADOR']:
+        try:
+            async_engine.enfileirar([{'url': url, 'url_hash': url_hash} for url_hash, url in itens])
+            return
+        except redis.RedisError as e:
+            logging.warning(f"RECOLETA: Fila do worker indisponível ({e}); usando tarefas do Celery.")
+    for url_hash, url in itens:
+        recoletar_url_lento.delay(url_hash, url)
+
+
+@shared_task(acks_late=True, time_limit=900, soft_time_limit=840)
+def recoletar_url_lento(url_hash, url):
+    """Recoleta uma URL que falhou no fast path, usando as estratégias com navegador."""
+    monitoramento = ProdutosMonitoradosExternos.objects.filter(url_hash=url_hash).first()
+    if monitoramento is None:
+        return {'status': 'FAILURE', 'reason': 'Nenhum monitoramento para a URL.'}
+    try:
+        scraped_data, strategy_used = executar_estrategias(url, monitoramento.vendedor_id, incluir_fast_path=False)
+    except Exception as e:
+        logging.error(f"RECOLETA: Erro no caminho lento para a URL {url}: {e}", exc_info=True)
+        return {'status': 'FAILURE', 'reason': str(e)}
+    if not scraped_data or validar_dados_extraidos(*scraped_data):
+        logging.warning(f"RECOLETA: Caminho lento falhou para a URL: {url}")
+        return {'status': 'FAILURE'}
+    _, atualizados = save_page_data(url, scraped_data[0].strip(), scraped_data[1])
+    refresh.liberar_caminho_lento([url_hash])
+    return {'status': 'SUCCESS', 'strategy': strategy_used, 'monitoramentos': atualizados}
+
+
+@shared_task(acks_late=True, time_limit=900, soft_time_limit=840)
+def coletar_lote_navegador(urls, usuario_id):
+    """
+    Coleta um lote de URLs com o SeleniumSpider no serviço de crawler do worker
+    (um reactor, um Xvfb e drivers quentes por processo). Roteada para a fila
+    `navegador` (ver CELERY_TASK_ROUTES), consumida por um worker dedicado.
+    """
+    resultados = crawl_urls(urls, usuario_id)
+    sucesso = 0
+    with ResultSink() as sink:
+        for url, scraped_data in resultados.items():
+            if scraped_data and not validar_dados_extraidos(*scraped_data):
+                sink.adicionar(url, scraped_data[0].strip(), scraped_data[1])
+                sucesso += 1
+    logging.info(f"NAVEGADOR: Lote de {len(urls)} URLs concluído. Sucesso: {sucesso}.")
+    return {'sucesso': sucesso, 'falha': len(urls) - sucesso}
+
+
+@shared_task
+def concluir_ciclo_recoleta(resultados, ciclo_id):
+    """Callback do chord: libera a trava para que o próximo ciclo possa começar."""
+    refresh.finalizar_ciclo(ciclo_id)
+    sucesso = sum(r.get('sucesso', 0) for r in resultados if r)
+    falha = sum(r.get('falha', 0) for r in resultados if r)
+    logging.info(f"RECOLETA: Ciclo {ciclo_id} concluído. Sucesso: {sucesso}, caminho lento: {falha}.")
+    return {'sucesso': sucesso, 'falha': falha}
+
+
+@shared_task(acks_late=True, time_limit=3600, soft_time_limit=3540)
+def compactar_historico():
+    """
+    Tarefa diária: resume o histórico antigo por dia, mantém as partições
+    mensais e avança as janelas dos resumos de preço.
+    """
+    resultado = historico.compactar()
+    resultado.update(historico.manter_particoes())
+    resultado['resumos'] = historico.atualizar_todos_resumos()
+    return resultado
@@ -0,0 +1,131 @@
+from django.test import SimpleTestCase
+from unittest.mock import Mock, patch
+import asyncio
+import redis
+from .browser_pool import AsyncBrowserPool
+from .tasks import _enviar_ao_caminho_lento
+from . import async_engine
+from .testing import FakeRedis
+
+
+class FakePaginaPlaywright:
+    def __init__(self, contexto):
+        self.contexto = contexto
+
+    async def goto(self, url, **kwargs):
+        # Simula as requisições da página passando pelo filtro do contexto.
+        for tipo, url_recurso in (('document', url), ('image', url + '.jpg'), ('script', 'https://www.google-analytics.com/ga.js')):
+            await self.contexto.filtro(FakeRoutePlaywright(self.contexto.navegador, tipo, url_recurso))
+        self.contexto.navegador.abertas += 1
+        FakeNavegadorAsync.abertas_total += 1
+        FakeNavegadorAsync.pico = max(FakeNavegadorAsync.pico, FakeNavegadorAsync.abertas_total)
+        try:
+            await asyncio.sleep(0.01)
+            if 'erro' in url:
+                raise TimeoutError('timeout')
+        finally:
+            self.contexto.navegador.abertas -= 1
+            FakeNavegadorAsync.abertas_total -= 1
+
+    async def content(self):
+        return """<html><head><script type="application/ld+json">
+            {"@type": "Product", "name": "Produto", "offers": {"price": "10.00"}}
+        </script></head></html>"""
+
+
+class FakeRoutePlaywright:
+    def __init__(self, navegador, tipo, url):
+        self.navegador = navegador
+        self.request = Mock(resource_type=tipo, url=url)
+
+    async def abort(self):
+        self.navegador.bloqueadas.append(self.request.url)
+
+    async def continue_(self):
+        pass
+
+
+class FakeContextoPlaywright:
+    def __init__(self, navegador):
+        self.navegador = navegador
+
+    async def route(self, padrao, handler):
+        self.filtro = handler
+
+    async def new_page(self):
+        return FakePaginaPlaywright(self)
+
+    async def close(self):
+        self.navegador.contextos_fechados += 1
+
+
+class FakeNavegadorAsync:
+    abertas_total = 0
+    pico = 0
+
+    def __init__(self):
+        self.abertas = 0
+        self.contextos_fechados = 0
+        self.bloqueadas = []
+
+    async def new_context(self, **opcoes):
+        self.opcoes_contexto = opcoes
+        return FakeContextoPlaywright(self)
+
+
+class AsyncEngineTests(SimpleTestCase):
+    def setUp(self):
+        FakeNavegadorAsync.abertas_total = FakeNavegadorAsync.pico = 0
+        self.navegadores = []
+
+        async def criar():
+            navegador = FakeNavegadorAsync()
+            self.navegadores.append(navegador)
+            return navegador
+
+        async def destruir(navegador):
+            pass
+
+        self.pool = AsyncBrowserPool('teste', criar, destruir, tamanho_max=2, max_paginas=100)
+        registro = Mock()
+        registro.resolver.return_value = (None, None)
+        registro.resolver_perfil.return_value = None
+        patcher = patch('scraper.async_engine.get_registro', return_value=registro)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch.dict('django.conf.settings.SCRAPER_ASYNC_ENGINE', {'PAGINAS_POR_NAVEGADOR': 5})
+    def test_many_pages_share_few_browsers(self):
+        urls = [f'https://loja.com/p/{i}' for i in range(20)] + ['https://loja.com/erro']
+
+        resultados = asyncio.run(async_engine.scrape_many(urls, paginas_simultaneas=8, pool=self.pool))
+
+        self.assertEqual(resultados['https://loja.com/p/0'], ('Produto', 10.0))
+        self.assertIsNone(resultados['https://loja.com/erro'])
+        self.assertEqual(sum(1 for r in resultados.values() if r), 20)
+        self.assertEqual(len(self.navegadores), 2)
+        self.assertEqual(FakeNavegadorAsync.pico, 8)
+        self.assertEqual(sum(n.contextos_fechados for n in self.navegadores), 21)
+        # Os navegadores voltam ao pool com as páginas contadas para a reciclagem.
+        self.assertEqual(sorted(r.usos for r in self.pool.ociosos), [11, 11])
+        # Perfil padrão: imagens e analytics bloqueados, o documento não.
+        bloqueadas = sum((n.bloqueadas for n in self.navegadores), [])
+        self.assertIn('https://loja.com/p/0.jpg', bloqueadas)
+        self.assertIn('https://www.google-analytics.com/ga.js', bloqueadas)
+        self.assertNotIn('https://loja.com/p/0', bloqueadas)
+
+    @patch('scraper.refresh.get_redis', return_value=FakeRedis())
+    @patch('scraper.tasks.recoletar_url_lento')
+    @patch('scraper.tasks.async_engine.enfileirar')
+    def test_slow_path_goes_to_worker_queue_when_enabled(self, mock_enfileirar, mock_lento, mock_redis):
+        itens = [('hash1', 'https://loja.com/p/1')]
+
+        with patch.dict('django.conf.settings.SCRAPER_REFRESH', {'USAR_WORKER_NAVEGADOR': True}):
+            _enviar_ao_caminho_lento(itens)
+        mock_enfileirar.assert_called_once_with([{'url': 'https://loja.com/p/1', 'url_hash': 'hash1'}])
+        mock_lento.delay.assert_not_called()
+
+        mock_enfileirar.side_effect = redis.ConnectionError('fora do ar')
+        with patch.dict('django.conf.settings.SCRAPER_REFRESH', {'USAR_WORKER_NAVEGADOR': True}):
+            _enviar_ao_caminho_lento(itens)
+        mock_lento.delay.assert_called_once_with('hash1', 'https://loja.com/p/1')
@@ -0,0 +1,73 @@
+from django.test import SimpleTestCase
+from unittest.mock import patch
+from .browser_pool import BrowserPool, PoolEsgotadoError
+
+
+class FakeNavegador:
+    def __init__(self, numero):
+        self.numero = numero
+        self.fechado = False
+        self.saudavel = True
+
+
+class BrowserPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.criados = []
+
+        def criar():
+            navegador = FakeNavegador(len(self.criados) + 1)
+            self.criados.append(navegador)
+            return navegador
+
+        def destruir(navegador):
+            navegador.fechado = True
+
+        self.pool = BrowserPool(
+            'teste', criar=criar, destruir=destruir,
+            verificar=lambda navegador: navegador.saudavel,
+            tamanho_max=1, max_paginas=3, max_rss_mb=0
+        )
+
+    def test_reuses_warm_browser(self):
+        with self.pool.checkout() as primeiro:
+            pass
+        with self.pool.checkout() as segundo:
+            pass
+        self.assertIs(primeiro, segundo)
+        self.assertEqual(len(self.criados), 1)
+
+    def test_recycles_after_max_pages(self):
+        for _ in range(3):
+            with self.pool.checkout():
+                pass
+        self.assertTrue(self.criados[0].fechado)
+        with self.pool.checkout() as navegador:
+            self.assertEqual(navegador.numero, 2)
+
+    def test_unhealthy_browser_is_replaced(self):
+        with self.pool.checkout() as navegador:
+            pass
+        navegador.saudavel = False
+        with self.pool.checkout() as novo:
+            self.assertIsNot(novo, navegador)
+        self.assertTrue(navegador.fechado)
+
+    def test_exception_discards_browser(self):
+        with self.assertRaises(ValueError):
+            with self.pool.checkout():
+                raise ValueError('falha')
+        self.assertTrue(self.criados[0].fechado)
+        self.assertEqual(self.pool.estatisticas()['ociosos'], 0)
+
+    def test_checkout_is_bounded(self):
+        with self.pool.checkout():
+            with self.assertRaises(PoolEsgotadoError):
+                with self.pool.checkout(timeout=0.01):
+                    pass
+
+    @patch('scraper.browser_pool.rss_worker_mb', return_value=4096)
+    def test_recycles_on_memory_threshold(self, mock_rss):
+        self.pool.max_rss_mb = 1024
+        with self.pool.checkout():
+            pass
+        self.assertTrue(self.criados[0].fechado)
@@ -0,0 +1,27 @@
+from django.test import SimpleTestCase
+from unittest.mock import patch
+import scrapy
+from .crawler_service import crawl_urls
+
+
+class SpiderFalso(scrapy.Spider):
+    name = 'spider_falso'
+
+    async def start(self):
+        for url in self.urls:
+            yield scrapy.Request('data:,', callback=self.parse, cb_kwargs={'url': url}, dont_filter=True)
+
+    def parse(self, response, url):
+        if 'sem-item' not in url:
+            yield {'url_produto': url, 'nome_produto': 'Produto', 'preco_atual': '19.9'}
+
+
+class CrawlerServiceTests(SimpleTestCase):
+    @patch.dict('os.environ', {'DISPLAY': ':0'})
+    @patch('cacapreco_scraper.cacapreco_scraper.spiders.selenium_spider.SeleniumSpider', SpiderFalso)
+    def test_reuses_reactor_and_returns_items_per_url(self):
+        primeiro = crawl_urls(['https://loja.com/p/1', 'https://loja.com/sem-item'], usuario_id=1, timeout=30)
+        segundo = crawl_urls(['https://loja.com/p/2'], usuario_id=1, timeout=30)
+
+        self.assertEqual(primeiro, {'https://loja.com/p/1': ('Produto', 19.9), 'https://loja.com/sem-item': None})
+        self.assertEqual(segundo, {'https://loja.com/p/2': ('Produto', 19.9)})
@@ -0,0 +1,88 @@
+from django.test import SimpleTestCase
+from unittest.mock import Mock, patch
+from .extraction import extract, converter_preco
+from .jsonld import ScannerJsonLd
+from .scraping_service import fast_path_scrape
+from .testing import FakeRedis, FakeResponse, PAGINA_JSON_LD
+
+
+class ExtracaoTests(SimpleTestCase):
+    def test_json_ld_price_uses_decimal_point(self):
+        html = """<html><head><script type="application/ld+json">
+            {"@graph": [{"@type": "WebPage"}, {"@type": "Product", "name": "TV 50", "offers": {"price": "1849.90"}}]}
+        </script></head><body><h1>Outro</h1></body></html>"""
+
+        resultado = extract(html, 'https://loja.com/p/1', selectors={'nome': ['h1'], 'preco': []})
+
+        self.assertEqual((resultado['nome'], resultado['preco'], resultado['fonte']), ('TV 50', 1849.9, 'json_ld'))
+
+    def test_price_format_follows_the_cents_separator(self):
+        casos = [
+            ('1.849,90', '.', 1849.9), ('1849,9', '.', 1849.9), ('1,849.90', '.', 1849.9), ('1,849', '.', 1849.0),
+            ('R$ 1.849,90', ',', 1849.9), ('1849.90', ',', 1849.9), ('1.849', ',', 1849.0), ('1.234.567', ',', 1234567.0),
+        ]
+        for texto, separador, esperado in casos:
+            self.assertEqual(converter_preco(texto, separador_decimal=separador), esperado, (texto, separador))
+
+    @patch('scraper.tasks.run_in_browser_loop', side_effect=lambda resultado: resultado)
+    @patch('scraper.tasks.render_profiles.get_perfil')
+    @patch('scraper.tasks.scrape_with_playwright_stealth', new_callable=Mock)
+    @patch('scraper.tasks.scrape_with_requests_html')
+    @patch('scraper.tasks.get_specific_selectors', return_value={'nome': ['h1'], 'preco': ['span.price']})
+    def test_rendered_strategies_parse_prices_with_converter_preco(self, mock_seletores, mock_html, mock_playwright, *mocks):
+        from .tasks import _estrategia_medium_path, _estrategia_playwright
+
+        for texto, esperado in [('R$ 1.849,90', ('TV', 1849.9)), ('1849.90', ('TV', 1849.9)), ('Indisponível', None)]:
+            mock_html.return_value = mock_playwright.return_value = {'success': True, 'data': {'name': 'TV', 'price': texto}}
+            self.assertEqual(_estrategia_medium_path('https://loja.com/p/1', 1), esperado, texto)
+            self.assertEqual(_estrategia_playwright('https://loja.com/p/1', 1), esperado, texto)
+
+    def test_unparseable_json_ld_price_falls_back_to_selectors(self):
+        html = """<html><head><script type="application/ld+json">
+            {"@type": "Product", "name": "TV 50", "offers": {"price": "Consulte"}}
+        </script></head><body><span class="price">R$ 1.849,90</span></body></html>"""
+
+        resultado = extract(html, 'https://loja.com/p/1', selectors={'nome': [], 'preco': ['span.price']})
+
+        self.assertEqual((resultado['nome'], resultado['preco'], resultado['preco_texto']), ('TV 50', 1849.9, 'R$ 1.849,90'))
+
+    def test_selectors_follow_priority_order(self):
+        html = """<html><body>
+            <span class="price">R$ 10,00</span>
+            <h1 class="titulo"> Notebook  X </h1>
+            <span class="a-price-whole">1.299,</span><span class="a-price-fraction">90</span>
+        </body></html>"""
+
+        resultado = extract(html, 'https://loja.com/p/1', selectors={
+            'nome': ['h2.inexistente', 'h1.titulo'],
+            'preco': ['span.a-price-whole', 'span.price'],
+        })
+
+        self.assertEqual(resultado['nome'], 'Notebook X')
+        self.assertEqual(resultado['preco'], 1299.9)
+
+
+class JsonLdScannerTests(SimpleTestCase):
+    PAGINA = PAGINA_JSON_LD
+
+    def test_finds_product_after_other_blocks_across_chunks(self):
+        for tamanho in (1, 7, 64, len(self.PAGINA)):
+            scanner = ScannerJsonLd()
+            for i in range(0, len(self.PAGINA), tamanho):
+                if scanner.feed(self.PAGINA[i:i + tamanho]):
+                    break
+            self.assertEqual((scanner.nome, scanner.preco), ('Fone áudio', 199.9), tamanho)
+            self.assertEqual(scanner.blocos, 2)
+
+    @patch('scraper.fetch_cache.get_redis', return_value=FakeRedis())
+    @patch('scraper.scraping_service.get_http_session')
+    def test_fast_path_stops_reading_once_json_ld_is_found(self, mock_session, mock_redis):
+        pedacos = [self.PAGINA[i:i + 256] for i in range(0, len(self.PAGINA), 256)]
+        resposta = FakeResponse(pedacos)
+        mock_session.return_value.get.return_value = resposta
+
+        with patch('scraper.extraction.parsear_html') as mock_parse:
+            self.assertEqual(fast_path_scrape('https://loja.com/p/1'), ('Fone áudio', 199.9))
+
+        mock_parse.assert_not_called()
+        self.assertLess(resposta.lidos, len(pedacos))
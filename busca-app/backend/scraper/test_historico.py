@@ -0,0 +1,57 @@
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
+from .models import HistoricoPrecos, HistoricoPrecosDiario, ResumoPrecos, PaginaProduto
+from . import historico
+from .testing import MonitoramentoBaseTestCase
+
+
+class HistoricoTests(MonitoramentoBaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.pagina = PaginaProduto.objects.create(url_hash='a' * 64, url_produto='https://loja.com/p/1')
+
+    def ponto(self, preco, dias_atras):
+        quando = timezone.now() - timedelta(days=dias_atras)
+        ponto = HistoricoPrecos.objects.create(pagina=self.pagina, preco=preco)
+        HistoricoPrecos.objects.filter(pk=ponto.pk).update(data_coleta=quando, confirmado_em=quando)
+        return ponto
+
+    def test_repeated_price_only_confirms_last_change_point(self):
+        historico.registrar_coletas([(self.pagina.pk, 10.0)])
+        criados, confirmados = historico.registrar_coletas([(self.pagina.pk, 10.0), (self.pagina.pk, '10.00')])
+        self.assertEqual((criados, confirmados), (0, 1))
+
+        historico.registrar_coletas([(self.pagina.pk, 12.5), (self.pagina.pk, 10.0)])
+
+        self.assertEqual([p['preco'] for p in historico.serie(self.pagina.pk)], [Decimal('10.00'), Decimal('12.50'), Decimal('10.00')])
+
+    def test_compaction_summarizes_old_days_and_keeps_current_price(self):
+        self.ponto(20.0, dias_atras=200)
+        self.ponto(18.0, dias_atras=200)
+        self.ponto(25.0, dias_atras=150)
+        recente = self.ponto(22.0, dias_atras=5)
+
+        resultado = historico.compactar(dias_detalhe=90)
+
+        self.assertEqual(resultado, {'dias': 2, 'removidos': 3})
+        self.assertEqual(list(HistoricoPrecos.objects.values_list('pk', flat=True)), [recente.pk])
+        dia_antigo = HistoricoPrecosDiario.objects.order_by('dia').first()
+        self.assertEqual((dia_antigo.preco_min, dia_antigo.preco_max, dia_antigo.preco_fechamento),
+                         (Decimal('18.00'), Decimal('20.00'), Decimal('18.00')))
+        self.assertEqual([p['preco'] for p in historico.serie(self.pagina.pk)], [Decimal('22.00'), Decimal('25.00'), Decimal('18.00')])
+
+
+    def test_rollup_is_maintained_on_every_history_write(self):
+        self.ponto(100.0, dias_atras=40)
+        self.ponto(80.0, dias_atras=10)
+
+        historico.registrar_coletas([(self.pagina.pk, 90.0)])
+
+        resumo = ResumoPrecos.objects.get(pagina=self.pagina)
+        self.assertEqual((resumo.preco_ultimo, resumo.preco_anterior), (Decimal('90.00'), Decimal('80.00')))
+        self.assertEqual(resumo.variacao_percentual, Decimal('12.50'))
+        self.assertEqual((resumo.min_7d, resumo.max_7d), (Decimal('80.00'), Decimal('90.00')))
+        self.assertEqual((resumo.min_90d, resumo.max_90d), (Decimal('80.00'), Decimal('100.00')))
+        # 30 dias: 20 a 100,00 e 10 a 80,00 (o 90,00 acabou de começar).
+        self.assertEqual(resumo.media_30d, Decimal('93.33'))
@@ -0,0 +1,56 @@
+from django.test import SimpleTestCase
+from unittest.mock import patch
+from .inflight import ColetaEmAndamento, NAO_DISPONIVEL
+from .testing import FakeRedis
+
+
+@patch('scraper.inflight.get_redis')
+class ColetaEmAndamentoTests(SimpleTestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+
+    def test_waiters_wake_on_publish_and_pass_the_signal_on(self, mock_redis):
+        mock_redis.return_value = self.redis
+        dona, espera = ColetaEmAndamento('abc'), ColetaEmAndamento('abc')
+        self.assertTrue(dona.adquirir())
+        self.assertFalse(espera.adquirir())
+        timeouts = []
+        blpop = self.redis.blpop
+
+        def publica_durante_a_espera(chaves, timeout=0):
+            timeouts.append(timeout)
+            dona.publicar(('Produto', 10.0))
+            return blpop(chaves, timeout)
+
+        with patch.object(self.redis, 'blpop', side_effect=publica_durante_a_espera):
+            self.assertEqual(espera.aguardar(timeout=120), ('Produto', 10.0))
+
+        self.assertEqual(timeouts, [15])
+        # O aviso volta para a lista: a próxima tarefa esperando também acorda.
+        self.assertEqual(self.redis.valores[espera.chave_aviso], [1])
+        self.assertEqual(ColetaEmAndamento('abc').aguardar(timeout=120), ('Produto', 10.0))
+
+    def test_gives_up_when_owner_releases_or_time_runs_out(self, mock_redis):
+        mock_redis.return_value = self.redis
+        dona, espera = ColetaEmAndamento('abc'), ColetaEmAndamento('abc')
+        dona.adquirir()
+
+        self.assertIs(espera.aguardar(timeout=0), NAO_DISPONIVEL)
+        dona.liberar()
+        self.assertIs(espera.aguardar(timeout=120), NAO_DISPONIVEL)
+        self.assertEqual(self.redis.valores[espera.chave_aviso], [1])
+
+    def test_stale_owner_does_not_release_a_lock_taken_over_by_another_task(self, mock_redis):
+        mock_redis.return_value = self.redis
+        antiga = ColetaEmAndamento('abc')
+        antiga.adquirir()
+        self.redis.delete(antiga.chave_trava)  # a trava expirou
+        nova = ColetaEmAndamento('abc')
+        self.assertTrue(nova.adquirir())
+
+        antiga.liberar()
+        antiga.publicar(('Produto', 10.0))
+
+        self.assertEqual(self.redis.get(nova.chave_trava), nova.token.encode())
+        nova.publicar(('Produto', 11.0))
+        self.assertIsNone(self.redis.get(nova.chave_trava))
@@ -0,0 +1,52 @@
+from django.test import SimpleTestCase
+from unittest.mock import patch
+import asyncio
+
+
+class MonitoramentoSpiderTests(SimpleTestCase):
+    def setUp(self):
+        from scrapy.utils.test import get_crawler
+        from cacapreco_scraper.cacapreco_scraper.spiders.monitoramento_spider import MonitoramentoSpider
+
+        self.crawler = get_crawler(MonitoramentoSpider)
+        self.spider = MonitoramentoSpider.from_crawler(self.crawler)
+
+    def test_uses_autothrottle_and_batched_pipeline(self):
+        self.assertTrue(self.crawler.settings.getbool('AUTOTHROTTLE_ENABLED'))
+        self.assertEqual(self.crawler.settings.getint('CONCURRENT_REQUESTS_PER_DOMAIN'), 8)
+        self.assertEqual(len(self.crawler.settings.getdict('ITEM_PIPELINES')), 1)
+
+    def test_parse_applies_domain_selectors_and_keeps_monitored_url(self):
+        from scrapy.http import HtmlResponse
+
+        html = b'<html><body><h1>Outro</h1><h2 class="nome">Notebook</h2><b class="valor">R$ 1.299,90</b></body></html>'
+        # Redirecionada: o item continua com a URL monitorada.
+        resposta = HtmlResponse(url='https://loja.com/p/1?ref=x', body=html, encoding='utf-8')
+        seletores = {'nome': ('h2.nome',), 'preco': ('b.valor',)}
+
+        itens = list(self.spider.parse(resposta, url_original='https://loja.com/p/1', seletores=seletores))
+        vazios = list(self.spider.parse(resposta, url_original='https://loja.com/p/2', seletores={'nome': (), 'preco': ()}))
+
+        self.assertEqual(itens, [{'url_produto': 'https://loja.com/p/1', 'nome_produto': 'Notebook', 'preco_atual': 1299.9}])
+        self.assertEqual(vazios, [])
+        self.assertEqual(self.crawler.stats.get_value('monitoramento/sem_dados'), 1)
+
+    @patch('scraper.refresh.finalizar_ciclo')
+    @patch('scraper.refresh.pagina_de_urls_vencidas', return_value=[('a' * 64, 'https://loja.com/p/1')])
+    @patch('scraper.refresh.iniciar_ciclo')
+    def test_shares_the_recollection_cycle_lock(self, mock_iniciar, mock_pagina, mock_finalizar):
+        from cacapreco_scraper.cacapreco_scraper.spiders import monitoramento_spider
+
+        async def agendar():
+            return [requisicao async for requisicao in self.spider.start()]
+
+        with patch.object(monitoramento_spider, 'candidatos_padrao', return_value={'nome': (), 'preco': ()}):
+            mock_iniciar.return_value = None
+            self.assertEqual(asyncio.run(agendar()), [])
+            mock_pagina.assert_not_called()
+
+            mock_iniciar.return_value = 'ciclo1'
+            self.assertEqual([r.url for r in asyncio.run(agendar())], ['https://loja.com/p/1'])
+
+        self.spider.closed('finished')
+        mock_finalizar.assert_called_once_with('ciclo1')
@@ -0,0 +1,77 @@
+from django.utils import timezone
+from datetime import timedelta
+from unittest.mock import patch
+from .tasks import recoletar_lote, recoletar_url_lento, agendar_recoleta, run_scraping_pipeline, _enviar_ao_caminho_lento
+from . import refresh
+from .testing import FakeRedis, MonitoramentoBaseTestCase
+
+
+class RecoletaTests(MonitoramentoBaseTestCase):
+    def test_selects_stale_urls_once_per_hash(self):
+        self.criar_monitoramento(self.vendedores[0], 'https://loja.com/p/1', horas_atras=10)
+        self.criar_monitoramento(self.vendedores[1], 'https://loja.com/p/1', horas_atras=10)
+        self.criar_monitoramento(self.vendedores[0], 'https://loja.com/p/2', horas_atras=1)
+
+        itens = refresh.selecionar_urls_vencidas(intervalo_horas=6)
+
+        self.assertEqual([url for _, url in itens], ['https://loja.com/p/1'])
+
+    def test_partitions_by_domain_and_size(self):
+        itens = [(f'{i:064x}', f'https://a.com/{i}') for i in range(5)]
+        itens += [(f'{i:064x}', f'https://b.com/{i}') for i in range(2)]
+
+        lotes = refresh.particionar_em_lotes(itens, tamanho_lote=3)
+
+        self.assertTrue(all(len(lote) <= 3 for lote in lotes))
+        self.assertEqual(sorted(sum(lotes, [])), sorted(itens))
+
+    def test_pages_stale_urls_by_hash_key(self):
+        for i in range(5):
+            self.criar_monitoramento(self.vendedores[i % 2], f'https://loja.com/p/{i}', horas_atras=10)
+        limite = timezone.now() - timedelta(hours=6)
+
+        primeira = refresh.pagina_de_urls_vencidas(limite, tamanho=3)
+        segunda = refresh.pagina_de_urls_vencidas(limite, apos_hash=primeira[-1][0], tamanho=3)
+
+        self.assertEqual((len(primeira), len(segunda)), (3, 2))
+        self.assertEqual(primeira + segunda, refresh.selecionar_urls_vencidas(intervalo_horas=6))
+
+    @patch('scraper.tasks.chord')
+    @patch('scraper.refresh.iniciar_ciclo', return_value=None)
+    def test_skips_cycle_while_previous_is_running(self, mock_iniciar, mock_chord):
+        self.criar_monitoramento(self.vendedores[0], 'https://loja.com/p/1', horas_atras=10)
+
+        resultado = agendar_recoleta()
+
+        self.assertEqual(resultado['status'], 'SKIPPED')
+        mock_chord.assert_not_called()
+
+    @patch('scraper.tasks.recoletar_url_lento')
+    @patch('scraper.refresh.get_redis')
+    def test_slow_path_backs_off_until_a_successful_collection(self, mock_redis, mock_lento):
+        mock_redis.return_value = FakeRedis()
+        itens = [('hash1', 'https://loja.com/p/1'), ('hash2', 'https://loja.com/p/2')]
+
+        _enviar_ao_caminho_lento(itens[:1])
+        _enviar_ao_caminho_lento(itens[:1])
+
+        self.assertEqual(refresh.sem_espera(itens), itens[1:])
+        self.assertEqual(mock_redis.return_value.get(f'{refresh.PREFIXO_TENTATIVAS}hash1'), 2)
+        refresh.liberar_caminho_lento(['hash1'])
+        self.assertEqual(refresh.sem_espera(itens), itens)
+
+    @patch('scraper.refresh.get_redis')
+    def test_finishing_an_expired_cycle_keeps_the_newer_cycle_lock(self, mock_redis):
+        mock_redis.return_value = FakeRedis()
+        antigo = refresh.iniciar_ciclo(ttl=60)
+        mock_redis.return_value.delete(refresh.CHAVE_CICLO)  # a trava expirou
+        novo = refresh.iniciar_ciclo(ttl=60)
+
+        self.assertFalse(refresh.finalizar_ciclo(antigo))
+        self.assertEqual(mock_redis.return_value.get(refresh.CHAVE_CICLO), novo.encode())
+        self.assertTrue(refresh.finalizar_ciclo(novo))
+        self.assertIsNone(mock_redis.return_value.get(refresh.CHAVE_CICLO))
+
+    def test_tasks_declare_celery_time_limits(self):
+        for tarefa in (run_scraping_pipeline, recoletar_lote, recoletar_url_lento):
+            self.assertLess(tarefa.soft_time_limit, tarefa.time_limit)
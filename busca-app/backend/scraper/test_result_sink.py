@@ -0,0 +1,53 @@
+from decimal import Decimal
+from unittest.mock import patch
+from .models import ProdutosMonitoradosExternos, HistoricoPrecos
+from .result_sink import ResultSink
+from .testing import MonitoramentoBaseTestCase
+
+
+class ResultSinkTests(MonitoramentoBaseTestCase):
+    def test_flush_upserts_pages_monitors_and_history_in_bulk(self):
+        existente = self.criar_monitoramento(self.vendedores[0], 'https://loja.com/p/1', horas_atras=10)
+        sink = ResultSink(tamanho_lote=10, intervalo_segundos=60)
+
+        sink.adicionar('https://loja.com/p/1?utm_source=x', 'Produto 1', 10.5)
+        sink.adicionar('https://loja.com/p/2', 'Produto 2', 20.0, usuario_id=self.vendedores[1].pk)
+        sink.adicionar('https://loja.com/p/3', 'Produto 3', 30.0, usuario_id=999999)
+        self.assertEqual(HistoricoPrecos.objects.count(), 0)
+
+        with self.assertNumQueries(13):  # inclui SAVEPOINT/RELEASE e os ids a reindexar na busca
+            estatisticas = sink.flush()
+
+        self.assertEqual(estatisticas['paginas'], 3)
+        self.assertEqual(estatisticas['monitoramentos'], 2)
+        self.assertIn('latencia_ms', estatisticas)
+        self.assertEqual(HistoricoPrecos.objects.count(), 3)
+        existente.refresh_from_db()
+        self.assertEqual(existente.preco_atual, Decimal('10.50'))
+        self.assertEqual(existente.historico_precos().count(), 1)
+        novo = ProdutosMonitoradosExternos.objects.get(vendedor=self.vendedores[1])
+        self.assertEqual((novo.nome_produto, novo.pagina.url_produto), ('Produto 2', 'https://loja.com/p/2'))
+
+    def test_flush_vencido_writes_buffer_after_interval(self):
+        sink = ResultSink(tamanho_lote=10, intervalo_segundos=5)
+
+        with patch('scraper.result_sink.time.monotonic', return_value=100.0):
+            sink.adicionar('https://loja.com/p/1', 'Produto', 1.0)
+            self.assertIsNone(sink.flush_vencido())
+        with patch('scraper.result_sink.time.monotonic', return_value=105.0):
+            self.assertEqual(sink.flush_vencido()['resultados'], 1)
+
+        self.assertEqual(len(sink), 0)
+        self.assertIsNone(sink.flush_vencido())
+
+    def test_flushes_when_batch_is_full_and_caches_vendors(self):
+        sink = ResultSink(tamanho_lote=2, intervalo_segundos=60)
+
+        self.assertIsNone(sink.adicionar('https://loja.com/p/1', 'Produto', 1.0, usuario_id=self.vendedores[0].pk))
+        self.assertEqual(sink.adicionar('https://loja.com/p/2', 'Produto', 2.0, usuario_id=self.vendedores[0].pk)['resultados'], 2)
+        sink.adicionar('https://loja.com/p/3', 'Produto', 3.0, usuario_id=self.vendedores[0].pk)
+        # Vendedor já conhecido: o segundo flush não consulta a tabela de vendedores.
+        with self.assertNumQueries(12):
+            sink.flush()
+
+        self.assertEqual(ProdutosMonitoradosExternos.objects.filter(vendedor=self.vendedores[0]).count(), 3)
@@ -0,0 +1,120 @@
+from django.test import SimpleTestCase
+from django.utils import timezone
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+import requests
+from .models import ProdutosMonitoradosExternos, HistoricoPrecos, ResumoPrecos, PaginaProduto
+from .scraping_service import fast_path_scrape_batch, intercalar_por_dominio, save_page_data
+from .fetch_cache import PAGINA_INALTERADA
+from .tasks import recoletar_lote, run_scraping_pipeline
+from .testing import FakeRedis, FakeResponse, PAGINA_JSON_LD, MonitoramentoBaseTestCase
+
+
+class FastPathBatchTests(SimpleTestCase):
+    def test_interleaves_urls_by_domain(self):
+        urls = ['https://a.com/1', 'https://a.com/2', 'https://a.com/3', 'https://b.com/1']
+        self.assertEqual(
+            intercalar_por_dominio(urls),
+            ['https://a.com/1', 'https://b.com/1', 'https://a.com/2', 'https://a.com/3']
+        )
+
+    @patch('scraper.scraping_service.get_fast_path_config', return_value={
+        'CONCURRENT_REQUESTS': 4, 'CONCURRENT_REQUESTS_PER_DOMAIN': 2, 'DOWNLOAD_DELAY': 0, 'TIMEOUT': 5, 'CHUNK_BYTES': 1024,
+    })
+    @patch('scraper.fetch_cache.get_redis', return_value=FakeRedis())
+    @patch('scraper.scraping_service.extract_product_data', side_effect=lambda html, url: ('Produto', 10.0))
+    @patch('scraper.scraping_service.get_http_session')
+    def test_batch_yields_every_url_once(self, mock_session, mock_extract, mock_config, mock_redis):
+        def get(url, timeout, stream=False, headers=None):
+            if 'erro' in url:
+                raise requests.exceptions.ConnectionError('falha')
+            return FakeResponse([b'<html></html>'])
+        mock_session.return_value.get.side_effect = get
+
+        urls = ['https://a.com/1', 'https://a.com/1', 'https://b.com/erro', 'https://c.com/2']
+        resultados = dict(fast_path_scrape_batch(urls))
+
+        self.assertEqual(set(resultados), {'https://a.com/1', 'https://b.com/erro', 'https://c.com/2'})
+        self.assertIsNone(resultados['https://b.com/erro'])
+        self.assertEqual(resultados['https://c.com/2'], ('Produto', 10.0))
+
+
+class PaginaCompartilhadaTests(MonitoramentoBaseTestCase):
+    def test_save_page_data_fans_out_to_every_subscriber(self):
+        a = self.criar_monitoramento(self.vendedores[0], 'https://loja.com/p/1', horas_atras=10)
+        b = self.criar_monitoramento(self.vendedores[1], 'https://loja.com/p/1?utm_source=x', horas_atras=10)
+
+        pagina, atualizados = save_page_data('https://loja.com/p/1', 'Produto', 99.9)
+
+        self.assertEqual(atualizados, 2)
+        self.assertEqual(PaginaProduto.objects.count(), 1)
+        for monitoramento in (a, b):
+            monitoramento.refresh_from_db()
+            self.assertEqual(monitoramento.pagina, pagina)
+            self.assertEqual(monitoramento.preco_atual, Decimal('99.90'))
+        # Um único registro de histórico, compartilhado pelos dois vendedores.
+        self.assertEqual(HistoricoPrecos.objects.count(), 1)
+        self.assertEqual(a.historico_precos().count(), 1)
+
+    @patch('scraper.tasks.executar_estrategias')
+    @patch('scraper.tasks.ColetaEmAndamento')
+    def test_pipeline_waits_for_in_flight_scrape(self, mock_coleta, mock_estrategias):
+        self.criar_monitoramento(self.vendedores[0], 'https://loja.com/p/1')
+        mock_coleta.return_value.adquirir.return_value = False
+        mock_coleta.return_value.aguardar.return_value = ('Produto', 50.0)
+
+        resultado = run_scraping_pipeline.apply(args=('https://loja.com/p/1', self.vendedores[1].pk)).get()
+
+        self.assertEqual(resultado['status'], 'SUCCESS')
+        mock_estrategias.assert_not_called()
+        # A espera deixa o orçamento da coleta própria dentro do soft time limit.
+        espera = mock_coleta.return_value.aguardar.call_args.kwargs['timeout']
+        self.assertTrue(500 < espera <= 840 - 300)
+        monitoramento = ProdutosMonitoradosExternos.objects.get(vendedor=self.vendedores[1])
+        self.assertEqual(monitoramento.preco_atual, Decimal('50.00'))
+        self.assertEqual(HistoricoPrecos.objects.count(), 0)
+
+
+@patch('scraper.fetch_cache.get_redis')
+class FetchCacheTests(MonitoramentoBaseTestCase):
+    PAGINA = PAGINA_JSON_LD
+
+    def setUp(self):
+        super().setUp()
+        self.redis = FakeRedis()
+
+    def coletar(self, mock_session, resposta):
+        mock_session.return_value.get.return_value = resposta
+        return dict(fast_path_scrape_batch(['https://loja.com/p/1']))['https://loja.com/p/1']
+
+    @patch('scraper.scraping_service.get_http_session')
+    def test_revalidates_with_etag_and_accepts_304(self, mock_session, mock_redis):
+        mock_redis.return_value = self.redis
+        self.assertEqual(self.coletar(mock_session, FakeResponse([self.PAGINA], headers={'ETag': '"v1"'})), ('Fone áudio', 199.9))
+
+        resultado = self.coletar(mock_session, FakeResponse([], status_code=304))
+
+        self.assertIs(resultado, PAGINA_INALTERADA)
+        self.assertEqual(mock_session.return_value.get.call_args.kwargs['headers'], {'If-None-Match': '"v1"'})
+
+    @patch('scraper.scraping_service.get_http_session')
+    def test_unchanged_fragment_confirms_cached_price(self, mock_session, mock_redis):
+        mock_redis.return_value = self.redis
+        monitoramento = self.criar_monitoramento(self.vendedores[0], 'https://loja.com/p/1', horas_atras=10)
+        save_page_data('https://loja.com/p/1', 'Fone áudio', 199.9)
+        ontem = timezone.now() - timedelta(days=1)
+        HistoricoPrecos.objects.update(confirmado_em=ontem)
+        ResumoPrecos.objects.update(atualizado_em=ontem)
+        self.coletar(mock_session, FakeResponse([self.PAGINA]))
+
+        # Sem ETag: a página vem inteira, mas o JSON-LD é o mesmo da coleta anterior.
+        mock_session.return_value.get.return_value = FakeResponse([self.PAGINA])
+        resultado = recoletar_lote([(monitoramento.url_hash, 'https://loja.com/p/1')])
+
+        self.assertEqual(resultado['inalteradas'], 1)
+        ponto = HistoricoPrecos.objects.get()
+        self.assertGreater(ponto.confirmado_em, ontem)
+        self.assertGreater(ResumoPrecos.objects.get(pagina_id=ponto.pagina_id).atualizado_em, ontem)
+        monitoramento.refresh_from_db()
+        self.assertGreater(monitoramento.ultima_coleta, timezone.now() - timedelta(minutes=1))
@@ -0,0 +1,61 @@
+from django.test import TestCase
+from unittest.mock import patch
+from .models import Dominio, Seletor
+from .scraping_service import get_specific_selectors
+from . import selector_registry
+from . import render_profiles
+from .testing import FakeRedis
+
+
+@patch('scraper.selector_registry.get_redis')
+class RegistroSeletoresTests(TestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        selector_registry._registro = selector_registry.RegistroSeletores(intervalo_versao=0)
+        self.addCleanup(setattr, selector_registry, '_registro', None)
+        loja = Dominio.objects.create(nome_dominio='loja.com.br')
+        Seletor.objects.create(dominio=loja, tipo=Seletor.TipoSeletor.PRECO, seletor='.preco-geral')
+        movel = Dominio.objects.create(nome_dominio='m.loja.com.br')
+        Seletor.objects.create(dominio=movel, tipo=Seletor.TipoSeletor.PRECO, seletor='.preco-movel', prioridade=1)
+        Seletor.objects.create(dominio=movel, tipo=Seletor.TipoSeletor.PRECO, seletor='.preco-principal', prioridade=0)
+
+    def test_resolves_most_specific_suffix_without_queries(self, mock_redis):
+        mock_redis.return_value = self.redis
+        get_specific_selectors('https://www.loja.com.br/p/1')
+
+        with self.assertNumQueries(0):
+            geral = get_specific_selectors('https://www.loja.com.br/p/1')
+            movel = get_specific_selectors('https://m.loja.com.br/p/1')
+            outro = get_specific_selectors('https://outraloja.com.br/p/1')
+
+        self.assertEqual(geral['preco'], ('.preco-geral',))
+        self.assertEqual(movel['preco'], ('.preco-principal', '.preco-movel'))
+        self.assertIsNone(outro)
+
+    def test_changes_bump_version_and_reload(self, mock_redis):
+        mock_redis.return_value = self.redis
+        self.assertIsNotNone(get_specific_selectors('https://loja.com.br/p/1'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Dominio.objects.filter(nome_dominio='loja.com.br').update(ativo=False)
+            Dominio.objects.get(nome_dominio='m.loja.com.br').save()
+
+        self.assertEqual(self.redis.get(selector_registry.CHAVE_VERSAO), 1)
+        self.assertIsNone(get_specific_selectors('https://loja.com.br/p/1'))
+
+    def test_render_profile_per_domain_with_model_defaults(self, mock_redis):
+        mock_redis.return_value = self.redis
+        Dominio.objects.filter(nome_dominio='m.loja.com.br').update(
+            recursos_bloqueados=['image', 'stylesheet'], bloquear_rastreadores=False,
+            condicao_espera=Dominio.CondicaoEspera.LOAD, javascript_habilitado=False,
+        )
+
+        movel = render_profiles.get_perfil('https://m.loja.com.br/p/1')
+        geral = render_profiles.get_perfil('https://www.loja.com.br/p/1')
+
+        self.assertEqual((movel['condicao_espera'], movel['javascript']), ('load', False))
+        self.assertTrue(render_profiles.deve_bloquear(movel, 'stylesheet', 'https://m.loja.com.br/a.css'))
+        self.assertFalse(render_profiles.deve_bloquear(movel, 'script', 'https://www.google-analytics.com/ga.js'))
+        self.assertEqual(geral, render_profiles.perfil_padrao())
+        self.assertEqual(render_profiles.get_perfil('https://outraloja.com.br/p/1'), render_profiles.perfil_padrao())
+        self.assertTrue(render_profiles.deve_bloquear(geral, 'script', 'https://ssl.google-analytics.com/ga.js'))
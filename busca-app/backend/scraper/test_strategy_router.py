@@ -0,0 +1,38 @@
+from django.test import SimpleTestCase
+from unittest.mock import Mock, patch
+from .tasks import executar_estrategias
+from . import strategy_router
+from .testing import FakeRedis
+
+
+@patch('scraper.strategy_router.get_router_config', return_value={
+    'EPSILON': 0, 'MIN_AMOSTRAS': 3, 'TAXA_MINIMA': 0.2, 'JANELA': 200,
+})
+@patch('scraper.strategy_router.get_redis')
+class RoteadorEstrategiasTests(SimpleTestCase):
+    def test_defers_strategies_that_keep_failing(self, mock_redis, mock_config):
+        mock_redis.return_value = FakeRedis()
+        for _ in range(5):
+            strategy_router.registrar('loja.com', 'fast_path', False, 120)
+        strategy_router.registrar('loja.com', 'playwright_stealth', True, 4000)
+
+        ordem = strategy_router.ordenar_estrategias('loja.com', ['fast_path', 'requests_html', 'playwright_stealth'])
+
+        self.assertEqual(ordem, ['requests_html', 'playwright_stealth', 'fast_path'])
+        self.assertEqual(strategy_router.estatisticas('loja.com')['playwright_stealth']['latencia_ms'], 4000)
+
+    @patch('scraper.strategy_router.dominio_da_url', return_value='loja.com')
+    def test_pipeline_starts_at_learned_strategy(self, mock_dominio, mock_redis, mock_config):
+        mock_redis.return_value = FakeRedis()
+        for _ in range(5):
+            strategy_router.registrar('loja.com', 'fast_path', False, 120)
+            strategy_router.registrar('loja.com', 'requests_html', False, 300)
+        fast_path = Mock(return_value=None)
+        playwright = Mock(return_value=('Produto', 10.0))
+
+        with patch.dict('scraper.tasks.ESTRATEGIAS', {'fast_path': fast_path, 'playwright_stealth': playwright}):
+            resultado = executar_estrategias('https://loja.com/p/1', 1)
+
+        self.assertEqual(resultado, (('Produto', 10.0), 'playwright_stealth'))
+        fast_path.assert_not_called()
+        self.assertEqual(strategy_router.estatisticas('loja.com')['playwright_stealth']['ok'], 1)
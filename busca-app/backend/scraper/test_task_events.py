@@ -0,0 +1,108 @@
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from unittest.mock import patch
+import asyncio
+import json
+import time
+from api.models import Usuario
+from .tasks import run_scraping_pipeline, publicar_conclusao_pipeline
+from . import task_events
+from .testing import FakeRedis, MonitoramentoBaseTestCase
+
+
+class FakePubSubAsync:
+    def __init__(self, mensagens):
+        self.mensagens = list(mensagens)
+        self.canais = []
+
+    async def subscribe(self, canal):
+        self.canais.append(canal)
+
+    async def get_message(self, ignore_subscribe_messages=True, timeout=None):
+        return {'data': self.mensagens.pop(0)} if self.mensagens else None
+
+    async def aclose(self):
+        pass
+
+
+class FakeRedisAsync:
+    def __init__(self, redis_sincrono, mensagens):
+        self.redis = redis_sincrono
+        self.pubsub_fake = FakePubSubAsync(mensagens)
+
+    def pubsub(self):
+        return self.pubsub_fake
+
+    async def mget(self, chaves):
+        return self.redis.mget(chaves)
+
+    async def aclose(self):
+        pass
+
+
+@patch('scraper.task_events.get_redis')
+class TaskEventsTests(MonitoramentoBaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.redis = FakeRedis()
+        self.dono = self.vendedores[0].pk
+        self.client = APIClient()
+        self.client.force_authenticate(Usuario.objects.get(pk=self.dono))
+
+    def concluir(self, task_id, usuario_id, estado='SUCCESS'):
+        task_events.registrar_tarefa(task_id, usuario_id)
+        publicar_conclusao_pipeline(sender=run_scraping_pipeline, task_id=task_id, args=('https://loja.com/p/1', usuario_id),
+                                    retval={'status': 'SUCCESS'}, state=estado)
+
+    @patch('scraper.task_events._do_backend_celery', side_effect=lambda task_id: {'task_id': task_id, 'status': 'PENDING', 'result': None})
+    def test_batched_status_reads_redis_once_and_hides_other_sellers(self, mock_backend, mock_redis):
+        mock_redis.return_value = self.redis
+        self.concluir('t1', self.dono)
+        self.concluir('t2', self.dono, estado='RETRY')
+        self.concluir('t3', self.vendedores[1].pk)
+
+        resposta = self.client.get(reverse('task-status-lote'), {'ids': 't1,t2,t3,t4'})
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(
+            [(r['task_id'], r['status'], r['result']) for r in resposta.json()['resultados']],
+            [('t1', 'SUCCESS', {'status': 'SUCCESS'}), ('t2', 'PENDING', None), ('t3', 'PENDING', None), ('t4', 'PENDING', None)]
+        )
+        mock_backend.assert_called_once_with('t4')
+        self.assertEqual(len(self.redis.valores[('publicadas', task_events.canal_usuario(self.dono))]), 1)
+        self.assertEqual(self.client.get(reverse('task-status-lote')).status_code, 400)
+
+    def test_stream_delivers_finished_then_pushed_results(self, mock_redis):
+        mock_redis.return_value = self.redis
+        self.concluir('t1', self.dono)
+        empurrada = json.dumps({'task_id': 't2', 'status': 'SUCCESS', 'result': None, 'usuario_id': self.dono})
+        assincrono = FakeRedisAsync(self.redis, [empurrada])
+
+        async def coletar():
+            return [evento async for evento in task_events.eventos_do_usuario(self.dono, ['t1', 't2'])]
+
+        with patch('redis.asyncio.Redis.from_url', return_value=assincrono):
+            eventos = asyncio.run(coletar())
+
+        dados = [json.loads(e.split('data: ')[1]) for e in eventos if e.startswith('event: tarefa')]
+        self.assertEqual([d['task_id'] for d in dados], ['t1', 't2'])
+        self.assertEqual(assincrono.pubsub_fake.canais, [task_events.canal_usuario(self.dono)])
+
+    def test_stream_accepts_only_short_lived_ticket(self, mock_redis):
+        resposta = self.client.post(reverse('task-events-ticket'), {'tasks': ['t1', 't2']}, format='json')
+
+        self.assertEqual(resposta.status_code, 200)
+        ticket = resposta.json()['ticket']
+        self.assertEqual(task_events.validar_ticket_stream(ticket), (self.dono, ['t1', 't2']))
+        self.assertEqual(self.client.post(reverse('task-events-ticket'), {}, format='json').status_code, 400)
+
+        emitido_em = time.time()
+        with patch('django.core.signing.time.time', return_value=emitido_em + 61):
+            self.assertIsNone(task_events.validar_ticket_stream(ticket))
+        self.assertIsNone(task_events.validar_ticket_stream(ticket + 'x'))
+
+        anonimo = APIClient()
+        jwt = str(RefreshToken.for_user(Usuario.objects.get(pk=self.dono)).access_token)
+        self.assertEqual(anonimo.get(reverse('task-events'), {'token': jwt}).status_code, 401)
+        self.assertEqual(anonimo.get(reverse('task-events'), {'ticket': jwt}).status_code, 401)
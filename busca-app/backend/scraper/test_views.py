@@ -0,0 +1,96 @@
+from django.utils import timezone
+from datetime import datetime, timedelta
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from api.models import Usuario, Vendedor
+from .models import ProdutosMonitoradosExternos, HistoricoPrecos
+from . import historico
+from .testing import MonitoramentoBaseTestCase
+
+
+class ListagemMonitoramentosTests(MonitoramentoBaseTestCase):
+    def setUp(self):
+        super().setUp()
+        Vendedor.objects.filter(pk=self.vendedores[0].pk).update(status_aprovacao='Aprovado')
+        self.client = APIClient()
+
+    def listar(self):
+        self.client.force_authenticate(Usuario.objects.get(pk=self.vendedores[0].pk))
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get(reverse('produtos-monitorados-list'))
+        self.assertEqual(resposta.status_code, 200)
+        return resposta.json()['results'], len(consultas)
+
+    def test_list_reads_rollups_without_per_item_queries(self):
+        for i in range(5):
+            monitoramento = self.criar_monitoramento(self.vendedores[0], f'https://loja.com/p/{i}')
+            historico.registrar_coletas([(monitoramento.pagina_id, 10.0 + i)])
+            historico.registrar_coletas([(monitoramento.pagina_id, 20.0)])
+        dados, consultas_com_cinco = self.listar()
+        ProdutosMonitoradosExternos.objects.exclude(url_produto__endswith='/0').delete()
+
+        _, consultas_com_um = self.listar()
+
+        self.assertEqual(consultas_com_cinco, consultas_com_um)
+        primeiro = next(item for item in dados if item['url_produto'].endswith('/0'))
+        self.assertEqual(Decimal(primeiro['variacao']), Decimal('100.00'))
+        self.assertEqual(primeiro['resumo']['preco_ultimo'], '20.00')
+
+
+class SeriePrecosTests(MonitoramentoBaseTestCase):
+    def setUp(self):
+        super().setUp()
+        Vendedor.objects.filter(pk__in=[v.pk for v in self.vendedores]).update(status_aprovacao='Aprovado')
+        self.monitoramento = self.criar_monitoramento(self.vendedores[0], 'https://loja.com/p/1')
+        self.client = APIClient()
+        self.client.force_authenticate(Usuario.objects.get(pk=self.vendedores[0].pk))
+        self.url = reverse('serie-precos', args=[self.monitoramento.pk])
+
+    def ponto(self, preco, quando):
+        ponto = HistoricoPrecos.objects.create(pagina_id=self.monitoramento.pagina_id, preco=preco)
+        HistoricoPrecos.objects.filter(pk=ponto.pk).update(data_coleta=quando)
+
+    def test_buckets_carry_price_forward_and_aggregate_changes(self):
+        dia = timezone.make_aware(datetime(2026, 3, 2))
+        self.ponto(100.0, dia - timedelta(days=3))
+        self.ponto(90.0, dia + timedelta(hours=8))
+        self.ponto(95.0, dia + timedelta(hours=20))
+
+        pontos = historico.ohlc(self.monitoramento.pagina_id, dia - timedelta(days=1), dia + timedelta(days=2), 'day')
+
+        self.assertEqual(
+            [(p['abertura'], p['maxima'], p['minima'], p['fechamento']) for p in pontos],
+            [(Decimal('100.00'),) * 4,
+             (Decimal('100.00'), Decimal('100.00'), Decimal('90.00'), Decimal('95.00')),
+             (Decimal('95.00'),) * 4],
+        )
+
+    def test_caps_points_and_answers_304_for_known_etag(self):
+        self.ponto(100.0, timezone.now() - timedelta(days=200))
+        parametros = {'from': '2026-01-01', 'to': '2026-06-30', 'resolution': 'hour'}
+
+        resposta = self.client.get(self.url, parametros)
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.data['resolution'], 'day')
+        self.assertLessEqual(len(resposta.data['pontos']), historico.get_historico_config()['MAX_PONTOS_SERIE'])
+        repetida = self.client.get(self.url, parametros, HTTP_IF_NONE_MATCH=resposta['ETag'])
+        self.assertEqual(repetida.status_code, 304)
+        self.assertEqual(self.client.get(self.url, {'resolution': 'minute'}).status_code, 400)
+
+    def test_default_period_keeps_etag_between_requests(self):
+        self.ponto(100.0, timezone.now() - timedelta(days=2))
+
+        resposta = self.client.get(self.url)
+        repetida = self.client.get(self.url, HTTP_IF_NONE_MATCH=resposta['ETag'])
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(repetida.status_code, 304)
+
+    def test_other_sellers_monitor_is_not_found(self):
+        self.client.force_authenticate(Usuario.objects.get(pk=self.vendedores[1].pk))
+
+        self.assertEqual(self.client.get(self.url).status_code, 404)
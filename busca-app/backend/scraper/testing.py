@@ -0,0 +1,155 @@
+"""Dublês e base compartilhados pelos testes do app `scraper`."""
+from django.test import TestCase
+from django.utils import timezone
+from datetime import timedelta
+import redis
+from api.models import Usuario, CategoriaLoja, Vendedor
+from .models import ProdutosMonitoradosExternos
+
+
+class FakeRedis:
+    def __init__(self):
+        self.valores = {}
+
+    def get(self, chave):
+        return self.valores.get(chave)
+
+    def incr(self, chave):
+        self.valores[chave] = int(self.valores.get(chave, 0)) + 1
+        return self.valores[chave]
+
+    def delete(self, *chaves):
+        for chave in chaves:
+            self.valores.pop(chave, None)
+
+    def hset(self, chave, mapping):
+        self.valores.setdefault(chave, {}).update({k.encode(): str(v).encode() for k, v in mapping.items()})
+
+    def hgetall(self, chave):
+        return dict(self.valores.get(chave, {}))
+
+    def hincrby(self, chave, campo, valor):
+        hash_ = self.valores.setdefault(chave, {})
+        hash_[campo.encode()] = str(int(hash_.get(campo.encode(), b'0')) + valor).encode()
+
+    def hmget(self, chave, *campos):
+        return [self.valores.get(chave, {}).get(c.encode()) for c in campos]
+
+    def expire(self, chave, ttl):
+        pass
+
+    def set(self, chave, valor, ex=None, nx=False):
+        if nx and chave in self.valores:
+            return None
+        self.valores[chave] = valor.encode() if isinstance(valor, str) else valor
+        return True
+
+    def mget(self, chaves):
+        return [self.valores.get(chave) for chave in chaves]
+
+    def exists(self, chave):
+        return int(chave in self.valores)
+
+    def rpush(self, chave, *valores):
+        lista = self.valores.setdefault(chave, [])
+        lista.extend(valores)
+        return len(lista)
+
+    def blpop(self, chaves, timeout=0):
+        # Não bloqueia: sem item na lista, age como se o timeout tivesse passado.
+        for chave in chaves:
+            if self.valores.get(chave):
+                valor = self.valores[chave].pop(0)
+                if not self.valores[chave]:
+                    del self.valores[chave]
+                return chave.encode(), valor
+        return None
+
+    def publish(self, canal, mensagem):
+        self.valores.setdefault(('publicadas', canal), []).append(mensagem)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def register_script(self, script):
+        return FakeScript(self)
+
+    def apagar_se_igual(self, chaves, valores):
+        valor = valores[0].encode() if isinstance(valores[0], str) else valores[0]
+        if self.valores.get(chaves[0]) != valor:
+            return 0
+        del self.valores[chaves[0]]
+        return 1
+
+
+class FakeScript:
+    """Só o script de `redis_client.apagar_se_igual`, executado em Python."""
+    def __init__(self, redis):
+        self.redis = redis
+
+    def __call__(self, keys, args, client=None):
+        if isinstance(client, FakePipeline):
+            client.comandos.append(('apagar_se_igual', (keys, args), {}))
+            return client
+        return self.redis.apagar_se_igual(keys, args)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.comandos = []
+
+    def __getattr__(self, nome):
+        return lambda *args, **kwargs: self.comandos.append((nome, args, kwargs))
+
+    def execute(self):
+        return [getattr(self.redis, nome)(*args, **kwargs) for nome, args, kwargs in self.comandos]
+
+
+class FakeResponse:
+    def __init__(self, pedacos, status_code=200, headers=None):
+        self.pedacos = iter(pedacos)
+        self.lidos = 0
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=None):
+        for pedaco in self.pedacos:
+            self.lidos += 1
+            yield pedaco
+
+
+PAGINA_JSON_LD = (
+    b'<html><head><script>var x = "<script type=application/ld+json>";</script>'
+    b'<script type="application/ld+json">{"@type": "BreadcrumbList", "itemListElement": []}</script>'
+    b'<SCRIPT type=\'application/ld+json\'>{"@context": "https://schema.org", "@graph": ['
+    b'{"@type": "Organization", "name": "Loja"},'
+    b'{"@type": ["Product"], "name": "Fone \xc3\xa1udio", "offers": {"@type": "AggregateOffer", "lowPrice": 199.9}}'
+    b']}</SCRIPT></head><body>' + b'x' * 5000 + b'</body></html>'
+)
+
+
+class MonitoramentoBaseTestCase(TestCase):
+    def setUp(self):
+        categoria = CategoriaLoja.objects.create(nome='Eletrônicos')
+        self.vendedores = []
+        for i in range(2):
+            usuario = Usuario.objects.create_user(email=f'vendedor{i}@example.com', password='password123', tipo_usuario='Vendedor')
+            self.vendedores.append(Vendedor.objects.create(usuario=usuario, nome_loja=f'Loja {i}', categoria_loja=categoria))
+
+    def criar_monitoramento(self, vendedor, url, horas_atras=0):
+        monitoramento = ProdutosMonitoradosExternos.objects.create(vendedor=vendedor, url_produto=url)
+        if horas_atras:
+            ProdutosMonitoradosExternos.objects.filter(pk=monitoramento.pk).update(
+                ultima_coleta=timezone.now() - timedelta(hours=horas_atras)
+            )
+        return monitoramento
@@ -3,8 +3,12 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     ProdutosMonitoradosExternosViewSet,
     HistoricoPrecosView,
+    SeriePrecosView,
     MonitorarProdutoView,
     TaskStatusView,
+    TaskStatusLoteView,
+    TaskEventsView,
+    TaskEventsTicketView,
 )
 
 router = DefaultRouter()
@@ -13,6 +17,10 @@ router.register(r'monitoramento', ProdutosMonitoradosExternosViewSet, basename='
 urlpatterns = [
     path('', include(router.urls)),
     path('monitoramento/<int:pk>/historico/', HistoricoPrecosView.as_view(), name='historico-precos'),
+    path('monitoramento/<int:pk>/serie/', SeriePrecosView.as_view(), name='serie-precos'),
     path('iniciar-monitoramento/', MonitorarProdutoView.as_view(), name='iniciar-monitoramento'),
+    path('task-status/', TaskStatusLoteView.as_view(), name='task-status-lote'),
+    path('task-status/stream/ticket/', TaskEventsTicketView.as_view(), name='task-events-ticket'),
+    path('task-status/stream/', TaskEventsView.as_view(), name='task-events'),
     path('task-status/<str:task_id>/', TaskStatusView.as_view(), name='task-status'),
 ]
\ No newline at end of file
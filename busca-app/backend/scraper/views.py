@@ -3,7 +3,14 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.db.models.query import QuerySet
-from celery.result import AsyncResult
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.http import quote_etag
+import hashlib
+from datetime import datetime, time, timedelta
 
 # Imports from the 'api' app
 from api.permissions import IsVendedor
@@ -11,12 +18,15 @@ from api.models import Vendedor
 
 # Imports from the local 'scraper' app
 from .models import ProdutosMonitoradosExternos, get_canonical_url
+from . import historico
+from . import task_events
 from .serializers import ProdutosMonitoradosExternosSerializer, ProdutosMonitoradosExternosComHistoricoSerializer
 # from .tasks import run_scraping_pipeline # This will be moved later
 
 
 class ProdutosMonitoradosExternosViewSet(mixins.ListModelMixin,
                                          mixins.RetrieveModelMixin,
+                                         mixins.UpdateModelMixin,
                                          mixins.DestroyModelMixin,
                                          viewsets.GenericViewSet):
     serializer_class = ProdutosMonitoradosExternosSerializer
@@ -24,7 +34,8 @@ class ProdutosMonitoradosExternosViewSet(mixins.ListModelMixin,
 
     def get_queryset(self) -> QuerySet[ProdutosMonitoradosExternos]: # type: ignore
         # Assuming the user model has a 'vendedor' related object
-        return ProdutosMonitoradosExternos.objects.filter(vendedor=self.request.user.vendedor) # type: ignore
+        # O resumo de preços vem no mesmo JOIN: uma consulta para a lista inteira.
+        return ProdutosMonitoradosExternos.objects.filter(vendedor=self.request.user.vendedor).select_related('pagina__resumo') # type: ignore
 
 
 class MonitorarProdutoView(APIView):
@@ -52,6 +63,8 @@ class MonitorarProdutoView(APIView):
 
         # Dispara a tarefa principal do Celery com a URL limpa
         task = run_scraping_pipeline.delay(url_limpa, usuario_id)
+        # Dono e status pendente no Redis: consulta em lote e stream de eventos (ver task_events).
+        task_events.registrar_tarefa(task.id, usuario_id)
 
         # Retorna uma resposta imediata para o frontend com o ID da tarefa
         return Response({
@@ -63,21 +76,144 @@ class MonitorarProdutoView(APIView):
 class TaskStatusView(APIView):
     """
     Verifica o status de uma tarefa do Celery para o frontend poder pollar.
+    Prefira `TaskStatusLoteView` ou o stream de `TaskEventsView`.
     """
     permission_classes = [IsAuthenticated]
 
     def get(self, request, task_id, *args, **kwargs):
-        task_result = AsyncResult(task_id)
-        result = {
-            'task_id': task_id,
-            'status': task_result.status,
-            'result': task_result.result if task_result.ready() else None
-        }
+        result = task_events.status_em_lote([task_id], request.user.id)[0]
         return Response(result, status=status.HTTP_200_OK)
 
 
+class TaskStatusLoteView(APIView):
+    """
+    Status de várias tarefas numa chamada: `?ids=<id1>,<id2>,...`.
+    Retorna {'resultados': [{task_id, status, result}, ...]} na ordem pedida.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        task_ids = list(dict.fromkeys(i for i in request.query_params.get('ids', '').split(',') if i))
+        limite = task_events.get_task_events_config()['MAX_TAREFAS_POR_CONSULTA']
+        if not task_ids:
+            return Response({'error': 'Informe os IDs das tarefas em ?ids=.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(task_ids) > limite:
+            return Response({'error': f'No máximo {limite} tarefas por consulta.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'resultados': task_events.status_em_lote(task_ids, request.user.id)})
+
+
+class TaskEventsTicketView(APIView):
+    """
+    Emite o ticket de vida curta do stream de `TaskEventsView` para `tasks`
+    (lista ou IDs separados por vírgula). O JWT fica no cabeçalho desta
+    chamada e nunca vai para a URL do EventSource.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        tarefas = request.data.get('tasks') or []
+        if isinstance(tarefas, str):
+            tarefas = tarefas.split(',')
+        task_ids = list(dict.fromkeys(str(i) for i in tarefas if i))
+        limite = task_events.get_task_events_config()['MAX_TAREFAS_POR_CONSULTA']
+        if not task_ids:
+            return Response({'error': 'Informe os IDs das tarefas em tasks.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(task_ids) > limite:
+            return Response({'error': f'No máximo {limite} tarefas por stream.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'ticket': task_events.emitir_ticket_stream(request.user.id, task_ids),
+            'validade': task_events.get_task_events_config()['VALIDADE_TICKET_SEGUNDOS'],
+        })
+
+
+class TaskEventsView(View):
+    """
+    Stream SSE (text/event-stream) com os resultados das tarefas do vendedor,
+    entregues quando cada uma termina; encerra depois de entregar todas. Recebe
+    em `?ticket=` o ticket de `TaskEventsTicketView`, que já traz o vendedor e
+    as tarefas. View assíncrona: o projeto roda em ASGI
+    (`uvicorn core.asgi:application`); sob WSGI o Django consumiria o gerador
+    inteiro antes de responder e o stream nunca chegaria ao navegador.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        ticket = task_events.validar_ticket_stream(request.GET.get('ticket', ''))
+        if ticket is None:
+            return JsonResponse({'detail': 'Ticket do stream inválido ou vencido.'}, status=status.HTTP_401_UNAUTHORIZED)
+        usuario_id, task_ids = ticket
+        resposta = StreamingHttpResponse(
+            task_events.eventos_do_usuario(usuario_id, task_ids), content_type='text/event-stream'
+        )
+        resposta['Cache-Control'] = 'no-cache'
+        resposta['X-Accel-Buffering'] = 'no'  # nginx: não acumular o stream
+        return resposta
+
+
 class HistoricoPrecosView(generics.RetrieveAPIView):
-    queryset = ProdutosMonitoradosExternos.objects.all()
+    queryset = ProdutosMonitoradosExternos.objects.select_related('pagina__resumo')
     serializer_class = ProdutosMonitoradosExternosComHistoricoSerializer
     permission_classes = [IsAuthenticated]
-    lookup_field = 'pk'
\ No newline at end of file
+    lookup_field = 'pk'
+
+
+def _parse_momento(valor, fim_do_dia=False):
+    """Aceita data ('2026-01-31') ou data e hora ISO 8601. Retorna datetime aware ou None."""
+    momento = parse_datetime(valor)
+    if momento is None:
+        dia = parse_date(valor)
+        if dia is None:
+            return None
+        momento = datetime.combine(dia + timedelta(days=1) if fim_do_dia else dia, time.min)
+    if timezone.is_naive(momento):
+        momento = timezone.make_aware(momento)
+    return momento
+
+
+class SeriePrecosView(APIView):
+    """
+    Série OHLC do preço de um produto monitorado, agregada no servidor.
+
+    Parâmetros: `from` e `to` (data ou data e hora; padrão: últimos 30 dias) e
+    `resolution` (`hour`, `day`, `week` ou `month`; padrão `day`). Se o período
+    geraria mais buckets que o limite, a resolução é engrossada e a usada vem
+    em `resolution` na resposta. Responde 304 quando o `If-None-Match` ainda vale.
+    Só o vendedor dono do monitoramento vê a série.
+    """
+    permission_classes = [IsAuthenticated, IsVendedor]
+
+    def get(self, request, pk, *args, **kwargs):
+        try:
+            fim = _parse_momento(request.query_params['to'], fim_do_dia=True) if 'to' in request.query_params else timezone.now()
+            inicio = _parse_momento(request.query_params['from']) if 'from' in request.query_params else fim - timedelta(days=30)
+        except ValueError:
+            fim = inicio = None
+        if inicio is None or fim is None or inicio >= fim:
+            return Response({'error': 'Período inválido. Use datas ISO 8601 em from/to, com from < to.'}, status=status.HTTP_400_BAD_REQUEST)
+        resolucao = request.query_params.get('resolution', 'day')
+        if resolucao not in historico.RESOLUCOES:
+            return Response({'error': f"Resolução inválida. Use uma de: {', '.join(historico.RESOLUCOES)}."}, status=status.HTTP_400_BAD_REQUEST)
+        resolucao = historico.resolucao_efetiva(inicio, fim, resolucao)
+
+        monitoramento = get_object_or_404(
+            ProdutosMonitoradosExternos.objects.select_related('pagina'), pk=pk, vendedor=request.user.vendedor
+        )
+        pagina = monitoramento.pagina
+        # A série só muda com uma nova coleta ou quando o período avança para outro bucket.
+        # Limites alinhados ao bucket: sem isso o `from` padrão (agora - 30 dias, com
+        # microssegundos) mudaria a cada requisição e o ETag nunca se repetiria.
+        versao = (
+            f"{pk}:{pagina and pagina.ultima_coleta}:{historico.inicio_bucket(inicio, resolucao).isoformat()}:"
+            f"{historico.inicio_bucket(fim, resolucao).isoformat()}:{resolucao}"
+        )
+        etag = quote_etag(hashlib.md5(versao.encode()).hexdigest())
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        if etag in request.headers.get('If-None-Match', ''):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        buckets = historico.ohlc(pagina.pk, inicio, fim, resolucao) if pagina else []
+        return Response({
+            'from': inicio,
+            'to': fim,
+            'resolution': resolucao,
+            'pontos': buckets,
+        }, headers=headers)
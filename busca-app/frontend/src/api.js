@@ -15,4 +15,24 @@ apiClient.interceptors.request.use(config => {
   return Promise.reject(error);
 });
 
+// Listagens paginadas por cursor ({ next, results }): segue `next` até o fim.
+// A cada página chama `aoReceberPagina` com os itens acumulados, para a tela
+// já mostrar a primeira enquanto as demais chegam. `next` já traz a query.
+export const buscarTodasAsPaginas = async (url, config = {}, aoReceberPagina = () => {}) => {
+  let itens = [];
+  let proxima = url;
+  let primeira = true;
+  while (proxima) {
+    const response = await apiClient.get(proxima, primeira ? config : { headers: config.headers });
+    const { results, next } = Array.isArray(response.data)
+      ? { results: response.data, next: null }
+      : response.data;
+    itens = itens.concat(results);
+    aoReceberPagina(itens);
+    proxima = next;
+    primeira = false;
+  }
+  return itens;
+};
+
 export default apiClient;
\ No newline at end of file
@@ -14,7 +14,6 @@ const AdicionarOferta = () => {
     // Estados para o fluxo
     const [searchTerm, setSearchTerm] = useState('');
     const [searchResults, setSearchResults] = useState([]);
-    const [allProducts, setAllProducts] = useState([]);
     const [selectedProduct, setSelectedProduct] = useState(null);
     const [loading, setLoading] = useState(false);
     
@@ -55,34 +54,28 @@ const AdicionarOferta = () => {
         }
     }, [location.state, navigate, token, reloadSelectedProduct, location.pathname]);
 
-    // Efeito para carregar todos os produtos do catálogo para a busca
-    useEffect(() => {
-        if (token) {
-            const url = `${process.env.REACT_APP_API_URL}/api/produtos/`;
-            axios.get(url, { headers: { Authorization: `Bearer ${token}` } })
-                .then(response => {
-                    if (Array.isArray(response.data)) {
-                        setAllProducts(response.data);
-                    } else {
-                        setAllProducts([]);
-                    }
-                })
-                .catch(err => console.error("Erro ao carregar produtos:", err));
-        }
-    }, [token]);
-
-    // Efeito para filtrar produtos localmente conforme o usuário digita
+    // Busca no catálogo inteiro pelo índice do servidor (/api/busca/), em vez de
+    // baixar a listagem de produtos (paginada) e filtrar localmente.
     useEffect(() => {
         if (searchTerm.length < 2) {
             setSearchResults([]);
             return;
         }
-        const lowercasedFilter = searchTerm.toLowerCase();
-        const filtered = allProducts.filter(p =>
-            p.nome.toLowerCase().includes(lowercasedFilter)
-        );
-        setSearchResults(filtered);
-    }, [searchTerm, allProducts]);
+        let cancelado = false;
+        const timeoutId = setTimeout(() => {
+            const url = `${process.env.REACT_APP_API_URL}/api/busca/`;
+            axios.get(url, { params: { q: searchTerm, tipo: 'produto', limite: 20 } })
+                .then(response => {
+                    if (cancelado) return;
+                    setSearchResults(response.data.resultados.map(r => ({ id: r.id, nome: r.titulo })));
+                })
+                .catch(err => console.error("Erro ao buscar produtos:", err));
+        }, 300);
+        return () => {
+            cancelado = true;
+            clearTimeout(timeoutId);
+        };
+    }, [searchTerm]);
 
     // Seleciona um produto da busca e carrega seus detalhes
     const handleSelectProduct = async (productSummary) => {
@@ -213,7 +206,7 @@ const AdicionarOferta = () => {
                             {searchResults.map(prod => (
                                 <li key={prod.id} onClick={() => handleSelectProduct(prod)}>
                                     <strong>{prod.nome}</strong>
-                                    <p>{prod.descricao}</p>
+                                    {prod.descricao && <p>{prod.descricao}</p>}
                                 </li>
                             ))}
                         </ul>
@@ -1,5 +1,5 @@
 import React, { useState, useEffect, useCallback } from 'react';
-import apiClient from '../api';
+import apiClient, { buscarTodasAsPaginas } from '../api';
 import Botao from './Botao';
 import { useNotification } from '../context/NotificationContext';
 
@@ -12,8 +12,7 @@ const ListaProdutosMonitorados = ({ refreshKey }) => {
     const fetchProdutos = useCallback(async () => {
         setLoading(true);
         try {
-            const response = await apiClient.get('/monitoramento/');
-            setProdutos(response.data);
+            await buscarTodasAsPaginas('/monitoramento/', {}, setProdutos); // listagem paginada por cursor
         } catch (error) {
             console.error("Erro ao buscar produtos monitorados:", error);
             showNotification('Erro ao buscar produtos monitorados.', 'erro');
@@ -1,5 +1,6 @@
 import React, { useState, useEffect, useContext, useCallback } from 'react';
 import axios from 'axios';
+import { buscarTodasAsPaginas } from '../api';
 import { AuthContext } from '../context/AuthContext';
 import { useNotification } from '../context/NotificationContext';
 import Botao from '../components/Botao';
@@ -13,10 +14,9 @@ const DashboardAdmin = () => {
     const fetchVendedoresPendentes = useCallback(async () => {
         if (!token) return;
         try {
-            const response = await axios.get(`${process.env.REACT_APP_API_URL}/api/vendedores/?status_aprovacao=Pendente`, {
+            await buscarTodasAsPaginas(`${process.env.REACT_APP_API_URL}/api/vendedores/?status_aprovacao=Pendente`, {
                 headers: { Authorization: `Bearer ${token}` }
-            });
-            setVendedoresPendentes(response.data);
+            }, setVendedoresPendentes); // listagem paginada por cursor
         } catch (error) {
             showNotification('Erro ao buscar vendedores pendentes.', 'erro');
             console.error('Erro ao buscar vendedores pendentes:', error);
@@ -1,6 +1,6 @@
 import React, { useState, useContext, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
-import apiClient from '../api';
+import apiClient, { buscarTodasAsPaginas } from '../api';
 import { AuthContext } from '../context/AuthContext';
 import { useMonitoring } from '../context/MonitoringContext';
 import Botao from '../components/Botao';
@@ -59,8 +59,8 @@ const DashboardVendedor = () => {
     const fetchAvaliacoes = async () => {
       if (!token) return;
       try {
-        const response = await apiClient.get('/avaliacoes/');
-        setAvaliacoes(response.data);
+        // Todas as páginas: a média da loja considera todas as avaliações
+        await buscarTodasAsPaginas('/avaliacoes/', {}, setAvaliacoes);
       } catch (err) {
         showNotification('Falha ao buscar suas avaliações.', 'erro');
         console.error(err);
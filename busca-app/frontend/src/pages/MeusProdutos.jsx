@@ -1,6 +1,7 @@
 import React, { useState, useEffect, useContext, useCallback } from 'react';
 //import { useNavigate } from 'react-router-dom';
 import axios from 'axios';
+import { buscarTodasAsPaginas } from '../api';
 import { AuthContext } from '../context/AuthContext';
 import Botao from '../components/Botao'; // Importando o componente Botao
 
@@ -36,8 +37,8 @@ const MeusProdutos = () => {
             const url = selectedCategory 
                 ? `${baseUrl}/api/produtos/meus-produtos/?id_categoria=${selectedCategory}` 
                 : `${baseUrl}/api/produtos/meus-produtos/`;
-            const response = await axios.get(url, { headers: { Authorization: `Bearer ${token}` } });
-            setProdutos(response.data);
+            // Listagem paginada por cursor, em ordem alfabética do produto
+            await buscarTodasAsPaginas(url, { headers: { Authorization: `Bearer ${token}` } }, setProdutos);
         } catch (err) {
             console.error("Falha ao buscar produtos:", err);
         }
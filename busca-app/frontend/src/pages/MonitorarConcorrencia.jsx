@@ -43,43 +43,81 @@ const MonitorarConcorrencia = () => {
   useEffect(() => {
     if (!loadingTaskId) return;
 
-    const intervalId = setInterval(async () => {
-      try {
-        const response = await apiClient.get(`/task-status/${loadingTaskId}/`);
-        const { status, result } = response.data;
-
-        if (status === 'SUCCESS' || status === 'FAILURE') {
+    const finalizarTarefa = (status, result) => {
+      setLoadingTaskId(null);
+
+      if (status === 'SUCCESS') {
+        const parsedResult = typeof result === 'string' ? JSON.parse(result) : result;
+        // Usa a URL do ref, que não muda com re-renderizações
+        const finalResult = { ...parsedResult, url_produto: submittedUrl.current, usuario_id: usuario.id };
+        setLastResult({ status: 'SUCCESS', data: finalResult });
+        showNotification("Raspagem concluída! Verifique o resultado no seu dashboard.", "sucesso");
+        setUrl(''); // Limpa o input sem re-disparar o efeito
+        // Força a atualização da lista de produtos monitorados se a ação for salvar no dashboard
+        setRefreshKey(prevKey => prevKey + 1);
+      } else {
+        const errorMessage = result?.error || "A raspagem do produto falhou.";
+        setLastResult({ status: 'FAILURE', message: errorMessage });
+        showNotification(errorMessage, "erro");
+      }
+    };
+
+    let intervalId = null;
+    const iniciarPolling = () => {
+      intervalId = setInterval(async () => {
+        try {
+          const response = await apiClient.get(`/task-status/${loadingTaskId}/`);
+          const { status, result } = response.data;
+
+          if (status === 'SUCCESS' || status === 'FAILURE') {
+            clearInterval(intervalId);
+            finalizarTarefa(status, result);
+          }
+        } catch (error) {
+          console.error("Erro ao verificar status da tarefa:", error);
           clearInterval(intervalId);
           setLoadingTaskId(null);
-
-          if (status === 'SUCCESS') {
-            const parsedResult = JSON.parse(result);
-            // Usa a URL do ref, que não muda com re-renderizações
-            const finalResult = { ...parsedResult, url_produto: submittedUrl.current, usuario_id: usuario.id };
-            setLastResult({ status: 'SUCCESS', data: finalResult });
-            showNotification("Raspagem concluída! Verifique o resultado no seu dashboard.", "sucesso");
-            setUrl(''); // Limpa o input sem re-disparar o efeito
-            // Força a atualização da lista de produtos monitorados se a ação for salvar no dashboard
-            setRefreshKey(prevKey => prevKey + 1);
-          } else {
-            const errorMessage = result?.error || "A raspagem do produto falhou.";
-            setLastResult({ status: 'FAILURE', message: errorMessage });
-            showNotification(errorMessage, "erro");
-          }
+          const errorMessage = "Erro de comunicação ao verificar o status da tarefa.";
+          setLastResult({ status: 'FAILURE', message: errorMessage });
+          showNotification(errorMessage, 'erro');
         }
+      }, 5000);
+      setPollingIntervalId(intervalId);
+    };
+
+    // O servidor empurra o resultado quando a tarefa termina (SSE); se o stream
+    // cair, volta ao polling. O EventSource não envia cabeçalhos: em vez do JWT,
+    // a URL leva um ticket de vida curta, pedido com o JWT no cabeçalho.
+    let stream = null;
+    let cancelado = false;
+    const abrirStream = async () => {
+      try {
+        const response = await apiClient.post('/task-status/stream/ticket/', { tasks: [loadingTaskId] });
+        if (cancelado) return;
+        stream = new EventSource(
+          `${apiClient.defaults.baseURL}/task-status/stream/?ticket=${encodeURIComponent(response.data.ticket)}`
+        );
+        stream.addEventListener('tarefa', (event) => {
+          stream.close();
+          const { status, result } = JSON.parse(event.data);
+          finalizarTarefa(status, result);
+        });
+        stream.onerror = () => {
+          stream.close();
+          if (!intervalId) iniciarPolling();
+        };
       } catch (error) {
-        console.error("Erro ao verificar status da tarefa:", error);
-        clearInterval(intervalId);
-        setLoadingTaskId(null);
-        const errorMessage = "Erro de comunicação ao verificar o status da tarefa.";
-        setLastResult({ status: 'FAILURE', message: errorMessage });
-        showNotification(errorMessage, 'erro');
+        console.error("Erro ao abrir o stream de status da tarefa:", error);
+        if (!cancelado && !intervalId) iniciarPolling();
       }
-    }, 5000);
-
-    setPollingIntervalId(intervalId);
-
-    return () => clearInterval(intervalId);
+    };
+    abrirStream();
+
+    return () => {
+      cancelado = true;
+      if (stream) stream.close();
+      if (intervalId) clearInterval(intervalId);
+    };
   }, [loadingTaskId, usuario, showNotification, setLastResult]); // Remove 'url' das dependências
 
   const toggleFormExpansion = () => {